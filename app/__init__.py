@@ -5,10 +5,27 @@ Application Management Package
 This package contains application management:
 - app: Thread management
 - config: Configuration and initialization
+- state: Global state shared giữa thread và UI
+- session_state: Statistics của session (lock + copy-on-write snapshots)
+- ui_scheduler: Gộp các cập nhật UI từ thread đọc log thành frames
+- headless: Chạy tracker không có UI (python -m app.headless), in statistics dạng JSON lines
+- replay: Replay các log cũ, tính lại profit / drops / lịch sử giá (python -m app.replay)
+
+Note:
+    app.app và app.config được import lazy. app.config tìm cửa sổ game ngay khi import,
+    nên import eager ở đây sẽ kéo theo cả win32gui mỗi khi core/services chỉ cần app.state
+    (và gây circular import core.drop_handler -> app -> core.drop_handler).
 """
-from . import app
-from . import config
-from .app import MyThread
+import importlib
+
+__all__ = ['app', 'config', 'state', 'session_state', 'ui_scheduler', 'headless', 'replay', 'MyThread']
 
-__all__ = ['app', 'config', 'MyThread']
 
+def __getattr__(name):
+    """Lazy import submodules và MyThread khi được truy cập lần đầu"""
+    if name in ('app', 'config', 'state', 'session_state', 'ui_scheduler', 'headless', 'replay'):
+        return importlib.import_module(f'.{name}', __name__)
+    if name == 'MyThread':
+        from .app import MyThread
+        return MyThread
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,52 +8,173 @@ Mục đích:
     - Xử lý và cập nhật UI khi có changes
 
 Tác dụng:
-    - Monitor log file mỗi 1 giây và xử lý updates
-    - Sync state từ drop_handler vào main module
-    - Cập nhật UI real-time với thời gian và tốc độ kiếm được
+    - Monitor log file qua LogTailer (inotify/polling) và xử lý updates ngay khi có log mới
+    - Lưu checkpoint (offset + parser state + statistics) để restart đọc tiếp đúng chỗ đã dừng
+    - Khi game tạo lại / truncate UE_game.log: reset parser state gắn với file cũ
+    - Cập nhật labels thời gian mỗi 1 giây kể cả khi không có log mới
+    - Cập nhật UI real-time với thời gian và tốc độ kiếm được (qua app.ui_scheduler)
+    - Đo thời gian xử lý mỗi chunk log (timer "chunk", core.metrics); mỗi vòng lặp là
+      section "worker" của core.profiler khi profiling được bật
 
 Class chính:
     - MyThread: Background thread đọc và xử lý log file
+
+Function chính:
+    - create_event_bus(): Pipeline scanners (init bag, drops, giá) dùng chung với app.headless
 """
+import atexit
 import time
 import threading
-from core.drop_handler import deal_change
-from core.price_handler import get_price_info
+from core import drop_handler
+from core.drop_handler import deal_change_events
+from core.log_parser import (
+    LogEventBus,
+    LogStreamTokenizer,
+    EVENT_INIT_BAG,
+    EVENT_MAP_EXIT,
+    PICK_EVENT_KINDS,
+    SCENE_EVENT_KINDS
+)
+from core.price_handler import get_price_info_events
+from services.price_service import price_search_scanner
 from app import state
 from app import config
-from core.drop_handler import (
-    drop_list as dh_drop_list,
-    drop_list_all as dh_drop_list_all,
-    income as dh_income,
-    income_all as dh_income_all
-)
-from services.log_scan_service import scan_init_bag
+from services.log_scan_service import scan_init_bag_events
+from core.logger import log_debug
+from core import metrics
+from core.profiler import profile_section
+from app.ui_scheduler import get_ui_scheduler, take_ui_snapshot
+from services.checkpoint_service import CheckpointService
+from core.log_tailer import LogTailer, ROTATION_REPLACED
+
+
+# Chu kỳ cập nhật labels thời gian/tốc độ (giây)
+UI_TICK_INTERVAL = 1.0
+
+# Kích thước mỗi block khi catch-up phần log được ghi trong lúc tracker tắt
+CATCH_UP_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def create_event_bus():
+    """
+    Tạo LogEventBus: mỗi chunk log chỉ tokenize một lần rồi phân phối cho các scanner
+    
+    Dùng chung cho MyThread và chế độ headless (app.headless). Thời gian mỗi scanner được
+    ghi vào timers "scan_init_bag", "deal_change", "get_price_info" (core.metrics).
+    Thứ tự subscribe quan trọng: init bag phải được xử lý trước deal_change_events
+    để state.bag_items là baseline mới nhất khi vào map.
+    
+    Returns:
+        LogEventBus
+    """
+    bus = LogEventBus()
+    # scan_init_bag: Tracking liên tục init bag events để update state.bag_items
+    bus.subscribe(scan_init_bag_events, {EVENT_INIT_BAG}, name="scan_init_bag")
+    # deal_change: Phát hiện vào/ra map, scan drops, cập nhật statistics và UI
+    bus.subscribe(deal_change_events, PICK_EVENT_KINDS | SCENE_EVENT_KINDS | {EVENT_INIT_BAG}, name="deal_change")
+    # get_price_info: Extract giá từ exchange search results (cần cả các dòng dump)
+    bus.subscribe(get_price_info_events, name="get_price_info")
+    return bus
 
 
 class MyThread(threading.Thread):
     """Thread for monitoring log file and processing updates"""
-    history = ""
+    tailer = None
+    event_bus = None
+    stream_tokenizer = None
+    checkpoint = None
+    
+    def _create_event_bus(self):
+        """LogEventBus của pipeline (xem create_event_bus())"""
+        return create_event_bus()
+    
+    def _capture_checkpoint(self):
+        """Trạng thái hiện tại cho CheckpointService (gọi giữa 2 chunk nên luôn nhất quán)"""
+        log_state = self.tailer.identity()
+        log_state.update(self.tailer.position())
+        log_state["path"] = self.tailer.path
+        return {
+            "log": log_state,
+            "parser": {
+                "pending_text": self.stream_tokenizer.pending_text,
+                "drop_block": drop_handler.drop_scanner.current_item,
+                "price_search": price_search_scanner.export_state(),
+            },
+            "session": drop_handler.export_session(),
+        }
+    
+    def _open_log(self):
+        """
+        Mở log file: resume từ checkpoint nếu còn hợp lệ, nếu không thì đọc từ cuối file
+        
+        Returns:
+            bool: True nếu đã resume từ checkpoint (cần catch-up)
+        """
+        self.tailer = LogTailer(config.position_log)
+        self.tailer.on_rotate = self._on_log_rotated
+        self.checkpoint = CheckpointService(self._capture_checkpoint)
+        data = None
+        if config.config_data.get("resume_from_checkpoint", True):
+            data = self.checkpoint.load(config.position_log)
+        if data is None:
+            self.tailer.open()
+            return False
+        parser_state = data.get("parser", {})
+        self.stream_tokenizer.restore(parser_state.get("pending_text", ""))
+        drop_handler.drop_scanner.current_item = parser_state.get("drop_block")
+        price_search_scanner.restore_state(parser_state.get("price_search"))
+        drop_handler.restore_session(data.get("session", {}))
+        self.tailer.open(position=data["log"], source_path=data["log"].get("source_path"))
+        return True
     
-    def _update_ui_labels(self, m, s, total_m, total_s):
-        """Update UI labels từ main thread (được gọi qua root.after())"""
-        try:
-            if not state.root or not state.root.winfo_exists():
-                return
-            
-            # Update labels từ main thread (an toàn)
-            state.root.label_current_time.config(text=f"Current: {m}m{s}s")
-            
-            current_speed = round(state.income / ((time.time() - state.t) / 60), 2) if (time.time() - state.t) > 0 else 0
-            state.root.label_current_speed.config(text=f"🔥 {current_speed} /min")
-            
-            state.root.label_total_time.config(text=f"Total: {total_m}m{total_s}s")
-            
-            total_time_elapsed = (state.total_time + (time.time() - state.t)) / 60
-            total_speed = round(state.income_all / total_time_elapsed, 2) if total_time_elapsed > 0 else 0
-            state.root.label_total_speed.config(text=f"🔥 {total_speed} /min")
-        except Exception:
-            # Widget đã bị destroy, bỏ qua
-            pass
+    def _on_log_rotated(self, reason):
+        """
+        Game đã tạo lại / truncate log: bỏ parser state của file cũ trước khi đọc file mới
+        
+        Args:
+            reason: ROTATION_REPLACED (file cũ đã được đọc hết) hoặc ROTATION_TRUNCATED
+        """
+        if reason == ROTATION_REPLACED:
+            # Dòng cuối của file cũ không có '\n' nhưng đã hoàn chỉnh
+            self.event_bus.publish(self.stream_tokenizer.flush())
+        self.stream_tokenizer.reset()
+        drop_handler.drop_scanner.reset()
+        price_search_scanner.reset()
+        self.checkpoint.mark_dirty()
+        log_debug(f"log file {reason}, reopening {self.tailer.path} from start")
+    
+    def _catch_up(self):
+        """
+        Xử lý phần log được ghi trong lúc tracker tắt
+        
+        Đọc theo block lớn (CATCH_UP_BLOCK_SIZE) và tokenize cả block một lần,
+        không chờ tailer giữa các block.
+        """
+        started = time.perf_counter()
+        start_offset = self.tailer.offset
+        while self.tailer.has_new_data():
+            things = self.tailer.read(max_bytes=CATCH_UP_BLOCK_SIZE)
+            if not things:
+                break
+            self.event_bus.publish(self.stream_tokenizer.feed(things))
+            self.checkpoint.mark_dirty()
+        self.checkpoint.maybe_save(force=True)
+        caught_up = self.tailer.offset - start_offset
+        log_debug(f"checkpoint: caught up {caught_up} bytes in {time.perf_counter() - started:.3f}s")
+    
+    def _process_new_log(self):
+        """Đọc phần log mới, phân phối cho các scanner và lưu checkpoint"""
+        things = self.tailer.read()
+        if things:
+            # "chunk": tokenize + scanners + checkpoint của một lần đọc
+            with metrics.timer("chunk"):
+                events = self.stream_tokenizer.feed(things)
+                self.event_bus.publish(events)
+                self.checkpoint.mark_dirty()
+                # Ra map là mốc quan trọng: ghi checkpoint ngay để không đếm lại map khi restart
+                self.checkpoint.maybe_save(force=any(event.kind == EVENT_MAP_EXIT for event in events))
+        else:
+            self.checkpoint.maybe_save()
     
     def run(self):
         """
@@ -62,48 +183,35 @@ class MyThread(threading.Thread):
         Note: Import traceback trong except block là OK theo PEP 8
         vì chỉ dùng khi có exception (lazy loading)
         """
-        self.history = open(config.position_log, "r", encoding="utf-8")
-        self.history.seek(0, 2)
+        self.event_bus = self._create_event_bus()
+        # Giữ lại dòng chưa ghi xong ở cuối mỗi lần đọc cho lần đọc sau
+        self.stream_tokenizer = LogStreamTokenizer()
+        if self._open_log():
+            self._catch_up()
+        # Lưu checkpoint lần cuối khi app thoát
+        atexit.register(self.checkpoint.maybe_save, True)
+        next_tick = time.monotonic() + UI_TICK_INTERVAL
         while True:
             try:
-                time.sleep(1)
-                things = self.history.read()
-                # print(things)
-                
-                # scan_init_bag: Tracking liên tục init bag events để update state.bag_items
-                # Nếu track được event init bag, sẽ update state.bag_items với data mới
-                scan_init_bag(things)
-                
-                # deal_change: Xử lý drops từ log - phát hiện vào/ra map, scan drops, cập nhật statistics và UI
-                deal_change(things)
-                # get_price_info: Extract giá từ exchange search results trong log
-                get_price_info(things)
+                # Block cho đến khi game ghi log mới hoặc đến lượt cập nhật labels
+                self.tailer.wait(timeout=max(0.0, next_tick - time.monotonic()))
+                # Thời gian chờ log mới không thuộc section "worker" của profiler
+                with profile_section("worker"):
+                    self._process_new_log()
                 
-                # Sync global state from drop_handler to state module
-                state.drop_list = dh_drop_list
-                state.drop_list_all = dh_drop_list_all
-                state.income = dh_income
-                state.income_all = dh_income_all
+                # Labels thời gian chỉ cần cập nhật mỗi UI_TICK_INTERVAL
+                if time.monotonic() < next_tick:
+                    continue
+                next_tick = time.monotonic() + UI_TICK_INTERVAL
                 
-                # Schedule UI update từ main thread để tránh blocking và lỗi Tkinter
-                if state.is_in_map:
-                    m = int((time.time() - state.t) // 60)
-                    s = int((time.time() - state.t) % 60)
-                    tmp_total_time = state.total_time + (time.time() - state.t)
-                    total_m = int(tmp_total_time // 60)
-                    total_s = int(tmp_total_time % 60)
-                    
-                    # Dùng root.after() để schedule update từ main thread (không block)
-                    try:
-                        if state.root and state.root.winfo_exists():
-                            state.root.after(0, lambda m=m, s=s, tm=total_m, ts=total_s: self._update_ui_labels(
-                                m, s, tm, ts
-                            ))
-                    except (RuntimeError, AttributeError):
+                # Labels thời gian/tốc độ: UiScheduler render snapshot trên Tk main thread,
+                # gộp với các frame reshow đang chờ (không dồn callbacks khi UI chậm).
+                # Statistics đọc từ state.session.snapshot(): không cần sync từ drop_handler
+                if state.session.is_in_map:
+                    scheduler = get_ui_scheduler()
+                    if scheduler is not None and not scheduler.submit(take_ui_snapshot()):
                         # Main loop đã kết thúc, exit thread
                         break
-                else:
-                    state.t = time.time()
             except Exception as e:
                 print("-------------Error-----------")
                 # Import traceback trong except block là OK (lazy loading khi có exception)
@@ -10,47 +10,85 @@ Mục đích:
 
 Tác dụng:
     - Khởi tạo config.json nếu chưa tồn tại
-    - Tìm cửa sổ game "Torchlight: Infinite"
+    - Tìm cửa sổ game "Torchlight: Infinite" (chỉ khi cần position_log, chỉ trên Windows)
     - Xác định đường dẫn đến file log UE_game.log
     - Verify và prepare log file để đọc
 
 Các biến export:
     - config_data: Dictionary chứa cấu hình (cost_per_map, opacity, tax, user)
-    - position_log: Đường dẫn đến file log của game
+    - position_log: Đường dẫn đến file log của game (tìm lazy lần đầu được truy cập)
+
+Note:
+    psutil / pywin32 chỉ được import trong find_game_log(): import module này không gọi
+    Windows API, nên chế độ headless (app.headless) và tests chạy được trên Linux.
 """
 import os
 import json
-import psutil
-import win32gui
-import win32process
 
 
-# Initialize config file if it doesn't exist
-if os.path.exists("config.json") == False:
-    with open("config.json", "w", encoding="utf-8") as f:
-        config_data = {
-            "cost_per_map": 0,
-            "opacity": 1.0,
-            "tax": 0,
-        }
-        json.dump(config_data, f, ensure_ascii=False, indent=4)
+CONFIG_PATH = "config.json"
+GAME_WINDOW_TITLE = "Torchlight: Infinite  "
+DEFAULT_CONFIG = {
+    "cost_per_map": 0,
+    "opacity": 1.0,
+    "tax": 0,
+}
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """
+    Load config.json (tạo file với DEFAULT_CONFIG nếu chưa tồn tại)
+
+    Args:
+        path: Đường dẫn config.json
+
+    Returns:
+        dict: Cấu hình
+    """
+    if not os.path.exists(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(DEFAULT_CONFIG, f, ensure_ascii=False, indent=4)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_game_log() -> str:
+    """
+    Tìm đường dẫn UE_game.log từ process của cửa sổ game đang chạy
+
+    Returns:
+        str: Đường dẫn log file
+
+    Raises:
+        ImportError: Nếu không có psutil / pywin32 (không phải Windows)
+        OSError: Nếu không tìm thấy game process hoặc không đọc được log file
+    """
+    import psutil
+    import win32gui
+    import win32process
+
+    hwnd = win32gui.FindWindow(None, GAME_WINDOW_TITLE)
+    tid, pid = win32process.GetWindowThreadProcessId(hwnd)
+    process = psutil.Process(pid)
+    position_game = process.exe()
+    path = position_game + "/../../../TorchLight/Saved/Logs/UE_game.log"
+    path = path.replace("\\", "/")
+    print(path)
+
+    # Verify log file exists
+    with open(path, "r", encoding="utf-8") as f:
+        print(f.read(100))
+    return path
+
 
 # Load config
-with open("config.json", "r", encoding="utf-8") as f:
-    config_data = json.load(f)
-
-# Find game process and log file path
-hwnd = win32gui.FindWindow(None, "Torchlight: Infinite  ")
-tid, pid = win32process.GetWindowThreadProcessId(hwnd)
-process = psutil.Process(pid)
-position_game = process.exe()
-position_log = position_game + "/../../../TorchLight/Saved/Logs/UE_game.log"
-position_log = position_log.replace("\\", "/")
-print(position_log)
-
-# Verify log file exists and move to end
-with open(position_log, "r", encoding="utf-8") as f:
-    print(f.read(100))
-    # Move to end of file
-    f.seek(0, 2)
+config_data = load_config()
+
 
+def __getattr__(name):
+    """position_log được tìm lần đầu khi truy cập (cần game đang chạy trên Windows)"""
+    if name == "position_log":
+        global position_log
+        position_log = find_game_log()
+        return position_log
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
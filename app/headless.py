@@ -0,0 +1,266 @@
+"""
+Headless Tracker Module
+=======================
+
+Mục đích:
+    Chạy pipeline của tracker (scan_init_bag, deal_change, get_price_info) không cần Tk,
+    pywin32 hay cửa sổ game: đọc log từ file (--log PATH) hoặc stdin và in statistics
+    của session dưới dạng JSON lines. Dùng trên server, container và CI (Linux).
+
+Tác dụng:
+    - Đọc log qua LogTailer (--log, đọc từ đầu file, --follow để tiếp tục theo dõi như tail -f)
+      hoặc từng dòng từ stdin, tokenize một lần rồi phân phối qua create_event_bus()
+    - In một dòng JSON mỗi khi ra map ("map_exit"), mỗi --interval giây khi đang theo dõi
+      ("tick") và khi kết thúc ("final")
+    - stdout chỉ chứa JSON lines: console output của logger / print chuyển sang stderr
+    - Ghi các file log/ giống app GUI (drop.txt, drop_log.txt, profit ledger, bag_log.json, giá)
+    - Chi phí map lấy từ config.json "cost_per_map" (hoặc --cost)
+    - --metrics-interval N: dump timers / counters của pipeline (core.metrics) vào
+      log/metrics.jsonl mỗi N giây và khi kết thúc
+    - --profile MODES (hoặc biến môi trường TLI_PROFILE): cProfile / sampling / tracemalloc
+      (core.profiler), output trong log/profiles/
+
+Class chính:
+    - HeadlessTracker: Feed log text vào pipeline, in statistics
+
+Function chính:
+    - session_stats(): Statistics hiện tại (dict JSON-serializable)
+    - main(): CLI entry point
+
+Cách chạy:
+    python -m app.headless --log path/to/UE_game.log
+    python -m app.headless --log path/to/UE_game.log --follow --interval 10
+    cat UE_game.log | python -m app.headless
+"""
+import argparse
+import contextlib
+import json
+import sys
+import time
+from typing import List, Optional, TextIO
+
+from app import config
+from app import state
+from app.app import create_event_bus, CATCH_UP_BLOCK_SIZE
+from core import drop_handler
+from core.log_parser import LogStreamTokenizer, EVENT_MAP_EXIT
+from core.log_tailer import LogTailer
+from core.logger import flush_logs
+from core import metrics
+from core import profiler
+from services.log_scan_service import init_bag_data
+
+
+# Số chữ số thập phân của income/profit trong output
+STATS_PRECISION = 2
+
+
+def session_stats(event: str, now: Optional[float] = None) -> dict:
+    """
+    Statistics hiện tại của session
+
+    Args:
+        event: Lý do in ("map_exit", "tick", "final")
+        now: Thời điểm tính thời gian map (mặc định: bây giờ)
+
+    Returns:
+        dict: event, time, map_count, is_in_map, income/profit (map hiện tại và tổng),
+            thời gian, drops (map hiện tại) và drops_all ({item_id_str: quantity})
+    """
+    now = time.time() if now is None else now
+    snapshot = state.session.snapshot()
+    map_elapsed = snapshot.map_elapsed(now)
+    return {
+        "event": event,
+        "time": round(now, 3),
+        "map_count": snapshot.map_count,
+        "is_in_map": snapshot.is_in_map,
+        "income": round(snapshot.income, STATS_PRECISION),
+        "income_all": round(snapshot.income_all, STATS_PRECISION),
+        "profit": round(snapshot.profit, STATS_PRECISION),
+        "profit_all": round(snapshot.profit_all, STATS_PRECISION),
+        "map_elapsed": round(map_elapsed, 3),
+        "total_time": round(snapshot.total_time + map_elapsed, 3),
+        "drops": {str(item_id): num for item_id, num in snapshot.drop_list.items()},
+        "drops_all": {str(item_id): num for item_id, num in snapshot.drop_list_all.items()},
+    }
+
+
+class HeadlessTracker:
+    """
+    Pipeline của tracker không có UI
+
+    Example:
+        tracker = HeadlessTracker(sys.stdout)
+        tracker.feed(text)    # in một dòng JSON cho mỗi lần ra map
+        tracker.finish()      # in dòng "final"
+    """
+
+    def __init__(self, out: TextIO):
+        """
+        Args:
+            out: Stream nhận JSON lines
+        """
+        self.out = out
+        self.tokenizer = LogStreamTokenizer()
+        self.event_bus = create_event_bus()
+        self.lines_written = 0
+
+    def emit(self, event: str):
+        """In statistics hiện tại thành một dòng JSON"""
+        self.out.write(json.dumps(session_stats(event), ensure_ascii=False, sort_keys=True) + "\n")
+        self.out.flush()
+        self.lines_written += 1
+
+    def _publish(self, events: List):
+        """
+        Publish events, tách tại mỗi lần ra map để in statistics của từng map
+
+        (Nếu publish cả chunk một lần, nhiều maps trong cùng chunk chỉ có một dòng output)
+        """
+        start = 0
+        for index, event in enumerate(events):
+            if event.kind == EVENT_MAP_EXIT:
+                self.event_bus.publish(events[start:index + 1])
+                start = index + 1
+                self.emit("map_exit")
+        if start < len(events):
+            self.event_bus.publish(events[start:])
+
+    def feed(self, text: str):
+        """
+        Xử lý log text mới (có thể cắt giữa dòng, phần dở được giữ cho lần sau)
+
+        Args:
+            text: Log text
+        """
+        with profiler.profile_section("worker"):
+            self._publish(self.tokenizer.feed(text))
+
+    def finish(self):
+        """Xử lý dòng cuối (không có '\\n') và in dòng "final" """
+        self._publish(self.tokenizer.flush())
+        self.emit("final")
+
+
+def run_file(tracker: HeadlessTracker, path: str, follow: bool = False, interval: float = 0):
+    """
+    Đọc log file từ đầu, tiếp tục theo dõi nếu follow
+
+    Args:
+        tracker: HeadlessTracker
+        path: Đường dẫn log file
+        follow: Sau khi đọc hết, chờ log mới (dừng bằng Ctrl+C)
+        interval: Giây giữa các dòng "tick" khi follow (0 = không in)
+    """
+    tailer = LogTailer(path, from_end=False)
+    tailer.open()
+    try:
+        while tailer.has_new_data():
+            text = tailer.read(max_bytes=CATCH_UP_BLOCK_SIZE)
+            if not text:
+                break
+            tracker.feed(text)
+        if not follow:
+            return
+        next_tick = time.monotonic() + interval if interval > 0 else None
+        while True:
+            timeout = max(0.0, next_tick - time.monotonic()) if next_tick is not None else 1.0
+            tailer.wait(timeout=timeout)
+            text = tailer.read()
+            if text:
+                tracker.feed(text)
+            if next_tick is not None and time.monotonic() >= next_tick:
+                next_tick = time.monotonic() + interval
+                tracker.emit("tick")
+    finally:
+        tailer.close()
+
+
+def run_stream(tracker: HeadlessTracker, stream: TextIO, interval: float = 0):
+    """
+    Đọc log từng dòng từ stream (stdin), xử lý ngay mỗi dòng
+
+    Args:
+        tracker: HeadlessTracker
+        stream: Text stream
+        interval: Giây giữa các dòng "tick" (0 = không in)
+    """
+    next_tick = time.monotonic() + interval if interval > 0 else None
+    for line in stream:
+        tracker.feed(line)
+        if next_tick is not None and time.monotonic() >= next_tick:
+            next_tick = time.monotonic() + interval
+            tracker.emit("tick")
+
+
+def main(argv: Optional[List[str]] = None, out: TextIO = None, stdin: TextIO = None) -> int:
+    """
+    CLI entry point
+
+    Args:
+        argv: Arguments (mặc định: sys.argv[1:])
+        out: Stream output (mặc định: sys.stdout)
+        stdin: Stream input khi không có --log (mặc định: sys.stdin)
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.headless",
+        description="Chạy tracker không có UI, in statistics của session dưới dạng JSON lines"
+    )
+    parser.add_argument("--log", help="Đường dẫn UE_game.log (mặc định: đọc từ stdin, '-' cũng là stdin)")
+    parser.add_argument("--follow", action="store_true", help="Sau khi đọc hết file, tiếp tục theo dõi log mới")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="In statistics mỗi INTERVAL giây khi --follow hoặc đọc stdin (mặc định: 0 = tắt)")
+    parser.add_argument("--cost", type=float, help="Chi phí mỗi map (mặc định: config.json cost_per_map)")
+    parser.add_argument("--metrics-interval", type=float, default=0,
+                        help=f"Dump metrics vào {metrics.METRICS_LOG_PATH} mỗi N giây (mặc định: 0 = tắt)")
+    parser.add_argument("--profile", metavar="MODES",
+                        help=f"Profiling: cpu, sample, memory, kết hợp bằng dấu phẩy (mặc định: ${profiler.PROFILE_ENV}), "
+                             f"output trong {profiler.PROFILES_DIR}")
+    args = parser.parse_args(argv)
+    out = sys.stdout if out is None else out
+    try:
+        modes = profiler.parse_modes(args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    drop_handler.config_data.update(config.config_data)
+    if args.cost is not None:
+        drop_handler.config_data["cost_per_map"] = args.cost
+    # Cache túi đồ từ lần chạy trước (giống app GUI)
+    init_bag_data()
+
+    tracker = HeadlessTracker(out)
+    metrics.start_metrics_dump(args.metrics_interval)
+    # Console output của pipeline (logger, print) sang stderr: stdout chỉ có JSON lines
+    with contextlib.redirect_stdout(sys.stderr):
+        if modes:
+            profiler.start_profiling(modes)
+        else:
+            profiler.start_from_env()
+        try:
+            try:
+                if args.log and args.log != "-":
+                    run_file(tracker, args.log, follow=args.follow, interval=args.interval)
+                else:
+                    run_stream(tracker, sys.stdin if stdin is None else stdin, interval=args.interval)
+            except KeyboardInterrupt:
+                pass
+            tracker.finish()
+        except OSError as e:
+            print(f"Error reading log: {e}")
+            return 1
+        finally:
+            summary = profiler.stop_profiling()
+            if summary:
+                print(f"profiler: overhead {summary['overhead']}, files: {', '.join(summary['files'])}")
+            metrics.stop_metrics_dump()
+            flush_logs()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Replay Command
+==============
+
+Mục đích:
+    Replay các UE_game.log cũ (file hoặc thư mục) để tính lại offline profit từng map,
+    tổng drops và lịch sử giá, không cần Tk, pywin32 hay cửa sổ game.
+
+Tác dụng:
+    - Gọi services.replay_service.replay() với cost / tax từ config.json (hoặc --cost)
+    - Nhiều file được đọc song song trên --workers process (mặc định: số CPU)
+    - Ghi output vào --out (mặc định log/replay/): profit_ledger.jsonl, price_history.bin, drops.json
+    - In tóm tắt và throughput (MB/s) của bước đọc log
+
+Function chính:
+    - main(): CLI entry point
+
+Cách chạy:
+    python -m app.replay path/to/UE_game.log
+    python -m app.replay path/to/archive/ --out replay_out --cost 7
+    python -m app.replay path/to/archive/ --workers 4
+"""
+import argparse
+import contextlib
+import os
+import sys
+from typing import List, Optional, TextIO
+
+from app import config
+from core.logger import flush_logs
+from services.replay_service import replay, REPLAY_OUT_DIR
+
+
+def main(argv: Optional[List[str]] = None, out: TextIO = None) -> int:
+    """
+    CLI entry point
+
+    Args:
+        argv: Arguments (mặc định: sys.argv[1:])
+        out: Stream output (mặc định: sys.stdout)
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.replay",
+        description="Replay UE_game.log cũ: tính lại profit từng map, drops và lịch sử giá"
+    )
+    parser.add_argument("paths", nargs="+", help="Log file hoặc thư mục chứa các file *.log")
+    parser.add_argument("--out", default=REPLAY_OUT_DIR, help=f"Thư mục output (mặc định: {REPLAY_OUT_DIR})")
+    parser.add_argument("--cost", type=float, help="Chi phí mỗi map (mặc định: config.json cost_per_map)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Số process đọc các file song song (mặc định: số CPU, 1 = tuần tự)")
+    args = parser.parse_args(argv)
+    out = sys.stdout if out is None else out
+
+    cost = config.config_data.get("cost_per_map", 0) if args.cost is None else args.cost
+    tax = config.config_data.get("tax", 0) == 1
+    # Console output của logger sang stderr: stdout chỉ có tóm tắt
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            summary = replay(args.paths, out_dir=args.out, cost=cost, tax=tax, workers=args.workers)
+        except OSError as e:
+            print(f"Error reading log: {e}")
+            return 1
+        finally:
+            flush_logs()
+    out.write(
+        f"Replayed {summary['files']} file(s), {summary['bytes'] / (1024 * 1024):.1f} MB in "
+        f"{summary['seconds']:.2f}s with {summary['workers']} worker(s) ({summary['mb_per_s']} MB/s)\n"
+        f"{summary['maps']} map(s) ({summary['incomplete_maps']} incomplete), {summary['drops']} drop(s), "
+        f"{summary['observations']} price observation(s), profit {summary['profit_all']}\n"
+        f"Output: {args.out}\n"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Session State Module
+====================
+
+Mục đích:
+    Module này giữ statistics của session (drops, income, profit, map count, thời gian)
+    trong một object duy nhất, dùng chung giữa thread đọc log (ghi) và Tk thread / UI scheduler (đọc).
+
+Tác dụng:
+    - Mọi thay đổi đi qua các method của SessionState và được giữ bởi một lock: vào/ra map,
+      thêm drop, restore từ checkpoint không bao giờ bị đọc dở dang
+    - snapshot() trả về SessionSnapshot bất biến, không copy drop lists (copy-on-write):
+      snapshot giữ reference tới dict hiện tại, lần ghi tiếp theo mới copy dict một lần
+      rồi sửa bản copy. Nhiều snapshot liên tiếp không có drop mới không tốn copy nào
+    - Thay cho các biến drop_list/income/... bị lặp lại ở core.drop_handler và app.state
+      (và đoạn sync giữa chúng trong MyThread.run)
+
+Class chính:
+    - SessionSnapshot: Trạng thái session bất biến tại một thời điểm
+    - SessionState: Statistics của session với lock và copy-on-write snapshots
+"""
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+
+class SessionSnapshot(NamedTuple):
+    """Trạng thái session tại một thời điểm (bất biến, drop lists chỉ đọc)"""
+    is_in_map: bool
+    # Thời điểm bắt đầu map hiện tại (None nếu chưa vào map lần nào)
+    t: Optional[float]
+    total_time: float
+    map_count: int
+    income: float
+    income_all: float
+    profit: float
+    profit_all: float
+    # {item_id: quantity} của map hiện tại / tất cả maps
+    drop_list: Mapping
+    drop_list_all: Mapping
+
+    def map_elapsed(self, now: Optional[float] = None) -> float:
+        """Thời gian (giây) của map đang chạy, 0 nếu đang ở ngoài map"""
+        if not self.is_in_map or not self.t:
+            return 0.0
+        return (time.time() if now is None else now) - self.t
+
+
+class SessionState:
+    """
+    Statistics của session: ghi qua methods (có lock), đọc qua snapshot()
+
+    Example:
+        session = SessionState()
+        session.enter_map(cost=12.5)
+        session.add_drop(5028, 3, value=0.6)
+        snapshot = session.snapshot()  # không copy drop lists
+        snapshot.drop_list  # {5028: 3}, không đổi khi có drops mới
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._is_in_map = False
+        self._t = None
+        self._total_time = 0.0
+        self._map_count = 0
+        self._income = 0
+        self._income_all = 0
+        self._profit = 0
+        self._profit_all = 0
+        self._drop_list = {}
+        self._drop_list_all = {}
+        # True khi dict hiện tại đã được đưa cho một snapshot: phải copy trước khi sửa
+        self._drops_shared = False
+        # Số lần copy-on-write (thống kê cho tests / debug)
+        self.copies = 0
+
+    # ------------------------------------------------------------------
+    # Đọc nhanh một giá trị (không cần nhất quán với các giá trị khác)
+    # ------------------------------------------------------------------
+
+    @property
+    def is_in_map(self) -> bool:
+        return self._is_in_map
+
+    @property
+    def t(self) -> Optional[float]:
+        return self._t
+
+    @property
+    def map_count(self) -> int:
+        return self._map_count
+
+    @property
+    def income(self) -> float:
+        return self._income
+
+    @property
+    def income_all(self) -> float:
+        return self._income_all
+
+    def snapshot(self) -> SessionSnapshot:
+        """
+        Trạng thái hiện tại (O(1): drop lists được chia sẻ tới lần ghi tiếp theo)
+
+        Returns:
+            SessionSnapshot
+        """
+        with self._lock:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self) -> SessionSnapshot:
+        """snapshot() khi đang giữ lock"""
+        self._drops_shared = True
+        return SessionSnapshot(
+            is_in_map=self._is_in_map,
+            t=self._t,
+            total_time=self._total_time,
+            map_count=self._map_count,
+            income=self._income,
+            income_all=self._income_all,
+            profit=self._profit,
+            profit_all=self._profit_all,
+            drop_list=MappingProxyType(self._drop_list),
+            drop_list_all=MappingProxyType(self._drop_list_all),
+        )
+
+    # ------------------------------------------------------------------
+    # Ghi (chỉ thread đọc log gọi, nhưng luôn giữ lock để snapshot nhất quán)
+    # ------------------------------------------------------------------
+
+    def _own_drops(self):
+        """Copy drop lists nếu đang được snapshot chia sẻ (gọi khi đang giữ lock)"""
+        if self._drops_shared:
+            self._drop_list = dict(self._drop_list)
+            self._drop_list_all = dict(self._drop_list_all)
+            self._drops_shared = False
+            self.copies += 1
+
+    def enter_map(self, cost: float = 0, now: Optional[float] = None):
+        """
+        Vào map mới: reset drops/income của map, trừ chi phí map vào income và profit
+
+        Args:
+            cost: Chi phí map
+            now: Thời điểm vào map (mặc định: bây giờ)
+        """
+        with self._lock:
+            self._is_in_map = True
+            self._t = time.time() if now is None else now
+            self._map_count += 1
+            # dict mới: snapshot cũ vẫn giữ drops của map trước
+            self._drop_list = {}
+            self._drop_list_all = dict(self._drop_list_all) if self._drops_shared else self._drop_list_all
+            self._drops_shared = False
+            self._income = -cost
+            self._income_all -= cost
+            self._profit = self._income
+            self._profit_all -= cost
+
+    def exit_map(self, now: Optional[float] = None) -> SessionSnapshot:
+        """
+        Ra map: cộng thời gian map vào total_time, cộng profit của map vào profit_all
+
+        Args:
+            now: Thời điểm ra map (mặc định: bây giờ)
+
+        Returns:
+            SessionSnapshot: Trạng thái ngay trước khi ra map (income, t, map_count của map vừa xong)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            before = self._snapshot_locked()
+            self._is_in_map = False
+            self._total_time += now - (self._t or now)
+            self._profit = self._income
+            self._profit_all += self._income
+        return before
+
+    def mark_in_map(self, now: Optional[float] = None):
+        """Có drops khi chưa thấy scene change vào map (log bắt đầu giữa map)"""
+        with self._lock:
+            if self._is_in_map:
+                return
+            self._is_in_map = True
+            if self._t is None:
+                self._t = time.time() if now is None else now
+
+    def add_drop(self, item_id: int, quantity: int, value: float = 0):
+        """
+        Thêm drop vào map hiện tại và tổng
+
+        Args:
+            item_id: ID item (int)
+            quantity: Số lượng nhặt được
+            value: Tổng giá trị (đã tính tax) cộng vào income
+        """
+        with self._lock:
+            self._own_drops()
+            self._drop_list[item_id] = self._drop_list.get(item_id, 0) + quantity
+            self._drop_list_all[item_id] = self._drop_list_all.get(item_id, 0) + quantity
+            if value:
+                self._income += value
+                self._income_all += value
+            self._profit = self._income
+
+    def export(self, now: Optional[float] = None) -> dict:
+        """
+        Statistics dạng JSON-serializable (dùng cho checkpoint)
+
+        Args:
+            now: Thời điểm tính map_elapsed (mặc định: bây giờ)
+
+        Returns:
+            dict: drop_list, drop_list_all, income, profit, map_count, thời gian...
+        """
+        snapshot = self.snapshot()
+        return {
+            "drop_list": {str(item_id): num for item_id, num in snapshot.drop_list.items()},
+            "drop_list_all": {str(item_id): num for item_id, num in snapshot.drop_list_all.items()},
+            "income": snapshot.income,
+            "income_all": snapshot.income_all,
+            "profit": snapshot.profit,
+            "profit_all": snapshot.profit_all,
+            "map_count": snapshot.map_count,
+            "total_time": snapshot.total_time,
+            "is_in_map": snapshot.is_in_map,
+            "map_elapsed": snapshot.map_elapsed(now),
+        }
+
+    def restore(self, data: dict, now: Optional[float] = None):
+        """
+        Khôi phục statistics từ export() của lần chạy trước
+
+        Args:
+            data: Kết quả export()
+            now: Thời điểm hiện tại (thời gian app tắt không tính vào map đang chạy)
+        """
+        now = time.time() if now is None else now
+        drop_list = {int(item_id): num for item_id, num in data.get("drop_list", {}).items()}
+        drop_list_all = {int(item_id): num for item_id, num in data.get("drop_list_all", {}).items()}
+        with self._lock:
+            self._drop_list = drop_list
+            self._drop_list_all = drop_list_all
+            self._drops_shared = False
+            self._income = data.get("income", 0)
+            self._income_all = data.get("income_all", 0)
+            self._profit = data.get("profit", 0)
+            self._profit_all = data.get("profit_all", 0)
+            self._map_count = data.get("map_count", 0)
+            self._total_time = data.get("total_time", 0)
+            self._is_in_map = data.get("is_in_map", False)
+            self._t = now - data.get("map_elapsed", 0)
@@ -9,60 +9,29 @@ Mục đích:
 Tác dụng:
     - Tránh circular imports giữa index.py và ui.py
     - Centralized state management
+    - Statistics của session nằm trong một SessionState (app.session_state) dùng chung
+      giữa thread đọc log và UI, không lặp lại ở core.drop_handler
     - Dễ test và maintain hơn
 """
+from app.session_state import SessionState
 
 # ============================================================================
-# Map State Variables
+# Session Statistics
 # ============================================================================
 
-# Trạng thái vào/ra map
-is_in_map = False  # True khi đang trong map, False khi ở ngoài map
-
-# Thời gian tracking
-t = None  # Timestamp khi bắt đầu map hiện tại (dùng để tính duration)
-map_start_time = None  # Thời gian bắt đầu map để tính duration (backup)
-total_time = 0  # Tổng thời gian đã chơi (tính bằng giây, cộng dồn từ các maps)
-
-# ============================================================================
-# Drop Statistics Variables
-# ============================================================================
-
-# Danh sách drops của map hiện tại: {item_id: quantity}
-# Được reset về {} mỗi khi vào map mới
-drop_list = {}
-
-# Danh sách drops tổng cộng (tất cả maps): {item_id: quantity}
-# Không reset, cộng dồn từ tất cả các maps
-drop_list_all = {}
-
-# ============================================================================
-# Income & Profit Variables
-# ============================================================================
-
-# Income của map hiện tại (đã trừ cost khi vào map)
-# Được reset về -map_cost mỗi khi vào map mới
-income = 0
-
-# Tổng income tất cả maps (đã trừ tất cả costs)
-# Không reset, cộng dồn từ tất cả các maps
-income_all = 0
-
-# Profit của map hiện tại = income (vì income đã trừ cost khi vào map)
-# Được reset về -map_cost mỗi khi vào map mới
-profit = 0
-
-# Tổng profit tất cả maps (đã trừ tất cả costs)
-# Không reset, cộng dồn từ tất cả các maps
-profit_all = 0
+# Statistics của session: is_in_map, thời gian map, drop_list/drop_list_all,
+# income/income_all, profit/profit_all, map_count
+#
+# Thread đọc log (core.drop_handler) ghi qua methods của SessionState (có lock),
+# UI đọc qua session.snapshot() (bất biến, không copy drop lists).
+# Luôn truy cập qua state.session (không `from app.state import session`) để
+# tests / restore có thể thay object.
+session = SessionState()
 
 # ============================================================================
 # UI State Variables
 # ============================================================================
 
-# Số lượng maps đã chơi (tăng mỗi khi vào map mới)
-map_count = 0
-
 # Reference đến main window (Tkinter root)
 # Dùng để update UI và lấy cost từ config
 root = None
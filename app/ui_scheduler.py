@@ -0,0 +1,216 @@
+"""
+UI Scheduler Module
+===================
+
+Mục đích:
+    Module này gộp các yêu cầu cập nhật UI từ thread đọc log (labels mỗi giây, reshow khi
+    có drops) thành tối đa một frame mỗi 1/max_fps giây trên Tk main thread.
+
+Tác dụng:
+    - Thread worker chụp một UiSnapshot bất biến (từ state.session.snapshot()) và
+      gửi cho scheduler; Tk thread chỉ render snapshot, không đọc state đang bị sửa
+    - Chỉ có tối đa một callback root.after() đang chờ: snapshot mới thay snapshot cũ
+      chưa render (frame cũ bị bỏ, đếm trong frames_skipped), nên UI chậm không làm
+      callbacks dồn lại
+    - Yêu cầu reshow của các frame bị bỏ được gộp vào frame mới nhất
+    - Giới hạn max_fps (config.json "ui_max_fps", mặc định DEFAULT_UI_MAX_FPS)
+    - core.metrics: timer "ui_frame" (render), "ui_latency" (từ lúc submit tới lúc render),
+      counters "ui_frames", "ui_frames_skipped"; render là section "ui" của core.profiler
+
+Class chính:
+    - UiSnapshot: Trạng thái UI bất biến của một frame
+    - UiScheduler: Gộp frames và schedule render trên Tk thread
+
+Function chính:
+    - take_ui_snapshot(): Chụp trạng thái hiện tại
+    - install_ui_scheduler(): Gắn scheduler vào cửa sổ chính
+    - request_ui_refresh(): Yêu cầu cập nhật UI (gọi từ bất kỳ thread nào, no-op nếu chưa có UI)
+"""
+import threading
+import time
+from typing import Callable, Mapping, NamedTuple, Optional
+from core.logger import log_error
+from core import metrics
+from core.profiler import profile_section
+from app import state
+
+
+DEFAULT_UI_MAX_FPS = 10
+
+
+class UiSnapshot(NamedTuple):
+    """Trạng thái UI của một frame (bất biến, drop lists chỉ đọc)"""
+    map_count: int
+    is_in_map: bool
+    income: float
+    income_all: float
+    profit: float
+    profit_all: float
+    map_elapsed: float
+    total_elapsed: float
+    drop_list: Mapping
+    drop_list_all: Mapping
+    # True nếu listbox Drops cần cập nhật (có drops mới / đổi filter)
+    reshow: bool
+
+
+def take_ui_snapshot(reshow: bool = False, now: Optional[float] = None) -> UiSnapshot:
+    """
+    Chụp trạng thái hiện tại cho UI
+
+    Args:
+        reshow: Frame này cần cập nhật listbox Drops
+        now: Thời điểm tính thời gian map (mặc định: bây giờ)
+
+    Returns:
+        UiSnapshot
+    """
+    session = state.session.snapshot()
+    map_elapsed = session.map_elapsed(now)
+    return UiSnapshot(
+        map_count=session.map_count,
+        is_in_map=session.is_in_map,
+        income=session.income,
+        income_all=session.income_all,
+        profit=session.profit,
+        profit_all=session.profit_all,
+        map_elapsed=map_elapsed,
+        total_elapsed=session.total_time + map_elapsed,
+        # Copy-on-write: snapshot chia sẻ drop lists, thread parse copy trước khi sửa
+        drop_list=session.drop_list,
+        drop_list_all=session.drop_list_all,
+        reshow=reshow
+    )
+
+
+class UiScheduler:
+    """
+    Gộp các snapshot thành tối đa một frame mỗi 1/max_fps giây
+
+    Example:
+        scheduler = UiScheduler(root.after, root.render_frame, max_fps=10)
+        scheduler.submit(take_ui_snapshot(reshow=True))  # từ thread đọc log
+    """
+
+    def __init__(self, schedule: Callable[[int, Callable], object], render: Callable[[UiSnapshot], None],
+                 max_fps: float = DEFAULT_UI_MAX_FPS):
+        """
+        Args:
+            schedule: Hàm schedule callback trên Tk thread, kiểu root.after(ms, callback)
+            render: Hàm render một snapshot (chạy trên Tk thread)
+            max_fps: Số frame tối đa mỗi giây
+        """
+        self.schedule = schedule
+        self.render = render
+        self.min_interval = 1.0 / max_fps if max_fps and max_fps > 0 else 0.0
+        self.frames_requested = 0
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self._lock = threading.Lock()
+        self._pending = None
+        # perf_counter_ns() lúc frame đang chờ được yêu cầu lần đầu (ui_latency)
+        self._pending_since = 0
+        self._scheduled = False
+        self._last_frame = None
+
+    def submit(self, snapshot: UiSnapshot) -> bool:
+        """
+        Gửi snapshot mới (thay snapshot chưa render nếu có)
+
+        Args:
+            snapshot: Trạng thái cần hiển thị
+
+        Returns:
+            bool: False nếu không schedule được (Tk main loop đã dừng)
+        """
+        with self._lock:
+            self.frames_requested += 1
+            if self._pending is not None:
+                # Frame cũ chưa kịp render: bỏ, nhưng giữ yêu cầu reshow
+                self.frames_skipped += 1
+                metrics.count("ui_frames_skipped")
+                if self._pending.reshow and not snapshot.reshow:
+                    snapshot = snapshot._replace(reshow=True)
+            else:
+                self._pending_since = time.perf_counter_ns()
+            self._pending = snapshot
+            if self._scheduled:
+                return True
+            self._scheduled = True
+            delay = 0.0
+            if self._last_frame is not None:
+                delay = max(0.0, self._last_frame + self.min_interval - time.monotonic())
+        try:
+            self.schedule(int(delay * 1000), self._frame)
+            return True
+        except Exception:
+            # Cửa sổ đã bị destroy / main loop đã kết thúc
+            with self._lock:
+                self._scheduled = False
+            return False
+
+    def _frame(self):
+        """Render snapshot mới nhất (chạy trên Tk thread)"""
+        with self._lock:
+            snapshot, self._pending = self._pending, None
+            pending_since = self._pending_since
+            self._scheduled = False
+            self._last_frame = time.monotonic()
+        if snapshot is None:
+            return
+        metrics.record("ui_latency", time.perf_counter_ns() - pending_since)
+        try:
+            with metrics.timer("ui_frame"), profile_section("ui"):
+                self.render(snapshot)
+            self.frames_rendered += 1
+            metrics.count("ui_frames")
+        except Exception as e:
+            log_error(f"ui scheduler: error rendering frame: {e}")
+
+    def stats(self) -> dict:
+        """Counters: frames_requested, frames_rendered, frames_skipped"""
+        return {
+            "frames_requested": self.frames_requested,
+            "frames_rendered": self.frames_rendered,
+            "frames_skipped": self.frames_skipped,
+        }
+
+
+_scheduler = None
+
+
+def install_ui_scheduler(root, max_fps: float = DEFAULT_UI_MAX_FPS) -> UiScheduler:
+    """
+    Tạo scheduler dùng chung cho cửa sổ chính
+
+    Args:
+        root: App (có after() và render_frame())
+        max_fps: Số frame tối đa mỗi giây
+
+    Returns:
+        UiScheduler
+    """
+    global _scheduler
+    _scheduler = UiScheduler(root.after, root.render_frame, max_fps)
+    return _scheduler
+
+
+def get_ui_scheduler() -> Optional[UiScheduler]:
+    """Scheduler dùng chung, None nếu chưa có UI (tests, chạy headless)"""
+    return _scheduler
+
+
+def request_ui_refresh(reshow: bool = False) -> bool:
+    """
+    Yêu cầu cập nhật UI với trạng thái hiện tại (gọi được từ bất kỳ thread nào)
+
+    Args:
+        reshow: Cập nhật cả listbox Drops
+
+    Returns:
+        bool: False nếu chưa có UI hoặc không schedule được
+    """
+    scheduler = _scheduler
+    if scheduler is None:
+        return False
+    return scheduler.submit(take_ui_snapshot(reshow))
@@ -0,0 +1,8 @@
+"""
+Benchmarks Package
+==================
+
+Các script đo hiệu năng cho pipeline đọc và xử lý log.
+Chạy từ thư mục gốc của project, ví dụ:
+    python -m benchmarks.bench_tailer_latency
+"""
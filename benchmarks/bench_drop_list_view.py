@@ -0,0 +1,148 @@
+"""
+Benchmark: Render listbox Drops
+===============================
+
+Mục đích:
+    Đo thời gian một frame của App.reshow() với N items (mặc định 1000, chế độ Total Drops)
+    trong một đợt nhặt đồ: mỗi frame có K items đổi số lượng. So sánh:
+        - legacy: xoá toàn bộ listbox rồi insert lại từng dòng (reshow cũ)
+        - diff: ui.drop_list_view.DropListView, chỉ xoá/insert các dòng thay đổi
+
+    Dùng tkinter.Listbox thật nếu có display; nếu không (CI, server) dùng listbox trong RAM
+    cùng API, khi đó kết quả chỉ gồm phần Python (số lệnh Tk được in kèm).
+
+Cách chạy:
+    python -m benchmarks.bench_drop_list_view [--items 1000] [--frames 200] [--seed 1]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from ui.drop_list_view import DropListView, STATUS_SYMBOLS, price_status
+
+
+class MemoryListbox:
+    """Listbox trong RAM (khi không có display), đếm số lệnh delete/insert"""
+
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+
+    def delete(self, first, last=None):
+        self.calls += 1
+        if last is None:
+            del self.rows[first]
+        else:
+            del self.rows[first:]
+
+    def insert(self, index, *elements):
+        self.calls += 1
+        if index == "end":
+            self.rows.extend(elements)
+        else:
+            self.rows[index:index] = elements
+
+
+class Catalog:
+    def __init__(self, items):
+        self.names = {item_id: f"Item {item_id} name" for item_id in items}
+
+    def name_of(self, item_id):
+        return self.names.get(item_id, f"Item {item_id}")
+
+
+class Prices:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get(self, item_id):
+        return self.entries.get(item_id)
+
+
+def make_listbox():
+    """Tk Listbox thật nếu có display, ngược lại MemoryListbox"""
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.withdraw()
+        listbox = tkinter.Listbox(root)
+        return listbox, root, "tk"
+    except Exception:
+        return MemoryListbox(), None, "memory"
+
+
+def legacy_reshow(listbox, drops, visible_ids, catalog, prices, now):
+    """Vòng lặp render của reshow() cũ"""
+    listbox.delete(1, "end")
+    for i in drops.keys():
+        item_id = str(i)
+        if item_id not in visible_ids:
+            continue
+        item_name = catalog.name_of(item_id)
+        price_data = prices.get(item_id) or {}
+        status = STATUS_SYMBOLS[price_status(price_data.get("last_update", 0), now)]
+        item_price = price_data.get("price", 0)
+        listbox.insert("end", f"{status} {item_name} x{drops[i]} [{drops[i] * item_price}]")
+
+
+def run(items, frames, changes, seed, make_frame):
+    rng = random.Random(seed)
+    now = time.time()
+    ids = [str(100000 + index) for index in range(items)]
+    prices = Prices({item_id: {"price": rng.lognormvariate(0, 2), "last_update": now} for item_id in ids})
+    catalog = Catalog(ids)
+    visible = set(ids)
+    drops = {int(item_id): rng.randint(1, 50) for item_id in ids}
+
+    listbox, root, backend = make_listbox()
+    listbox.insert("end", "legend")
+    render = make_frame()
+    render(listbox, drops, visible, catalog, prices, now)
+    if root is not None:
+        root.update_idletasks()
+
+    frame_times = []
+    calls_before = getattr(listbox, "calls", 0)
+    for _ in range(frames):
+        for item_id in rng.sample(ids, changes):
+            drops[int(item_id)] += rng.randint(1, 3)
+        start = time.perf_counter()
+        render(listbox, drops, visible, catalog, prices, now)
+        if root is not None:
+            root.update_idletasks()
+        frame_times.append(time.perf_counter() - start)
+    calls = getattr(listbox, "calls", 0) - calls_before
+    if root is not None:
+        root.destroy()
+    return backend, frame_times, calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.items} items, {args.frames} frames (seed {args.seed})")
+    print(f"{'mode':<8} {'changed/frame':>13} {'backend':>8} {'median (ms)':>12} {'p95 (ms)':>10} {'Tk calls/frame':>15}")
+    for changes in (1, 10, 100):
+        for mode in ("legacy", "diff"):
+            if mode == "legacy":
+                make_frame = lambda: legacy_reshow
+            else:
+                def make_frame():
+                    view = DropListView(header_rows=1)
+                    return lambda listbox, drops, visible, catalog, prices, now: view.render(
+                        listbox, drops, visible, catalog, prices, now=now)
+            backend, frame_times, calls = run(args.items, args.frames, changes, args.seed, make_frame)
+            frame_times.sort()
+            median = statistics.median(frame_times) * 1000
+            p95 = frame_times[int(len(frame_times) * 0.95) - 1] * 1000
+            calls_text = f"{calls / args.frames:.1f}" if backend == "memory" else "-"
+            print(f"{mode:<8} {changes:>13} {backend:>8} {median:>12.3f} {p95:>10.3f} {calls_text:>15}")
+
+
+if __name__ == "__main__":
+    main()
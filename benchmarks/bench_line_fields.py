@@ -0,0 +1,126 @@
+"""
+Benchmark: Lấy fields từ các dòng PickItems / InitBagData
+=========================================================
+
+Mục đích:
+    So sánh thời gian lấy fields (PageId, SlotId, ConfigBaseId, Num, BagNum, timestamp)
+    giữa:
+        - legacy: cách cũ của scan_init_bag / scan_drop_log, mỗi field một re.search với
+          pattern dạng string (qua cache của module re) trên cả dòng
+        - registry: core.log_patterns, một pattern anchored với named groups mỗi loại dòng
+
+    Gồm microbenchmark cho từng loại dòng và parse_init_bag_events() trên các InitBagData
+    dumps có --slots slots (synthetic log có seed của benchmarks.log_generator).
+    Kết quả của hai cách được kiểm tra là giống nhau.
+
+Cách chạy:
+    python -m benchmarks.bench_line_fields [--slots 5000] [--dumps 4] [--rounds 5] [--seed 1]
+"""
+import argparse
+import re
+import time
+
+from benchmarks.log_generator import LogMix, build_log_text
+from core.log_parser import (
+    tokenize_log, EVENT_INIT_BAG, EVENT_PICK_MODIFY, EVENT_PICK_START, EVENT_PICK_UPDATE
+)
+from core.log_patterns import LINE_PATTERNS
+from services.log_scan_service import parse_init_bag_events
+
+
+def legacy_timestamp(line):
+    match = re.search(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3})\]', line)
+    return match.group(1) if match else None
+
+
+def legacy_fields(kind, line):
+    """Fields của dòng theo cách cũ, cùng thứ tự với LINE_PATTERNS[kind].names"""
+    def search(pattern):
+        match = re.search(pattern, line)
+        return match.group(1) if match else None
+
+    if kind == EVENT_PICK_START:
+        return (legacy_timestamp(line),)
+    if kind == EVENT_PICK_UPDATE:
+        return search(r'BagNum=(\d+)'), search(r'PageId=(\d+)'), search(r'SlotId=(\d+)')
+    if kind == EVENT_PICK_MODIFY:
+        return legacy_timestamp(line), search(r'ConfigBaseId\s*=\s*(\d+)'), search(r'Num\s*=\s*(\d+)')
+    return (legacy_timestamp(line), search(r'PageId\s*=\s*(\d+)'), search(r'SlotId\s*=\s*(\d+)'),
+            search(r'ConfigBaseId\s*=\s*(\d+)'), search(r'Num\s*=\s*(\d+)'))
+
+
+def legacy_parse_init_bag(events):
+    """parse_init_bag_events() trước khi dùng core.log_patterns"""
+    bag_data = {}
+    for event in events:
+        if event.kind == EVENT_INIT_BAG:
+            line = event.line
+            timestamp_match = re.search(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3})\]', line)
+            timestamp = timestamp_match.group(1) if timestamp_match else ""
+            page_id_match = re.search(r'PageId\s*=\s*(\d+)', line)
+            slot_id_match = re.search(r'SlotId\s*=\s*(\d+)', line)
+            config_base_id_match = re.search(r'ConfigBaseId\s*=\s*(\d+)', line)
+            num_match = re.search(r'Num\s*=\s*(\d+)', line)
+            if config_base_id_match:
+                item_id = config_base_id_match.group(1)
+                page_id = int(page_id_match.group(1)) if page_id_match else 0
+                slot_id = int(slot_id_match.group(1)) if slot_id_match else 0
+                num = int(num_match.group(1)) if num_match else 0
+                if item_id in bag_data:
+                    bag_data[item_id]["num"] += num
+                else:
+                    bag_data[item_id] = {"pageId": page_id, "slotId": slot_id, "num": num, "timestamp": timestamp}
+    return bag_data
+
+
+def generate_events(slots: int, dumps: int, seed: int):
+    """LogEvents của một synthetic log có dumps InitBagData dumps, mỗi dump slots slots"""
+    mix = LogMix(noise_lines=(0, 2), init_bag_every=1, init_bag_slots=slots, price_searches_per_map=0,
+                 drop_item_blocks_per_map=0)
+    # Mỗi slot ~110 bytes; các maps khác chỉ có vài PickItems bursts
+    text, _ = build_log_text(slots * 110 * dumps, seed, mix)
+    return tokenize_log(text)
+
+
+def best_of(rounds, function, *args):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slots", type=int, default=5000, help="Số slots mỗi InitBagData dump")
+    parser.add_argument("--dumps", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    events = generate_events(args.slots, args.dumps, args.seed)
+    print(f"{len(events)} lines, {args.slots} slots / InitBagData dump (seed {args.seed})")
+    print(f"{'benchmark':<22} {'lines':>8} {'legacy (s)':>11} {'registry (s)':>13} {'speedup':>8}")
+    for kind, pattern in LINE_PATTERNS.items():
+        lines = [event.line for event in events if event.kind == kind]
+        if not lines:
+            continue
+        legacy = [legacy_fields(kind, line) for line in lines]
+        if [pattern.fields(line) for line in lines] != legacy:
+            raise SystemExit(f"{kind}: kết quả khác legacy")
+        before = best_of(args.rounds, lambda: [legacy_fields(kind, line) for line in lines])
+        after = best_of(args.rounds, lambda: [pattern.fields(line) for line in lines])
+        print(f"{kind:<22} {len(lines):>8} {before:>11.4f} {after:>13.4f} {before / after:>7.2f}x")
+
+    if legacy_parse_init_bag(events) != parse_init_bag_events(events):
+        raise SystemExit("parse_init_bag_events: kết quả khác legacy")
+    before = best_of(args.rounds, legacy_parse_init_bag, events)
+    after = best_of(args.rounds, parse_init_bag_events, events)
+    lines = sum(event.kind == EVENT_INIT_BAG for event in events)
+    print(f"{'parse_init_bag_events':<22} {lines:>8} {before:>11.4f} {after:>13.4f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
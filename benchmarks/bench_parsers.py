@@ -0,0 +1,244 @@
+"""
+Benchmark Suite: Log parsers
+============================
+
+Mục đích:
+    Đo các parser chính trên synthetic UE_game.log (benchmarks.log_generator, có seed):
+    scan_init_bag, scan_drop_log, scan_price_search, convert_from_log_structure
+    (mọi +DropItems block từ scanned_log) và deal_change end to end.
+
+    Kết quả dạng pytest-benchmark (min/max/mean/stddev/median/iqr/ops cho mỗi benchmark,
+    kèm machine_info) được lưu thành JSON baseline. Lần chạy sau so sánh median với baseline
+    và trả về exit code 1 nếu có benchmark chậm hơn quá --threshold.
+
+Function chính:
+    - run_suite(): Chạy các benchmarks, trả về dict kết quả
+    - compare_results(): So sánh kết quả với baseline
+
+Cách chạy:
+    python -m benchmarks.bench_parsers --save benchmarks/baselines/parsers.json
+    python -m benchmarks.bench_parsers --compare benchmarks/baselines/parsers.json [--threshold 0.2]
+    python -m benchmarks.bench_parsers --size 64 --rounds 3 --only scan_price_search,deal_change
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app import state
+from app.session_state import SessionState
+from benchmarks.log_generator import build_log_text
+from core import drop_handler
+from core.log_parser import convert_from_log_structure, scanned_log
+from core.logger import get_log_file, get_log_level, LOG_FILE, set_log_file, set_log_level, WARNING
+from repositories.append_writer import close_append_writer
+from services.bag_snapshot import close_bag_snapshot_writer
+from services.log_scan_service import DropScanner, scan_drop_log, scan_init_bag, scan_price_search
+from services.profit_ledger import close_profit_ledger
+
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baselines", "parsers.json")
+DEFAULT_THRESHOLD = 0.2
+STATS_PRECISION = 6
+
+
+def _reset_pipeline_state():
+    """State sạch cho deal_change (như app vừa khởi động, không có main window)"""
+    state.session = SessionState()
+    state.bag_items = {}
+    state.root = None
+    drop_handler.previous_item_quantities = {}
+    drop_handler.drop_scanner = DropScanner()
+    drop_handler.config_data = {"cost_per_map": 0, "tax": 0}
+
+
+def build_cases(text: str) -> List[Tuple[str, Callable[[], object], Optional[Callable[[], None]], int]]:
+    """
+    Các benchmarks trên cùng một log text
+
+    Returns:
+        List[(name, function, setup, bytes)]: setup (nếu có) chạy trước mỗi round, không tính
+            thời gian; bytes là kích thước input (để tính MB/s)
+    """
+    size = len(text.encode("utf-8"))
+    drop_blocks = scanned_log(text)
+    return [
+        ("scan_init_bag", lambda: scan_init_bag(text), None, size),
+        ("scan_drop_log", lambda: scan_drop_log(text), None, size),
+        ("scan_price_search", lambda: scan_price_search(text, strategy="mean"), None, size),
+        ("convert_from_log_structure", lambda: [convert_from_log_structure(block) for block in drop_blocks], None,
+         sum(len(block.encode("utf-8")) for block in drop_blocks)),
+        ("deal_change", lambda: drop_handler.deal_change(text), _reset_pipeline_state, size),
+    ]
+
+
+def _stats(timings: List[float]) -> Dict[str, float]:
+    """Thống kê theo format pytest-benchmark"""
+    ordered = sorted(timings)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) > 1 else [ordered[0]] * 3
+    mean = statistics.fmean(ordered)
+    stats = {
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": mean,
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "median": statistics.median(ordered),
+        "iqr": quartiles[2] - quartiles[0],
+        "q1": quartiles[0],
+        "q3": quartiles[2],
+        "ops": 1 / mean if mean > 0 else 0.0,
+        "total": sum(ordered),
+    }
+    stats = {key: round(value, STATS_PRECISION) for key, value in stats.items()}
+    stats["rounds"] = len(ordered)
+    return stats
+
+
+def run_suite(size_mb: float = 8, seed: int = 1, rounds: int = 5, warmup: int = 1,
+              only: Optional[List[str]] = None, out=sys.stdout) -> Dict:
+    """
+    Chạy các benchmarks trong thư mục tạm (các file log/ của pipeline không ghi vào repo)
+
+    Args:
+        size_mb: Kích thước synthetic log (MB)
+        seed: Seed của generator
+        rounds: Số lần đo mỗi benchmark
+        warmup: Số lần chạy trước khi đo
+        only: Chỉ chạy các benchmarks này
+        out: Stream in tiến độ (None = không in)
+
+    Returns:
+        dict: machine_info, datetime, params, benchmarks (mỗi benchmark: name, stats, extra_info)
+    """
+    text, generated = build_log_text(int(size_mb * 1024 * 1024), seed)
+    previous_dir = os.getcwd()
+    previous_level = get_log_level()
+    previous_log_file = get_log_file()
+    saved_state = (state.session, state.bag_items, state.root, drop_handler.previous_item_quantities,
+                   drop_handler.drop_scanner, drop_handler.config_data)
+    benchmarks = []
+    # DEBUG log của mỗi drop / search sẽ chiếm phần lớn thời gian đo
+    set_log_level(WARNING)
+    os.chdir(tempfile.mkdtemp(prefix="bench_parsers_"))
+    set_log_file(LOG_FILE)
+    try:
+        for name, function, setup, size_bytes in build_cases(text):
+            if only and name not in only:
+                continue
+            timings = []
+            for index in range(warmup + rounds):
+                if setup is not None:
+                    setup()
+                started = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - started
+                if index >= warmup:
+                    timings.append(elapsed)
+            stats = _stats(timings)
+            benchmarks.append({
+                "name": name,
+                "group": "parsers",
+                "stats": stats,
+                "extra_info": {"bytes": size_bytes, "mb_per_s": round(size_bytes / (1024 * 1024) / stats["median"], 2)},
+            })
+            if out is not None:
+                out.write(f"{name:<28} median {stats['median']:>9.4f}s  "
+                          f"{benchmarks[-1]['extra_info']['mb_per_s']:>8.1f} MB/s\n")
+    finally:
+        # Các writer giữ đường dẫn tương đối, đóng trước khi về thư mục cũ
+        close_bag_snapshot_writer()
+        close_append_writer()
+        close_profit_ledger()
+        set_log_file(previous_log_file)
+        os.chdir(previous_dir)
+        set_log_level(previous_level)
+        (state.session, state.bag_items, state.root, drop_handler.previous_item_quantities,
+         drop_handler.drop_scanner, drop_handler.config_data) = saved_state
+    return {
+        "machine_info": {
+            "python_version": platform.python_version(),
+            "python_implementation": platform.python_implementation(),
+            "system": platform.system(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "datetime": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "params": {"size_mb": size_mb, "seed": seed, "rounds": rounds, "warmup": warmup,
+                   "generated": generated._asdict()},
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    So sánh median của từng benchmark với baseline
+
+    Args:
+        baseline: Kết quả run_suite() đã lưu
+        current: Kết quả run_suite() lần này
+        threshold: Tỷ lệ chậm hơn tối đa (0.2 = chậm hơn 20% là regression)
+
+    Returns:
+        List[Dict]: name, baseline, current (median, giây), change (tỷ lệ), regression (bool);
+            chỉ các benchmarks có trong cả hai
+    """
+    baseline_medians = {bench["name"]: bench["stats"]["median"] for bench in baseline.get("benchmarks", [])}
+    rows = []
+    for bench in current.get("benchmarks", []):
+        name = bench["name"]
+        if name not in baseline_medians:
+            continue
+        before = baseline_medians[name]
+        after = bench["stats"]["median"]
+        change = (after - before) / before if before > 0 else 0.0
+        rows.append({"name": name, "baseline": before, "current": after, "change": round(change, 4),
+                     "regression": change > threshold})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=8, help="Kích thước synthetic log (MB)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--only", help="Chỉ chạy các benchmarks này (cách nhau bởi dấu phẩy)")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, help=f"Lưu kết quả (mặc định: {DEFAULT_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="So sánh với baseline JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Chậm hơn baseline quá tỷ lệ này là regression (mặc định: 0.2)")
+    args = parser.parse_args(argv)
+
+    only = args.only.split(",") if args.only else None
+    results = run_suite(args.size, args.seed, args.rounds, args.warmup, only)
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("params", {}).get("size_mb") != args.size:
+            print(f"warning: baseline size {baseline.get('params', {}).get('size_mb')} MB != {args.size} MB")
+        print(f"\n{'benchmark':<28} {'baseline':>10} {'current':>10} {'change':>8}")
+        for row in compare_results(baseline, results, args.threshold):
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:<28} {row['baseline']:>10.4f} {row['current']:>10.4f} {row['change']:>+8.1%}{flag}")
+            if row["regression"]:
+                exit_code = 1
+    if args.save:
+        directory = os.path.dirname(args.save)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"saved {args.save}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark: Thống kê ladder giá
+==============================
+
+Mục đích:
+    So sánh thời gian tính giá cho N ladders (mặc định 10k, mỗi ladder tối đa 100 giá
+    như unitPrices của một lần search) giữa:
+        - legacy: vòng lặp cũ của scan_price_search (float() 3 lần, chỉ mean + max)
+        - python: analyze_ladder() bản Python thuần, từng ladder
+        - numpy: analyze_ladder() bản NumPy, từng ladder (nếu đã cài NumPy)
+        - numpy-batch: analyze_ladders() một lần cho cả N ladders (đường replay)
+
+    Ladders được sinh có seed, dạng chuỗi như trong log, có ~2% listing troll.
+
+Cách chạy:
+    python -m benchmarks.bench_price_analyzer [--ladders 10000] [--seed 1]
+"""
+import argparse
+import random
+import time
+
+from services import price_analyzer
+from services.price_analyzer import analyze_ladder, analyze_ladders
+
+
+def generate_ladders(count: int, seed: int):
+    """Sinh ladders giá (chuỗi) tăng dần quanh một giá gốc, thỉnh thoảng có listing troll"""
+    rng = random.Random(seed)
+    ladders = []
+    for _ in range(count):
+        base = rng.lognormvariate(0, 2)
+        depth = rng.randint(10, 100)
+        ladder = sorted(base * (1 + abs(rng.gauss(0, 0.02))) for _ in range(depth))
+        if rng.random() < 0.02:
+            ladder[-1] = base * 1000
+        ladders.append([repr(value) for value in ladder])
+    return ladders
+
+
+def legacy(values):
+    """Logic cũ của scan_price_search"""
+    num_values = len(values)
+    sum_values = sum(float(v) for v in values)
+    average_price = sum_values / num_values
+    highest_price = max(float(v) for v in values)
+    values_float = [float(v) for v in values]
+    return average_price, highest_price, values_float
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ladders", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    ladders = generate_ladders(args.ladders, args.seed)
+    results = {"legacy": timed(lambda: [legacy(ladder) for ladder in ladders])}
+
+    price_analyzer.use_numpy = False
+    results["python"] = timed(lambda: [analyze_ladder(ladder, "trimmed_mean") for ladder in ladders])
+    if price_analyzer.np is not None:
+        price_analyzer.use_numpy = True
+        price_analyzer.numpy_min_batch = 1
+        results["numpy"] = timed(lambda: [analyze_ladder(ladder, "trimmed_mean") for ladder in ladders])
+        results["numpy-batch"] = timed(analyze_ladders, ladders, "trimmed_mean")
+    else:
+        print("NumPy chưa được cài: bỏ qua numpy / numpy-batch")
+
+    print(f"{args.ladders} ladders (seed {args.seed})")
+    print(f"{'mode':<12} {'total (s)':>10} {'per ladder (us)':>16} {'vs legacy':>10}")
+    for mode, elapsed in results.items():
+        print(f"{mode:<12} {elapsed:>10.3f} {elapsed / args.ladders * 1e6:>16.1f} {results['legacy'] / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: Scan price search trên log lớn
+==========================================
+
+Mục đích:
+    Đo thời gian scan_price_search() trên synthetic log kích thước tăng dần (mặc định
+    tới 100 MB), mật độ search cố định (một search mỗi --search-every KB log). Thời gian /
+    MB phải gần như không đổi (tuyến tính theo kích thước log).
+
+    Cách cũ (regex DOTALL chạy lại trên toàn bộ text cho từng SynId) là
+    O(số search x độ dài text), chỉ đo ở các kích thước nhỏ (--legacy-max-mb).
+
+Cách chạy:
+    python -m benchmarks.bench_price_search [--sizes 12.5,25,50,100] [--search-every 64]
+"""
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from services import log_scan_service
+from services.log_scan_service import scan_price_search
+
+
+PREFIX = "[2025.11.08-20.21.00:708][609]GameLog: Display: [Game] "
+NOISE_LINES = [
+    PREFIX + "ItemChange@ Update Id=1 BagNum=3 in PageId=102 SlotId=0",
+    PREFIX + "SkillMgr@ Cast SkillId = 1203 Target = 77",
+    PREFIX + "UIMgr@ OpenPanel Name = Bag",
+    "|      | +attr [12]",
+]
+
+
+def build_search(syn_id: int, rng: random.Random) -> str:
+    """Một response (ladder 100 giá) + request inline như trong log"""
+    base = rng.uniform(0.05, 50)
+    lines = [
+        f"{PREFIX}----Socket RecvMessage STT----XchgSearchPrice----SynId = {syn_id}",
+        PREFIX,
+        "+errCode",
+        f"+prices+1+unitPrices+1 [{base:.11f}]",
+    ]
+    lines += [f"|      | |          +{index} [{base * (1 + index / 1000):.11f}]" for index in range(2, 101)]
+    lines += [
+        "|      | +currency [100300]",
+        f"{PREFIX}----Socket RecvMessage End----",
+        f"XchgSearchPrice----SynId = {syn_id} +refer [{rng.choice([5028, 1001, 360404])}]",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def build_log(size_bytes: int, search_every: int, seed: int):
+    """Sinh log ~size_bytes với một search mỗi search_every byte"""
+    rng = random.Random(seed)
+    noise = "".join(line + "\n" for line in NOISE_LINES)
+    parts = []
+    total = 0
+    syn_id = 0
+    while total < size_bytes:
+        filler = noise * max(1, search_every // len(noise))
+        search = build_search(syn_id, rng)
+        parts += [filler, search]
+        total += len(filler) + len(search)
+        syn_id += 1
+    return "".join(parts), syn_id
+
+
+def legacy_scan_price_search(changed_text: str):
+    """Phần tìm SynId / data block của scan_price_search cũ (không tính giá)"""
+    results = []
+    pattern_id = r'XchgSearchPrice----SynId\s*=\s*(\d+).*?\+refer\s*\[(\d+)\]'
+    for syn_id, item_id in re.findall(pattern_id, changed_text, re.DOTALL):
+        data_block_pattern = re.compile(
+            rf'----Socket RecvMessage STT----XchgSearchPrice----SynId = {syn_id}\s+'
+            r'\[.*?\]\s*GameLog: Display: \[Game\]\s+'
+            r'(.*?)(?=----Socket RecvMessage STT----|$)',
+            re.DOTALL
+        )
+        data_block_match = data_block_pattern.search(changed_text)
+        if data_block_match:
+            results.append((syn_id, item_id))
+    return results
+
+
+def measure(function, text):
+    start = time.perf_counter()
+    results = function(text)
+    return time.perf_counter() - start, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="12.5,25,50,100", help="Kích thước log (MB), cách nhau bởi dấu phẩy")
+    parser.add_argument("--search-every", type=int, default=64, help="Một search mỗi N KB log")
+    parser.add_argument("--legacy-max-mb", type=float, default=2.0, help="Chỉ chạy cách cũ tới kích thước này")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Chỉ đo phần scan: bỏ log_debug mỗi result (print + ghi logger.txt)
+    log_scan_service.log_debug = lambda *args: None
+    os.chdir(tempfile.mkdtemp(prefix="bench_price_search_"))
+
+    sizes = [float(size) for size in args.sizes.split(",")]
+    legacy_sizes = [args.legacy_max_mb / 4, args.legacy_max_mb / 2, args.legacy_max_mb]
+
+    print(f"{'scanner':<8} {'size (MB)':>10} {'searches':>9} {'time (s)':>9} {'s / MB':>8}")
+    for name, function, mode_sizes in (
+        ("legacy", legacy_scan_price_search, legacy_sizes),
+        ("scanner", lambda text: scan_price_search(text, strategy="mean"), sizes),
+    ):
+        for size in mode_sizes:
+            text, searches = build_log(int(size * 1024 * 1024), args.search_every * 1024, args.seed)
+            elapsed, found = measure(function, text)
+            assert found == searches, f"{name}: found {found} / {searches} searches"
+            print(f"{name:<8} {size:>10.2f} {searches:>9} {elapsed:>9.3f} {elapsed / size:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: Replay log file lớn
+==============================
+
+Mục đích:
+    Đo throughput (MB/s) của services.replay_service.replay_file() trên synthetic
+    UE_game.log (benchmarks.log_generator: maps, drops, price searches, xen giữa rất nhiều
+    dòng noise như log thật).
+    Mục tiêu: >= 100 MB/s trên một core.
+
+    So sánh với cách app đang chạy đọc log: decode toàn bộ text rồi tokenize_log() mọi dòng.
+
+Cách chạy:
+    python -m benchmarks.bench_replay [--size 200] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.log_generator import generate_log
+from core.log_parser import tokenize_log
+from services import log_scan_service
+from services.replay_service import replay_file
+
+
+def best_of(repeat: int, function):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=200, help="Kích thước log (MB)")
+    parser.add_argument("--repeat", type=int, default=3, help="Lấy thời gian tốt nhất của N lần chạy")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Chỉ đo phần replay: bỏ log_debug mỗi result (print + ghi logger.txt)
+    log_scan_service.log_debug = lambda *args: None
+    os.chdir(tempfile.mkdtemp(prefix="bench_replay_"))
+    size_mb = generate_log("UE_game.log", int(args.size * 1024 * 1024), args.seed).bytes / (1024 * 1024)
+
+    def tokenize_all():
+        with open("UE_game.log", "r", encoding="utf-8") as f:
+            return tokenize_log(f.read())
+
+    print(f"{'mode':<14} {'size (MB)':>10} {'time (s)':>9} {'MB/s':>8}")
+    elapsed, result = best_of(args.repeat, lambda: replay_file("UE_game.log", strategy="mean"))
+    print(f"{'replay_file':<14} {size_mb:>10.1f} {elapsed:>9.3f} {size_mb / elapsed:>8.1f}"
+          f"   ({len(result.maps)} maps, {sum(result.drops.values())} drops, "
+          f"{len(result.observations)} observations)")
+    elapsed, _ = best_of(args.repeat, tokenize_all)
+    print(f"{'tokenize_log':<14} {size_mb:>10.1f} {elapsed:>9.3f} {size_mb / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: Replay song song nhiều log file
+==========================================
+
+Mục đích:
+    Đo services.replay_service.replay() trên nhiều synthetic log file với 1/2/4/8 worker
+    process (ProcessPoolExecutor), in thời gian, throughput (MB/s) và speedup so với 1 worker.
+    Output (profit_ledger.jsonl/.idx, price_history.bin, drops.json) của mọi số worker được
+    so sánh từng byte với replay tuần tự.
+
+    Speedup bị giới hạn bởi số CPU của máy (os.cpu_count(), in ở đầu kết quả).
+
+Cách chạy:
+    python -m benchmarks.bench_replay_scaling [--files 16] [--size 25] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.log_generator import generate_log
+from core.logger import set_log_level, WARNING
+from services import log_scan_service
+from services.replay_service import (
+    replay,
+    REPLAY_LEDGER_NAME,
+    REPLAY_PRICE_HISTORY_NAME,
+    REPLAY_DROPS_NAME
+)
+
+
+OUTPUT_NAMES = (REPLAY_LEDGER_NAME, "profit_ledger.idx", REPLAY_PRICE_HISTORY_NAME, REPLAY_DROPS_NAME)
+
+
+def read_outputs(out_dir: str) -> dict:
+    outputs = {}
+    for name in OUTPUT_NAMES:
+        with open(os.path.join(out_dir, name), "rb") as f:
+            outputs[name] = f.read()
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=16, help="Số log file")
+    parser.add_argument("--size", type=float, default=25, help="Kích thước mỗi file (MB)")
+    parser.add_argument("--workers", default="1,2,4,8", help="Số worker, cách nhau bởi dấu phẩy")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Chỉ đo phần replay: bỏ log_debug mỗi result (print + ghi logger.txt), worker fork kế thừa
+    log_scan_service.log_debug = lambda *args: None
+    set_log_level(WARNING)
+    os.chdir(tempfile.mkdtemp(prefix="bench_replay_scaling_"))
+    os.makedirs("logs")
+    for index in range(args.files):
+        generate_log(os.path.join("logs", f"UE_game-{index:04d}.log"), int(args.size * 1024 * 1024), args.seed + index)
+
+    print(f"cpu_count={os.cpu_count()}, {args.files} files x {args.size} MB")
+    print(f"{'workers':>7} {'time (s)':>9} {'MB/s':>8} {'speedup':>8} {'identical':>10}")
+    baseline = None
+    serial = None
+    for workers in [int(value) for value in args.workers.split(",")]:
+        out_dir = f"out_{workers}"
+        summary = replay(["logs"], out_dir=out_dir, cost=1, strategy="mean", workers=workers)
+        outputs = read_outputs(out_dir)
+        if baseline is None:
+            baseline = summary["seconds"]
+            serial = outputs
+        identical = outputs == serial
+        print(f"{workers:>7} {summary['seconds']:>9.3f} {summary['mb_per_s']:>8.1f} "
+              f"{baseline / summary['seconds']:>8.2f} {str(identical):>10}")
+        assert identical, f"{workers} workers: output differs from serial replay"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark: Structured log (+DropItems blocks)
+=============================================
+
+Mục đích:
+    So sánh thời gian đọc các +DropItems blocks (format structured log "|  +Key [value]")
+    giữa:
+        - legacy: convert_from_log_structure() cũ (strip, count, re.sub, re.match mỗi dòng)
+          + duyệt đệ quy của deal_drop() cũ (nối string path)
+        - convert: convert_from_log_structure() mới + picked_drop_items()
+        - extract: extract_drop_items(), không build dict
+
+    Blocks được lấy bằng scanned_log() từ synthetic log có seed (benchmarks.log_generator,
+    mỗi block --items items, như một dump DropItems lớn). Mỗi round bắt đầu với cache dòng
+    rỗng (như lúc app vừa chạy). Kết quả của cả ba cách được kiểm tra là giống nhau.
+
+Cách chạy:
+    python -m benchmarks.bench_structured_log [--size 16] [--items 200] [--seed 1] [--rounds 5]
+"""
+import argparse
+import re
+import time
+
+from benchmarks.log_generator import LogMix, build_log_text
+from core import log_parser
+from core.log_parser import (
+    DropItem, convert_from_log_structure, extract_drop_items, picked_drop_items, scanned_log
+)
+
+
+def legacy_convert(log_text):
+    """convert_from_log_structure() trước khi viết lại (không có verbose)"""
+    lines = [line.strip() for line in log_text.split('\n') if line.strip()]
+    stack = []
+    root = {}
+    for line in lines:
+        level = line.count('|')
+        content = re.sub(r'\|+', '', line).strip()
+        while len(stack) > level:
+            stack.pop()
+        parent = root if not stack else stack[-1]
+        if parent is None:
+            continue
+        if '[' in content and ']' in content:
+            key_part = content[:content.index('[')].strip()
+            value_part = content[content.index('[') + 1: content.rindex(']')].strip()
+            if value_part.lower() == 'true':
+                value = True
+            elif value_part.lower() == 'false':
+                value = False
+            elif re.match(r'^-?\d+$', value_part):
+                value = int(value_part)
+            else:
+                value = value_part
+            keys = [k.strip() for k in key_part.split('+') if k.strip()]
+            current_node = parent
+            for i in range(len(keys)):
+                key = keys[i]
+                if i == len(keys) - 1:
+                    current_node[key] = value
+                else:
+                    if not isinstance(current_node, dict):
+                        break
+                    if key not in current_node:
+                        current_node[key] = {}
+                    current_node = current_node[key]
+            stack.append(current_node)
+        else:
+            keys = [k.strip() for k in content.strip().split('+') if k.strip()]
+            current_node = parent
+            for key in keys:
+                if not isinstance(current_node, dict):
+                    break
+                if key not in current_node:
+                    current_node[key] = {}
+                current_node = current_node[key]
+            stack.append(current_node)
+    return root
+
+
+def legacy_picked_items(drop_data):
+    """Duyệt đệ quy của deal_drop() trước khi viết lại -> List[DropItem]"""
+    items = []
+
+    def process(item_data):
+        picked = False
+        if "Picked" in item_data:
+            picked = item_data["Picked"]
+        elif isinstance(item_data.get("item"), dict) and "Picked" in item_data["item"]:
+            picked = item_data["item"]["Picked"]
+        if not picked:
+            return
+        item_info = item_data.get("item", {})
+        if isinstance(item_info, dict) and "SpecialInfo" in item_info:
+            special_info = item_info["SpecialInfo"]
+            if isinstance(special_info, dict):
+                if "BaseId" in special_info:
+                    item_info["BaseId"] = special_info["BaseId"]
+                if "Num" in special_info:
+                    item_info["Num"] = special_info["Num"]
+        base_id = item_info.get("BaseId")
+        if base_id is not None:
+            items.append(DropItem(base_id, item_info.get("Num", 0)))
+
+    def walk(data, path=""):
+        for key, value in data.items():
+            current_path = f"{path}.{key}" if path else key
+            if isinstance(value, dict) and "item" in value:
+                if ("Picked" in value) or (isinstance(value["item"], dict) and "Picked" in value["item"]):
+                    process(value)
+            if isinstance(value, dict):
+                walk(value, current_path)
+
+    walk(drop_data)
+    return items
+
+
+def generate_blocks(size_mb: float, items: int, seed: int):
+    """+DropItems blocks (mỗi block items items) từ synthetic log chỉ có ít noise"""
+    mix = LogMix(noise_lines=(0, 5), drop_item_blocks_per_map=4, drop_items_per_block=items)
+    text, _ = build_log_text(int(size_mb * 1024 * 1024), seed, mix)
+    return scanned_log(text)
+
+
+def timed(function, blocks):
+    """Thời gian đọc hết các blocks, bắt đầu với cache dòng rỗng"""
+    log_parser._structure_entries.clear()
+    log_parser._structure_heads.clear()
+    start = time.perf_counter()
+    results = [function(block) for block in blocks]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=16, help="Kích thước synthetic log (MB)")
+    parser.add_argument("--items", type=int, default=200, help="Số items mỗi block")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    blocks = generate_blocks(args.size, args.items, args.seed)
+    size_mb = sum(len(block.encode("utf-8")) for block in blocks) / (1024 * 1024)
+    modes = {
+        "legacy": lambda block: legacy_picked_items(legacy_convert(block)),
+        "convert": lambda block: picked_drop_items(convert_from_log_structure(block)),
+        "extract": extract_drop_items,
+    }
+    # Các modes chạy xen kẽ trong mỗi round để nhiễu của máy ảnh hưởng đều, lấy min mỗi mode
+    results = {}
+    for _ in range(args.rounds):
+        expected = None
+        for mode, function in modes.items():
+            elapsed, items = timed(function, blocks)
+            if expected is None:
+                expected = items
+            elif items != expected:
+                raise SystemExit(f"{mode}: kết quả khác legacy")
+            results[mode] = min(results.get(mode, elapsed), elapsed)
+
+    print(f"{len(blocks)} blocks x {args.items} items ({size_mb:.1f} MB, seed {args.seed})")
+    print(f"{'mode':<10} {'total (s)':>10} {'MB/s':>8} {'vs legacy':>10}")
+    for mode, elapsed in results.items():
+        print(f"{mode:<10} {elapsed:>10.3f} {size_mb / elapsed:>8.1f} {results['legacy'] / elapsed:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: Drop-to-label latency của log tailer
+================================================
+
+Mục đích:
+    Đo độ trễ end-to-end từ lúc một synthetic writer ghi PickItems block vào log
+    đến lúc "label" được cập nhật trên UI thread, cho từng tail backend:
+        - legacy: sleep(1) + read() như MyThread cũ
+        - polling: PollingBackend với adaptive backoff
+        - inotify: InotifyBackend (chỉ Linux)
+    Đồng thời đo CPU time tiêu tốn khi game idle (không có log mới).
+
+Cách chạy:
+    python -m benchmarks.bench_tailer_latency [--drops 50] [--interval 0.1]
+"""
+import argparse
+import os
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from core.log_tailer import LogTailer, PollingBackend, create_tail_backend
+from services.log_scan_service import scan_drop_log
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILES = ["id_table.json", "search_price_log.json"]
+LOG_PREFIX = "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] "
+
+
+class LegacyBackend:
+    """Mô phỏng vòng lặp cũ: luôn sleep 1 giây rồi mới read()"""
+
+    name = "legacy"
+
+    def wait(self, has_new_data, timeout):
+        time.sleep(1)
+        return has_new_data()
+
+    def close(self):
+        pass
+
+
+def build_drop_block(sequence: int) -> str:
+    """Tạo PickItems block với Num = sequence để nhận diện drop ở phía consumer"""
+    lines = [
+        "ItemChange@ ProtoName=PickItems start",
+        f"ItemChange@ Update Id=1 BagNum={sequence} in PageId=102 SlotId=0",
+        f"BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = {sequence}",
+        "ItemChange@ ProtoName=PickItems end",
+    ]
+    return "".join(LOG_PREFIX + line + "\n" for line in lines)
+
+
+def run_writer(log_path, drops, interval, write_times):
+    """Ghi từng drop block vào log, lưu thời điểm ghi theo sequence"""
+    for sequence in range(1, drops + 1):
+        time.sleep(interval)
+        block = build_drop_block(sequence).encode("utf-8")
+        write_times[sequence] = time.perf_counter()
+        with open(log_path, "ab") as f:
+            f.write(block)
+
+
+def run_ui_thread(label_queue, write_times, latencies, drops):
+    """Mô phỏng Tk main thread: nhận update từ worker (thay cho root.after)"""
+    while len(latencies) < drops:
+        sequence = label_queue.get()
+        if sequence is None:
+            return
+        latencies.append(time.perf_counter() - write_times[sequence])
+
+
+def measure_latency(backend, log_path, drops, interval):
+    """
+    Chạy writer + tailer + scanner + UI thread, trả về list độ trễ (giây)
+    """
+    with open(log_path, "wb"):
+        pass
+    tailer = LogTailer(log_path, backend=backend)
+    tailer.open()
+    write_times = {}
+    latencies = []
+    label_queue = queue.Queue()
+    ui_thread = threading.Thread(target=run_ui_thread, args=(label_queue, write_times, latencies, drops))
+    writer = threading.Thread(target=run_writer, args=(log_path, drops, interval, write_times))
+    ui_thread.start()
+    writer.start()
+    seen = 0
+    deadline = time.monotonic() + drops * interval + 10
+    while seen < drops and time.monotonic() < deadline:
+        tailer.wait(timeout=1.0)
+        text = tailer.read()
+        if not text:
+            continue
+        for item in scan_drop_log(text):
+            label_queue.put(item["num"])
+            seen += 1
+    writer.join()
+    label_queue.put(None)
+    ui_thread.join()
+    tailer.close()
+    return latencies
+
+
+def measure_idle_cpu(backend, log_path, duration):
+    """Đo CPU time (giây) tiêu tốn khi chờ log trong duration giây mà không có ghi mới"""
+    tailer = LogTailer(log_path, backend=backend)
+    tailer.open()
+    started_cpu = time.process_time()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        tailer.wait(timeout=max(0.0, deadline - time.monotonic()))
+        tailer.read()
+    cpu_used = time.process_time() - started_cpu
+    tailer.close()
+    return cpu_used
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop-to-label latency benchmark")
+    parser.add_argument("--drops", type=int, default=30)
+    parser.add_argument("--interval", type=float, default=0.1, help="Giây giữa 2 drop")
+    parser.add_argument("--idle", type=float, default=3.0, help="Số giây đo CPU khi idle")
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_tailer_")
+    for name in DATA_FILES:
+        source = os.path.join(PROJECT_DIR, name)
+        if os.path.exists(source):
+            shutil.copy(source, work_dir)
+    old_cwd = os.getcwd()
+    os.chdir(work_dir)
+    log_path = os.path.join(work_dir, "UE_game.log")
+
+    factories = [("polling", lambda: PollingBackend())]
+    if sys.platform.startswith("linux"):
+        factories.append(("inotify", lambda: create_tail_backend(log_path, "inotify")))
+    if not args.skip_legacy:
+        factories.insert(0, ("legacy", LegacyBackend))
+
+    try:
+        print(f"{'backend':<10}{'p50':>12}{'p95':>12}{'max':>12}{'idle cpu':>14}")
+        for name, factory in factories:
+            with open(log_path, "wb"):
+                pass
+            latencies = measure_latency(factory(), log_path, args.drops, args.interval)
+            idle_cpu = measure_idle_cpu(factory(), log_path, args.idle)
+            if not latencies:
+                print(f"{name:<10} no drops detected")
+                continue
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{name:<10}{format_ms(statistics.median(latencies)):>12}{format_ms(p95):>12}"
+                  f"{format_ms(latencies[-1]):>12}{idle_cpu / args.idle * 100:>12.3f} %")
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
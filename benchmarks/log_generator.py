@@ -0,0 +1,294 @@
+"""
+Synthetic UE_game.log Generator
+===============================
+
+Mục đích:
+    Sinh UE_game.log giả lập có seed (cùng seed + cùng tham số = cùng nội dung từng byte)
+    cho benchmarks và tests, từ 1 MB tới 1 GB, không cần log thật của game.
+
+Tác dụng:
+    - Mix cấu hình được (LogMix): số maps, PickItems bursts mỗi map, InitBagData dumps
+      (số slots), XchgSearchPrice responses + requests, +DropItems structured blocks và
+      số dòng noise giữa các event
+    - Số lượng trong túi nhất quán giữa InitBagData và PickItems (Num tăng dần), nên
+      drops tính lại được đúng bằng số đã sinh
+    - Sinh theo từng map (iter_log_chunks), ghi file lớn không cần giữ cả log trong RAM
+    - GeneratedLog ghi lại số lượng đã sinh của từng loại để kiểm tra kết quả parse
+
+Class chính:
+    - LogMix: Tỷ lệ các loại event
+    - GeneratedLog: Thống kê những gì đã sinh
+
+Function chính:
+    - iter_log_chunks(): Sinh log theo từng map (str)
+    - build_log_text(): Log trong RAM
+    - generate_log(): Ghi log ra file
+
+Cách chạy:
+    python -m benchmarks.log_generator --size 100 --out UE_game.log [--seed 1]
+"""
+import argparse
+import random
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+
+HIDEOUT_SCENE = "World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200'"
+MAP_SCENES = [
+    "World'/Game/Art/Maps/02/Map01/Map01.Map01'",
+    "World'/Game/Art/Maps/03/YL_BeiFengLinDi201/YL_BeiFengLinDi201.YL_BeiFengLinDi201'",
+    "World'/Game/Art/Maps/04/KD_YuanSuKuangDong000/KD_YuanSuKuangDong000.KD_YuanSuKuangDong000'",
+]
+NOISE_LINES = [
+    "LogNet: Display: NotifyAcceptingConnection accepted from: 10.0.0.1:51234",
+    "GameLog: Display: [Game] SkillMgr@ Cast SkillId = 1203 Target = 77",
+    "GameLog: Display: [Game] UIMgr@ OpenPanel Name = Bag",
+    "LogStreaming: Display: Flushing async loaders.",
+    "GameLog: Display: [Game] MonsterMgr@ Spawn MonsterId = 30120 Pos = (1203.5, -88.2, 410.0)",
+    "LogRenderer: Warning: Reallocating scene render targets to support 1920x1080 Format 10 NumSamples 1",
+    "GameLog: Display: [Game] AudioMgr@ Play EventName = Play_Skill_Hit_03",
+]
+# Currency (100300) và các items thường gặp
+ITEMS = [100300, 5028, 1001, 360404, 200101, 5030, 430000, 100200]
+CURRENCY_ITEM_ID = 100300
+START_TIME = 1762621188.0
+GAME_PREFIX = "GameLog: Display: [Game] "
+
+
+class LogMix(NamedTuple):
+    """Tỷ lệ các loại event trong log (mỗi giá trị là số lượng trên một map)"""
+    # Số PickItems bursts mỗi map (min, max)
+    picks_per_map: Tuple[int, int] = (3, 8)
+    # Số dòng noise giữa 2 event (min, max)
+    noise_lines: Tuple[int, int] = (100, 400)
+    # InitBagData dump mỗi N maps (0 = chỉ ở đầu log)
+    init_bag_every: int = 10
+    # Số slots trong mỗi InitBagData dump (items không thuộc ITEMS được thêm vào cho đủ)
+    init_bag_slots: int = 60
+    # Số XchgSearchPrice (response + request) mỗi map
+    price_searches_per_map: int = 1
+    # Số +DropItems structured blocks mỗi map và số items trong mỗi block
+    drop_item_blocks_per_map: int = 1
+    drop_items_per_block: int = 8
+
+
+class GeneratedLog(NamedTuple):
+    """Những gì đã được sinh (để so với kết quả parse)"""
+    bytes: int
+    maps: int
+    pick_blocks: int
+    # {item_id (str): tổng số lượng nhặt được}
+    drops: Dict[str, int]
+    init_bag_dumps: int
+    init_bag_slots: int
+    price_searches: int
+    drop_item_blocks: int
+
+
+class _Writer:
+    """Trạng thái sinh log: thời gian, túi đồ, SynId, thống kê"""
+
+    def __init__(self, seed: int, mix: LogMix):
+        self.rng = random.Random(seed)
+        self.mix = mix
+        self.now = START_TIME
+        self._second = None
+        self._stamp = ""
+        self.lines = []
+        slots = max(mix.init_bag_slots, len(ITEMS))
+        self.bag_items = ITEMS + [900000 + index for index in range(slots - len(ITEMS))]
+        self.bag = {item_id: self.rng.randrange(1, 500) for item_id in self.bag_items}
+        self.syn_id = 0
+        self.counts = {"maps": 0, "pick_blocks": 0, "init_bag_dumps": 0, "init_bag_slots": 0,
+                       "price_searches": 0, "drop_item_blocks": 0}
+        self.drops = {}
+
+    def prefix(self) -> str:
+        self.now += self.rng.uniform(0.001, 0.05)
+        second = int(self.now)
+        if second != self._second:
+            self._second = second
+            self._stamp = time.strftime("%Y.%m.%d-%H.%M.%S", time.gmtime(second))
+        return f"[{self._stamp}:{int(self.now * 1000) % 1000:03d}][{self.rng.randrange(1000):3d}]"
+
+    def game(self, text: str):
+        self.lines.append(f"{self.prefix()}{GAME_PREFIX}{text}")
+
+    def noise(self):
+        rng = self.rng
+        low, high = self.mix.noise_lines
+        for _ in range(rng.randint(low, high) if high > 0 else 0):
+            self.lines.append(self.prefix() + rng.choice(NOISE_LINES))
+
+    def init_bag(self):
+        for slot_id, item_id in enumerate(self.bag_items):
+            self.game(f"BagMgr@:InitBagData PageId = 102 SlotId = {slot_id} ConfigBaseId = {item_id} "
+                      f"Num = {self.bag[item_id]}")
+        self.counts["init_bag_dumps"] += 1
+        self.counts["init_bag_slots"] += len(self.bag_items)
+
+    def pick(self):
+        rng = self.rng
+        item_id = rng.choice(ITEMS)
+        quantity = rng.randrange(1, 20)
+        self.bag[item_id] += quantity
+        num = self.bag[item_id]
+        slot_id = self.bag_items.index(item_id)
+        self.game("ItemChange@ ProtoName=PickItems start")
+        self.game(f"ItemChange@ Update Id={rng.randrange(1, 99999)} BagNum={num} in PageId=102 SlotId={slot_id}")
+        self.game(f"BagMgr@:Modfy BagItem PageId = 102 SlotId = {slot_id} ConfigBaseId = {item_id} Num = {num}")
+        self.game("ItemChange@ ProtoName=PickItems end")
+        self.counts["pick_blocks"] += 1
+        key = str(item_id)
+        self.drops[key] = self.drops.get(key, 0) + quantity
+
+    def price_search(self):
+        rng = self.rng
+        self.syn_id += 1
+        item_id = rng.choice(ITEMS[1:])
+        base = rng.uniform(0.05, 50)
+        self.game(f"----Socket RecvMessage STT----XchgSearchPrice----SynId = {self.syn_id}")
+        self.lines.append(f"{self.prefix()}{GAME_PREFIX}")
+        self.lines += ["+errCode", f"+prices+1+unitPrices+1 [{base:.11f}]"]
+        self.lines += [f"|      | |          +{index} [{base * (1 + index / 1000):.11f}]" for index in range(2, 101)]
+        self.lines.append("|      | +currency [100300]")
+        self.game("----Socket RecvMessage End----")
+        if rng.random() < 0.5:
+            self.lines.append(f"XchgSearchPrice----SynId = {self.syn_id} +refer [{item_id}]")
+        else:
+            self.game(f"----Socket SendMessage STT----XchgSearchPrice----SynId = {self.syn_id}")
+            self.lines.append(f"{self.prefix()}{GAME_PREFIX}")
+            self.lines.append(f"+filters+1+refer [{item_id}]")
+            self.game("----Socket SendMessage End----")
+        self.counts["price_searches"] += 1
+
+    def drop_items(self):
+        """+DropItems structured block (format cũ, đọc bằng scanned_log + convert_from_log_structure)"""
+        rng = self.rng
+        self.game("----Socket RecvMessage STT----DropItems")
+        for index in range(1, self.mix.drop_items_per_block + 1):
+            item_id = rng.choice(ITEMS)
+            self.lines += [
+                f"+DropItems+{index}+item+BaseId [{item_id}]",
+                f"|          +Num [{rng.randrange(1, 50)}]",
+                f"|          +Picked [{'true' if rng.random() < 0.7 else 'false'}]",
+                f"|          +SpecialInfo+BaseId [{item_id}]",
+                f"|          |           +Num [{rng.randrange(1, 50)}]",
+                f"+DropItems+{index}+Pos+X [{rng.randrange(-5000, 5000)}]",
+                f"|                  +Y [{rng.randrange(-5000, 5000)}]",
+            ]
+        self.game("----Socket RecvMessage End----")
+        self.counts["drop_item_blocks"] += 1
+
+    def game_map(self):
+        rng = self.rng
+        mix = self.mix
+        map_index = self.counts["maps"]
+        if map_index == 0 or (mix.init_bag_every and map_index % mix.init_bag_every == 0):
+            self.init_bag()
+        scene = rng.choice(MAP_SCENES)
+        self.game(f"PageApplyBase@ _UpdateGameEnd: LastSceneName = {HIDEOUT_SCENE} NextSceneName = {scene}")
+        low, high = mix.picks_per_map
+        events = ["pick"] * rng.randint(low, high) + ["drop_items"] * mix.drop_item_blocks_per_map
+        rng.shuffle(events)
+        for event in events:
+            self.noise()
+            getattr(self, event)()
+        self.noise()
+        self.game(f"PageApplyBase@ _UpdateGameEnd: LastSceneName = {scene} NextSceneName = {HIDEOUT_SCENE}")
+        for _ in range(mix.price_searches_per_map):
+            self.noise()
+            self.price_search()
+        self.counts["maps"] += 1
+
+    def take(self) -> str:
+        text = "\n".join(self.lines) + "\n"
+        self.lines = []
+        return text
+
+
+def iter_log_chunks(size_bytes: int, seed: int = 1, mix: Optional[LogMix] = None,
+                    stats: Optional[dict] = None) -> Iterator[str]:
+    """
+    Sinh log theo từng map tới khi đạt ít nhất size_bytes (UTF-8)
+
+    Args:
+        size_bytes: Kích thước tối thiểu
+        seed: Seed của random
+        mix: Tỷ lệ các loại event (mặc định: LogMix())
+        stats: dict nhận thống kê GeneratedLog (key "log") khi sinh xong
+
+    Yields:
+        str: Các dòng của một map (kết thúc bằng '\\n')
+    """
+    writer = _Writer(seed, mix or LogMix())
+    total = 0
+    while total < size_bytes:
+        writer.game_map()
+        chunk = writer.take()
+        total += len(chunk.encode("utf-8"))
+        yield chunk
+    if stats is not None:
+        stats["log"] = GeneratedLog(bytes=total, drops=dict(writer.drops), **writer.counts)
+
+
+def build_log_text(size_bytes: int, seed: int = 1, mix: Optional[LogMix] = None) -> Tuple[str, GeneratedLog]:
+    """
+    Log trong RAM
+
+    Returns:
+        Tuple[str, GeneratedLog]: Log text và thống kê
+    """
+    stats = {}
+    text = "".join(iter_log_chunks(size_bytes, seed, mix, stats))
+    return text, stats["log"]
+
+
+def generate_log(path: str, size_bytes: int, seed: int = 1, mix: Optional[LogMix] = None) -> GeneratedLog:
+    """
+    Ghi log ra file (từng map một, RAM không tăng theo kích thước)
+
+    Returns:
+        GeneratedLog
+    """
+    stats = {}
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for chunk in iter_log_chunks(size_bytes, seed, mix, stats):
+            f.write(chunk)
+    return stats["log"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=float, default=100, help="Kích thước log (MB), 1 tới 1024")
+    parser.add_argument("--out", default="UE_game.log", help="File output")
+    parser.add_argument("--seed", type=int, default=1)
+    defaults = LogMix()
+    parser.add_argument("--picks", default="%d,%d" % defaults.picks_per_map, help="PickItems mỗi map: min,max")
+    parser.add_argument("--noise", default="%d,%d" % defaults.noise_lines, help="Dòng noise giữa 2 event: min,max")
+    parser.add_argument("--init-bag-every", type=int, default=defaults.init_bag_every)
+    parser.add_argument("--init-bag-slots", type=int, default=defaults.init_bag_slots)
+    parser.add_argument("--price-searches", type=int, default=defaults.price_searches_per_map)
+    parser.add_argument("--drop-item-blocks", type=int, default=defaults.drop_item_blocks_per_map)
+    parser.add_argument("--drop-items", type=int, default=defaults.drop_items_per_block)
+    args = parser.parse_args()
+
+    mix = LogMix(
+        picks_per_map=tuple(int(value) for value in args.picks.split(",")),
+        noise_lines=tuple(int(value) for value in args.noise.split(",")),
+        init_bag_every=args.init_bag_every,
+        init_bag_slots=args.init_bag_slots,
+        price_searches_per_map=args.price_searches,
+        drop_item_blocks_per_map=args.drop_item_blocks,
+        drop_items_per_block=args.drop_items,
+    )
+    started = time.perf_counter()
+    generated = generate_log(args.out, int(args.size * 1024 * 1024), args.seed, mix)
+    elapsed = time.perf_counter() - started
+    print(f"{args.out}: {generated.bytes / (1024 * 1024):.1f} MB in {elapsed:.1f}s, {generated.maps} maps, "
+          f"{generated.pick_blocks} picks, {generated.price_searches} price searches, "
+          f"{generated.init_bag_dumps} init bag dumps, {generated.drop_item_blocks} drop item blocks")
+
+
+if __name__ == "__main__":
+    main()
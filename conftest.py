@@ -0,0 +1,57 @@
+"""
+Fixtures dùng chung cho các tests ở thư mục gốc
+
+Mục đích:
+    work_dir (autouse): mỗi test chạy trong thư mục tạm (logger.txt, log/*, price_store.db...
+    không ghi vào repo, file log được set_log_file() vào thư mục tạm), state của app về giá trị ban đầu, và mọi object dùng chung của
+    process (writers, profit ledger, price store, price history, price search scanner) được
+    đóng trước và sau test, để không giữ đường dẫn / cache của test khác.
+
+    Test file cần thêm setup / teardown riêng thì định nghĩa lại work_dir nhận work_dir:
+        @pytest.fixture(autouse=True)
+        def work_dir(work_dir):
+            metrics.reset_metrics()
+            yield work_dir
+            metrics.reset_metrics()
+"""
+import pytest
+
+from app import state
+from app.session_state import SessionState
+from core import drop_handler
+from core.logger import get_log_file, LOG_FILE, set_log_file
+from repositories.append_writer import close_append_writer
+from services import price_service
+from services.bag_snapshot import close_bag_snapshot_writer
+from services.log_scan_service import DropScanner
+from services.price_history import reset_price_history
+from services.price_store import close_price_store
+from services.profit_ledger import close_profit_ledger
+
+
+def close_shared_objects():
+    """Đóng các object dùng chung của process (lần dùng sau sẽ mở lại trong thư mục hiện tại)"""
+    close_bag_snapshot_writer()
+    close_append_writer()
+    close_profit_ledger()
+    close_price_store()
+    reset_price_history()
+    price_service.price_search_scanner.reset()
+
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    previous_log_file = get_log_file()
+    monkeypatch.chdir(tmp_path)
+    set_log_file(tmp_path / LOG_FILE)
+    monkeypatch.setattr(state, "bag_items", {})
+    monkeypatch.setattr(state, "session", SessionState())
+    monkeypatch.setattr(state, "root", None)
+    monkeypatch.setattr(drop_handler, "config_data", {})
+    monkeypatch.setattr(drop_handler, "pending_items", {})
+    monkeypatch.setattr(drop_handler, "previous_item_quantities", {})
+    monkeypatch.setattr(drop_handler, "drop_scanner", DropScanner())
+    close_shared_objects()
+    yield tmp_path
+    close_shared_objects()
+    set_log_file(previous_log_file)
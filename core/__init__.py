@@ -4,12 +4,25 @@ Core Business Logic Modules
 
 This package contains all core business logic:
 - log_parser: Log parsing utilities
+- log_patterns: Regex compile sẵn để lấy fields của PickItems / InitBagData lines
 - drop_handler: Drop item handling and statistics
 - price_handler: Price information handling
+- log_tailer: Event-driven log file tailing (inotify / adaptive polling)
+- metrics: Timers (HDR-style histograms) và counters của pipeline
+- profiler: Profiling bật / tắt lúc chạy (cProfile, sampling, tracemalloc)
+
+Note:
+    Submodules được import lazy. drop_handler/price_handler import services, mà services
+    lại import core.logger / core.log_parser, nên import eager ở đây gây circular import
+    khi services được import trước core.
 """
-from . import log_parser
-from . import drop_handler
-from . import price_handler
+import importlib
+
+__all__ = ['log_parser', 'log_patterns', 'drop_handler', 'price_handler', 'log_tailer', 'metrics', 'profiler']
 
-__all__ = ['log_parser', 'drop_handler', 'price_handler']
 
+def __getattr__(name):
+    """Lazy import submodules khi được truy cập lần đầu"""
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
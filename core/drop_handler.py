@@ -11,205 +11,153 @@ Mục đích:
 Tác dụng:
     - Theo dõi trạng thái vào/ra map
     - Parse và xử lý drop items từ log
-    - Cập nhật statistics (drop_list, income, etc.)
-    - Ghi log drops vào file log/drop.txt để theo dõi
+    - Cập nhật statistics (drop_list, income, etc.) trong state.session (app.session_state),
+      qua methods có lock để UI đọc snapshot nhất quán
+    - Ghi log drops vào file log/drop.txt để theo dõi (qua repositories.append_writer,
+      thread parse không chờ disk I/O)
+    - Lưu state.bag_items xuống log/bag_log.json qua services.bag_snapshot (gộp các lần ghi)
 
 Các function chính:
     - deal_drop(): Xử lý drop data và cập nhật statistics
     - deal_change(): Phát hiện map changes và trigger drop processing
+    - deal_change_events(): Giống deal_change() nhưng nhận LogEvent đã tokenize
+    - export_session() / restore_session(): Lưu/khôi phục statistics của session (checkpoint)
 
 Global variables:
-    - drop_list: Dictionary lưu drops của map hiện tại
-    - drop_list_all: Dictionary lưu tất cả drops
-    - income: Giá trị items map hiện tại
-    - income_all: Tổng giá trị items
     - pending_items: Queue các items chưa có trong local database
+    - previous_item_quantities: Số lượng items khi vào map (chỉ thread đọc log dùng)
+    - drop_scanner: PickItems block đang mở giữa các lần đọc log
+
+Note:
+    drop_list, drop_list_all, income, income_all nằm trong state.session
+    (đọc qua state.session.snapshot()), không còn là globals của module này.
 """
 import time
-import json
 import os
 from datetime import datetime
-from .log_parser import convert_from_log_structure, scanned_log
-from .logger import log_debug
-from services.log_scan_service import scan_drop_log, scan_init_bag
+from .log_parser import (
+    convert_from_log_structure,
+    picked_drop_items,
+    scanned_log,
+    tokenize_log,
+    EVENT_INIT_BAG,
+    EVENT_MAP_ENTER,
+    EVENT_MAP_EXIT,
+    PICK_EVENT_KINDS
+)
+from .logger import log_debug, log_info, log_error, is_enabled, DEBUG
+from . import metrics
+from .profiler import map_boundary
+from services.log_scan_service import DropScanner, scan_init_bag_events, DROP_LOG_PATH
+from services.item_catalog import get_item_catalog
+from services.price_store import get_price_store
+from services.bag_snapshot import mark_bag_dirty, flush_bag_snapshot
+from services.profit_ledger import get_profit_ledger
+from repositories.append_writer import get_append_writer
 from app import state
+from app.ui_scheduler import request_ui_refresh
+
 
+DROP_TXT_PATH = os.path.join("log", "drop.txt")
+START_MAP_MARKER = "==========================START MAP================\n"
+END_MAP_MARKER = "==========================END MAP================\n"
 
 # Global state variables (will be initialized in main)
 pending_items = {}
 exclude_list = []
-drop_list = {}
-drop_list_all = {}
-income = 0
-income_all = 0
 config_data = {}
 # Track số lượng items trước đó trong map (để tính chênh lệch khi nhặt)
 previous_item_quantities = {}  # {item_id: quantity}
+# PickItems block đang mở được giữ lại giữa các lần đọc log (block có thể bị cắt giữa 2 chunk)
+drop_scanner = DropScanner()
 
 
 def deal_drop(drop_data, item_id_table, price_table):
-    """Update drop statistics"""
-    global income, income_all, drop_list, drop_list_all, config_data, pending_items, exclude_list
-    
-    def invoke_drop_item_processing(item_data, item_key):
-        """
-        Xử lý một drop item đơn lẻ từ parsed log data (format cũ)
-        
-        Flow xử lý:
-        1. Kiểm tra item đã được nhặt (Picked flag)
-        2. Extract BaseId và Num từ item_data (có thể từ SpecialInfo)
-        3. Convert item ID sang name từ item_id_table
-        4. Nếu không có trong local, thêm vào pending_items queue
-        5. Kiểm tra exclude list
-        6. Cập nhật drop_list và drop_list_all
-        7. Tính giá và cập nhật income
-        8. Ghi log vào log/drop.txt
-        
-        Args:
-            item_data (dict): Dictionary chứa thông tin item từ parsed log
-            item_key (str): Key/path của item trong nested structure
-        
-        Note:
-            - Function này xử lý format log cũ (có thể không còn được dùng)
-            - Format mới sử dụng scan_drop_log() trong deal_change()
-        """
-        global income, income_all, drop_list, drop_list_all, exclude_list, pending_items, config_data
-        
-        # Check if picked (Picked may be at root level or inside item)
-        picked = False
-        print(item_data)
-        if "Picked" in item_data:
-            picked = item_data["Picked"]
-        elif isinstance(item_data.get("item"), dict) and "Picked" in item_data["item"]:
-            picked = item_data["item"]["Picked"]
-
-        if not picked:
-            return
-
-        # Process SpecialInfo (nested item information)
-        # SpecialInfo có thể chứa BaseId và Num thực tế của item
-        item_info = item_data.get("item", {})
-        if isinstance(item_info, dict) and "SpecialInfo" in item_info:
-            special_info = item_info["SpecialInfo"]
-            if isinstance(special_info, dict):
-                if "BaseId" in special_info:
-                    item_info["BaseId"] = special_info["BaseId"]
-                if "Num" in special_info:
-                    item_info["Num"] = special_info["Num"]
-
-        # Get base ID and quantity
-        base_id = item_info.get("BaseId")
-        num = item_info.get("Num", 0)
-
-        if base_id is None:
-            return
-
-        # Convert ID to name
-        base_id_str = str(base_id)
-        
-        # Log khi nhặt được item
-        log_debug(f"drop item {base_id_str}")
-        item_name = base_id_str  # Default to using ID as name
+    """
+    Update drop statistics từ parsed +DropItems block (format cũ)
 
-        # Lấy name từ item_id_table, nếu không có thì thêm vào pending queue
-        if base_id_str in item_id_table:
-            item_name = item_id_table[base_id_str]
-        else:
-            # No local data, add to pending queue để fetch từ server sau
-            global pending_items
-            if base_id_str not in pending_items:
-                print(f"[Network] ID {base_id_str} not found locally, starting fetch")
-                pending_items[base_id_str] = num
-            else:
-                pending_items[base_id_str] += num
-                print(f"[Network] ID {base_id_str} already in queue, accumulated: {pending_items[base_id_str]}")
-            return
+    Args:
+        drop_data (dict): Kết quả convert_from_log_structure() của block
+        item_id_table (dict): {item_id_str: item_name}
+        price_table (dict): {item_id_str: price}
 
-        # Check if item name is empty
-        if not item_name.strip():
-            return
+    Note:
+        - Chỉ xử lý items có Picked = true (đã nhặt), xem picked_drop_items()
+        - Format mới sử dụng scan_drop_log() trong deal_change()
+    """
+    for item in picked_drop_items(drop_data):
+        _record_drop_item(item.base_id, item.num, item_id_table, price_table)
 
-        # Check if in exclude list (items không muốn track)
-        global exclude_list
-        if exclude_list and item_name in exclude_list:
-            print(f"Excluded: {item_name} x{num}")
-            return
-        print(base_id)
-        
-        # Count quantity: Cập nhật drop_list (map hiện tại) và drop_list_all (tổng)
-        if base_id not in drop_list:
-            drop_list[base_id] = 0
-        drop_list[base_id] += num
 
-        if base_id not in drop_list_all:
-            drop_list_all[base_id] = 0
-        drop_list_all[base_id] += num
+def _record_drop_item(base_id, num, item_id_table, price_table):
+    """
+    Xử lý một drop item đã nhặt của deal_drop() (format cũ)
 
-        # Calculate price: Lấy giá từ price_table, áp dụng tax nếu có
-        price = 0.0
-        base_id_str = str(base_id)
-        if base_id_str == "100300":
-            # Flame Elementium là tiền tệ chính: 1 Flame Elementium = 1 profit
-            # Price hiển thị = 0.0 nhưng tính trực tiếp số lượng vào profit
-            price = 0.0  # Hiển thị 0.0 trong log
-            income += num  # Tính trực tiếp số lượng vào profit
-            income_all += num
-        elif base_id_str in price_table:
-            price = price_table[base_id_str]
-            if config_data.get("tax", 0) == 1:
-                price = price * 0.875  # Tax 12.5%
-            income += price * num
-            income_all += price * num
+    Flow xử lý:
+    1. Convert item ID sang name từ item_id_table
+    2. Nếu không có trong local, cộng số lượng vào pending_items ({item_id_str: num}) rồi bỏ qua
+    3. Kiểm tra exclude list
+    4. Cập nhật drop_list và drop_list_all
+    5. Tính giá và cập nhật income
+    6. Ghi log vào log/drop.txt
 
-        log_debug(f"drop item {item_name} x{num} ({round(price, 3)}/each)")
-        # Record to file: Ghi log vào log/drop.txt
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_line = f"[{timestamp}] Drop: {item_name} x{num} ({round(price, 3)}/each)\n"
-        drop_log_path = os.path.join("log", "drop.txt")
-        os.makedirs("log", exist_ok=True)
-        with open(drop_log_path, "a", encoding="utf-8") as f:
-            f.write(log_line)
-
-    def invoke_drop_items_recursive(data, path=""):
-        """
-        Recursively scan và xử lý tất cả dropped items từ nested dictionary structure
-        
-        Flow:
-        1. Duyệt qua tất cả keys trong dictionary
-        2. Tìm các node có chứa "item" key (có thể là drop item)
-        3. Kiểm tra có "Picked" marker không (đã nhặt)
-        4. Nếu có Picked, gọi invoke_drop_item_processing() để xử lý
-        5. Tiếp tục đệ quy vào các child nodes để tìm items khác
-        
-        Args:
-            data (dict): Nested dictionary chứa drop items structure từ parsed log
-            path (str): Current path trong nested structure (dùng để debug/tracking)
-        
-        Note:
-            - Function này duyệt recursive qua toàn bộ nested structure
-            - Chỉ xử lý items có "Picked" = True (đã nhặt)
-            - Format log cũ sử dụng nested structure với "item" và "Picked" markers
-        """
-        for key, value in data.items():
-            current_path = f"{path}.{key}" if path else key
+    Args:
+        base_id: BaseId của item (SpecialInfo đã được ưu tiên)
+        num: Số lượng
+        item_id_table (dict): {item_id_str: item_name}
+        price_table (dict): {item_id_str: price}
+    """
+    # Convert ID to name
+    base_id_str = str(base_id)
+    
+    # Log khi nhặt được item
+    log_debug(f"drop item {base_id_str}")
+    item_name = base_id_str  # Default to using ID as name
 
-            # Check if contains drop data: Tìm node có chứa "item" key
-            if isinstance(value, dict) and "item" in value:
-                # Check if has Picked marker: Kiểm tra item đã được nhặt chưa
-                # Picked có thể ở root level hoặc trong item dict
-                has_picked = ("Picked" in value) or \
-                             (isinstance(value["item"], dict) and "Picked" in value["item"])
+    # Lấy name từ item_id_table, nếu không có thì thêm vào pending queue
+    if base_id_str in item_id_table:
+        item_name = item_id_table[base_id_str]
+    else:
+        # No local data, add to pending queue để fetch từ server sau
+        if base_id_str not in pending_items:
+            print(f"[Network] ID {base_id_str} not found locally, starting fetch")
+            pending_items[base_id_str] = num
+        else:
+            pending_items[base_id_str] += num
+            print(f"[Network] ID {base_id_str} already in queue, accumulated: {pending_items[base_id_str]}")
+        return
+
+    # Check if item name is empty
+    if not item_name.strip():
+        return
+
+    # Check if in exclude list (items không muốn track)
+    if exclude_list and item_name in exclude_list:
+        print(f"Excluded: {item_name} x{num}")
+        return
 
-                if has_picked:
-                    # Item đã được nhặt, xử lý nó
-                    invoke_drop_item_processing(value, current_path)
+    # Calculate price: Lấy giá từ price_table, áp dụng tax nếu có
+    price = 0.0
+    value = 0.0
+    if base_id_str == "100300":
+        # Flame Elementium là tiền tệ chính: 1 Flame Elementium = 1 profit
+        # Price hiển thị = 0.0 nhưng tính trực tiếp số lượng vào profit
+        price = 0.0  # Hiển thị 0.0 trong log
+        value = num  # Tính trực tiếp số lượng vào profit
+    elif base_id_str in price_table:
+        price = price_table[base_id_str]
+        if config_data.get("tax", 0) == 1:
+            price = price * 0.875  # Tax 12.5%
+        value = price * num
 
-            # Recursively process child items: Tiếp tục đệ quy vào các child nodes
-            if isinstance(value, dict):
-                invoke_drop_items_recursive(value, current_path)
+    # Count quantity: Cập nhật drop_list (map hiện tại), drop_list_all (tổng) và income
+    state.session.add_drop(base_id, num, value)
 
-    # Start recursive processing
-    invoke_drop_items_recursive(drop_data)
+    log_debug(f"drop item {item_name} x{num} ({round(price, 3)}/each)")
+    # Record to file: Ghi log vào log/drop.txt
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_line = f"[{timestamp}] Drop: {item_name} x{num} ({round(price, 3)}/each)\n"
+    get_append_writer().write(DROP_TXT_PATH, log_line)
 
 
 def deal_change(changed_text):
@@ -218,10 +166,10 @@ def deal_change(changed_text):
     
     Tác dụng chính:
     1. Phát hiện vào/ra map: Cập nhật is_in_map, reset drop_list, tính chi phí map
-    2. Load dữ liệu items: Đọc id_table.json (name, type) và search_price_log.json (price)
+    2. Load dữ liệu items: Tên từ item catalog (id_table.json), price từ price store
     3. Scan và parse drops: Tìm drop blocks trong log, parse thành JSON
     4. Xử lý drops: Cập nhật drop_list, income, ghi vào log/drop.txt
-    6. Tính profit: Ghi profit vào log/profit_log.json khi ra map
+    6. Tính profit: Ghi profit vào log/profit_ledger.jsonl khi ra map
     5. Cập nhật UI: Refresh UI khi có drops mới
     
     Args:
@@ -229,283 +177,255 @@ def deal_change(changed_text):
     
     Note: This function uses state from app.state module, không import index để tránh circular import
     """
-    global drop_list, income, drop_list_all, income_all, config_data, previous_item_quantities
+    deal_change_events(tokenize_log(changed_text))
+
+
+def deal_change_events(events):
+    """
+    Giống deal_change() nhưng nhận LogEvent đã tokenize sẵn
     
-    # Detect map entry
-    if "PageApplyBase@ _UpdateGameEnd: LastSceneName = World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200' NextSceneName = World'/Game/Art/Maps" in changed_text:
-        # DEBUG: Log state.bag_items trước khi vào map để kiểm tra data
-        log_debug(f"BEFORE MAP ENTRY - state.bag_items count: {len(state.bag_items)}, items: {list(state.bag_items.keys())[:10] if state.bag_items else 'empty'}")
-        if state.bag_items:
-            # Log một vài items để debug
-            sample_items = dict(list(state.bag_items.items())[:5])
-            for item_id, item_data in sample_items.items():
-                log_debug(f"  - {item_id}: {item_data.get('name', 'N/A')} x{item_data.get('num', 0)}")
-        
-        state.is_in_map = True
-        drop_list = {}
-        previous_item_quantities = {}  # Reset tracking khi vào map mới
-        
-        # KHÔNG reset state.bag_items ở đây - giữ lại data từ bag_log.json làm cache
-        # Nếu scan_init_bag() tìm được data mới, sẽ update vào state.bag_items
-        # Nếu không tìm được, vẫn dùng data từ bag_log.json làm baseline
-        log_debug(f"KEEPING bag_items from cache, count: {len(state.bag_items)}")
-        
-        # Tính chi phí map và trừ vào income
-        map_cost = state.root.cost if state.root else 0
-        income = -map_cost
-        income_all += -map_cost
-        # Profit = income (đã trừ cost)
-        state.profit = income
-        state.profit_all += -map_cost  # Trừ cost từ profit_all
-        state.map_count += 1
-        
-        # Lưu thời gian bắt đầu map để tính duration
-        state.map_start_time = time.time()
-        
-        # Ghi marker "START MAP" vào log/drop_log.txt
-        try:
-            os.makedirs("log", exist_ok=True)
-            start_map_marker = "==========================START MAP================\n"
-            drop_log_path = os.path.join("log", "drop_log.txt")
-            with open(drop_log_path, "a", encoding="utf-8") as f:
-                f.write(start_map_marker)
-        except Exception as e:
-            log_debug(f"error writing START MAP marker: {e}")
-        
-        # QUAN TRỌNG: Scan init bag ngay khi vào map để update baseline cho state.bag_items
-        # Nếu track được event init bag của user thì sẽ update vào state.bag_items
-        # Nếu không track được, vẫn dùng data từ bag_log.json (cache) làm baseline
-        try:
-            init_bag_data = scan_init_bag(changed_text)
-            log_debug(f"AFTER scan_init_bag - init_bag_data count: {len(init_bag_data) if init_bag_data else 0}, state.bag_items count: {len(state.bag_items)}")
-            if init_bag_data:
-                # scan_init_bag đã tự động update state.bag_items với baseline mới từ log
-                # Chỉ cần set previous_item_quantities để tương thích (nếu cần)
-                for item_id_str, bag_info in init_bag_data.items():
-                    item_id_int = int(item_id_str)
-                    previous_item_quantities[item_id_int] = bag_info.get("num", 0)
-                log_debug(f"Updated state.bag_items from init bag event (new baseline)")
-                
-                # Log bag items vào bag_log.json khi vào map (baseline mới)
-                try:
-                    bag_log_path = os.path.join("log", "bag_log.json")
-                    os.makedirs("log", exist_ok=True)
-                    bag_current = {
-                        "timestamp": round(time.time()),
-                        "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "items": state.bag_items
-                    }
-                    with open(bag_log_path, 'w', encoding="utf-8") as f:
-                        json.dump(bag_current, f, indent=4, ensure_ascii=False)
-                except Exception as e:
-                    log_debug(f"error writing to bag_log.json on map entry: {e}")
-                
-                log_debug(f"Map entry: initialized {len(init_bag_data)} items from bag (baseline set in state.bag_items)")
-                # DEBUG: Log state.bag_items sau khi scan để verify
-                if state.bag_items:
-                    sample_items = dict(list(state.bag_items.items())[:5])
-                    log_debug(f"  Sample bag_items after scan:")
-                    for item_id, item_data in sample_items.items():
-                        log_debug(f"    - {item_id}: {item_data.get('name', 'N/A')} x{item_data.get('num', 0)}")
-            else:
-                # Không track được init bag event, dùng data từ bag_log.json (cache)
-                # Set previous_item_quantities từ state.bag_items hiện tại
-                for item_id_str, item_data in state.bag_items.items():
-                    item_id_int = int(item_id_str)
-                    previous_item_quantities[item_id_int] = item_data.get("num", 0)
-                log_debug(f"Using cached bag_items from bag_log.json as baseline (no init bag event found)")
-                log_debug(f"  Cached items count: {len(state.bag_items)}")
-        except Exception as e:
-            log_debug(f"error scanning init bag on map entry: {e}")
-        
-    # Detect map exit
-    if "NextSceneName = World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200'" in changed_text:
-        state.is_in_map = False
-        map_duration = time.time() - state.t
-        state.total_time += map_duration
-        
-        # Tính profit và ghi vào profit_log.json
-        # Profit = income (đã bao gồm cả cost được trừ khi vào map)
-        map_cost = state.root.cost if state.root else 0
-        map_profit = income  # income đã là profit (income - cost)
-        # Cập nhật profit vào state
-        state.profit = income
-        state.profit_all += map_profit  # Cộng profit của map này vào tổng (đã trừ cost ở đầu)
-        
-        # Tính toán và ghi tóm tắt drops vào log/drop_log.txt
-        try:
-            os.makedirs("log", exist_ok=True)
-            
-            # Load id_table và price_table để tính tóm tắt
-            summary_id_table = {}
-            summary_price_table = {}
+    Events được xử lý theo đúng thứ tự trong log: drops trước một scene change
+    thuộc về map cũ, drops sau thuộc về map mới.
+    
+    Args:
+        events (List[LogEvent]): Events từ tokenize_log(), cần ít nhất các kinds
+            SCENE_EVENT_KINDS, PICK_EVENT_KINDS và EVENT_INIT_BAG
+    """
+    segment = []
+    for event in events:
+        if event.kind == EVENT_MAP_ENTER:
+            _handle_drop_events(segment)
+            segment = []
+            _enter_map()
+        elif event.kind == EVENT_MAP_EXIT:
+            _handle_drop_events(segment)
+            segment = []
+            _exit_map()
+        elif event.kind in PICK_EVENT_KINDS or event.kind == EVENT_INIT_BAG:
+            segment.append(event)
+    _handle_drop_events(segment)
+
+
+def export_session():
+    """
+    Xuất statistics của session hiện tại dưới dạng JSON-serializable (dùng cho checkpoint)
+    
+    Returns:
+        dict: drop_list, drop_list_all, income, profit, map_count, thời gian..., và state.bag_items
+            (baseline để tính số lượng drop, phải khớp với offset của checkpoint; bag_log.json
+            được ghi theo lịch riêng nên không dùng được làm baseline khi resume)
+    """
+    session = state.session.export()
+    session["previous_item_quantities"] = {
+        str(item_id): num for item_id, num in previous_item_quantities.items()
+    }
+    session["bag_items"] = {item_id: dict(item_data) for item_id, item_data in state.bag_items.items()}
+    return session
+
+
+def restore_session(session):
+    """
+    Khôi phục statistics từ export_session() của lần chạy trước
+    
+    Args:
+        session (dict): Kết quả export_session()
+    """
+    previous_item_quantities.clear()
+    previous_item_quantities.update(
+        {int(item_id): num for item_id, num in session.get("previous_item_quantities", {}).items()}
+    )
+    # Baseline túi đồ cùng thời điểm với checkpoint (thay cho bag_log.json đã load lúc start)
+    if "bag_items" in session:
+        state.bag_items = session["bag_items"]
+        mark_bag_dirty()
+    # Thời gian app tắt không tính vào map đang chạy
+    state.session.restore(session)
+    restored = state.session.snapshot()
+    log_debug(f"session restored: map_count={restored.map_count}, income_all={round(restored.income_all, 2)}, "
+              f"drops={len(restored.drop_list_all)}")
+
+
+
+def _map_cost():
+    """Chi phí mỗi map: từ cửa sổ chính (Settings), hoặc config cost_per_map khi chạy headless"""
+    if state.root:
+        return state.root.cost
+    return config_data.get("cost_per_map", 0)
+
+
+def _enter_map():
+    """Vào map mới: reset drop_list, trừ chi phí map, ghi marker START MAP"""
+    global previous_item_quantities
+    
+    # DEBUG: Log state.bag_items trước khi vào map để kiểm tra data
+    # (bỏ qua cả phần lấy sample khi DEBUG tắt)
+    if is_enabled(DEBUG):
+        log_debug("BEFORE MAP ENTRY - state.bag_items count: %s, items: %s",
+                  len(state.bag_items), list(state.bag_items)[:10] if state.bag_items else 'empty')
+        for item_id, item_data in list(state.bag_items.items())[:5]:
+            log_debug("  - %s: %s x%s", item_id, item_data.get('name', 'N/A'), item_data.get('num', 0))
+    
+    previous_item_quantities = {}  # Reset tracking khi vào map mới
+    
+    # KHÔNG reset state.bag_items ở đây - giữ lại data từ bag_log.json làm cache
+    # Nếu scan_init_bag() tìm được data mới, sẽ update vào state.bag_items
+    # Nếu không tìm được, vẫn dùng data từ bag_log.json làm baseline
+    log_debug("KEEPING bag_items from cache, count: %s", len(state.bag_items))
+    
+    # Reset drops/income của map, trừ chi phí map vào income và profit_all,
+    # lưu thời gian bắt đầu map để tính duration
+    map_cost = _map_cost()
+    state.session.enter_map(map_cost)
+    
+    # Ghi marker "START MAP" vào log/drop_log.txt
+    get_append_writer().write(DROP_LOG_PATH, START_MAP_MARKER)
+    # Snapshot bộ nhớ khi profiling mode "memory" được bật (no-op nếu không)
+    map_boundary("enter_map")
+    
+    # Baseline cho state.bag_items: InitBagData events của cùng chunk đã được
+    # scan_init_bag_events() xử lý trước (subscribe trước deal_change_events trong LogEventBus).
+    # Nếu không có init bag event, vẫn dùng data từ bag_log.json (cache) làm baseline
+    for item_id_str, item_data in state.bag_items.items():
+        previous_item_quantities[int(item_id_str)] = item_data.get("num", 0)
+    log_debug("Map entry: baseline set from state.bag_items, count: %s", len(state.bag_items))
+    if state.bag_items and is_enabled(DEBUG):
+        log_debug("  Sample bag_items at map entry:")
+        for item_id, item_data in list(state.bag_items.items())[:5]:
+            log_debug("    - %s: %s x%s", item_id, item_data.get('name', 'N/A'), item_data.get('num', 0))
+
+
+def _exit_map():
+    """Ra map: cộng thời gian, ghi tóm tắt drops, marker END MAP và profit ledger"""
+    # Cộng thời gian map vào total_time, profit của map vào profit_all
+    # (profit = income, đã bao gồm cả cost được trừ khi vào map)
+    now = time.time()
+    finished = state.session.exit_map(now)
+    map_duration = now - (finished.t or now)
+    income = finished.income
+    map_cost = _map_cost()
+    map_profit = income
+    
+    # Tính toán và ghi tóm tắt drops vào log/drop_log.txt
+    writer = get_append_writer()
+    try:
+        # Tên items từ catalog dùng chung, giá từ price store (không đọc file)
+        catalog = get_item_catalog()
+        price_store = get_price_store()
+        
+        # Tính tóm tắt drops từ drop_list
+        drop_summaries = []
+        for item_id_int, quantity in finished.drop_list.items():
+            item_id_str = str(item_id_int)
+            item_name = catalog.name_of(item_id_str)
             
-            try:
-                with open("id_table.json", 'r', encoding="utf-8") as f:
-                    id_table_data = json.load(f)
-                for item_id, item_data in id_table_data.items():
-                    summary_id_table[str(item_id)] = item_data.get("name", f"Item {item_id}")
-            except Exception as e:
-                log_debug(f"error reading id_table.json for summary: {e}")
+            # Tính giá (có tax nếu cần)
+            if item_id_str == "100300":
+                # Flame Elementium là tiền tệ chính: 1 = 1 profit
+                # Price hiển thị = 0.0 nhưng total_value = quantity để sort đúng
+                price = 0.0  # Hiển thị 0.0 trong log
+                total_value = quantity  # Total = số lượng để sort đúng (sẽ hiển thị "=> = quantity")
+            else:
+                price = price_store.price_of(item_id_str)
+                if config_data.get("tax", 0) == 1:
+                    price = price * 0.875  # Tax 12.5%
+                total_value = price * quantity
             
-            try:
-                with open("search_price_log.json", 'r', encoding="utf-8") as f:
-                    price_log = json.load(f)
-                for entry in price_log:
-                    item_id = entry.get("idItem")
-                    price = entry.get("price", 0)
-                    if item_id:
-                        summary_price_table[str(item_id)] = price
-            except Exception as e:
-                log_debug(f"error reading search_price_log.json for summary: {e}")
+            drop_summaries.append({
+                "item_id": item_id_str,
+                "name": item_name,
+                "quantity": quantity,
+                "price": price,
+                "total": total_value
+            })
+        
+        # Sắp xếp theo tổng giá trị giảm dần
+        drop_summaries.sort(key=lambda x: x["total"], reverse=True)
+        
+        # Format và ghi tóm tắt vào log/drop_log.txt
+        summary_lines = []
+        for summary in drop_summaries:
+            # Format currency
+            total_value = summary["total"]
+            price = summary["price"]
+            quantity = summary["quantity"]
+            item_name = summary["name"]
+            item_id_str = summary["item_id"]
             
-            # Tính tóm tắt drops từ drop_list
-            drop_summaries = []
-            for item_id_int, quantity in drop_list.items():
-                item_id_str = str(item_id_int)
-                item_name = summary_id_table.get(item_id_str, f"Item {item_id_str}")
-                
-                # Tính giá (có tax nếu cần)
-                if item_id_str == "100300":
-                    # Flame Elementium là tiền tệ chính: 1 = 1 profit
-                    # Price hiển thị = 0.0 nhưng total_value = quantity để sort đúng
-                    price = 0.0  # Hiển thị 0.0 trong log
-                    total_value = quantity  # Total = số lượng để sort đúng (sẽ hiển thị "=> = quantity")
+            # Đặc biệt cho Flame Elementium: hiển thị "= quantity" thay vì "total: X Fe"
+            if item_id_str == "100300":
+                summary_line = f"Drop: {item_name} x{quantity} (0.0/each), total: 0 Fe => = {quantity}\n"
+            else:
+                if total_value >= 1:
+                    total_str = f"{total_value:.2f} Fe".rstrip('0').rstrip('.')
                 else:
-                    price = summary_price_table.get(item_id_str, 0.0)
-                    if config_data.get("tax", 0) == 1:
-                        price = price * 0.875  # Tax 12.5%
-                    total_value = price * quantity
-                
-                drop_summaries.append({
-                    "item_id": item_id_str,
-                    "name": item_name,
-                    "quantity": quantity,
-                    "price": price,
-                    "total": total_value
-                })
-            
-            # Sắp xếp theo tổng giá trị giảm dần
-            drop_summaries.sort(key=lambda x: x["total"], reverse=True)
-            
-            # Format và ghi tóm tắt vào log/drop_log.txt
-            drop_log_path = os.path.join("log", "drop_log.txt")
-            with open(drop_log_path, "a", encoding="utf-8") as f:
-                for summary in drop_summaries:
-                    # Format currency
-                    total_value = summary["total"]
-                    price = summary["price"]
-                    quantity = summary["quantity"]
-                    item_name = summary["name"]
-                    item_id_str = summary["item_id"]
-                    
-                    # Đặc biệt cho Flame Elementium: hiển thị "= quantity" thay vì "total: X Fe"
-                    if item_id_str == "100300":
-                        summary_line = f"Drop: {item_name} x{quantity} (0.0/each), total: 0 Fe => = {quantity}\n"
-                    else:
-                        if total_value >= 1:
-                            total_str = f"{total_value:.2f} Fe".rstrip('0').rstrip('.')
-                        else:
-                            total_str = f"{total_value:.4f} Fe".rstrip('0').rstrip('.') if total_value > 0 else "0 Fe"
-                        summary_line = f"Drop: {item_name} x{quantity} ({price}/each), total: {total_str}\n"
-                    
-                    f.write(summary_line)
-        except Exception as e:
-            log_debug(f"error writing drop summary: {e}")
-        
-        # Ghi marker "END MAP" vào log/drop_log.txt và log/drop.txt
-        try:
-            os.makedirs("log", exist_ok=True)
-            end_map_marker = "==========================END MAP================\n"
-            
-            # Ghi vào log/drop_log.txt
-            drop_log_path = os.path.join("log", "drop_log.txt")
-            with open(drop_log_path, "a", encoding="utf-8") as f:
-                f.write(end_map_marker)
-            
-            # Ghi vào log/drop.txt
-            drop_txt_path = os.path.join("log", "drop.txt")
-            with open(drop_txt_path, "a", encoding="utf-8") as f:
-                f.write(end_map_marker)
-        except Exception as e:
-            log_debug(f"error writing END MAP marker: {e}")
-        
-        # Ghi profit log
-        try:
-            profit_log_path = os.path.join("log", "profit_log.json")
-            os.makedirs("log", exist_ok=True)
-            
-            # Đọc profit log hiện tại hoặc tạo mới
-            try:
-                with open(profit_log_path, 'r', encoding="utf-8") as f:
-                    profit_log = json.load(f)
-            except FileNotFoundError:
-                profit_log = []
+                    total_str = f"{total_value:.4f} Fe".rstrip('0').rstrip('.') if total_value > 0 else "0 Fe"
+                summary_line = f"Drop: {item_name} x{quantity} ({price}/each), total: {total_str}\n"
             
-            # Tạo entry mới
-            profit_entry = {
-                "timestamp": round(time.time()),
-                "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "map_count": state.map_count,
-                "income": round(income, 2),
-                "cost": round(map_cost, 2),
-                "profit": round(map_profit, 2),
-                "duration_seconds": round(map_duration, 2),
-                "duration_formatted": f"{int(map_duration // 60)}m{int(map_duration % 60)}s"
-            }
-            
-            profit_log.append(profit_entry)
-            
-            # Ghi lại file
-            with open(profit_log_path, 'w', encoding="utf-8") as f:
-                json.dump(profit_log, f, indent=4, ensure_ascii=False)
-            
-            log_debug(f"profit logged: map #{state.map_count}, profit={round(map_profit, 2)}, duration={round(map_duration, 2)}s")
-        except Exception as e:
-            log_debug(f"error writing to profit_log.json: {e}")
+            summary_lines.append(summary_line)
+        if summary_lines:
+            writer.write(DROP_LOG_PATH, "".join(summary_lines))
+    except Exception as e:
+        log_error(f"error writing drop summary: {e}")
     
-    # Load item ID and price tables từ id_table.json và search_price_log.json
-    id_table = {}
-    price_table = {}
+    # Ghi marker "END MAP" vào log/drop_log.txt và log/drop.txt, fsync khi writer ghi xong
+    writer.write(DROP_LOG_PATH, END_MAP_MARKER)
+    writer.write(DROP_TXT_PATH, END_MAP_MARKER)
+    writer.flush(fsync=True)
+    flush_bag_snapshot()
     
-    # Load id_table.json để lấy name và type
+    # Ghi profit của map vào ledger (append một dòng, không đọc lại lịch sử)
     try:
-        with open("id_table.json", 'r', encoding="utf-8") as f:
-            id_table_data = json.load(f)
-        for item_id, item_data in id_table_data.items():
-            id_table[str(item_id)] = item_data.get("name", f"Item {item_id}")
+        profit_entry = {
+            "timestamp": round(time.time()),
+            "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "map_count": finished.map_count,
+            "income": round(income, 2),
+            "cost": round(map_cost, 2),
+            "profit": round(map_profit, 2),
+            "duration_seconds": round(map_duration, 2),
+            "duration_formatted": f"{int(map_duration // 60)}m{int(map_duration % 60)}s"
+        }
+        get_profit_ledger().record(profit_entry)
+        
+        log_info(f"profit logged: map #{finished.map_count}, profit={round(map_profit, 2)}, duration={round(map_duration, 2)}s")
     except Exception as e:
-        log_debug(f"error reading id_table.json: {e}")
+        log_error(f"error writing to profit ledger: {e}")
+    map_boundary("exit_map")
+
+
+def _handle_drop_events(events):
+    """
+    Scan drops trong một đoạn events (giữa 2 scene changes) và cập nhật statistics
     
-    # Load search_price_log.json để lấy price
-    try:
-        with open("search_price_log.json", 'r', encoding="utf-8") as f:
-            price_log = json.load(f)
-        for entry in price_log:
-            item_id = entry.get("idItem")
-            price = entry.get("price", 0)
-            if item_id:
-                price_table[str(item_id)] = price
-    except Exception as e:
-        log_debug(f"error reading search_price_log.json: {e}")
+    Args:
+        events (List[LogEvent]): PickItems và InitBagData events
+    """
+    global config_data
+    
+    if not events:
+        return
     
     # QUAN TRỌNG: Scan init bag TRƯỚC KHI scan drops để đảm bảo có baseline
     # Nếu đã vào map nhưng chưa có baseline (state.bag_items rỗng), scan lại
     # Điều này xử lý trường hợp BagMgr@:InitBagData xuất hiện sau khi vào map
-    if state.is_in_map and not state.bag_items:
+    if state.session.is_in_map and not state.bag_items:
         try:
-            init_bag_data = scan_init_bag(changed_text)
+            init_bag_data = scan_init_bag_events(events)
             if init_bag_data:
                 # scan_init_bag đã tự động update state.bag_items với baseline
                 log_debug(f"Late init bag scan: initialized {len(init_bag_data)} items (baseline set)")
         except Exception as e:
-            log_debug(f"error scanning init bag (late): {e}")
+            log_error(f"error scanning init bag (late): {e}")
     
-    # Scan drops từ log theo format mới (PickItems)
-    # Truyền id_table và price_table để ghi name và price vào drop_log.txt
-    drop_items = scan_drop_log(changed_text, id_table=id_table, price_table=price_table)
+    # Scan drops từ log theo format mới (PickItems), resume block đang mở từ chunk trước
+    drop_items = drop_scanner.feed(events)
     if not drop_items:
         return
+    metrics.count("pick_items", len(drop_items))
+    
+    # Tên items lấy từ catalog dùng chung, price từ price store
+    catalog = get_item_catalog()
+    price_store = get_price_store()
     
     # Xử lý từng drop item
     for item in drop_items:
@@ -537,7 +457,7 @@ def deal_change(changed_text):
             previous_quantity = state.bag_items[item_id_str].get("num", 0)
         # Nếu item chưa có trong bag_items, previous_quantity = 0 (item mới không có trong túi ban đầu)
 
-        log_debug(f"previous_quantity: {previous_quantity}, current_quantity: {current_quantity}")
+        log_debug("previous_quantity: %s, current_quantity: %s", previous_quantity, current_quantity)
         # Bước 3: Tính quant drop = current_quantity - previous_quantity
         new_quantity = current_quantity - previous_quantity
         
@@ -546,19 +466,21 @@ def deal_change(changed_text):
             # Vẫn cập nhật quantity mới vào state.bag_items để track số lượng hiện tại
             if item_id_str in state.bag_items:
                 state.bag_items[item_id_str]["num"] = current_quantity
+                mark_bag_dirty()
             continue
         
         # Log khi nhặt được item
         log_debug(f"drop item {item_id_str} x{new_quantity}")
         
-        # Lấy name từ id_table
-        item_name = id_table.get(item_id_str, f"Item {item_id_str}")
+        # Lấy name từ catalog
+        item_name = catalog.name_of(item_id_str)
         
         # Check if in exclude list
         if exclude_list and item_name in exclude_list:
             # Vẫn cập nhật quantity vào bag_items dù bị exclude
             if item_id_str in state.bag_items:
                 state.bag_items[item_id_str]["num"] = current_quantity
+                mark_bag_dirty()
             continue
         
         # QUAN TRỌNG: Cập nhật quantity mới vào state.bag_items sau khi tính drop
@@ -573,64 +495,36 @@ def deal_change(changed_text):
                 "num": current_quantity
             }
         
-        # Log bag items vào bag_log.json sau mỗi drop để track real-time
-        try:
-            bag_log_path = os.path.join("log", "bag_log.json")
-            os.makedirs("log", exist_ok=True)
-            bag_current = {
-                "timestamp": round(time.time()),
-                "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "items": state.bag_items
-            }
-            with open(bag_log_path, 'w', encoding="utf-8") as f:
-                json.dump(bag_current, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            log_debug(f"error writing to bag_log.json after drop: {e}")
-        
-        # Cập nhật drop_list
-        if item_id_int not in drop_list:
-            drop_list[item_id_int] = 0
-        drop_list[item_id_int] += new_quantity
-        
-        if item_id_int not in drop_list_all:
-            drop_list_all[item_id_int] = 0
-        drop_list_all[item_id_int] += new_quantity
+        # bag_log.json được ghi bởi snapshot writer: tối đa một lần mỗi vài giây
+        # (và khi ra map), không ghi lại toàn bộ túi sau mỗi drop
+        mark_bag_dirty()
         
         # Tính giá
         price = 0.0
+        value = 0.0
         if item_id_str == "100300":
             # Flame Elementium là tiền tệ chính: 1 Flame Elementium = 1 profit
             # Price hiển thị = 0.0 nhưng tính trực tiếp số lượng vào profit
             price = 0.0  # Hiển thị 0.0 trong log
-            income += new_quantity  # Tính trực tiếp số lượng vào profit
-            income_all += new_quantity
-        elif item_id_str in price_table:
-            price = price_table[item_id_str]
+            value = new_quantity  # Tính trực tiếp số lượng vào profit
+        elif price_store.get(item_id_str) is not None:
+            price = price_store.price_of(item_id_str)
             if config_data.get("tax", 0) == 1:
                 price = price * 0.875  # Tax 12.5%
-            income += price * new_quantity
-            income_all += price * new_quantity
+            value = price * new_quantity
         
-        # Cập nhật profit = income (vì income đã trừ cost khi vào map)
-        state.profit = income
+        # Cập nhật drop_list, drop_list_all và income (profit = income vì income đã trừ cost khi vào map)
+        state.session.add_drop(item_id_int, new_quantity, value)
+        metrics.count("drops_processed")
         
         # Ghi vào log/drop.txt
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_line = f"[{timestamp}] Drop: {item_name} x{new_quantity} ({round(price, 3)}/each)\n"
-        drop_log_path = os.path.join("log", "drop.txt")
-        os.makedirs("log", exist_ok=True)
-        with open(drop_log_path, "a", encoding="utf-8") as f:
-            f.write(log_line)
+        get_append_writer().write(DROP_TXT_PATH, log_line)
     
     if drop_items:
-        # Schedule reshow() từ main thread để tránh blocking và lỗi Tkinter
-        try:
-            if state.root and state.root.winfo_exists():
-                state.root.after(0, state.root.reshow)
-        except (RuntimeError, AttributeError):
-            # Main loop đã kết thúc, bỏ qua
-            pass
+        # Yêu cầu reshow() trên Tk main thread: UiScheduler gộp các yêu cầu thành một frame
+        request_ui_refresh(reshow=True)
         
-        if state.is_in_map == False:
-            state.is_in_map = True
+        state.session.mark_in_map()
 
@@ -13,10 +13,169 @@ Tác dụng:
 
 Các function chính:
     - convert_from_log_structure(): Chuyển đổi log text thành dict structure
+    - iter_log_structure(): Structured log text -> các cặp (path, value) phẳng
+    - extract_drop_items(): Picked / BaseId / Num của +DropItems block, không build dict
+    - picked_drop_items(): Các item đã nhặt trong dict của convert_from_log_structure()
     - log_to_json(): Wrapper function để convert log
     - scanned_log(): Tìm và extract các drop blocks từ log text
+    - tokenize_log(): Phân loại từng dòng log một lần duy nhất thành LogEvent
+    - LogStreamTokenizer: Tokenize theo từng chunk, giữ lại dòng chưa ghi xong giữa các lần feed
+    - LogEventBus: Phân phối LogEvent cho các scanner đã subscribe
+    - iter_relevant_events(): Tokenize buffer lớn (mmap, replay), bỏ qua các dòng noise
+    - parse_log_timestamp(): Timestamp "[2025.11.08-16.59.48:014]" đầu dòng -> Unix time
 """
+import calendar
 import re
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional
+
+from . import metrics
+
+
+# ============================================================================
+# Log Event Kinds
+# ============================================================================
+
+EVENT_INIT_BAG = "init_bag"  # BagMgr@:InitBagData ... ConfigBaseId ...
+EVENT_PICK_START = "pick_start"  # ItemChange@ ProtoName=PickItems start
+EVENT_PICK_UPDATE = "pick_update"  # ItemChange@ Update ... BagNum=...
+EVENT_PICK_MODIFY = "pick_modify"  # BagMgr@:Modfy BagItem ... ConfigBaseId ...
+EVENT_PICK_END = "pick_end"  # ItemChange@ ProtoName=PickItems end
+EVENT_MAP_ENTER = "map_enter"  # Rời hideout, vào map
+EVENT_MAP_EXIT = "map_exit"  # Quay về hideout
+EVENT_PRICE_SEARCH = "price_search"  # Dòng có XchgSearchPrice (request/response)
+EVENT_OTHER = "other"  # Các dòng còn lại (bao gồm nội dung dump của structured log)
+
+PICK_EVENT_KINDS = frozenset({EVENT_PICK_START, EVENT_PICK_UPDATE, EVENT_PICK_MODIFY, EVENT_PICK_END})
+SCENE_EVENT_KINDS = frozenset({EVENT_MAP_ENTER, EVENT_MAP_EXIT})
+
+# Hideout: scene change có NextSceneName là hideout = ra map,
+# LastSceneName là hideout và NextSceneName là map khác = vào map
+HIDEOUT_SCENE = "World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200'"
+MAP_ENTER_MARKER = f"PageApplyBase@ _UpdateGameEnd: LastSceneName = {HIDEOUT_SCENE} NextSceneName = World'/Game/Art/Maps"
+MAP_EXIT_MARKER = f"NextSceneName = {HIDEOUT_SCENE}"
+
+# Một dòng log đã được phân loại
+LogEvent = namedtuple("LogEvent", ["kind", "line"])
+
+# Substring bắt buộc của mọi dòng có kind khác EVENT_OTHER (xem classify_line())
+EVENT_MARKERS = (b'ItemChange@ ', b'BagMgr@:', b'NextSceneName', b'XchgSearchPrice')
+# Socket message block (request/response): "----Socket RecvMessage STT----XchgSearchPrice..."
+# tới dòng "----Socket RecvMessage End----". Ladder giá nằm trong các dòng dump của block
+SOCKET_BLOCK_START = b'STT----'
+SOCKET_MARKER = b'----Socket '
+# Kích thước mỗi block khi tokenize buffer lớn (iter_relevant_events)
+RELEVANT_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+# Dòng structured log: "|      | +Key+SubKey [value]". Các dòng của một dump lặp lại rất nhiều
+# (vd "|          +Picked [true]") nên kết quả tách dòng được cache: line -> _structure_entry(line),
+# và head (phần trước '[') -> (level, keys) cho các dòng chưa gặp. Cache đầy thì không thêm nữa
+# (các dòng lặp lại đã có từ các dump đầu tiên, dòng có value ngẫu nhiên như Pos thì không)
+STRUCTURE_CACHE_SIZE = 8192
+_structure_entries = {}
+_structure_heads = {}
+# Item đã nhặt trong một +DropItems block (node <path>+item+BaseId / Num, có Picked)
+DropItem = namedtuple("DropItem", ["base_id", "num"])
+# Key cuối của các field extract_drop_items() cần
+_DROP_FIELD_KEYS = frozenset({"Picked", "BaseId", "Num"})
+_UNSET = object()
+
+
+def _structure_head(head: str):
+    """(level, keys) của phần trước '[' của một dòng (level = số '|'), có cache"""
+    entry = _structure_heads.get(head)
+    if entry is None:
+        entry = (head.count('|'), tuple(key for key in (k.strip() for k in head.replace('|', '').split('+')) if key))
+        if len(_structure_heads) < STRUCTURE_CACHE_SIZE:
+            _structure_heads[head] = entry
+    return entry
+
+
+def _structure_value(value_part: str):
+    """Text trong [] -> bool / int / str (strip, true / false không phân biệt hoa thường, số nguyên)"""
+    if value_part.isdecimal() or (value_part[:1] == '-' and value_part[1:].isdecimal()):
+        return int(value_part)
+    value_part = value_part.strip()
+    lowered = value_part.lower()
+    if lowered == 'true':
+        return True
+    if lowered == 'false':
+        return False
+    if value_part.isdecimal() or (value_part[:1] == '-' and value_part[1:].isdecimal()):
+        return int(value_part)
+    return value_part
+
+
+def _structure_entry(line: str):
+    """
+    Tách một dòng structured log, có cache
+
+    Level là số '|' của cả dòng (kể cả trong value), '|' được bỏ khỏi key và value.
+    Dòng có '[' nhưng không có ']' được đọc như dòng không có value.
+
+    Returns:
+        Optional[tuple]: (level, keys, value, child_keys, field), None nếu dòng trống
+            - value: None nếu dòng không có [value] (vd "+SpecialInfo")
+            - child_keys: keys của node được push vào stack, tính từ node cha (bỏ key
+              cuối nếu có value)
+            - field: key cuối nếu là field của extract_drop_items(), ngược lại None
+    """
+    head, bracket, tail = line.partition('[')
+    end = tail.rfind(']')
+    if end >= 0 and '|' not in tail:
+        level, keys = _structure_heads.get(head) or _structure_head(head)
+        value = tail[:end]
+        value = int(value) if value.isdecimal() else _structure_value(value)
+    elif not bracket:
+        if not head or head.isspace():
+            return None
+        level, keys = _structure_head(head)
+        value = None
+    else:
+        level = line.count('|')
+        content = line.replace('|', '')
+        if ']' not in content:
+            keys = _structure_head(content)[1]
+            value = None
+        else:
+            start = content.index('[')
+            keys = _structure_head(content[:start])[1]
+            value = _structure_value(content[start + 1:content.rindex(']')])
+    if value is None:
+        entry = (level, keys, None, keys, None)
+    else:
+        entry = (level, keys, value, keys[:-1], keys[-1] if keys and keys[-1] in _DROP_FIELD_KEYS else None)
+    if len(_structure_entries) < STRUCTURE_CACHE_SIZE:
+        _structure_entries[line] = entry
+    return entry
+
+
+def iter_log_structure(log_text: str):
+    """
+    Structured log text -> các cặp (path, value) phẳng, không build dict
+
+    Args:
+        log_text: Text containing structured logs
+
+    Yields:
+        Tuple[Tuple[str, ...], object]: path đầy đủ của key (vd ("DropItems", "1", "item",
+            "Num")) và value (bool / int / str), theo thứ tự trong text; dòng không có
+            [value] không được yield
+    """
+    entries = _structure_entries
+    # paths[level] là path của node cha của dòng có level đó
+    paths = [()]
+    for line in log_text.split('\n'):
+        entry = entries.get(line) or _structure_entry(line)
+        if entry is None:
+            continue
+        level, keys, value, child_keys, _ = entry
+        del paths[level + 1:]
+        parent = paths[-1]
+        paths.append(parent + child_keys)
+        if value is not None and keys:
+            yield parent + keys, value
 
 
 def convert_from_log_structure(log_text: str, verbose: bool = False):
@@ -30,124 +189,143 @@ def convert_from_log_structure(log_text: str, verbose: bool = False):
     Returns:
         Converted nested dictionary
     """
-    # Split and filter empty lines
-    lines = [line.strip() for line in log_text.split('\n') if line.strip()]
-    stack  = []
+    entries = _structure_entries
     root = {}
+    # stack[level] là node cha của dòng có level đó (stack[0] = root)
+    stack = [root]
 
     if verbose:
         print("=== Starting parsing ===")
 
-    for line in lines:
-        # Calculate level (number of '|')
-        level = line.count('|')
-        # Extract content (remove all '|' and trim)
-        content = re.sub(r'\|+', '', line).strip()
+    for line in log_text.split('\n'):
+        entry = entries.get(line) or _structure_entry(line)
+        if entry is None:
+            continue
+        level, keys, value, _, _ = entry
 
         if verbose:
-            print(f"\nProcessing: '{line}'")
-            print(f"  Level: {level}, Content: '{content}'")
+            print(f"\nProcessing: '{line.strip()}'")
+            print(f"  Level: {level}, Keys: {list(keys)}, Value: {value!r}")
 
         # Adjust stack to match current level
-        while len(stack) > level:
-            stack.pop()
-
-        # Determine parent node
-        if not stack:
-            parent = root
-        else:
-            parent = stack[-1]
-
-        # Skip empty parent nodes
-        if parent is None:
-            continue
-
-        # Parse key-value pairs (including [] cases)
-        if '[' in content and ']' in content:
-            # Extract key part and value part
-            key_part = content[:content.index('[')].strip()
-            value_part = content[content.index('[') + 1: content.rindex(']')].strip()
-
-            # Convert value type
-            if value_part.lower() == 'true':
-                value = True
-            elif value_part.lower() == 'false':
-                value = False
-            elif re.match(r'^-?\d+$', value_part):
-                value = int(value_part)
-            else:
-                value = value_part
-
-            # Process multi-level keys (separated by '+')
-            keys = [k.strip() for k in key_part.split('+') if k.strip()]
-
-            current_node = parent
-
-            for i in range(len(keys)):
-                key = keys[i]
-                # Skip empty keys
-                if not key:
-                    continue
-
-                # Check if current node is valid
-                if current_node is None:
-                    continue
+        del stack[level + 1:]
+        node = stack[-1]
 
-                if i == len(keys) - 1:
-                    # Last key, set value
-                    current_node[key] = value
+        if value is None:
+            # Keys without values (e.g., +SpecialInfo): node mới là key cuối
+            for key in keys:
+                if not isinstance(node, dict):
+                    break
+                node = node.setdefault(key, {})
+        elif len(keys) == 1:
+            node[keys[0]] = value
+        elif keys:
+            # Multi-level keys (separated by '+'): key cuối nhận value, node là cha của nó
+            last = len(keys) - 1
+            for index, key in enumerate(keys):
+                if index == last:
+                    node[key] = value
+                elif isinstance(node, dict):
+                    node = node.setdefault(key, {})
                 else:
-                    # Not the last key, ensure it's a dict and create child node
-                    if not isinstance(current_node, dict):
-                        break
-
-                    if key not in current_node:
-                        current_node[key] = {}
-                    current_node = current_node[key]
-
-                    # Check if new node is valid
-                    if current_node is None:
-                        break
+                    break
 
-            # Add current node to stack
-            stack.append(current_node)
+        # Add current node to stack
+        stack.append(node)
 
-        # Handle keys without values (e.g., +SpecialInfo)
-        else:
-            key_part = content.strip()
-            keys = [k.strip() for k in key_part.split('+') if k.strip()]
+    if verbose:
+        print("\n=== Parsing completed ===")
 
-            current_node = parent
+    return root
 
-            for key in keys:
-                # Skip empty keys
-                if not key:
-                    continue
 
-                # Check if current node is valid
-                if current_node is None:
-                    continue
+def picked_drop_items(drop_data) -> List[DropItem]:
+    """
+    Các item đã nhặt trong dict của convert_from_log_structure()
 
-                # Ensure current node is a dictionary
-                if not isinstance(current_node, dict):
-                    break
+    Node có key "item" là một drop item; item được tính khi có Picked (ở node hoặc trong
+    item) và là true. BaseId / Num trong item+SpecialInfo được ưu tiên.
 
-                # Create child node (if it doesn't exist)
-                if key not in current_node:
-                    current_node[key] = {}
-                current_node = current_node[key]
+    Args:
+        drop_data: Nested dict của một +DropItems block
 
-                # Check if new node is valid
-                if current_node is None:
-                    break
+    Returns:
+        List[DropItem]: Theo thứ tự trong dict (duyệt depth-first), bỏ qua item không có BaseId
+    """
+    items = []
+    nodes = [iter(drop_data.values())]
+    while nodes:
+        node = next(nodes[-1], _UNSET)
+        if node is _UNSET:
+            nodes.pop()
+            continue
+        if not isinstance(node, dict):
+            continue
+        if "item" in node:
+            item_info = node["item"] if isinstance(node["item"], dict) else {}
+            picked = node["Picked"] if "Picked" in node else item_info.get("Picked", False)
+            special_info = item_info.get("SpecialInfo")
+            if not isinstance(special_info, dict):
+                special_info = {}
+            base_id = special_info.get("BaseId", item_info.get("BaseId"))
+            if picked and base_id is not None:
+                items.append(DropItem(base_id, special_info.get("Num", item_info.get("Num", 0))))
+        nodes.append(iter(node.values()))
+    return items
+
+
+def extract_drop_items(log_text: str) -> List[DropItem]:
+    """
+    Các item đã nhặt trong một +DropItems block, đọc thẳng từ text
 
-            # Add current node to stack
-            stack.append(current_node)
+    Cùng kết quả với picked_drop_items(convert_from_log_structure(log_text)) nhưng không
+    build dict: chỉ giữ path của các node đang mở và các field Picked / BaseId / Num.
 
-    if verbose:
-        print("\n=== Parsing completed ===")
+    Args:
+        log_text: Một block từ scanned_log()
 
-    return root
+    Returns:
+        List[DropItem]: Theo thứ tự node xuất hiện trong block
+    """
+    entries = _structure_entries
+    # path của item -> [Picked của node, Picked trong item, BaseId, Num, SpecialInfo BaseId, SpecialInfo Num]
+    nodes = {}
+    paths = [()]
+    for line in log_text.split('\n'):
+        entry = entries.get(line) or _structure_entry(line)
+        if entry is None:
+            continue
+        level, _, value, child_keys, key = entry
+        del paths[level + 1:]
+        path = paths[-1] + child_keys
+        paths.append(path)
+        if key is None:
+            continue
+        # path là path của node chứa key; nodes được đánh dấu bằng path của item
+        if path and path[-1] == "item":
+            field = 2 if key == "BaseId" else 3 if key == "Num" else 1
+        elif path[-2:] == ("item", "SpecialInfo") and key != "Picked":
+            path, field = path[:-1], (4 if key == "BaseId" else 5)
+        elif key == "Picked":
+            path, field = path + ("item",), 0
+        else:
+            continue
+        fields = nodes.get(path)
+        if fields is None:
+            fields = nodes[path] = [_UNSET] * 6
+        fields[field] = value
+
+    items = []
+    for node_picked, item_picked, base_id, num, special_base_id, special_num in nodes.values():
+        picked = node_picked if node_picked is not _UNSET else item_picked
+        if special_base_id is not _UNSET:
+            base_id = special_base_id
+        if special_num is not _UNSET:
+            num = special_num
+        if picked is _UNSET or not picked or base_id is _UNSET:
+            continue
+        items.append(DropItem(base_id, 0 if num is _UNSET else num))
+    return items
 
 
 def log_to_json(log_text):
@@ -200,3 +378,274 @@ def scanned_log(changed_text):
             i += 1
     return drop_blocks
 
+
+
+def classify_line(line: str) -> str:
+    """
+    Phân loại một dòng log thành event kind
+
+    Các marker đều chứa '@' (trừ XchgSearchPrice và NextSceneName), nên phần lớn
+    dòng log thường chỉ tốn vài phép kiểm tra substring.
+
+    Args:
+        line: Một dòng log (không có ký tự xuống dòng)
+
+    Returns:
+        str: Một trong các hằng EVENT_*
+    """
+    if '@' in line:
+        if 'ItemChange@ ' in line:
+            if 'ItemChange@ ProtoName=PickItems start' in line:
+                return EVENT_PICK_START
+            if 'ItemChange@ ProtoName=PickItems end' in line:
+                return EVENT_PICK_END
+            if 'ItemChange@ Update' in line and 'BagNum=' in line:
+                return EVENT_PICK_UPDATE
+        elif 'BagMgr@:' in line:
+            if 'BagMgr@:Modfy BagItem' in line and 'ConfigBaseId' in line:
+                return EVENT_PICK_MODIFY
+            if 'BagMgr@:InitBagData' in line and 'ConfigBaseId' in line:
+                return EVENT_INIT_BAG
+    if 'NextSceneName' in line:
+        # Ra map được ưu tiên: hideout -> hideout không được tính là vào map mới
+        if MAP_EXIT_MARKER in line:
+            return EVENT_MAP_EXIT
+        if MAP_ENTER_MARKER in line:
+            return EVENT_MAP_ENTER
+    if 'XchgSearchPrice' in line:
+        return EVENT_PRICE_SEARCH
+    return EVENT_OTHER
+
+
+def tokenize_log(changed_text: str) -> List[LogEvent]:
+    """
+    Tách log text thành các dòng và phân loại mỗi dòng đúng một lần
+
+    Args:
+        changed_text: Nội dung log mới được đọc từ file
+
+    Returns:
+        List[LogEvent]: Events theo đúng thứ tự xuất hiện trong log
+    """
+    return [LogEvent(classify_line(line), line) for line in changed_text.split('\n')]
+
+
+class LogStreamTokenizer:
+    """
+    Tokenizer cho log được đọc theo từng chunk (tailer, replay)
+
+    Game có thể flush giữa chừng một dòng. Phần sau ký tự '\\n' cuối cùng của chunk
+    được giữ lại và ghép với chunk kế tiếp, nên mỗi dòng chỉ được phân loại một lần
+    khi đã hoàn chỉnh. Chi phí mỗi lần feed là O(độ dài chunk mới).
+
+    Example:
+        tokenizer = LogStreamTokenizer()
+        events = tokenizer.feed(tailer.read())
+    """
+
+    def __init__(self):
+        self._partial_parts = []
+
+    @property
+    def pending_text(self) -> str:
+        """Phần dòng cuối chưa có ký tự xuống dòng"""
+        return ''.join(self._partial_parts)
+
+    def feed(self, text: str) -> List[LogEvent]:
+        """
+        Tokenize các dòng hoàn chỉnh trong text
+
+        Args:
+            text: Chunk text mới (có thể bắt đầu/kết thúc giữa một dòng)
+
+        Returns:
+            List[LogEvent]: Events của các dòng đã hoàn chỉnh
+        """
+        newline = text.rfind('\n')
+        if newline < 0:
+            if text:
+                self._partial_parts.append(text)
+            return []
+        head = text[:newline]
+        if self._partial_parts:
+            self._partial_parts.append(head)
+            head = ''.join(self._partial_parts)
+        tail = text[newline + 1:]
+        self._partial_parts = [tail] if tail else []
+        with metrics.timer("tokenize"):
+            events = tokenize_log(head)
+        metrics.count("lines_classified", len(events))
+        return events
+
+    def flush(self) -> List[LogEvent]:
+        """
+        Tokenize phần dòng còn lại (dùng khi đã đọc hết file, ví dụ replay)
+
+        Returns:
+            List[LogEvent]: Event của dòng cuối (rỗng nếu không còn gì)
+        """
+        if not self._partial_parts:
+            return []
+        line = self.pending_text
+        self._partial_parts = []
+        metrics.count("lines_classified")
+        return tokenize_log(line)
+
+    def reset(self):
+        """Bỏ phần dòng đang chờ (ví dụ khi file log bị mở lại)"""
+        self._partial_parts = []
+
+    def restore(self, pending_text: str):
+        """
+        Khôi phục phần dòng đang chờ (pending_text của lần chạy trước, từ checkpoint)
+
+        Args:
+            pending_text: Phần dòng chưa có ký tự xuống dòng
+        """
+        self._partial_parts = [pending_text] if pending_text else []
+
+
+class LogEventBus:
+    """
+    Phân phối LogEvent cho các consumer (scanner) đã subscribe
+
+    Mỗi chunk log chỉ được tokenize một lần, sau đó mỗi handler nhận list events
+    đã lọc theo kinds mà nó quan tâm, theo thứ tự subscribe. Thời gian của mỗi handler
+    được ghi vào timer cùng tên (core.metrics), số events được gửi vào counter "events_emitted".
+
+    Example:
+        bus = LogEventBus()
+        bus.subscribe(scan_init_bag_events, {EVENT_INIT_BAG})
+        bus.subscribe(deal_change_events, PICK_EVENT_KINDS | SCENE_EVENT_KINDS)
+        bus.publish(tokenize_log(text))
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, handler: Callable[[List[LogEvent]], object], kinds: Optional[Iterable[str]] = None,
+                  name: Optional[str] = None):
+        """
+        Đăng ký handler nhận events
+
+        Args:
+            handler: Callable nhận List[LogEvent]
+            kinds: Tập event kinds cần nhận, None = nhận tất cả
+            name: Tên timer của handler trong core.metrics (mặc định: handler.__name__)
+        """
+        name = name or getattr(handler, "__name__", repr(handler))
+        self._subscribers.append((handler, frozenset(kinds) if kinds is not None else None, name))
+
+    def publish(self, events: List[LogEvent]):
+        """
+        Gửi events cho tất cả handlers
+
+        Handler chỉ được gọi khi có ít nhất một event thuộc kinds của nó.
+
+        Args:
+            events: Events từ tokenize_log()
+        """
+        for handler, kinds, name in self._subscribers:
+            if kinds is None:
+                selected = events
+            else:
+                selected = [event for event in events if event.kind in kinds]
+            if selected:
+                metrics.count("events_emitted", len(selected))
+                with metrics.timer(name):
+                    handler(selected)
+
+
+def parse_log_timestamp(line: str) -> Optional[float]:
+    """
+    Timestamp đầu dòng log dạng "[2025.11.08-16.59.48:014]" -> Unix time (giây)
+
+    UE ghi timestamp theo UTC, nên kết quả không phụ thuộc timezone của máy chạy.
+
+    Args:
+        line: Một dòng log
+
+    Returns:
+        float hoặc None nếu dòng không bắt đầu bằng timestamp
+    """
+    if len(line) < 25 or line[0] != '[' or line[24] != ']':
+        return None
+    try:
+        seconds = calendar.timegm((int(line[1:5]), int(line[6:8]), int(line[9:11]),
+                                   int(line[12:14]), int(line[15:17]), int(line[18:20])))
+        return seconds + int(line[21:24]) / 1000
+    except ValueError:
+        return None
+
+
+def _relevant_spans(buffer, start: int, end: int) -> List[List[int]]:
+    """
+    Các đoạn [span_start, span_end) trong buffer chứa dòng có event marker (đã merge, theo thứ tự)
+
+    Dòng mở Socket block có XchgSearchPrice được kéo dài tới hết dòng có SOCKET_MARKER tiếp theo
+    (có thể vượt quá end: block bị cắt giữa 2 block đọc vẫn được lấy đủ).
+    """
+    size = len(buffer)
+    spans = {}
+    for marker in EVENT_MARKERS:
+        position = buffer.find(marker, start, end)
+        while position >= 0:
+            line_start = max(buffer.rfind(b'\n', start, position) + 1, start)
+            line_end = buffer.find(b'\n', position, size)
+            if line_end < 0:
+                line_end = size
+            span_end = line_end
+            if marker == b'XchgSearchPrice' and buffer.find(SOCKET_BLOCK_START, line_start, line_end) >= 0:
+                block_end = buffer.find(SOCKET_MARKER, line_end, size)
+                if block_end >= 0:
+                    span_end = buffer.find(b'\n', block_end, size)
+                    if span_end < 0:
+                        span_end = size
+            if span_end > spans.get(line_start, -1):
+                spans[line_start] = span_end
+            position = buffer.find(marker, line_end, end)
+    merged = []
+    for span_start in sorted(spans):
+        span_end = spans[span_start]
+        if merged and span_start <= merged[-1][1] + 1:
+            if span_end > merged[-1][1]:
+                merged[-1][1] = span_end
+        else:
+            merged.append([span_start, span_end])
+    return merged
+
+
+def iter_relevant_events(buffer, block_size: int = RELEVANT_BLOCK_SIZE, start: int = 0):
+    """
+    Tokenize buffer lớn (bytes / mmap của cả log file) theo từng block, chỉ giữ các dòng có thể là event
+
+    Thay vì tách và phân loại mọi dòng như tokenize_log(), tìm các EVENT_MARKERS bằng
+    bytes.find() (tốc độ C) và chỉ decode + classify_line() các dòng chứa marker, cùng toàn bộ
+    Socket block của price search (PriceSearchScanner cần các dòng dump của ladder).
+    Các dòng bị bỏ qua đều là EVENT_OTHER nằm ngoài price search block, mà DropScanner,
+    deal_change_events và PriceSearchScanner đều không dùng tới.
+
+    Args:
+        buffer: bytes hoặc mmap (UTF-8, "\r\n" được chuẩn hóa thành "\n")
+        block_size: Số byte mỗi block (mỗi lần yield)
+        start: Offset bắt đầu (đầu một dòng)
+
+    Yields:
+        Tuple[List[LogEvent], int]: Events của block (theo thứ tự trong log) và offset đã đọc tới
+    """
+    size = len(buffer)
+    while start < size:
+        end = min(size, start + block_size)
+        if end < size:
+            # Block kết thúc ở ranh giới dòng
+            newline = buffer.rfind(b'\n', start, end)
+            end = newline + 1 if newline >= start else buffer.find(b'\n', end, size) + 1 or size
+        events = []
+        for span_start, span_end in _relevant_spans(buffer, start, end):
+            text = buffer[span_start:span_end].decode('utf-8', 'replace')
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').rstrip('\r')
+            events.extend([LogEvent(classify_line(line), line) for line in text.split('\n')])
+            end = max(end, span_end + 1)
+        yield events, min(end, size)
+        start = end
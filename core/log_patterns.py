@@ -0,0 +1,130 @@
+"""
+Log Patterns Module
+===================
+
+Mục đích:
+    Registry các regex đã compile sẵn để lấy fields từ từng loại dòng log (PickItems,
+    InitBagData). Mỗi loại dòng có một pattern anchored với named groups, lấy tất cả fields
+    trong một lần match thay vì re.search từng field trên cả dòng.
+
+Tác dụng:
+    - Fast path: pattern của loại dòng match từ đầu dòng theo format chuẩn, ví dụ
+      "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] BagMgr@:InitBagData PageId = 102
+      SlotId = 0 ConfigBaseId = 100300 Num = 123"
+    - Fast path chỉ nhận format chuẩn (một khoảng trắng quanh '=' và giữa các fields); dòng
+      khác format chuẩn (khoảng trắng khác, thiếu field, thứ tự khác, không có timestamp đầu
+      dòng...) được đọc bằng cách cũ, mỗi field một re.search (đã compile) lấy match đầu
+      tiên trong dòng, nên kết quả luôn giống cách cũ
+    - Phần giữa timestamp và marker của fast path không được chứa '=': mọi field pattern đều
+      cần '=', nên match đầu tiên của mỗi field chắc chắn nằm trong phần fast path đọc
+    - Patterns tránh backtracking thừa: prefix greedy [^=]* (dừng ở '=' đầu tiên rồi lùi về
+      marker), khoảng trắng literal thay vì whitespace tùy ý, digits của timestamp viết từng cái
+      thay vì quantifier {n}
+
+Class chính:
+    - LinePattern: Pattern của một loại dòng (fast path + fallback theo từng field)
+
+Registry:
+    - PICK_START_FIELDS: timestamp
+    - PICK_UPDATE_FIELDS: bag_num, page_id, slot_id
+    - PICK_MODIFY_FIELDS: timestamp, item_id, num
+    - INIT_BAG_FIELDS: timestamp, page_id, slot_id, item_id, num
+    - LINE_PATTERNS: event kind (core.log_parser.EVENT_*) -> LinePattern
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+from .log_parser import EVENT_INIT_BAG, EVENT_PICK_MODIFY, EVENT_PICK_START, EVENT_PICK_UPDATE
+
+
+# "[2025.11.08-16.59.48:014]"
+# Cùng nghĩa với \d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3} của cách cũ, match nhanh hơn
+TIMESTAMP = r'\d\d\d\d\.\d\d\.\d\d-\d\d\.\d\d\.\d\d:\d\d\d'
+TIMESTAMP_PATTERN = re.compile(rf'\[({TIMESTAMP})\]')
+
+# Field patterns của cách cũ (match đầu tiên trong dòng), dùng cho fallback
+FIELD_PATTERNS = {
+    "timestamp": TIMESTAMP_PATTERN,
+    "page_id": re.compile(r'PageId\s*=\s*(\d+)'),
+    "slot_id": re.compile(r'SlotId\s*=\s*(\d+)'),
+    "item_id": re.compile(r'ConfigBaseId\s*=\s*(\d+)'),
+    "num": re.compile(r'Num\s*=\s*(\d+)'),
+    # Dòng ItemChange@ Update không có khoảng trắng quanh '='
+    "bag_num": re.compile(r'BagNum=(\d+)'),
+    "update_page_id": re.compile(r'PageId=(\d+)'),
+    "update_slot_id": re.compile(r'SlotId=(\d+)'),
+}
+
+
+class LinePattern:
+    """
+    Pattern của một loại dòng log
+
+    Example:
+        timestamp, page_id, slot_id, item_id, num = INIT_BAG_FIELDS.fields(line)
+    """
+
+    def __init__(self, name: str, pattern: str, fallback: Dict[str, str]):
+        """
+        Args:
+            name: Tên loại dòng (debug)
+            pattern: Regex của format chuẩn, match từ đầu dòng; named groups theo đúng thứ tự
+                của fallback và là các groups duy nhất
+            fallback: {group name: key trong FIELD_PATTERNS}
+        """
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.names = tuple(fallback)
+        self._fallback = tuple(FIELD_PATTERNS[key] for key in fallback.values())
+        if tuple(self.pattern.groupindex) != self.names or self.pattern.groups != len(self.names):
+            raise ValueError(f"{name}: groups của pattern phải là {self.names}")
+
+    def fields(self, line: str) -> Tuple[Optional[str], ...]:
+        """
+        Các fields của dòng (str, None nếu dòng không có field đó), theo thứ tự self.names
+        """
+        match = self.pattern.match(line)
+        if match is not None:
+            return match.groups()
+        return tuple(found.group(1) if found else None
+                     for found in (pattern.search(line) for pattern in self._fallback))
+
+    def __repr__(self):
+        return f"LinePattern({self.name!r}, {self.names})"
+
+
+# Giữa timestamp và marker: phần còn lại của prefix ("[  1]GameLog: Display: [Game] "), không có '='
+_PREFIX = rf'\[(?P<timestamp>{TIMESTAMP})\][^=]*'
+
+# "ItemChange@ ProtoName=PickItems start"
+PICK_START_FIELDS = LinePattern(
+    "pick_start",
+    _PREFIX,
+    {"timestamp": "timestamp"},
+)
+# "ItemChange@ Update Id=1 BagNum=5 in PageId=102 SlotId=3" (timestamp không cần)
+PICK_UPDATE_FIELDS = LinePattern(
+    "pick_update",
+    r'[^=]*ItemChange@ Update Id=\d+ BagNum=(?P<bag_num>\d+) in PageId=(?P<page_id>\d+) SlotId=(?P<slot_id>\d+)',
+    {"bag_num": "bag_num", "page_id": "update_page_id", "slot_id": "update_slot_id"},
+)
+# "BagMgr@:Modfy BagItem PageId = 102 SlotId = 3 ConfigBaseId = 5028 Num = 5"
+PICK_MODIFY_FIELDS = LinePattern(
+    "pick_modify",
+    _PREFIX + r'BagMgr@:Modfy BagItem PageId = \d+ SlotId = \d+ ConfigBaseId = (?P<item_id>\d+) Num = (?P<num>\d+)',
+    {"timestamp": "timestamp", "item_id": "item_id", "num": "num"},
+)
+# "BagMgr@:InitBagData PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 123"
+INIT_BAG_FIELDS = LinePattern(
+    "init_bag",
+    _PREFIX + r'BagMgr@:InitBagData PageId = (?P<page_id>\d+) SlotId = (?P<slot_id>\d+)'
+              r' ConfigBaseId = (?P<item_id>\d+) Num = (?P<num>\d+)',
+    {"timestamp": "timestamp", "page_id": "page_id", "slot_id": "slot_id", "item_id": "item_id", "num": "num"},
+)
+
+LINE_PATTERNS = {
+    EVENT_PICK_START: PICK_START_FIELDS,
+    EVENT_PICK_UPDATE: PICK_UPDATE_FIELDS,
+    EVENT_PICK_MODIFY: PICK_MODIFY_FIELDS,
+    EVENT_INIT_BAG: INIT_BAG_FIELDS,
+}
@@ -0,0 +1,568 @@
+"""
+Log Tailer Module
+=================
+
+Mục đích:
+    Module này theo dõi file UE_game.log và trả về phần text mới được ghi thêm
+    ngay khi game flush log, thay cho vòng lặp sleep(1) + read() cũ.
+
+Tác dụng:
+    - Giảm độ trễ từ lúc game ghi drop đến lúc UI cập nhật (từ ~1s xuống vài ms)
+    - Không đánh thức CPU khi game đang idle (không có log mới)
+    - Phát hiện khi game restart và truncate / tạo lại UE_game.log (hoặc đổi tên file cũ
+      thành UE_game-backup-*.log): đọc nốt file cũ rồi chuyển sang file mới từ byte 0
+    - Đo mỗi lần đọc có dữ liệu (timer "log_read", counter "bytes_read" trong core.metrics)
+    - Backend có thể thay thế (pluggable):
+        + InotifyBackend: dùng inotify + select() trên Linux, block cho đến khi file thay đổi
+        + PollingBackend: fallback cho các platform khác, poll fstat với adaptive backoff
+
+Class chính:
+    - LogTailer: Mở file log, chờ dữ liệu mới và decode thành text
+    - InotifyBackend / PollingBackend: Các chiến lược chờ file thay đổi
+
+Function chính:
+    - create_tail_backend(): Chọn backend phù hợp với platform hiện tại
+    - get_file_identity(): Định danh file log (dev, inode, hash phần đầu file) cho checkpoint
+    - find_rotated_file(): Tìm file UE_game-backup-*.log có cùng định danh với checkpoint
+"""
+import codecs
+import ctypes
+import ctypes.util
+import glob
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable, Optional
+
+from . import metrics
+from .logger import log_warning
+
+
+# Polling backoff: bắt đầu poll nhanh, giãn dần khi không có dữ liệu mới
+DEFAULT_MIN_POLL_INTERVAL = 0.01
+DEFAULT_MAX_POLL_INTERVAL = 0.25
+DEFAULT_BACKOFF_FACTOR = 2.0
+
+# Số byte tối đa đọc trong một lần read() để tránh giữ quá nhiều text trong RAM
+DEFAULT_READ_SIZE = 4 * 1024 * 1024
+
+# Số byte đầu file dùng để nhận diện file log (inode có thể bị tái sử dụng)
+IDENTITY_HEAD_SIZE = 4096
+
+# Lý do chuyển file (truyền cho LogTailer.on_rotate)
+ROTATION_REPLACED = "replaced"  # Path trỏ sang file mới (file cũ bị đổi tên/xóa)
+ROTATION_TRUNCATED = "truncated"  # Cùng file nhưng bị truncate (size giảm hoặc phần đầu file đổi)
+
+# inotify constants (xem <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVE_SELF = 0x00000800
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+_INOTIFY_WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVE_SELF | IN_DELETE_SELF
+
+
+class PollingBackend:
+    """
+    Backend chờ dữ liệu bằng cách poll, với adaptive backoff
+
+    Khi có dữ liệu mới, interval reset về min_interval để bắt kịp burst drops.
+    Khi idle, interval nhân với backoff_factor cho đến max_interval,
+    nên CPU gần như không bị đánh thức khi game không ghi log.
+    """
+
+    name = "polling"
+
+    def __init__(self, min_interval: float = DEFAULT_MIN_POLL_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_POLL_INTERVAL,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self._interval = min_interval
+
+    def wait(self, has_new_data: Callable[[], bool], timeout: float) -> bool:
+        """
+        Chờ cho đến khi has_new_data() trả về True hoặc hết timeout
+
+        Args:
+            has_new_data: Callable kiểm tra file có dữ liệu mới chưa (rẻ, chỉ fstat)
+            timeout: Thời gian chờ tối đa (giây)
+
+        Returns:
+            bool: True nếu có dữ liệu mới, False nếu hết timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if has_new_data():
+                self._interval = self.min_interval
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self._interval, remaining))
+            self._interval = min(self._interval * self.backoff_factor, self.max_interval)
+
+    def close(self):
+        """Polling backend không giữ resource nào"""
+
+
+class InotifyBackend:
+    """
+    Backend chờ dữ liệu bằng inotify + select() (chỉ có trên Linux)
+
+    Thread bị block trong select() cho đến khi kernel báo file thay đổi,
+    nên độ trễ chỉ vài ms và không tốn CPU khi idle.
+    """
+
+    name = "inotify"
+
+    def __init__(self, path: str):
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._watch = -1
+        self.watch(path)
+
+    def watch(self, path: str):
+        """
+        Watch file log (gọi lại khi file được mở lại sau rotation)
+
+        Args:
+            path: Đường dẫn file cần watch
+
+        Raises:
+            OSError: Nếu inotify_add_watch thất bại
+        """
+        if self._watch >= 0:
+            self._libc.inotify_rm_watch(self._fd, self._watch)
+        self._watch = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), _INOTIFY_WATCH_MASK
+        )
+        if self._watch < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch failed for {path}: {os.strerror(errno)}")
+
+    def wait(self, has_new_data: Callable[[], bool], timeout: float) -> bool:
+        """
+        Chờ inotify event hoặc hết timeout
+
+        Args:
+            has_new_data: Callable kiểm tra file có dữ liệu mới chưa
+            timeout: Thời gian chờ tối đa (giây)
+
+        Returns:
+            bool: True nếu có dữ liệu mới, False nếu hết timeout
+        """
+        # Kiểm tra trước khi block: dữ liệu có thể đã được ghi trước khi watch
+        if has_new_data():
+            return True
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            self._drain()
+            if has_new_data():
+                return True
+
+    def _drain(self):
+        """Đọc hết các inotify events đang pending (chỉ cần biết là có event)"""
+        try:
+            while os.read(self._fd, 64 * _INOTIFY_EVENT_HEADER.size + 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        """Đóng inotify file descriptor"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def get_file_identity(path: str, head_size: int = IDENTITY_HEAD_SIZE) -> dict:
+    """
+    Lấy định danh của file log để biết file có còn là file cũ không
+
+    Args:
+        path: Đường dẫn file
+        head_size: Số byte đầu file dùng để hash (file ngắn hơn thì hash toàn bộ)
+
+    Returns:
+        dict: {"dev", "ino", "head_size", "head_hash"}
+
+    Raises:
+        OSError: Nếu không đọc được file
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        head = f.read(head_size)
+    return {
+        "dev": stat.st_dev,
+        "ino": stat.st_ino,
+        "head_size": len(head),
+        "head_hash": hashlib.sha1(head).hexdigest(),
+    }
+
+
+def is_same_file(path: str, identity: dict) -> bool:
+    """
+    Kiểm tra file tại path có đúng là file đã được định danh bởi identity không
+
+    Args:
+        path: Đường dẫn file hiện tại
+        identity: Kết quả get_file_identity() trước đó
+
+    Returns:
+        bool: True nếu cùng dev/inode và phần đầu file không đổi
+    """
+    try:
+        current = get_file_identity(path, identity.get("head_size", IDENTITY_HEAD_SIZE))
+    except OSError:
+        return False
+    return (current["dev"] == identity.get("dev")
+            and current["ino"] == identity.get("ino")
+            and current["head_hash"] == identity.get("head_hash"))
+
+
+def list_backup_files(path: str) -> list:
+    """
+    Liệt kê các file UE_game-backup-*.log cạnh path, cũ trước mới sau
+
+    Tên backup chứa timestamp (UE_game-backup-2025.11.08-17.00.00.log) nên sort theo tên
+    cũng là sort theo thời gian rotate.
+    """
+    stem, ext = os.path.splitext(path)
+    return sorted(glob.glob(glob.escape(stem) + "-backup-*" + glob.escape(ext)))
+
+
+def find_rotated_file(path: str, identity: dict) -> Optional[str]:
+    """
+    Tìm bản backup của file log (UE_game-backup-*.log cạnh UE_game.log) khớp với identity
+
+    Game đổi tên log cũ thành UE_game-backup-<timestamp>.log khi khởi động lại,
+    nên checkpoint của log cũ vẫn dùng được để đọc nốt phần chưa xử lý.
+
+    Args:
+        path: Đường dẫn log hiện tại (ví dụ .../Logs/UE_game.log)
+        identity: Định danh file trong checkpoint
+
+    Returns:
+        str: Đường dẫn file backup khớp, None nếu không tìm thấy
+    """
+    # File mới nhất trước: thường là file vừa được rotate
+    for candidate in reversed(list_backup_files(path)):
+        if is_same_file(candidate, identity):
+            return candidate
+    return None
+
+
+def create_tail_backend(path: str, name: str = "auto"):
+    """
+    Tạo backend chờ dữ liệu phù hợp với platform
+
+    Args:
+        path: Đường dẫn file log
+        name: "auto", "inotify" hoặc "polling"
+
+    Returns:
+        InotifyBackend trên Linux (nếu khả dụng), ngược lại PollingBackend
+
+    Raises:
+        ValueError: Nếu name không hợp lệ
+    """
+    if name == "polling":
+        return PollingBackend()
+    if name not in ("auto", "inotify"):
+        raise ValueError(f"Unknown tail backend: {name}")
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyBackend(path)
+        except (OSError, AttributeError) as e:
+            if name == "inotify":
+                raise
+            log_warning(f"inotify unavailable ({e}), falling back to polling")
+    elif name == "inotify":
+        raise ValueError("inotify backend is only available on Linux")
+    return PollingBackend()
+
+
+class LogTailer:
+    """
+    Đọc phần text mới được ghi thêm vào file log
+
+    File được mở ở binary mode và decode bằng incremental UTF-8 decoder,
+    nên ký tự nhiều byte bị cắt ở cuối lần đọc sẽ được giữ lại cho lần sau.
+    "\\r\\n" được chuẩn hóa thành "\\n" giống text mode cũ.
+
+    Khi path bị thay bằng file mới (inode khác) hoặc bị truncate, read() đọc nốt phần
+    còn lại của file cũ, gọi on_rotate(reason) rồi mở lại path từ byte 0. Owner dùng
+    on_rotate để flush/reset parser state gắn với file cũ.
+
+    Example:
+        tailer = LogTailer(config.position_log)
+        tailer.open()
+        while True:
+            if tailer.wait(timeout=1.0):
+                text = tailer.read()
+    """
+
+    def __init__(self, path: str, backend=None, from_end: bool = True,
+                 read_size: int = DEFAULT_READ_SIZE):
+        self.path = path
+        self.backend = backend
+        self.from_end = from_end
+        self.read_size = read_size
+        self.offset = 0
+        self.on_rotate = None
+        self.rotations = 0
+        self._file = None
+        self._decoder = None
+        self._pending_cr = False
+        self._head = b""
+
+    def open(self, position: Optional[dict] = None, source_path: Optional[str] = None):
+        """
+        Mở file log, seek đến cuối file nếu from_end=True
+
+        Args:
+            position: Kết quả position() của lần chạy trước (resume từ checkpoint).
+                      Nếu có, đọc tiếp từ đúng byte offset đó thay vì cuối file.
+            source_path: File thực sự cần mở nếu khác path (ví dụ UE_game-backup-*.log
+                         từ find_rotated_file()). Sau khi đọc hết, tailer tự chuyển sang path.
+
+        Raises:
+            OSError: Nếu không mở được file
+        """
+        self._file = open(source_path or self.path, "rb")
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending_cr = False
+        self._head = self._read_head(IDENTITY_HEAD_SIZE)
+        if position is not None:
+            self._file.seek(position["offset"])
+            self._decoder.setstate((bytes.fromhex(position.get("decoder_buffer", "")), 0))
+            self._pending_cr = bool(position.get("pending_cr", False))
+        elif self.from_end:
+            self._file.seek(0, os.SEEK_END)
+        self.offset = self._file.tell()
+        if self.backend is None:
+            self.backend = create_tail_backend(self.path)
+
+    def position(self) -> dict:
+        """
+        Vị trí đọc hiện tại, đủ để open(position=...) đọc tiếp không mất/lặp byte nào
+
+        Returns:
+            dict: {"offset", "decoder_buffer" (hex các byte UTF-8 chưa decode xong), "pending_cr"}
+        """
+        buffered, _ = self._decoder.getstate()
+        return {
+            "offset": self.offset,
+            "decoder_buffer": buffered.hex(),
+            "pending_cr": self._pending_cr,
+        }
+
+    def identity(self) -> dict:
+        """Định danh của file đang mở (xem get_file_identity())"""
+        stat = os.fstat(self._file.fileno())
+        head = self._read_head(IDENTITY_HEAD_SIZE)
+        return {
+            "dev": stat.st_dev,
+            "ino": stat.st_ino,
+            "head_size": len(head),
+            "head_hash": hashlib.sha1(head).hexdigest(),
+        }
+
+    def size(self) -> int:
+        """Kích thước hiện tại của file đang mở"""
+        return os.fstat(self._file.fileno()).st_size
+
+    def has_new_data(self) -> bool:
+        """
+        Kiểm tra nhanh (fstat/stat) xem có gì để read() không
+
+        Trả về True cả khi file bị truncate hoặc path đã trỏ sang file mới,
+        để wait() không block trong lúc game đang ghi vào file mới.
+        """
+        stat = os.fstat(self._file.fileno())
+        if stat.st_size != self.offset:
+            return True
+        return self._path_replaced(stat)
+
+    def _path_replaced(self, stat) -> bool:
+        """True nếu path hiện trỏ sang file khác file đang mở"""
+        try:
+            path_stat = os.stat(self.path)
+        except OSError:
+            # File cũ đã bị đổi tên nhưng file mới chưa được tạo: tiếp tục đọc file cũ
+            return False
+        return (path_stat.st_dev, path_stat.st_ino) != (stat.st_dev, stat.st_ino)
+
+    def _read_head(self, size: int) -> bytes:
+        """Đọc size byte đầu file đang mở mà không làm thay đổi vị trí đọc"""
+        position = self._file.tell()
+        try:
+            self._file.seek(0)
+            return self._file.read(size)
+        finally:
+            self._file.seek(position)
+
+    def _detect_rotation(self) -> Optional[str]:
+        """
+        Kiểm tra file log có bị thay thế / truncate không (gọi khi read() không đọc được gì)
+
+        Returns:
+            ROTATION_REPLACED, ROTATION_TRUNCATED hoặc None
+        """
+        stat = os.fstat(self._file.fileno())
+        if self._path_replaced(stat):
+            return ROTATION_REPLACED
+        if stat.st_size < self.offset:
+            return ROTATION_TRUNCATED
+        # Truncate rồi ghi lại nhanh hơn offset cũ: size không giảm nhưng phần đầu file đã khác
+        if self._head:
+            head = self._read_head(len(self._head))
+            if head != self._head:
+                return ROTATION_TRUNCATED
+        if len(self._head) < IDENTITY_HEAD_SIZE and self.offset > len(self._head):
+            self._head = self._read_head(min(self.offset, IDENTITY_HEAD_SIZE))
+        return None
+
+    def _next_rotated_file(self) -> Optional[str]:
+        """
+        File được game tạo ngay sau file đang mở, nếu file đó cũng đã thành backup
+
+        Khi game rotate nhiều lần giữa 2 lần read(), các file ở giữa vẫn được đọc theo thứ tự
+        thay vì nhảy thẳng sang path.
+        """
+        stat = os.fstat(self._file.fileno())
+        backups = list_backup_files(self.path)
+        for index, candidate in enumerate(backups):
+            try:
+                candidate_stat = os.stat(candidate)
+            except OSError:
+                continue
+            if (candidate_stat.st_dev, candidate_stat.st_ino) == (stat.st_dev, stat.st_ino):
+                return backups[index + 1] if index + 1 < len(backups) else None
+        return None
+
+    def _rotate(self, reason: str) -> bool:
+        """
+        Báo cho owner rồi mở file kế tiếp (backup kế tiếp hoặc path) từ byte 0
+
+        Returns:
+            bool: False nếu file kế tiếp chưa mở được (game đang tạo lại), giữ nguyên file cũ
+        """
+        next_path = self.path
+        if reason == ROTATION_REPLACED:
+            next_path = self._next_rotated_file() or self.path
+        try:
+            next_file = open(next_path, "rb")
+        except OSError:
+            return False
+        if self.on_rotate is not None:
+            self.on_rotate(reason)
+        self._file.close()
+        self._file = next_file
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending_cr = False
+        self._head = self._read_head(IDENTITY_HEAD_SIZE)
+        self.offset = 0
+        self.rotations += 1
+        if hasattr(self.backend, "watch"):
+            try:
+                self.backend.watch(next_path)
+            except OSError as e:
+                # Vẫn đọc được khi wait() hết timeout, chỉ mất tác dụng wake-up sớm
+                log_warning(f"cannot watch {next_path}: {e}")
+        return True
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block cho đến khi có dữ liệu mới hoặc hết timeout
+
+        Args:
+            timeout: Thời gian chờ tối đa (giây)
+
+        Returns:
+            bool: True nếu có dữ liệu mới để read()
+        """
+        return self.backend.wait(self.has_new_data, timeout)
+
+    def read(self, max_bytes: Optional[int] = None) -> str:
+        """
+        Đọc dữ liệu mới kể từ lần đọc trước
+
+        Args:
+            max_bytes: Giới hạn số byte đọc trong lần này (None = đọc hết).
+                       Dùng khi catch-up một khoảng log lớn theo từng block.
+
+        Returns:
+            str: Text mới (rỗng nếu không có gì mới)
+        """
+        started = time.perf_counter_ns()
+        parts = self._read_chunks(max_bytes)
+        if not parts and self._file is not None:
+            reason = self._detect_rotation()
+            if reason == ROTATION_REPLACED:
+                # Đọc nốt những gì được ghi vào file cũ trước khi nó bị đổi tên
+                parts = self._read_chunks(max_bytes)
+                if not parts and self._rotate(reason):
+                    parts = self._read_chunks(max_bytes)
+            elif reason == ROTATION_TRUNCATED and self._rotate(reason):
+                parts = self._read_chunks(max_bytes)
+        if not parts:
+            return ""
+        text = self._normalize_newlines("".join(parts))
+        # Lần đọc không có gì mới không được tính vào timer "log_read"
+        metrics.record("log_read", time.perf_counter_ns() - started)
+        return text
+
+    def _read_chunks(self, max_bytes: Optional[int]) -> list:
+        """Đọc tối đa max_bytes từ file đang mở, trả về list text đã decode"""
+        parts = []
+        remaining = max_bytes
+        while remaining is None or remaining > 0:
+            size = self.read_size if remaining is None else min(self.read_size, remaining)
+            data = self._file.read(size)
+            if not data:
+                break
+            self.offset += len(data)
+            metrics.count("bytes_read", len(data))
+            parts.append(self._decoder.decode(data))
+            if remaining is not None:
+                remaining -= len(data)
+            if len(data) < size:
+                break
+        return parts
+
+    def _normalize_newlines(self, text: str) -> str:
+        """Chuyển \\r\\n thành \\n, giữ lại \\r cuối cùng chờ \\n ở lần đọc sau"""
+        if self._pending_cr:
+            text = "\r" + text
+            self._pending_cr = False
+        if text.endswith("\r"):
+            text = text[:-1]
+            self._pending_cr = True
+        return text.replace("\r\n", "\n")
+
+    def close(self):
+        """Đóng file và backend"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.backend is not None:
+            self.backend.close()
@@ -6,51 +6,316 @@ Mục đích:
     Module này cung cấp utility functions cho logging trong ứng dụng.
 
 Tác dụng:
-    - Cung cấp logger function có thể tái sử dụng
-    - Format thời gian nhất quán
-    - Ghi log ra cả console và file logger.txt
-    - Dễ dàng thay đổi format log trong tương lai
+    - Log theo level (DEBUG < INFO < WARNING < ERROR), level tối thiểu lấy từ
+      config.json "log_level" (mặc định DEBUG) hoặc set_log_level()
+    - Lazy formatting: log_debug("values %s", values) chỉ format khi level DEBUG được bật,
+      message bị tắt chỉ tốn một phép so sánh
+    - Ghi ra console và file logger.txt từ một background thread: thread gọi log chỉ
+      đưa record vào queue, writer thread gom thành batch (một lần print + một lần mở file)
+    - logger.txt được rotate theo kích thước (logger.txt.1, .2, ...)
+    - Format thời gian nhất quán: [LEVEL] MM-DD-YYYY hh:mm:ss - message
 
 Function chính:
-    - log_debug(): Log message với prefix [DEBUG] và timestamp
+    - log_debug() / log_info() / log_warning() / log_error(): Log message theo level
+    - is_enabled(): Level có đang được ghi không (để bỏ qua cả đoạn code chỉ dùng cho log)
+    - set_log_level() / get_log_level(): Đổi / đọc level tối thiểu
+    - set_log_file() / get_log_file(): Đổi / đọc file log (mặc định logger.txt của thư mục hiện tại
+      lúc log lần đầu)
+    - flush_logs(): Chờ writer ghi hết các message đang chờ
 """
-from datetime import datetime
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
 
 # File path cho log file
 LOG_FILE = "logger.txt"
+# Đường dẫn tuyệt đối của file log, resolve một lần (get_log_file() / set_log_file())
+_log_path = None
+CONFIG_PATH = "config.json"
 
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+DEFAULT_LOG_LEVEL = DEBUG
 
-def log_debug(message):
+# Rotate logger.txt khi vượt quá LOG_MAX_BYTES, giữ LOG_BACKUP_COUNT file cũ
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+LOG_MAX_QUEUE = 100000
+LOG_MAX_BATCH = 1000
+# Thời gian chờ tối đa của flush_logs() (giây)
+FLUSH_TIMEOUT = 5.0
+
+
+def _read_config_level(config_path: str = CONFIG_PATH) -> int:
+    """Level từ config.json "log_level" (tên như "INFO" hoặc số), DEFAULT_LOG_LEVEL nếu thiếu"""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            value = json.load(f).get("log_level", DEFAULT_LOG_LEVEL)
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_LOG_LEVEL
+    try:
+        return _parse_level(value)
+    except ValueError:
+        return DEFAULT_LOG_LEVEL
+
+
+def _parse_level(level) -> int:
+    if isinstance(level, int):
+        return level
+    for number, name in LEVEL_NAMES.items():
+        if str(level).upper() == name:
+            return number
+    raise ValueError(f"unknown log level {level!r}, expected one of {list(LEVEL_NAMES.values())}")
+
+
+_level = _read_config_level()
+
+
+def set_log_level(level):
+    """
+    Đổi level tối thiểu được ghi
+
+    Args:
+        level: DEBUG/INFO/WARNING/ERROR hoặc tên ("debug", "INFO", ...)
+
+    Raises:
+        ValueError: Nếu tên level không hợp lệ
+    """
+    global _level
+    _level = _parse_level(level)
+
+
+def get_log_level() -> int:
+    """Level tối thiểu đang được ghi"""
+    return _level
+
+
+def is_enabled(level: int = DEBUG) -> bool:
+    """
+    Level có đang được ghi không
+
+    Example:
+        if is_enabled(DEBUG):
+            for item_id, item_data in list(state.bag_items.items())[:5]:
+                log_debug("  - %s: %s", item_id, item_data)
+    """
+    return level >= _level
+
+
+class _Flush:
+    """Marker trong queue: writer đã ghi hết các record trước nó"""
+
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class _LogWriter:
+    """Background thread ghi log ra console + file theo batch"""
+
+    def __init__(self):
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=LOG_MAX_QUEUE)
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    def put(self, record) -> bool:
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < LOG_MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if not isinstance(record, _Flush)]
+            if records:
+                self._write(records)
+            for marker in batch:
+                if isinstance(marker, _Flush):
+                    marker.done.set()
+
+    def _write(self, records):
+        lines = []
+        for level, created, message in records:
+            timestamp = time.strftime("%m-%d-%Y %H:%M:%S", time.localtime(created))
+            lines.append(f"[{LEVEL_NAMES.get(level, level)}] {timestamp} - {message}\n")
+        text = "".join(lines)
+
+        # Print ra console (pythonw không có stdout)
+        if sys.stdout is not None:
+            try:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+
+        # Ghi vào file logger.txt
+        path = _log_path
+        try:
+            self._rotate_if_needed(path, len(text.encode("utf-8")))
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            # Nếu không ghi được file, chỉ print ra console
+            print(f"[ERROR] Failed to write to {path}: {e}")
+
+    def _rotate_if_needed(self, path: str, incoming: int):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if size == 0 or size + incoming <= LOG_MAX_BYTES:
+            return
+        for index in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            source = f"{path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{path}.{index + 1}")
+        if LOG_BACKUP_COUNT > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """Process con (fork, ví dụ worker của replay song song) không có writer thread của process cha"""
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_writer() -> _LogWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                get_log_file()
+                _writer = _LogWriter()
+                atexit.register(flush_logs)
+    return _writer
+
+
+def get_log_file() -> str:
+    """Đường dẫn tuyệt đối của file log (lần gọi đầu: LOG_FILE trong thư mục hiện tại)"""
+    global _log_path
+    if _log_path is None:
+        _log_path = os.path.abspath(LOG_FILE)
+    return _log_path
+
+
+def set_log_file(path: str):
+    """
+    Đổi file log, các message đang chờ được ghi vào file cũ trước
+
+    Args:
+        path: File log mới (resolve thành đường dẫn tuyệt đối ngay lúc gọi)
+    """
+    global _log_path
+    flush_logs()
+    _log_path = os.path.abspath(path)
+
+
+def log(level: int, message, *args):
+    """
+    Log message với level (bỏ qua ngay nếu level đang tắt)
+
+    Args:
+        level: DEBUG/INFO/WARNING/ERROR
+        message: str (format kiểu % với args nếu có) hoặc callable trả về str
+        *args: Tham số cho message % args, chỉ được format khi level được bật
+    """
+    if level < _level:
+        return
+    try:
+        if callable(message):
+            message = message()
+        elif args:
+            message = message % args
+    except Exception as e:
+        message = f"{message!r} (log format error: {e})"
+    _get_writer().put((level, time.time(), message))
+
+
+def log_debug(message, *args):
     """
     Logger utility function - Log message với prefix [DEBUG] và timestamp
-    
+
     Chỉ log các thông tin quan trọng:
     - Drop items được nhặt
     - Errors và warnings
     - Map entry/exit (nếu cần)
-    
+
     Args:
-        message (str): Message cần log
-    
+        message (str): Message cần log (hoặc format string cho args)
+        *args: Tham số format lazy, ví dụ log_debug("values %s", values)
+
     Format output: [DEBUG] MM-DD-YYYY hh:mm:ss - {message}
-    
+
     Example:
         log_debug("drop item 360404")
         # Output: [DEBUG] 01-15-2025 23:13:40 - drop item 360404
-        # (cả console và file logger.txt)
-    """
-    
-    timestamp = datetime.now().strftime("%m-%d-%Y %H:%M:%S")
-    log_message = f"[DEBUG] {timestamp} - {message}"
-    
-    # Print ra console
-    print(log_message)
-    
-    # Ghi vào file logger.txt
-    try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(log_message + "\n")
-    except Exception as e:
-        # Nếu không ghi được file, chỉ print ra console
-        print(f"[ERROR] Failed to write to {LOG_FILE}: {e}")
+        # (cả console và file logger.txt, ghi bởi writer thread)
+    """
+    log(DEBUG, message, *args)
+
+
+def log_info(message, *args):
+    """Log message với level INFO (xem log_debug())"""
+    log(INFO, message, *args)
 
+
+def log_warning(message, *args):
+    """Log message với level WARNING (xem log_debug())"""
+    log(WARNING, message, *args)
+
+
+def log_error(message, *args):
+    """Log message với level ERROR (xem log_debug())"""
+    log(ERROR, message, *args)
+
+
+def flush_logs(timeout: float = FLUSH_TIMEOUT) -> bool:
+    """
+    Chờ writer ghi hết các message đang chờ (tự gọi khi process thoát)
+
+    Args:
+        timeout: Thời gian chờ tối đa (giây)
+
+    Returns:
+        bool: True nếu đã ghi xong
+    """
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
@@ -0,0 +1,363 @@
+"""
+Metrics Module
+==============
+
+Mục đích:
+    Module này đo pipeline của tracker (đọc log, tokenize, các scanner, ghi file, render UI)
+    để biết overlay bị lag vì bước nào: timers theo từng stage và counters
+    (bytes đọc, dòng được phân loại, events, drops, lần ghi file, UI frames).
+
+Tác dụng:
+    - Timers dùng time.perf_counter_ns() (monotonic, độ phân giải ns) và ghi vào
+      Histogram kiểu HDR: buckets log-linear, sai số tương đối <= 1/64 ở mọi độ lớn,
+      bộ nhớ cố định (không giữ từng sample), nên p50/p90/p99 tính được cho cả session
+    - Counters và histograms có lock riêng: ghi từ thread đọc log / writer threads,
+      đọc snapshot từ Tk thread hoặc dump thread
+    - snapshot(): dict JSON-serializable (API trong process, cửa sổ Metrics của UI)
+    - MetricsDumper: ghi snapshot thành một dòng JSON vào log/metrics.jsonl mỗi
+      interval giây (config.json "metrics_dump_interval"), trên thread riêng
+    - set_enabled(False): timer() / count() thành no-op
+
+Class chính:
+    - Histogram: HDR-style histogram (giá trị nguyên, ví dụ ns)
+    - Metrics: Registry counters + timers
+    - MetricsDumper: Background thread dump snapshot định kỳ
+
+Function chính:
+    - get_metrics() / reset_metrics(): Registry dùng chung của process
+    - timer(): Context manager đo một stage
+    - count(): Tăng counter
+    - record(): Ghi một khoảng thời gian đã đo sẵn (ns)
+    - start_metrics_dump() / stop_metrics_dump(): Dump định kỳ (dòng cuối khi dừng)
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .logger import log_error
+
+
+METRICS_LOG_PATH = os.path.join("log", "metrics.jsonl")
+DEFAULT_METRICS_DUMP_INTERVAL = 60.0
+
+# 2^SUB_BUCKET_BITS sub-buckets mỗi lũy thừa của 2: sai số tương đối <= 1 / 2^(SUB_BUCKET_BITS - 1)
+SUB_BUCKET_BITS = 7
+_HALF_SUB_BUCKETS = 1 << (SUB_BUCKET_BITS - 1)
+PERCENTILES = (50, 90, 99)
+NS_PER_MS = 1_000_000
+
+
+def _bucket_index(value: int) -> int:
+    """Bucket của value: giá trị nhỏ chính xác tuyệt đối, giá trị lớn giữ SUB_BUCKET_BITS bit đầu"""
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return shift * _HALF_SUB_BUCKETS + (value >> shift)
+
+
+def _bucket_range(index: int):
+    """(min, max) của các giá trị thuộc bucket index"""
+    shift = (index >> (SUB_BUCKET_BITS - 1)) - 1
+    if shift <= 0:
+        return index, index
+    mantissa = index - shift * _HALF_SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """
+    Histogram giá trị nguyên không âm, kiểu HDR (log-linear buckets)
+
+    Example:
+        histogram = Histogram()
+        histogram.record(1_250_000)     # ns
+        histogram.percentile(99)        # ~1_250_000 (sai số <= 1/64)
+    """
+
+    def __init__(self):
+        self._counts = {}   # bucket index -> số lần
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value: int):
+        """Ghi một giá trị (số âm được coi là 0)"""
+        if value < 0:
+            value = 0
+        index = _bucket_index(value)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, percent: float) -> int:
+        """
+        Giá trị tại percentile (0-100)
+
+        Returns:
+            int: Cận trên của bucket chứa percentile (không vượt quá max), 0 nếu chưa có giá trị
+        """
+        with self._lock:
+            return self._percentiles((percent,))[0]
+
+    def _percentiles(self, percents):
+        if not self.count:
+            return [0] * len(percents)
+        results = []
+        buckets = sorted(self._counts.items())
+        for percent in percents:
+            target = max(1, -(-self.count * percent // 100))
+            seen = 0
+            for index, bucket_count in buckets:
+                seen += bucket_count
+                if seen >= target:
+                    results.append(min(_bucket_range(index)[1], self.max))
+                    break
+        return results
+
+    def summary(self, scale: float = 1) -> Dict:
+        """
+        Thống kê của histogram
+
+        Args:
+            scale: Chia các giá trị cho scale (ví dụ NS_PER_MS để ra ms)
+
+        Returns:
+            dict: count, total, mean, min, p50, p90, p99, max
+        """
+        with self._lock:
+            count, total = self.count, self.total
+            minimum, maximum = self.min or 0, self.max or 0
+            percentiles = self._percentiles(PERCENTILES)
+        result = {
+            "count": count,
+            "total": round(total / scale, 3),
+            "mean": round(total / count / scale, 3) if count else 0.0,
+            "min": round(minimum / scale, 3),
+        }
+        for percent, value in zip(PERCENTILES, percentiles):
+            result[f"p{percent}"] = round(value / scale, 3)
+        result["max"] = round(maximum / scale, 3)
+        return result
+
+
+class _Timer:
+    """Context manager ghi thời gian (ns) của một block vào histogram"""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self.started = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter_ns() - self.started)
+        return False
+
+
+class _NullTimer:
+    """Timer khi metrics bị tắt"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Registry counters và timers của process
+
+    Example:
+        metrics = get_metrics()
+        with metrics.timer("tokenize"):
+            events = tokenizer.feed(text)
+        metrics.count("lines_classified", len(events))
+        metrics.snapshot()["timers"]["tokenize"]["p99_ms"]
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.started = time.monotonic()
+        self._counters = {}
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: int = 1):
+        """Cộng value vào counter name"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def histogram(self, name: str) -> Histogram:
+        """Histogram (ns) của timer name, tạo nếu chưa có"""
+        histogram = self._timers.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._timers.setdefault(name, Histogram())
+        return histogram
+
+    def timer(self, name: str):
+        """Context manager đo thời gian block vào timer name"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def record(self, name: str, nanoseconds: int):
+        """Ghi một khoảng thời gian đã đo sẵn (ns) vào timer name"""
+        if self.enabled:
+            self.histogram(name).record(nanoseconds)
+
+    def snapshot(self) -> Dict:
+        """
+        Trạng thái hiện tại (JSON-serializable)
+
+        Returns:
+            dict: time, uptime_seconds, counters {name: int},
+                timers {name: {count, total_ms, mean_ms, min_ms, p50_ms, p90_ms, p99_ms, max_ms}}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            timers = dict(self._timers)
+        return {
+            "time": round(time.time(), 3),
+            "uptime_seconds": round(time.monotonic() - self.started, 3),
+            "counters": dict(sorted(counters.items())),
+            "timers": {
+                name: {f"{key}_ms" if key != "count" else key: value
+                       for key, value in timers[name].summary(NS_PER_MS).items()}
+                for name in sorted(timers)
+            },
+        }
+
+
+class MetricsDumper:
+    """
+    Ghi get_metrics().snapshot() thành một dòng JSON mỗi interval giây
+
+    Example:
+        dumper = MetricsDumper(60)
+        dumper.start()
+        dumper.stop()   # ghi dòng cuối
+    """
+
+    def __init__(self, interval: float = DEFAULT_METRICS_DUMP_INTERVAL, path: str = METRICS_LOG_PATH):
+        self.interval = interval
+        self.path = path
+        self.dumps = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MetricsDumper", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def dump(self):
+        """Append snapshot hiện tại thành một dòng JSON"""
+        line = json.dumps(get_metrics().snapshot(), sort_keys=True) + "\n"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.dumps += 1
+        except OSError as e:
+            log_error(f"MetricsDumper: error writing {self.path}: {e}")
+
+    def stop(self):
+        """Dừng thread và ghi snapshot cuối"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.dump()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+
+_metrics = Metrics()
+_dumper = None
+
+
+def get_metrics() -> Metrics:
+    """Registry dùng chung của process"""
+    return _metrics
+
+
+def reset_metrics():
+    """Xoá toàn bộ counters / timers (tests, benchmark); giữ trạng thái enabled"""
+    global _metrics
+    enabled = _metrics.enabled
+    _metrics = Metrics()
+    _metrics.enabled = enabled
+
+
+def set_enabled(enabled: bool):
+    """Bật / tắt đo (khi tắt, timer() và count() không làm gì)"""
+    _metrics.enabled = enabled
+
+
+def timer(name: str):
+    """get_metrics().timer(name)"""
+    return _metrics.timer(name)
+
+
+def count(name: str, value: int = 1):
+    """get_metrics().count(name, value)"""
+    _metrics.count(name, value)
+
+
+def record(name: str, nanoseconds: int):
+    """get_metrics().record(name, nanoseconds)"""
+    _metrics.record(name, nanoseconds)
+
+
+def start_metrics_dump(interval: float = DEFAULT_METRICS_DUMP_INTERVAL,
+                       path: str = METRICS_LOG_PATH) -> Optional[MetricsDumper]:
+    """
+    Bắt đầu dump snapshot định kỳ (thay dumper cũ nếu có)
+
+    Args:
+        interval: Giây giữa 2 lần dump (<= 0: không dump)
+        path: File JSONL
+
+    Returns:
+        MetricsDumper hoặc None nếu interval <= 0
+    """
+    global _dumper
+    stop_metrics_dump()
+    if not interval or interval <= 0:
+        return None
+    _dumper = MetricsDumper(interval, path)
+    _dumper.start()
+    return _dumper
+
+
+def stop_metrics_dump():
+    """Dừng dumper (nếu có) sau khi ghi snapshot cuối"""
+    global _dumper
+    dumper, _dumper = _dumper, None
+    if dumper is not None:
+        dumper.stop()
@@ -11,10 +11,10 @@ Lưu ý:
     - Business logic đã được di chuyển vào services/price_service.py
     - Module này chỉ re-export để backward compatibility
 """
-from services.price_service import get_price_info, price_update
+from services.price_service import get_price_info, get_price_info_events, price_update
 
 # Re-export để backward compatibility
-__all__ = ['get_price_info', 'price_update']
+__all__ = ['get_price_info', 'get_price_info_events', 'price_update']
 
 
 
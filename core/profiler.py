@@ -0,0 +1,501 @@
+"""
+Profiler Module
+===============
+
+Mục đích:
+    Module này bật / tắt profiling lúc app đang chạy (không sửa code) để có CPU profile
+    và memory profile của một session farm dài: biến môi trường TLI_PROFILE, flag --profile
+    (index.py, app.headless) hoặc combobox Profiling trong Settings.
+
+Tác dụng:
+    - Các đoạn code nóng được bọc bằng profile_section(name): vòng lặp của thread đọc log
+      ("worker") và các Tk callbacks ("ui"). Khi profiling tắt, profile_section() chỉ tốn
+      một phép kiểm tra global
+    - "cpu": cProfile (deterministic), một Profile cho mỗi section, ghi
+      log/profiles/<session>-<section>.prof (đọc bằng pstats / snakeviz)
+    - "sample": sampling profiler (thread riêng lấy stack qua sys._current_frames() mỗi
+      sample_interval giây, chỉ các thread đang ở trong một section), ghi
+      <session>-samples.txt dạng collapsed stacks (flamegraph.pl, speedscope)
+    - "memory": tracemalloc, snapshot ở mỗi lần vào / ra map (map_boundary()), ghi diff với
+      snapshot trước vào <session>-mem-NNN-<label>.txt
+    - Overhead được đo và ghi vào <session>-summary.json: hệ số chậm đi của một workload
+      chuẩn (tokenize_log) khi có cProfile / tracemalloc, thời gian CPU của sampler, bộ nhớ
+      của tracemalloc và thời gian chụp snapshots
+
+Class chính:
+    - Profiler: Một phiên profiling (start() ... stop())
+
+Function chính:
+    - parse_modes(): "cpu,memory" -> frozenset modes
+    - start_profiling() / stop_profiling(): Bắt đầu / kết thúc phiên dùng chung
+    - start_from_env(): Bắt đầu nếu có TLI_PROFILE
+    - profile_section(): Context manager bọc một đoạn code nóng
+    - map_boundary(): Snapshot bộ nhớ ở mốc vào / ra map
+"""
+import cProfile
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from .log_parser import tokenize_log
+from .logger import log_info, log_error
+
+
+PROFILE_ENV = "TLI_PROFILE"
+PROFILES_DIR = os.path.join("log", "profiles")
+PROFILE_MODES = ("cpu", "sample", "memory")
+# Giá trị env / flag được hiểu là "bật" với mode mặc định
+DEFAULT_MODES = frozenset({"cpu", "memory"})
+DEFAULT_SAMPLE_INTERVAL = 0.005
+MEMORY_FRAMES = 16
+MEMORY_TOP = 40
+SAMPLE_MAX_DEPTH = 64
+_session_numbers = itertools.count(1)
+# Thời gian chờ các section đang chạy khi stop() (giây)
+STOP_TIMEOUT = 2.0
+
+# Workload chuẩn để đo overhead: phân loại các dòng log như thread đọc log
+_CALIBRATION_LINES = "\n".join([
+    "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] ItemChange@ ProtoName=PickItems start",
+    "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] BagMgr@:Modfy BagItem PageId = 102 SlotId = 0 "
+    "ConfigBaseId = 5028 Num = 13",
+    "[2025.11.08-16.59.48:014][  1]LogNet: Display: NotifyAcceptingConnection accepted from: 10.0.0.1:51234",
+    "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] SkillMgr@ Cast SkillId = 1203 Target = 77",
+] * 500)
+
+
+def parse_modes(value) -> FrozenSet[str]:
+    """
+    Modes từ env / flag / Settings
+
+    Args:
+        value: "cpu", "sample", "memory", kết hợp bằng dấu phẩy / "+" ("cpu,memory"),
+            "all", "1" / "on" / "true" (= DEFAULT_MODES); rỗng / "0" / "off" = tắt
+
+    Returns:
+        frozenset: Các modes (rỗng = tắt)
+
+    Raises:
+        ValueError: Nếu có mode không hợp lệ
+    """
+    if value is None:
+        return frozenset()
+    if not isinstance(value, str):
+        return frozenset(parse_modes(",".join(value)))
+    text = value.strip().lower()
+    if text in ("", "0", "off", "false", "no"):
+        return frozenset()
+    if text in ("1", "on", "true", "yes"):
+        return DEFAULT_MODES
+    if text == "all":
+        return frozenset(PROFILE_MODES)
+    modes = frozenset(part.strip() for part in text.replace("+", ",").split(",") if part.strip())
+    unknown = modes - set(PROFILE_MODES)
+    if unknown:
+        raise ValueError(f"unknown profile mode(s) {sorted(unknown)}, expected {PROFILE_MODES}")
+    return modes
+
+
+def _best_time(function, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _calibration_workload():
+    tokenize_log(_CALIBRATION_LINES)
+
+
+class _NullSection:
+    """Section khi không profiling"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """Context manager của Profiler.section()"""
+
+    __slots__ = ("profiler", "name")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._exit(self.name)
+        return False
+
+
+class Profiler:
+    """
+    Một phiên profiling
+
+    Example:
+        profiler = Profiler({"cpu", "memory"})
+        profiler.start()
+        with profiler.section("worker"):
+            process(chunk)
+        profiler.map_boundary("exit_map")
+        summary = profiler.stop()     # ghi .prof, memory diffs, summary.json
+    """
+
+    def __init__(self, modes: Iterable[str], out_dir: str = PROFILES_DIR,
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL, memory_top: int = MEMORY_TOP):
+        """
+        Args:
+            modes: Tập con của PROFILE_MODES
+            out_dir: Thư mục output
+            sample_interval: Giây giữa 2 lần lấy mẫu (mode "sample")
+            memory_top: Số dòng của mỗi memory diff
+        """
+        self.modes = parse_modes(list(modes))
+        self.out_dir = out_dir
+        self.sample_interval = sample_interval
+        self.memory_top = memory_top
+        # Nhiều phiên trong cùng một giây (bật / tắt từ Settings) không ghi đè file của nhau
+        self.session = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}-{next(_session_numbers)}"
+        self.files = []
+        self.overhead = {}
+        self._profiles = {}      # section -> cProfile.Profile
+        self._sections = {}      # section -> [calls, seconds]
+        self._depth = {}         # thread ident -> (depth, section, started)
+        self._cond = threading.Condition()
+        self._running = False
+        self._started = 0.0
+        self._samples = {}       # collapsed stack -> count
+        self._sample_count = 0
+        self._sampler_seconds = 0.0
+        self._sampler = None
+        self._memory_snapshot = None
+        self._memory_index = 0
+        self._memory_seconds = 0.0
+        self._started_tracemalloc = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.out_dir, f"{self.session}-{suffix}")
+
+    def start(self):
+        """Đo overhead rồi bắt đầu profiling"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._calibrate()
+        if "memory" in self.modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(MEMORY_FRAMES)
+                self._started_tracemalloc = True
+            self._memory_snapshot = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self._running = True
+        if "sample" in self.modes:
+            self._sampler = threading.Thread(target=self._sample_loop, name="ProfilerSampler", daemon=True)
+            self._sampler.start()
+        log_info(f"profiler: started {sorted(self.modes)}, output {self.out_dir}/{self.session}-*")
+
+    def _calibrate(self):
+        """Hệ số chậm đi của workload chuẩn khi có cProfile / tracemalloc"""
+        baseline = _best_time(_calibration_workload)
+        self.overhead["calibration_seconds"] = round(baseline, 6)
+        if "cpu" in self.modes:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: đã có profiler khác đang chạy
+                profile = None
+            if profile is not None:
+                try:
+                    profiled = _best_time(_calibration_workload)
+                finally:
+                    profile.disable()
+                self.overhead["cpu_slowdown"] = round(profiled / baseline, 2)
+        if "memory" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+            try:
+                traced = _best_time(_calibration_workload)
+            finally:
+                tracemalloc.stop()
+            self.overhead["memory_slowdown"] = round(traced / baseline, 2)
+
+    def section(self, name: str):
+        """Context manager bọc một đoạn code (lồng nhau trên cùng thread: chỉ section ngoài cùng được tính)"""
+        if not self._running:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def _enter(self, name: str):
+        ident = threading.get_ident()
+        with self._cond:
+            depth = self._depth.get(ident)
+            if depth is not None:
+                self._depth[ident] = (depth[0] + 1, depth[1], depth[2])
+                return
+            if not self._running:
+                return
+            self._depth[ident] = (1, name, time.perf_counter())
+            profile = None
+            if "cpu" in self.modes:
+                profile = self._profiles.get(name)
+                if profile is None:
+                    profile = self._profiles[name] = cProfile.Profile()
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: cProfile dùng sys.monitoring chung cho cả process, section
+                # của thread khác đang được profile
+                pass
+
+    def _exit(self, name: str):
+        ident = threading.get_ident()
+        with self._cond:
+            depth = self._depth.get(ident)
+            if depth is None:
+                return
+            if depth[0] > 1:
+                self._depth[ident] = (depth[0] - 1, depth[1], depth[2])
+                return
+            section = depth[1]
+            profile = self._profiles.get(section)
+        # Disable trước khi bỏ thread khỏi _depth: stop() chờ _depth để dump các Profile
+        if profile is not None:
+            profile.disable()
+        with self._cond:
+            del self._depth[ident]
+            stats = self._sections.setdefault(section, [0, 0.0])
+            stats[0] += 1
+            stats[1] += time.perf_counter() - depth[2]
+            self._cond.notify_all()
+
+    def _sample_loop(self):
+        """Lấy stack của các thread đang ở trong một section mỗi sample_interval giây"""
+        own = threading.get_ident()
+        while self._running:
+            time.sleep(self.sample_interval)
+            started = time.perf_counter()
+            with self._cond:
+                active = {ident: depth[1] for ident, depth in self._depth.items()}
+            if active:
+                frames = sys._current_frames()
+                for ident, section in active.items():
+                    frame = frames.get(ident)
+                    if frame is None or ident == own:
+                        continue
+                    stack = []
+                    while frame is not None and len(stack) < SAMPLE_MAX_DEPTH:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                        frame = frame.f_back
+                    stack.append(section)
+                    key = ";".join(reversed(stack))
+                    self._samples[key] = self._samples.get(key, 0) + 1
+                    self._sample_count += 1
+            self._sampler_seconds += time.perf_counter() - started
+
+    def _memory_checkpoint(self, label: str):
+        """Snapshot + ghi diff với snapshot trước, thời gian được cộng vào memory_snapshot_seconds"""
+        started = time.perf_counter()
+        # Không filter_traces(): filter của tracemalloc chạy bằng Python, chậm hơn cả snapshot
+        snapshot = tracemalloc.take_snapshot()
+        self._memory_index += 1
+        try:
+            self._write_memory_diff(f"mem-{self._memory_index:03d}-{label}.txt", snapshot)
+        finally:
+            self._memory_seconds += time.perf_counter() - started
+
+    def map_boundary(self, label: str):
+        """
+        Snapshot bộ nhớ và ghi diff với snapshot trước (mode "memory")
+
+        Args:
+            label: Mốc ("enter_map", "exit_map", ...), có trong tên file
+        """
+        if not self._running or "memory" not in self.modes or not tracemalloc.is_tracing():
+            return
+        try:
+            self._memory_checkpoint(label)
+        except Exception as e:
+            log_error(f"profiler: error taking memory snapshot: {e}")
+
+    def _write_memory_diff(self, suffix: str, snapshot):
+        previous, self._memory_snapshot = self._memory_snapshot, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [
+            f"traced: {current} bytes, peak: {peak} bytes, "
+            f"tracemalloc overhead: {tracemalloc.get_tracemalloc_memory()} bytes",
+            f"top {self.memory_top} differences vs previous snapshot (lineno):",
+        ]
+        lines += [str(stat) for stat in snapshot.compare_to(previous, "lineno")[:self.memory_top]]
+        path = self._path(suffix)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self.files.append(path)
+
+    def stop(self) -> Dict:
+        """
+        Kết thúc phiên: chờ các section đang chạy, ghi files và summary
+
+        Returns:
+            dict: modes, duration_seconds, sections {name: {calls, seconds}}, overhead, files
+        """
+        ident = threading.get_ident()
+        with self._cond:
+            if not self._running:
+                return {}
+            self._running = False
+            # Section của thread khác đang chạy: chờ xong để Profile không bị disable giữa chừng
+            self._cond.wait_for(lambda: not any(other != ident for other in self._depth), STOP_TIMEOUT)
+        duration = time.perf_counter() - self._started
+        if self._sampler is not None:
+            self._sampler.join(STOP_TIMEOUT)
+        try:
+            self._write_outputs(duration)
+        except OSError as e:
+            log_error(f"profiler: error writing profiles: {e}")
+        summary = self.summary(duration)
+        path = self._path("summary.json")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            self.files.append(path)
+            summary["files"] = list(self.files)
+        except OSError as e:
+            log_error(f"profiler: error writing {path}: {e}")
+        log_info(f"profiler: stopped, wrote {len(self.files)} file(s) to {self.out_dir}")
+        return summary
+
+    def _write_outputs(self, duration: float):
+        os.makedirs(self.out_dir, exist_ok=True)
+        for section, profile in self._profiles.items():
+            path = self._path(f"{section}.prof")
+            profile.dump_stats(path)
+            self.files.append(path)
+        if "sample" in self.modes:
+            path = self._path("samples.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, samples in sorted(self._samples.items(), key=lambda item: -item[1]):
+                    f.write(f"{stack} {samples}\n")
+            self.files.append(path)
+            self.overhead["sampler_cpu_fraction"] = round(self._sampler_seconds / duration, 4) if duration > 0 else 0.0
+        if self._memory_snapshot is not None:
+            if tracemalloc.is_tracing():
+                self.overhead["tracemalloc_bytes"] = tracemalloc.get_tracemalloc_memory()
+                self._memory_checkpoint("stop")
+            self.overhead["memory_snapshot_seconds"] = round(self._memory_seconds, 4)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self._memory_snapshot = None
+
+    def summary(self, duration: Optional[float] = None) -> Dict:
+        """Thống kê của phiên (xem stop())"""
+        if duration is None:
+            duration = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "session": self.session,
+            "modes": sorted(self.modes),
+            "duration_seconds": round(duration, 3),
+            "sections": {name: {"calls": calls, "seconds": round(seconds, 6)}
+                         for name, (calls, seconds) in sorted(self._sections.items())},
+            "samples": self._sample_count,
+            "memory_snapshots": self._memory_index,
+            "overhead": dict(self.overhead),
+            "files": list(self.files),
+        }
+
+
+_profiler = None
+_lock = threading.Lock()
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Phiên đang chạy, None nếu profiling tắt"""
+    return _profiler
+
+
+def start_profiling(modes, out_dir: str = PROFILES_DIR,
+                    sample_interval: float = DEFAULT_SAMPLE_INTERVAL) -> Optional[Profiler]:
+    """
+    Bắt đầu phiên dùng chung (kết thúc phiên cũ nếu có)
+
+    Args:
+        modes: Xem parse_modes() (rỗng = chỉ tắt phiên cũ)
+        out_dir: Thư mục output
+        sample_interval: Giây giữa 2 lần lấy mẫu (mode "sample")
+
+    Returns:
+        Profiler hoặc None nếu modes rỗng
+
+    Raises:
+        ValueError: Nếu có mode không hợp lệ
+    """
+    global _profiler
+    modes = parse_modes(modes)
+    with _lock:
+        stop_profiling()
+        if not modes:
+            return None
+        profiler = Profiler(modes, out_dir, sample_interval)
+        profiler.start()
+        _profiler = profiler
+    return profiler
+
+
+def stop_profiling() -> Dict:
+    """Kết thúc phiên dùng chung (nếu có), trả về summary"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return {}
+    return profiler.stop()
+
+
+def start_from_env(environ=None) -> Optional[Profiler]:
+    """Bắt đầu phiên nếu biến môi trường TLI_PROFILE được set (ví dụ TLI_PROFILE=cpu,memory)"""
+    environ = os.environ if environ is None else environ
+    value = environ.get(PROFILE_ENV)
+    if not value:
+        return None
+    try:
+        return start_profiling(value)
+    except ValueError as e:
+        log_error(f"profiler: {PROFILE_ENV}: {e}")
+        return None
+
+
+def profile_section(name: str):
+    """Context manager bọc đoạn code nóng vào section name của phiên đang chạy (no-op nếu tắt)"""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SECTION
+    return profiler.section(name)
+
+
+def map_boundary(label: str):
+    """Snapshot bộ nhớ ở mốc vào / ra map (no-op nếu không có mode "memory")"""
+    profiler = _profiler
+    if profiler is not None:
+        profiler.map_boundary(label)
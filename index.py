@@ -15,17 +15,18 @@ Tác dụng:
 
 Flow khi chạy:
     1. Import các modules (app, drop_handler, price_handler, config)
-    2. Khởi tạo global variables (is_in_map, drop_list, income, etc.)
+    2. Khởi tạo global variables (config, bag_items cache; statistics nằm trong state.session)
     3. Clear log files (drop.txt, drop_log.txt)
     4. Tạo App instance
-    5. Start MyThread để đọc log file
+    5. Start metrics dump (log/metrics.jsonl), profiling (nếu được bật) và MyThread để đọc log file
     6. Start price_update thread để sync giá từ server
     7. Chạy mainloop() để hiển thị UI
 
 Lưu ý:
     Chạy file này để start ứng dụng: python index.py
 """
-import time
+import argparse
+import atexit
 import os
 import _thread
 from ui.ui import App
@@ -33,14 +34,19 @@ from app.app import MyThread
 from core.drop_handler import pending_items
 from core.price_handler import price_update
 from app import config
+from app.ui_scheduler import install_ui_scheduler, DEFAULT_UI_MAX_FPS
+from core import metrics
+from core import profiler
+
+# Tìm cửa sổ game và log file ngay khi start (chạy không có game: python -m app.headless)
+position_log = config.position_log
 
 # Initialize config for drop_handler
 from core.drop_handler import config_data as dh_config_data
 dh_config_data.update(config.config_data)
 
-# Import state module và initialize
+# Import state module (statistics của session nằm trong state.session)
 from app import state
-state.t = time.time()
 
 # Load bag_items từ bag_log.json khi start app để có cache trước đó
 from services.log_scan_service import init_bag_data
@@ -64,25 +70,44 @@ try:
 except Exception as e:
     print(f"Error clearing log files: {e}")
 
+# Command line: --profile MODES không hợp lệ thì báo lỗi và thoát trước khi mở cửa sổ (giống app.headless)
+arg_parser = argparse.ArgumentParser(prog="index.py")
+arg_parser.add_argument("--profile", metavar="MODES", help="cpu, sample, memory (kết hợp bằng dấu phẩy)")
+args, _ = arg_parser.parse_known_args()
+try:
+    profile_modes = profiler.parse_modes(args.profile)
+except ValueError as e:
+    arg_parser.error(str(e))
+
 # Initialize app
 root = App()
 root.wm_attributes('-topmost', 1)
 state.root = root
+# Cập nhật UI từ thread đọc log được gộp thành tối đa ui_max_fps frames mỗi giây
+install_ui_scheduler(root, config.config_data.get("ui_max_fps", DEFAULT_UI_MAX_FPS))
+
+# Metrics của pipeline (cửa sổ Metrics trong Settings): dump vào log/metrics.jsonl
+# mỗi metrics_dump_interval giây (0 = không dump), metrics_enabled = false để tắt đo
+metrics.set_enabled(config.config_data.get("metrics_enabled", True))
+metrics.start_metrics_dump(config.config_data.get("metrics_dump_interval", metrics.DEFAULT_METRICS_DUMP_INTERVAL))
+atexit.register(metrics.stop_metrics_dump)
+
+# Profiling (cProfile / sampling / tracemalloc, output trong log/profiles/): --profile MODES
+# (đã kiểm tra trước khi mở cửa sổ), biến môi trường TLI_PROFILE, hoặc bật / tắt lúc đang chạy trong Settings
+if profile_modes:
+    profiler.start_profiling(profile_modes)
+else:
+    profiler.start_from_env()
+atexit.register(profiler.stop_profiling)
 
 # Start log monitoring thread
 MyThread().start()
 
 # Export state để backward compatibility (nếu có code cũ còn dùng)
 # Các module mới nên import từ app.state thay vì index
-is_in_map = state.is_in_map
-drop_list = state.drop_list
-drop_list_all = state.drop_list_all
-income = state.income
-income_all = state.income_all
-t = state.t
+# Statistics (drop_list, income, map_count...) đọc qua session.snapshot()
+session = state.session
 show_all = state.show_all
-total_time = state.total_time
-map_count = state.map_count
 
 # TODO: Re-enable price sync thread sau khi hoàn thiện
 # Start price update thread
@@ -8,6 +8,7 @@ Repositories chỉ chịu trách nhiệm:
 - Giao tiếp với external APIs
 - HTTP requests/responses
 - Data transformation cơ bản (JSON parsing)
+- Đọc/ghi file trạng thái local (atomic)
 - Không chứa business logic
 """
 
@@ -18,10 +19,40 @@ from .price_api_client import (
     register_user
 )
 
+from .file_store import (
+    atomic_write_text,
+    atomic_write_json,
+    read_json
+)
+
+from .price_repository import PriceRepository
+
+from .price_history_file import PriceHistoryFile
+
+from .append_writer import (
+    AppendWriter,
+    get_append_writer,
+    close_append_writer
+)
+
+from .snapshot_writer import SnapshotWriter
+
+from .profit_ledger_file import ProfitLedgerFile
+
 __all__ = [
     'fetch_all_prices',
     'fetch_item_by_id',
     'submit_price',
-    'register_user'
+    'register_user',
+    'atomic_write_text',
+    'atomic_write_json',
+    'read_json',
+    'PriceRepository',
+    'PriceHistoryFile',
+    'AppendWriter',
+    'get_append_writer',
+    'close_append_writer',
+    'SnapshotWriter',
+    'ProfitLedgerFile'
 ]
 
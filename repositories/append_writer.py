@@ -0,0 +1,221 @@
+"""
+Append Writer Module
+====================
+
+Mục đích:
+    Module này ghi thêm (append) các dòng text vào file log local (log/drop.txt,
+    log/drop_log.txt) từ một background thread, để thread parse log không bao giờ
+    chờ disk I/O.
+
+Tác dụng:
+    - write() chỉ đưa dòng vào một queue có giới hạn (không block)
+    - Writer thread gom các dòng theo file và ghi mỗi file một lần mỗi batch:
+      khi đủ max_batch_bytes, hết flush_interval giây, hoặc khi được yêu cầu flush()
+    - flush(fsync=True) (ra map) đảm bảo dữ liệu đã nằm trên đĩa
+    - Thứ tự dòng được giữ nguyên (một queue chung cho tất cả file)
+    - Mỗi lần ghi file được đo (timer "append_write", counters "file_writes", "bytes_written"
+      trong core.metrics)
+    - Queue đầy (disk bị treo lâu): dòng mới bị bỏ và được đếm trong dropped_lines,
+      thay vì làm thread parse bị block
+
+Class chính:
+    - AppendWriter: Background writer với queue có giới hạn
+
+Các function chính:
+    - get_append_writer(): Writer dùng chung của process (flush + dừng khi thoát)
+    - close_append_writer(): Flush và dừng writer dùng chung
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Dict, List
+
+from core import metrics
+
+
+DEFAULT_MAX_QUEUE = 10000
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BATCH_BYTES = 64 * 1024
+
+# Thời gian chờ tối đa của flush(wait=True) / close() (giây)
+FLUSH_TIMEOUT = 5.0
+
+
+class _FlushRequest:
+    """Marker trong queue: ghi hết batch hiện tại (và fsync nếu cần)"""
+
+    __slots__ = ("fsync", "done")
+
+    def __init__(self, fsync: bool):
+        self.fsync = fsync
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class AppendWriter:
+    """
+    Background writer append text vào các file
+
+    Example:
+        writer = get_append_writer()
+        writer.write("log/drop.txt", "[...] Drop: Netherrealm Resonance x3 (0.2/each)\\n")
+        writer.flush(fsync=True)  # ra map
+    """
+
+    def __init__(self, max_queue: int = DEFAULT_MAX_QUEUE, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES):
+        self.flush_interval = flush_interval
+        self.max_batch_bytes = max_batch_bytes
+        self.dropped_lines = 0
+        self.write_errors = 0
+        # Số lần mở file để ghi (mỗi file một lần mỗi batch)
+        self.batches_written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="AppendWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, path: str, text: str) -> bool:
+        """
+        Đưa text vào queue để ghi thêm vào cuối file path (không block)
+
+        Args:
+            path: File đích (thư mục được tạo nếu chưa có)
+            text: Nội dung (thường là một hoặc nhiều dòng có '\\n')
+
+        Returns:
+            bool: False nếu queue đầy hoặc writer đã đóng (text bị bỏ)
+        """
+        if self._closed:
+            self.dropped_lines += 1
+            return False
+        try:
+            self._queue.put_nowait((path, text))
+            return True
+        except queue.Full:
+            self.dropped_lines += 1
+            if self.dropped_lines == 1 or self.dropped_lines % 1000 == 0:
+                print(f"AppendWriter: queue full, dropped {self.dropped_lines} line(s)")
+            return False
+
+    def flush(self, fsync: bool = False, wait: bool = False) -> bool:
+        """
+        Yêu cầu writer ghi hết các dòng đang chờ
+
+        Args:
+            fsync: Gọi os.fsync() cho các file vừa ghi (ví dụ khi ra map)
+            wait: Chờ tới khi ghi xong (tối đa FLUSH_TIMEOUT giây); thread parse không nên chờ
+
+        Returns:
+            bool: True nếu đã được đưa vào queue (và đã xong nếu wait=True)
+        """
+        if self._closed:
+            return False
+        request = _FlushRequest(fsync)
+        try:
+            if wait:
+                self._queue.put(request, timeout=FLUSH_TIMEOUT)
+            else:
+                self._queue.put_nowait(request)
+        except queue.Full:
+            return False
+        return request.done.wait(FLUSH_TIMEOUT) if wait else True
+
+    def close(self):
+        """Ghi hết các dòng đang chờ (có fsync) và dừng writer thread"""
+        if self._closed:
+            return
+        self.flush(fsync=True, wait=True)
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=FLUSH_TIMEOUT)
+        except queue.Full:
+            return
+        self._thread.join(FLUSH_TIMEOUT)
+
+    def _run(self):
+        pending = {}  # path -> [text]
+        pending_bytes = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._write_batch(pending, fsync=True)
+                return
+            if isinstance(item, _FlushRequest):
+                self._write_batch(pending, fsync=item.fsync)
+                pending, pending_bytes, deadline = {}, 0, None
+                item.done.set()
+                continue
+            if item is not None:
+                path, text = item
+                pending.setdefault(path, []).append(text)
+                pending_bytes += len(text)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if pending_bytes < self.max_batch_bytes and time.monotonic() < deadline:
+                    continue
+            if pending:
+                self._write_batch(pending, fsync=False)
+            pending, pending_bytes, deadline = {}, 0, None
+
+    def _write_batch(self, pending: Dict[str, List[str]], fsync: bool):
+        """Ghi mỗi file một lần cho toàn bộ batch"""
+        for path, parts in pending.items():
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                text = "".join(parts)
+                with metrics.timer("append_write"):
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(text)
+                        if fsync:
+                            f.flush()
+                            os.fsync(f.fileno())
+                self.batches_written += 1
+                metrics.count("file_writes")
+                metrics.count("bytes_written", len(text))
+            except OSError as e:
+                self.write_errors += 1
+                print(f"AppendWriter: error writing {path}: {e}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_atexit_registered = False
+
+
+def get_append_writer() -> AppendWriter:
+    """
+    Writer dùng chung của process (tạo ở lần gọi đầu tiên, tự close khi process thoát)
+
+    Returns:
+        AppendWriter
+    """
+    global _writer, _atexit_registered
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                if not _atexit_registered:
+                    atexit.register(close_append_writer)
+                    _atexit_registered = True
+                _writer = AppendWriter()
+    return _writer
+
+
+def close_append_writer():
+    """Flush + dừng writer dùng chung, lần get_append_writer() sau sẽ tạo writer mới"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
@@ -0,0 +1,83 @@
+"""
+File Store Module
+=================
+
+Mục đích:
+    Module này cung cấp các hàm đọc/ghi file JSON an toàn (atomic) cho các file
+    trạng thái local như log/checkpoint.json.
+
+Tác dụng:
+    - Ghi vào file tạm cùng thư mục rồi os.replace() sang file đích, nên khi app
+      bị kill giữa chừng file đích hoặc là bản cũ hoặc là bản mới, không bao giờ bị cắt dở
+    - Đọc JSON với giá trị mặc định khi file chưa tồn tại hoặc bị hỏng
+
+Các function chính:
+    - atomic_write_text(): Ghi text atomic
+    - atomic_write_json(): Ghi JSON atomic
+    - read_json(): Đọc JSON, trả về default nếu lỗi
+"""
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def atomic_write_text(path: str, text: str, fsync: bool = True):
+    """
+    Ghi text vào file theo kiểu atomic (file tạm + os.replace)
+
+    Args:
+        path: Đường dẫn file đích
+        text: Nội dung cần ghi (UTF-8)
+        fsync: Gọi os.fsync() trước khi rename để dữ liệu nằm trên đĩa khi mất điện
+
+    Raises:
+        OSError: Nếu không ghi được file
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: Any, indent: int = None, fsync: bool = True):
+    """
+    Ghi data dưới dạng JSON theo kiểu atomic
+
+    Args:
+        path: Đường dẫn file đích
+        data: Dữ liệu JSON-serializable
+        indent: Indent của json.dumps (None = compact)
+        fsync: Xem atomic_write_text()
+    """
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=indent), fsync=fsync)
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """
+    Đọc file JSON
+
+    Args:
+        path: Đường dẫn file
+        default: Giá trị trả về nếu file không tồn tại hoặc không phải JSON hợp lệ
+
+    Returns:
+        Dữ liệu đã parse hoặc default
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
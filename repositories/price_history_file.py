@@ -0,0 +1,96 @@
+"""
+Price History File
+==================
+
+Repository này lưu lịch sử giá (mỗi lần search giá trên exchange là một observation)
+vào một file binary append-only (log/price_history.bin).
+Chỉ chứa data access, không có business logic.
+
+Format:
+    - Header 8 byte: magic b"TLPH" + version (uint32 little-endian)
+    - Các record kích thước cố định (RECORD.size byte), xem RECORD_FIELDS
+    - Record cuối bị ghi dở (crash giữa chừng) được bỏ qua và cắt khi mở file; file ngắn hơn
+      header (crash khi đang tạo file) được coi là rỗng và cắt về 0 byte
+
+Các function chính:
+    - PriceHistoryFile.read_all(): Đọc toàn bộ records
+    - PriceHistoryFile.append(): Ghi thêm records vào cuối file
+"""
+import os
+import struct
+import threading
+from typing import Iterable, List, Tuple
+
+
+PRICE_HISTORY_PATH = os.path.join("log", "price_history.bin")
+
+MAGIC = b"TLPH"
+VERSION = 1
+HEADER = struct.Struct("<4sI")
+
+# Thứ tự field trong một record (item_id là số nguyên, depth là số giá trị trong ladder)
+RECORD_FIELDS = ("item_id", "timestamp", "price", "mean", "min", "max",
+                 "p10", "p25", "p50", "p75", "p90", "depth")
+RECORD = struct.Struct("<Id" + "d" * 9 + "I")
+
+
+class PriceHistoryFile:
+    """File append-only chứa các observation giá"""
+
+    def __init__(self, path: str = PRICE_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def read_all(self) -> List[Tuple]:
+        """
+        Đọc toàn bộ records, cắt bỏ record cuối nếu bị ghi dở (hoặc cả file nếu header bị ghi dở)
+
+        Returns:
+            List[Tuple]: Các records theo thứ tự RECORD_FIELDS
+
+        Raises:
+            ValueError: Nếu file không phải price history (sai magic/version)
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if not data:
+            return []
+        if len(data) < HEADER.size:
+            # Không thể chứa record nào: cắt về rỗng để append() ghi lại header
+            with self._lock, open(self.path, "r+b") as f:
+                f.truncate(0)
+            return []
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a price history file (version {VERSION})")
+        body_size = len(data) - HEADER.size
+        valid_size = body_size - body_size % RECORD.size
+        if valid_size != body_size:
+            with self._lock, open(self.path, "r+b") as f:
+                f.truncate(HEADER.size + valid_size)
+        return list(RECORD.iter_unpack(memoryview(data)[HEADER.size:HEADER.size + valid_size]))
+
+    def append(self, records: Iterable[Tuple]):
+        """
+        Ghi thêm records vào cuối file (tạo file + header nếu chưa có)
+
+        Args:
+            records: Các tuple theo thứ tự RECORD_FIELDS
+
+        Raises:
+            OSError: Nếu không ghi được file
+        """
+        payload = b"".join(RECORD.pack(*record) for record in records)
+        if not payload:
+            return
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "ab") as f:
+                if f.tell() == 0:
+                    f.write(HEADER.pack(MAGIC, VERSION))
+                f.write(payload)
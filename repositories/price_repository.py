@@ -0,0 +1,147 @@
+"""
+Price Repository
+================
+
+Repository này lưu giá items trong SQLite (price_store.db) thay cho việc đọc/ghi lại
+toàn bộ search_price_log.json mỗi khi có một giá mới.
+Chỉ chứa data access, không có business logic.
+
+Schema:
+    prices(item_id TEXT PRIMARY KEY, name TEXT, price REAL, last_update INTEGER, type TEXT)
+    - PRIMARY KEY là index theo item id: upsert/lookup O(log n)
+    - Mỗi upsert là một transaction (journal WAL) nên crash giữa chừng không làm hỏng DB
+
+Các function chính:
+    - PriceRepository.load_all(): Đọc toàn bộ bảng prices
+    - PriceRepository.upsert(): Insert hoặc update giá của một item (atomic)
+    - PriceRepository.import_json(): Migrate dữ liệu từ search_price_log.json
+"""
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+
+
+PRICE_DB_PATH = "price_store.db"
+LEGACY_PRICE_LOG_PATH = "search_price_log.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    item_id TEXT PRIMARY KEY,
+    name TEXT,
+    price REAL NOT NULL,
+    last_update INTEGER NOT NULL,
+    type TEXT
+)
+"""
+
+_UPSERT = """
+INSERT INTO prices (item_id, name, price, last_update, type)
+VALUES (:item_id, :name, :price, :last_update, :type)
+ON CONFLICT(item_id) DO UPDATE SET
+    name = COALESCE(excluded.name, prices.name),
+    price = excluded.price,
+    last_update = excluded.last_update,
+    type = COALESCE(excluded.type, prices.type)
+"""
+
+
+class PriceRepository:
+    """
+    Bảng prices trong SQLite
+
+    Connection được dùng chung giữa MyThread (ghi) và Tk main thread (đọc lúc khởi tạo),
+    mọi truy cập đi qua một lock.
+    """
+
+    def __init__(self, path: str = PRICE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+    def load_all(self) -> List[Dict]:
+        """
+        Đọc toàn bộ bảng prices
+
+        Returns:
+            List[Dict]: [{"idItem", "name", "price", "last_update", "type"}] (format giống search_price_log.json)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, name, price, last_update, type FROM prices"
+            ).fetchall()
+        return [
+            {"idItem": item_id, "name": name, "price": price, "last_update": last_update, "type": item_type}
+            for item_id, name, price, last_update, item_type in rows
+        ]
+
+    def count(self) -> int:
+        """Số items trong bảng prices"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+
+    def upsert(self, entry: Dict):
+        """
+        Insert hoặc update giá của một item (một transaction)
+
+        Args:
+            entry: {"idItem", "price", "last_update", "name" (optional), "type" (optional)}
+
+        Raises:
+            sqlite3.Error: Nếu ghi thất bại
+        """
+        self.upsert_many([entry])
+
+    def upsert_many(self, entries: Iterable[Dict]):
+        """
+        Insert hoặc update nhiều items trong cùng một transaction
+
+        Args:
+            entries: Các entry giống upsert()
+
+        Raises:
+            sqlite3.Error: Nếu ghi thất bại (không có entry nào được ghi)
+        """
+        params = [
+            {
+                "item_id": str(entry["idItem"]),
+                "name": entry.get("name"),
+                "price": entry.get("price", 0),
+                "last_update": entry.get("last_update", 0),
+                "type": entry.get("type"),
+            }
+            for entry in entries
+        ]
+        if not params:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(_UPSERT, params)
+
+    def import_json(self, path: str = LEGACY_PRICE_LOG_PATH) -> int:
+        """
+        Import search_price_log.json vào bảng prices (dùng khi migrate lần đầu)
+
+        Args:
+            path: Đường dẫn file JSON (list các entry có "idItem")
+
+        Returns:
+            int: Số entries đã import
+
+        Raises:
+            OSError / ValueError: Nếu không đọc được file
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            price_log = json.load(f)
+        entries = [entry for entry in price_log if isinstance(entry, dict) and entry.get("idItem")]
+        self.upsert_many(entries)
+        return len(entries)
+
+    def close(self):
+        """Đóng connection"""
+        with self._lock:
+            self._conn.close()
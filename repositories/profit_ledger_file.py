@@ -0,0 +1,214 @@
+"""
+Profit Ledger File
+==================
+
+Repository này lưu lịch sử profit (mỗi map một record) vào một file JSONL append-only
+(log/profit_ledger.jsonl) kèm file index (log/profit_ledger.idx).
+Chỉ chứa data access, không có business logic.
+
+Format:
+    - profit_ledger.jsonl: Mỗi dòng là một record JSON (UTF-8, compact)
+    - profit_ledger.idx: Offset (uint64 little-endian) của từng dòng trong file JSONL,
+      nên record thứ n đọc được bằng 2 lần seek, không cần đọc cả file
+    - Ghi dòng JSONL trước rồi mới ghi index: crash giữa chừng chỉ để lại dòng ghi dở
+      (bị cắt khi mở) hoặc dòng chưa có index (được index lại khi mở)
+
+Các function chính:
+    - ProfitLedgerFile.append(): Ghi thêm một record (O(1), không đọc lại file)
+    - ProfitLedgerFile.read_range(): Đọc các records [start, stop)
+    - ProfitLedgerFile.iter_records(): Đọc lần lượt theo từng trang
+    - ProfitLedgerFile.import_json(): Migrate dữ liệu từ profit_log.json
+"""
+import json
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional
+
+
+PROFIT_LEDGER_PATH = os.path.join("log", "profit_ledger.jsonl")
+PROFIT_INDEX_PATH = os.path.join("log", "profit_ledger.idx")
+LEGACY_PROFIT_LOG_PATH = os.path.join("log", "profit_log.json")
+
+OFFSET = struct.Struct("<Q")
+
+
+class ProfitLedgerFile:
+    """File JSONL append-only + index offset của từng record"""
+
+    def __init__(self, path: str = PROFIT_LEDGER_PATH, index_path: Optional[str] = None):
+        self.path = path
+        self.index_path = index_path or os.path.splitext(path)[0] + ".idx"
+        self._lock = threading.Lock()
+        with self._lock:
+            self._recover()
+
+    def _size(self, path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def _offset(self, index: int) -> int:
+        with open(self.index_path, "rb") as f:
+            f.seek(index * OFFSET.size)
+            return OFFSET.unpack(f.read(OFFSET.size))[0]
+
+    def _recover(self):
+        """Cắt dòng/offset ghi dở và index các dòng chưa có offset (chỉ đọc phần đuôi file)"""
+        data_size = self._size(self.path)
+        index_size = self._size(self.index_path)
+        count = index_size // OFFSET.size
+        # Bỏ offset trỏ ra ngoài file JSONL (file JSONL bị cắt/xoá)
+        while count and self._offset(count - 1) >= data_size:
+            count -= 1
+        if count * OFFSET.size != index_size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(count * OFFSET.size)
+        if not data_size:
+            self._count = count
+            return
+
+        # Dòng cuối đã có index vẫn được đọc lại để tìm điểm bắt đầu của phần chưa index
+        start = self._offset(count - 1) if count else 0
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            tail = f.read()
+        offsets = []
+        position = start
+        complete = start
+        # Chỉ tách theo b"\n" (json.dumps luôn escape xuống dòng bên trong string)
+        for line in tail.split(b"\n")[:-1]:
+            offsets.append(position)
+            position += len(line) + 1
+            complete = position
+        if count:
+            offsets = offsets[1:]
+        if complete != data_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(complete)
+        if offsets:
+            with open(self.index_path, "ab") as f:
+                f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+        self._count = count + len(offsets)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, record: Dict) -> int:
+        """
+        Ghi thêm một record vào cuối ledger
+
+        Args:
+            record: dict JSON-serializable
+
+        Returns:
+            int: Vị trí (index) của record
+
+        Raises:
+            OSError: Nếu không ghi được file
+        """
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+            with open(self.index_path, "ab") as f:
+                f.write(OFFSET.pack(offset))
+            self._count += 1
+            return self._count - 1
+
+    def append_many(self, records: List[Dict]) -> int:
+        """
+        Ghi thêm nhiều records (một lần mở file)
+
+        Returns:
+            int: Số records đã ghi
+        """
+        lines = [(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                 for record in records]
+        if not lines:
+            return 0
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            offsets = []
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                for line in lines:
+                    offsets.append(offset)
+                    offset += len(line)
+                f.write(b"".join(lines))
+            with open(self.index_path, "ab") as f:
+                f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+            self._count += len(lines)
+        return len(lines)
+
+    def read_range(self, start: int, stop: int) -> List[Dict]:
+        """
+        Đọc các records [start, stop) (giống slicing, không đọc phần còn lại của file)
+
+        Args:
+            start: Index đầu tiên
+            stop: Index sau record cuối cùng
+
+        Returns:
+            List[Dict]: Các records theo thứ tự ghi
+        """
+        with self._lock:
+            start, stop, _ = slice(start, stop).indices(self._count)
+            if start >= stop:
+                return []
+            with open(self.index_path, "rb") as f:
+                f.seek(start * OFFSET.size)
+                first = OFFSET.unpack(f.read(OFFSET.size))[0]
+                end = None
+                if stop < self._count:
+                    f.seek(stop * OFFSET.size)
+                    end = OFFSET.unpack(f.read(OFFSET.size))[0]
+            with open(self.path, "rb") as f:
+                f.seek(first)
+                data = f.read() if end is None else f.read(end - first)
+        return [json.loads(line) for line in data.split(b"\n") if line]
+
+    def iter_records(self, start: int = 0, page_size: int = 256) -> Iterator[Dict]:
+        """
+        Đọc lần lượt các records từ start, mỗi lần một trang page_size records
+
+        Args:
+            start: Index bắt đầu
+            page_size: Số records đọc mỗi lần
+
+        Yields:
+            dict: Từng record
+        """
+        position = start
+        while position < len(self):
+            page = self.read_range(position, position + page_size)
+            if not page:
+                return
+            yield from page
+            position += len(page)
+
+    def import_json(self, path: str = LEGACY_PROFIT_LOG_PATH) -> int:
+        """
+        Import profit_log.json (list các entries) vào ledger (dùng khi migrate lần đầu)
+
+        Args:
+            path: Đường dẫn profit_log.json
+
+        Returns:
+            int: Số records đã import
+
+        Raises:
+            OSError, ValueError: Nếu không đọc được file
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError(f"{path} is not a profit log (expected a list)")
+        return self.append_many([entry for entry in entries if isinstance(entry, dict)])
@@ -0,0 +1,160 @@
+"""
+Snapshot Writer Module
+======================
+
+Mục đích:
+    Module này ghi snapshot của một trạng thái thay đổi liên tục (ví dụ state.bag_items
+    -> log/bag_log.json) từ một background thread, gộp nhiều thay đổi thành một lần ghi.
+
+Tác dụng:
+    - mark_dirty() chỉ bật cờ dirty (O(1), không serialize, không disk I/O)
+    - Writer thread ghi tối đa một lần mỗi interval giây: thay đổi đầu tiên sau một
+      khoảng nghỉ được ghi ngay, các thay đổi tiếp theo được gộp tới hết interval
+    - flush() (ra map) ghi ngay phần đang dirty, close() (app thoát) ghi lần cuối
+    - Ghi atomic (file tạm + os.replace, xem repositories.file_store): file đích
+      luôn là một snapshot đầy đủ
+    - Dữ liệu lấy từ source() ngay lúc ghi, nên luôn là trạng thái mới nhất
+    - Mỗi lần ghi được đo (timer "snapshot_write", counter "file_writes" trong core.metrics)
+
+Class chính:
+    - SnapshotWriter: Debounced atomic JSON snapshot writer
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from core import metrics
+from .file_store import atomic_write_json
+
+
+DEFAULT_SNAPSHOT_INTERVAL = 5.0
+
+# Thời gian chờ tối đa của flush(wait=True) / close() (giây)
+FLUSH_TIMEOUT = 5.0
+
+
+class SnapshotWriter:
+    """
+    Ghi source() vào file JSON, tối đa một lần mỗi interval giây
+
+    Example:
+        writer = SnapshotWriter("log/bag_log.json", lambda: {"items": dict(state.bag_items)})
+        writer.mark_dirty()  # sau mỗi thay đổi
+        writer.flush()       # ra map
+        writer.close()       # app thoát
+    """
+
+    def __init__(self, path: str, source: Callable[[], Any], interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+                 indent: Optional[int] = None):
+        self.path = path
+        self.source = source
+        self.interval = interval
+        self.indent = indent
+        self.writes = 0
+        self.write_errors = 0
+        self._cond = threading.Condition()
+        # _generation tăng mỗi lần mark_dirty(), _written là generation của lần ghi gần nhất
+        self._generation = 0
+        self._written = 0
+        self._last_write = None
+        self._flush_requested = False
+        self._fsync = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="SnapshotWriter", daemon=True)
+        self._thread.start()
+
+    @property
+    def dirty(self) -> bool:
+        """Còn thay đổi chưa được ghi"""
+        with self._cond:
+            return self._generation != self._written
+
+    def mark_dirty(self):
+        """Đánh dấu trạng thái đã thay đổi (không block, không serialize)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._generation += 1
+            self._cond.notify()
+
+    def flush(self, fsync: bool = True, wait: bool = False) -> bool:
+        """
+        Ghi ngay phần đang dirty, không chờ hết interval
+
+        Args:
+            fsync: Gọi os.fsync() trước khi rename
+            wait: Chờ tới khi ghi xong (tối đa FLUSH_TIMEOUT giây)
+
+        Returns:
+            bool: True nếu không còn gì để ghi (hoặc đã yêu cầu ghi nếu wait=False)
+        """
+        with self._cond:
+            target = self._generation
+            if self._written >= target:
+                return True
+            if self._closed:
+                return False
+            self._flush_requested = True
+            self._fsync = self._fsync or fsync
+            self._cond.notify()
+            if not wait:
+                return True
+            return self._cond.wait_for(lambda: self._written >= target, FLUSH_TIMEOUT)
+
+    def close(self):
+        """Ghi lần cuối nếu còn dirty (có fsync) và dừng writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(FLUSH_TIMEOUT)
+
+    def _next_write(self):
+        """Chờ tới khi cần ghi, trả về (generation, fsync) hoặc None nếu dừng"""
+        with self._cond:
+            while True:
+                pending = self._generation != self._written
+                if self._closed:
+                    return (self._generation, True) if pending else None
+                if pending:
+                    now = time.monotonic()
+                    due = now if self._last_write is None else self._last_write + self.interval
+                    if self._flush_requested or now >= due:
+                        fsync = self._fsync
+                        self._flush_requested = False
+                        self._fsync = False
+                        return self._generation, fsync
+                    self._cond.wait(due - now)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            job = self._next_write()
+            if job is None:
+                return
+            generation, fsync = job
+            ok = self._write(fsync)
+            with self._cond:
+                self._last_write = time.monotonic()
+                if ok or self._closed:
+                    # Khi dừng không thử lại, tránh close() bị treo vì disk lỗi
+                    self._written = max(self._written, generation)
+                self._cond.notify_all()
+                if self._closed and self._written >= self._generation:
+                    return
+
+    def _write(self, fsync: bool) -> bool:
+        try:
+            with metrics.timer("snapshot_write"):
+                atomic_write_json(self.path, self.source(), indent=self.indent, fsync=fsync)
+        except Exception as e:
+            # Lỗi source (dữ liệu đang bị sửa) hoặc disk: vẫn dirty, thử lại sau interval
+            self.write_errors += 1
+            print(f"SnapshotWriter: error writing {self.path}: {e}")
+            return False
+        self.writes += 1
+        metrics.count("file_writes")
+        return True
@@ -12,6 +12,7 @@ Services chịu trách nhiệm:
 
 from .price_service import (
     get_price_info,
+    get_price_info_events,
     price_update,
     get_user
 )
@@ -19,28 +20,121 @@ from .price_service import (
 from .log_scan_service import (
     init_bag_data,
     scan_init_bag,
+    scan_init_bag_events,
+    parse_init_bag_events,
     scan_drop_log,
-    scan_price_search
+    scan_drop_events,
+    DropScanner,
+    scan_price_search,
+    scan_price_search_events,
+    analyze_price_searches
 )
 
 from .item_service import (
     get_item_info,
     get_item_name,
     get_item_price,
+    get_item_price_at,
     clear_cache as clear_item_cache
 )
 
+from .item_catalog import (
+    ItemCatalog,
+    get_item_catalog
+)
+
+from .price_store import (
+    PriceStore,
+    get_price_store,
+    close_price_store
+)
+
+from .price_analyzer import (
+    analyze_ladder,
+    analyze_ladders,
+    get_price_strategy,
+    PRICE_STRATEGIES
+)
+
+from .price_history import (
+    PriceHistory,
+    summarize_ladder,
+    summary_from_stats,
+    get_price_history,
+    reset_price_history
+)
+
+from .bag_snapshot import (
+    load_bag_snapshot,
+    mark_bag_dirty,
+    flush_bag_snapshot,
+    get_bag_snapshot_writer,
+    close_bag_snapshot_writer
+)
+
+from .profit_ledger import (
+    ProfitLedger,
+    get_profit_ledger,
+    close_profit_ledger
+)
+
+from .checkpoint_service import CheckpointService
+
+from .replay_service import (
+    ReplayResult,
+    find_log_files,
+    replay_file,
+    build_outputs,
+    replay
+)
+
 __all__ = [
     'get_price_info',
+    'get_price_info_events',
     'price_update',
     'get_user',
     'init_bag_data',
     'scan_init_bag',
+    'scan_init_bag_events',
+    'parse_init_bag_events',
     'scan_drop_log',
+    'scan_drop_events',
+    'DropScanner',
     'scan_price_search',
+    'scan_price_search_events',
+    'analyze_price_searches',
     'get_item_info',
     'get_item_name',
     'get_item_price',
-    'clear_item_cache'
+    'get_item_price_at',
+    'clear_item_cache',
+    'ItemCatalog',
+    'get_item_catalog',
+    'PriceStore',
+    'get_price_store',
+    'close_price_store',
+    'analyze_ladder',
+    'analyze_ladders',
+    'get_price_strategy',
+    'PRICE_STRATEGIES',
+    'PriceHistory',
+    'summarize_ladder',
+    'summary_from_stats',
+    'get_price_history',
+    'reset_price_history',
+    'load_bag_snapshot',
+    'mark_bag_dirty',
+    'flush_bag_snapshot',
+    'get_bag_snapshot_writer',
+    'close_bag_snapshot_writer',
+    'ProfitLedger',
+    'get_profit_ledger',
+    'close_profit_ledger',
+    'CheckpointService',
+    'ReplayResult',
+    'find_log_files',
+    'replay_file',
+    'build_outputs',
+    'replay'
 ]
 
@@ -0,0 +1,115 @@
+"""
+Bag Snapshot Service
+====================
+
+Mục đích:
+    Module này lưu state.bag_items xuống log/bag_log.json để lần start app sau có cache
+    số lượng items trong túi (init_bag_data), thay vì ghi lại toàn bộ túi sau mỗi drop.
+
+Tác dụng:
+    - Drop / InitBagData chỉ gọi mark_bag_dirty(), không serialize túi đồ
+    - repositories.snapshot_writer gộp các thay đổi: ghi tối đa một lần mỗi
+      BAG_SNAPSHOT_INTERVAL giây, ghi ngay khi ra map (flush_bag_snapshot) và khi app thoát
+    - Ghi atomic, JSON compact (không indent) nên file nhỏ hơn và load nhanh hơn;
+      format giữ nguyên {"timestamp", "datetime", "items"} nên file cũ vẫn đọc được
+
+Function chính:
+    - mark_bag_dirty(): Đánh dấu state.bag_items đã thay đổi
+    - flush_bag_snapshot(): Ghi ngay (ra map)
+    - load_bag_snapshot(): Đọc items từ log/bag_log.json
+    - get_bag_snapshot_writer() / close_bag_snapshot_writer(): Writer dùng chung
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from repositories.file_store import read_json
+from repositories.snapshot_writer import SnapshotWriter
+from app import state
+
+
+BAG_LOG_PATH = os.path.join("log", "bag_log.json")
+BAG_SNAPSHOT_INTERVAL = 5.0
+
+
+def _bag_snapshot() -> Dict:
+    """Snapshot của state.bag_items (chạy trên writer thread, copy trước khi serialize)"""
+    # dict() copy trong một bước nên thread parse có thể thêm item cùng lúc
+    items = dict(state.bag_items)
+    return {
+        "timestamp": round(time.time()),
+        "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "items": {item_id: dict(info) if isinstance(info, dict) else info for item_id, info in items.items()}
+    }
+
+
+def load_bag_snapshot(path: str = BAG_LOG_PATH) -> Optional[Dict[str, Dict]]:
+    """
+    Đọc bag items từ bag_log.json
+
+    Args:
+        path: Đường dẫn bag_log.json
+
+    Returns:
+        dict item_id -> {"name", "num"}, None nếu chưa có file hoặc sai format
+        (file dạng list cũ: lấy entry cuối cùng)
+    """
+    data = read_json(path)
+    if isinstance(data, list) and data:
+        data = data[-1]
+    if isinstance(data, dict) and isinstance(data.get("items"), dict):
+        return data["items"]
+    return None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_atexit_registered = False
+
+
+def get_bag_snapshot_writer() -> SnapshotWriter:
+    """
+    Writer dùng chung cho log/bag_log.json (tự ghi lần cuối khi process thoát)
+
+    Returns:
+        SnapshotWriter
+    """
+    global _writer, _atexit_registered
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                if not _atexit_registered:
+                    atexit.register(close_bag_snapshot_writer)
+                    _atexit_registered = True
+                _writer = SnapshotWriter(BAG_LOG_PATH, _bag_snapshot, interval=BAG_SNAPSHOT_INTERVAL)
+    return _writer
+
+
+def close_bag_snapshot_writer():
+    """Ghi lần cuối + dừng writer dùng chung, lần get_bag_snapshot_writer() sau sẽ tạo writer mới"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+def mark_bag_dirty():
+    """state.bag_items đã thay đổi: sẽ được ghi trong BAG_SNAPSHOT_INTERVAL giây"""
+    get_bag_snapshot_writer().mark_dirty()
+
+
+def flush_bag_snapshot(wait: bool = False) -> bool:
+    """
+    Ghi ngay state.bag_items (có fsync) nếu có thay đổi chưa ghi
+
+    Args:
+        wait: Chờ tới khi ghi xong
+
+    Returns:
+        bool: Xem SnapshotWriter.flush()
+    """
+    return get_bag_snapshot_writer().flush(fsync=True, wait=wait)
@@ -0,0 +1,135 @@
+"""
+Checkpoint Service Module
+=========================
+
+Mục đích:
+    Module này lưu checkpoint của việc đọc UE_game.log vào log/checkpoint.json để
+    khi restart tracker có thể đọc tiếp đúng chỗ đã dừng, thay vì seek đến cuối file
+    và mất các drops được ghi trong lúc tracker tắt.
+
+Nội dung checkpoint:
+    - log: Định danh file (dev, inode, hash phần đầu) + byte offset + byte UTF-8 chưa decode xong
+    - parser: Dòng đang ghi dở (LogStreamTokenizer) + PickItems block đang mở (DropScanner)
+    - session: Statistics của session (drop_list_all, income_all, map_count, ...) và
+      state.bag_items (baseline số lượng, cùng thời điểm với offset)
+
+Tác dụng:
+    - Ghi atomic (file tạm + os.replace), không bao giờ để lại checkpoint bị cắt dở
+    - Giới hạn tần suất ghi (flush_interval), có thể ép ghi ngay (ví dụ khi ra map)
+    - Checkpoint chỉ được dùng khi file log vẫn là file cũ và chưa bị truncate,
+      hoặc file cũ đã được game đổi tên thành UE_game-backup-*.log (đọc nốt file backup
+      rồi chuyển sang log mới)
+
+Class chính:
+    - CheckpointService: Load/validate và flush checkpoint theo tần suất giới hạn
+"""
+import os
+import time
+from typing import Callable, Dict, Optional
+from core.logger import log_debug
+from core.log_tailer import find_rotated_file, is_same_file
+from repositories.file_store import atomic_write_json, read_json
+
+
+CHECKPOINT_PATH = os.path.join("log", "checkpoint.json")
+CHECKPOINT_VERSION = 1
+
+# Khoảng thời gian tối thiểu giữa 2 lần ghi checkpoint (giây)
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+class CheckpointService:
+    """
+    Quản lý file checkpoint cho log tailer
+
+    capture là callable trả về dict checkpoint hiện tại (không gồm "version"/"saved_at"),
+    chỉ được gọi khi thực sự cần ghi, nên mark_dirty() + maybe_save() rất rẻ.
+
+    Example:
+        checkpoint = CheckpointService(self._capture_checkpoint)
+        data = checkpoint.load(config.position_log)
+        ...
+        checkpoint.mark_dirty()
+        checkpoint.maybe_save()
+    """
+
+    def __init__(self, capture: Callable[[], Dict], path: str = CHECKPOINT_PATH,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.capture = capture
+        self.path = path
+        self.flush_interval = flush_interval
+        self.save_count = 0
+        self._dirty = False
+        self._last_save = float("-inf")
+
+    def load(self, log_path: str) -> Optional[Dict]:
+        """
+        Đọc checkpoint và kiểm tra còn dùng được cho log_path không
+
+        Args:
+            log_path: Đường dẫn UE_game.log hiện tại
+
+        Returns:
+            dict checkpoint nếu hợp lệ, None nếu không có hoặc file log đã đổi/bị truncate.
+            Nếu log cũ đã thành file backup, data["log"]["source_path"] là đường dẫn file backup.
+        """
+        data = read_json(self.path)
+        if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+            return None
+        log_state = data.get("log") or {}
+        source_path = log_path
+        if not is_same_file(log_path, log_state):
+            source_path = find_rotated_file(log_path, log_state)
+            if source_path is None:
+                log_debug("checkpoint: log file changed since last run, starting from end of file")
+                return None
+            log_debug(f"checkpoint: log was rotated to {source_path}, resuming from backup")
+            log_state["source_path"] = source_path
+        try:
+            size = os.path.getsize(source_path)
+        except OSError as e:
+            log_debug(f"checkpoint: cannot stat log file: {e}")
+            return None
+        if log_state.get("offset", -1) > size or log_state.get("offset", -1) < 0:
+            log_debug(f"checkpoint: offset {log_state.get('offset')} beyond file size {size}, ignored")
+            return None
+        return data
+
+    def mark_dirty(self):
+        """Đánh dấu có dữ liệu mới cần ghi vào checkpoint"""
+        self._dirty = True
+
+    def maybe_save(self, force: bool = False) -> bool:
+        """
+        Ghi checkpoint nếu có thay đổi và đã qua flush_interval (hoặc force=True)
+
+        Args:
+            force: Ghi ngay, bỏ qua giới hạn tần suất
+
+        Returns:
+            bool: True nếu đã ghi
+        """
+        if not self._dirty:
+            return False
+        if not force and time.monotonic() - self._last_save < self.flush_interval:
+            return False
+        return self.save()
+
+    def save(self) -> bool:
+        """
+        Ghi checkpoint ngay lập tức (atomic)
+
+        Returns:
+            bool: True nếu ghi thành công
+        """
+        try:
+            data = {"version": CHECKPOINT_VERSION, "saved_at": time.time()}
+            data.update(self.capture())
+            atomic_write_json(self.path, data)
+        except Exception as e:
+            log_debug(f"error writing checkpoint: {e}")
+            return False
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.save_count += 1
+        return True
@@ -0,0 +1,206 @@
+"""
+Item Catalog Service
+====================
+
+Mục đích:
+    Module này giữ một bản duy nhất của id_table.json trong RAM cho toàn bộ process
+    (drop_handler, log_scan_service, item_service, ui), thay cho các cache TTL riêng lẻ
+    mà mỗi module tự json.load() lại.
+
+Tác dụng:
+    - Lookup O(1) theo item id: name, type
+    - Index phụ theo type (dùng cho filter của Drops panel - App.show_type)
+    - Chỉ đọc lại file khi file thực sự thay đổi: kiểm tra mtime/size (tối đa mỗi
+      check_interval giây), nếu đổi thì so sánh hash nội dung trước khi rebuild
+    - Ở trạng thái ổn định không đọc file nào, kể cả khi được gọi mỗi tick
+    - Thời gian mỗi lần đọc lại file được ghi vào timer "catalog_reload" (core.metrics)
+
+Class chính:
+    - ItemCatalog: Catalog items với index theo id và theo type
+
+Function chính:
+    - get_item_catalog(): Catalog dùng chung của process (id_table.json trong thư mục hiện tại)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, Optional
+from core.logger import log_debug
+from core import metrics
+
+
+ID_TABLE_PATH = "id_table.json"
+UNKNOWN_TYPE = "Unknown"
+
+# Khoảng thời gian tối thiểu giữa 2 lần os.stat() kiểm tra file thay đổi (giây)
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+class ItemCatalog:
+    """
+    Catalog items từ id_table.json
+
+    Dữ liệu được thay cả khối (một tuple) khi reload, nên thread đọc (MyThread, Tk main
+    thread) không cần lock và luôn thấy một bản nhất quán.
+
+    Example:
+        catalog = get_item_catalog()
+        catalog.name_of("5028")                    # "Netherrealm Resonance"
+        catalog.ids_of_types(["Hard Currency"])    # frozenset({"100300", "5028", ...})
+    """
+
+    def __init__(self, path: str = ID_TABLE_PATH, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        # Tăng mỗi khi nội dung catalog thay đổi (UI có thể dùng để biết cần render lại)
+        self.version = 0
+        self.load_count = 0
+        self._data = ({}, {})  # (items: {id: {"name", "type"}}, by_type: {type: frozenset(ids)})
+        self._stat_key = None
+        self._content_hash = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_fresh(self):
+        """Kiểm tra file thay đổi (rate-limited) và reload nếu cần"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if self._stat_key is not None or self.load_count == 0:
+                log_debug(f"item catalog: cannot stat {self.path}: {e}")
+                self._stat_key = None
+                self.load_count += 1
+            return
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if stat_key != self._stat_key:
+            with metrics.timer("catalog_reload"):
+                self._reload(stat_key)
+
+    def _reload(self, stat_key):
+        """Đọc file, chỉ rebuild index khi hash nội dung khác lần trước"""
+        with self._lock:
+            if stat_key == self._stat_key:
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+            except OSError as e:
+                log_debug(f"item catalog: error reading {self.path}: {e}")
+                return
+            self.load_count += 1
+            self._stat_key = stat_key
+            content_hash = hashlib.sha1(raw).hexdigest()
+            if content_hash == self._content_hash:
+                return
+            try:
+                table = json.loads(raw.decode("utf-8"))
+            except ValueError as e:
+                # File đang được ghi dở hoặc hỏng: giữ catalog cũ, thử lại lần check sau
+                log_debug(f"item catalog: invalid JSON in {self.path}: {e}")
+                self._stat_key = None
+                return
+            self._data = self._build(table)
+            self._content_hash = content_hash
+            self.version += 1
+            log_debug(f"item catalog: loaded {len(self._data[0])} items (version {self.version})")
+
+    @staticmethod
+    def _build(table: Dict):
+        """Chuẩn hóa id_table thành {id: {name, type}} và index theo type"""
+        items = {}
+        ids_by_type = {}
+        for item_id, item_data in table.items():
+            item_id = str(item_id)
+            if isinstance(item_data, dict):
+                entry = {
+                    "name": item_data.get("name", f"Item {item_id}"),
+                    "type": item_data.get("type", UNKNOWN_TYPE),
+                }
+            else:
+                # Fallback nếu format không đúng
+                entry = {"name": str(item_data), "type": UNKNOWN_TYPE}
+            items[item_id] = entry
+            ids_by_type.setdefault(entry["type"], set()).add(item_id)
+        by_type = {item_type: frozenset(ids) for item_type, ids in ids_by_type.items()}
+        return items, by_type
+
+    def invalidate(self):
+        """Bắt buộc kiểm tra lại file ở lần truy cập tiếp theo"""
+        self._next_check = 0.0
+        self._stat_key = None
+
+    def get(self, item_id) -> Optional[Dict[str, str]]:
+        """
+        Lấy {"name", "type"} của item
+
+        Args:
+            item_id: Item ID (str hoặc int)
+
+        Returns:
+            dict hoặc None nếu item không có trong id_table.json
+        """
+        self._ensure_fresh()
+        return self._data[0].get(str(item_id))
+
+    def __contains__(self, item_id) -> bool:
+        return self.get(item_id) is not None
+
+    def __len__(self) -> int:
+        self._ensure_fresh()
+        return len(self._data[0])
+
+    def name_of(self, item_id, default: Optional[str] = None) -> str:
+        """Tên item, hoặc default / "Item {id}" nếu không có"""
+        entry = self.get(item_id)
+        if entry is None:
+            return default if default is not None else f"Item {item_id}"
+        return entry["name"]
+
+    def type_of(self, item_id) -> str:
+        """Type của item, "Unknown" nếu không có"""
+        entry = self.get(item_id)
+        return entry["type"] if entry is not None else UNKNOWN_TYPE
+
+    def ids_of_type(self, item_type: str) -> FrozenSet[str]:
+        """Tất cả item ids (str) thuộc type"""
+        self._ensure_fresh()
+        return self._data[1].get(item_type, frozenset())
+
+    def ids_of_types(self, item_types: Iterable[str]) -> FrozenSet[str]:
+        """Hợp các item ids của nhiều types (ví dụ App.show_type)"""
+        self._ensure_fresh()
+        by_type = self._data[1]
+        ids = set()
+        for item_type in item_types:
+            ids.update(by_type.get(item_type, ()))
+        return frozenset(ids)
+
+    def types(self) -> FrozenSet[str]:
+        """Các type có trong catalog"""
+        self._ensure_fresh()
+        return frozenset(self._data[1])
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_item_catalog() -> ItemCatalog:
+    """
+    Catalog dùng chung của process
+
+    Returns:
+        ItemCatalog: Catalog của id_table.json (tạo ở lần gọi đầu tiên)
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ItemCatalog()
+    return _catalog
@@ -5,7 +5,8 @@ Item Service Module
 Mục đích:
     Module này cung cấp các service functions để lấy thông tin item từ itemId:
     - get_item_info(): Lấy thông tin đầy đủ của item (name, type, price)
-    - Có cache để tối ưu performance
+    - Name/type lấy từ item catalog dùng chung (services.item_catalog),
+      price từ view trong RAM của price store (services.price_store)
 
 Tác dụng:
     - Centralized logic để lấy thông tin item
@@ -13,89 +14,10 @@ Tác dụng:
     - Dễ maintain và extend
     - Cung cấp interface rõ ràng cho các module khác sử dụng
 """
-import json
-import os
-import time
-from typing import Dict, Optional
-
-
-# Cache để tránh đọc file nhiều lần
-_id_table_cache = None
-_id_table_cache_time = 0
-_price_log_cache = None
-_price_log_cache_time = 0
-_cache_ttl = 5  # Cache 5 giây
-
-
-def _load_id_table() -> Dict:
-    """
-    Load id_table.json với cache
-    
-    Returns:
-        Dict: Dictionary với format {itemId: {name: str, type: str}}
-    """
-    global _id_table_cache, _id_table_cache_time
-    
-    now = time.time()
-    if _id_table_cache is None or (now - _id_table_cache_time > _cache_ttl):
-        try:
-            with open("id_table.json", 'r', encoding="utf-8") as f:
-                id_table_data = json.load(f)
-            
-            # Transform thành format dễ dùng: {itemId: {name, type}}
-            _id_table_cache = {}
-            for item_id, item_data in id_table_data.items():
-                if isinstance(item_data, dict):
-                    _id_table_cache[str(item_id)] = {
-                        "name": item_data.get("name", f"Item {item_id}"),
-                        "type": item_data.get("type", "Unknown")
-                    }
-                else:
-                    # Fallback nếu format không đúng
-                    _id_table_cache[str(item_id)] = {
-                        "name": str(item_data),
-                        "type": "Unknown"
-                    }
-            
-            _id_table_cache_time = now
-        except Exception as e:
-            print(f'Error reading id_table.json: {e}')
-            if _id_table_cache is None:
-                _id_table_cache = {}
-    
-    return _id_table_cache
-
-
-def _load_price_log() -> Dict:
-    """
-    Load search_price_log.json với cache
-    
-    Returns:
-        Dict: Dictionary với format {itemId: price}
-    """
-    global _price_log_cache, _price_log_cache_time
-    
-    now = time.time()
-    if _price_log_cache is None or (now - _price_log_cache_time > _cache_ttl):
-        try:
-            with open("search_price_log.json", 'r', encoding="utf-8") as f:
-                price_log = json.load(f)
-            
-            # Transform thành format dễ dùng: {itemId: price}
-            _price_log_cache = {}
-            for entry in price_log:
-                item_id = entry.get("idItem")
-                price = entry.get("price", 0)
-                if item_id:
-                    _price_log_cache[str(item_id)] = price
-            
-            _price_log_cache_time = now
-        except Exception as e:
-            print(f'Error reading search_price_log.json: {e}')
-            if _price_log_cache is None:
-                _price_log_cache = {}
-    
-    return _price_log_cache
+from typing import Dict
+from .item_catalog import get_item_catalog
+from .price_store import get_price_store
+from .price_history import get_price_history
 
 
 def get_item_info(item_id: str, apply_tax: bool = False) -> Dict[str, any]:
@@ -128,12 +50,9 @@ def get_item_info(item_id: str, apply_tax: bool = False) -> Dict[str, any]:
     """
     item_id_str = str(item_id)
     
-    # Load id_table và price_log
-    id_table = _load_id_table()
-    price_log = _load_price_log()
-    
+    # Name/type lấy từ catalog, price từ price store (không đọc file)
     # Lấy name và type từ id_table
-    item_data = id_table.get(item_id_str, {})
+    item_data = get_item_catalog().get(item_id_str)
     if not item_data:
         # Fallback nếu không tìm thấy
         item_data = {
@@ -144,8 +63,8 @@ def get_item_info(item_id: str, apply_tax: bool = False) -> Dict[str, any]:
     name = item_data.get("name", f"Item {item_id_str}")
     item_type = item_data.get("type", "Unknown")
     
-    # Lấy price từ price_log (đã được làm tròn 4 chữ số)
-    price = price_log.get(item_id_str, 0.0)
+    # Lấy price từ price store (đã được làm tròn 4 chữ số)
+    price = get_price_store().price_of(item_id_str)
     
     # Tính price_with_tax nếu cần và làm tròn về 4 chữ số thập phân
     price_with_tax = price
@@ -196,15 +115,35 @@ def get_item_price(item_id: str, apply_tax: bool = False) -> float:
     return info.get("price", 0.0)
 
 
+def get_item_price_at(item_id: str, timestamp: float, apply_tax: bool = False) -> float:
+    """
+    Lấy price của item tại thời điểm timestamp (giá có hiệu lực lúc drop)
+    
+    Dùng lịch sử giá (services.price_history), fallback về giá hiện tại nếu
+    chưa có observation nào trước timestamp.
+    
+    Args:
+        item_id (str): Item ID cần lấy price
+        timestamp (float): Unix timestamp cần định giá
+        apply_tax (bool): Có áp dụng tax 12.5% không (default: False)
+    
+    Returns:
+        float: Item price (đã apply tax nếu cần)
+    """
+    item_id_str = str(item_id)
+    price = get_price_history().price_at(item_id_str, timestamp)
+    if price is None:
+        price = get_price_store().price_of(item_id_str)
+    if apply_tax and item_id_str != "100300":
+        price = price * 0.875  # Tax 12.5%
+    return round(price, 4) if price > 0 else 0.0
+
+
 def clear_cache():
     """
     Clear cache để force reload data từ file
     
-    Useful khi muốn đảm bảo data mới nhất
+    Useful khi muốn đảm bảo data mới nhất (price store luôn mới nhất, không cần clear)
     """
-    global _id_table_cache, _id_table_cache_time, _price_log_cache, _price_log_cache_time
-    _id_table_cache = None
-    _id_table_cache_time = 0
-    _price_log_cache = None
-    _price_log_cache_time = 0
+    get_item_catalog().invalidate()
 
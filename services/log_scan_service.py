@@ -5,10 +5,16 @@ Log Scan Service Module
 Mục đích:
     Module này cung cấp các service functions để scan log theo từng lĩnh vực:
     - scan_init_bag: Scan init bag data (BagMgr@:InitBagData)
+    - parse_init_bag_events: Parse init bag data, không ghi file / state (replay)
     - scan_drop_log: Scan drops từ log (PickItems format)
-    - scan_price_search: Scan price search results từ log
+    - scan_price_search: Scan price search results từ log (PriceSearchScanner khi đọc theo chunk)
     - Có thể mở rộng thêm các scan functions khác
 
+Mỗi scanner có 2 dạng:
+    - scan_xxx(changed_text): API cũ nhận text, tự tokenize
+    - scan_xxx_events(events): nhận LogEvent đã phân loại bởi core.log_parser.tokenize_log(),
+      để nhiều scanner dùng chung một lần tokenize cho cùng một chunk
+
 Tác dụng:
     - Tách biệt logic scan theo từng domain
     - Dễ dàng maintain và extend
@@ -16,15 +22,32 @@ Tác dụng:
 """
 import re
 import os
-import json
 import time
 from typing import List, Dict, Optional
 from datetime import datetime
-from core.logger import log_debug
+from core.logger import log_debug, log_warning, log_error
+from core.log_parser import (
+    tokenize_log,
+    EVENT_INIT_BAG,
+    EVENT_PICK_START,
+    EVENT_PICK_UPDATE,
+    EVENT_PICK_MODIFY,
+    EVENT_PICK_END,
+    EVENT_PRICE_SEARCH,
+    LogEvent
+)
+from core.log_patterns import INIT_BAG_FIELDS, PICK_MODIFY_FIELDS, PICK_START_FIELDS, PICK_UPDATE_FIELDS
 from .item_service import get_item_info
+from .item_catalog import get_item_catalog
+from .price_analyzer import analyze_ladder, analyze_ladders, get_price_strategy, CONFIG_PATH
+from repositories.append_writer import get_append_writer
+from .bag_snapshot import load_bag_snapshot, mark_bag_dirty
 from app import state
 
 
+DROP_LOG_PATH = os.path.join("log", "drop_log.txt")
+
+
 def init_bag_data():
     """
     Load bag_items từ bag_log.json khi start app để có cache trước đó
@@ -33,24 +56,14 @@ def init_bag_data():
         bool: True nếu load thành công, False nếu không
     """
     try:
-        bag_log_path = os.path.join("log", "bag_log.json")
-        if os.path.exists(bag_log_path):
-            with open(bag_log_path, 'r', encoding="utf-8") as f:
-                bag_log_data = json.load(f)
-                if isinstance(bag_log_data, dict) and "items" in bag_log_data:
-                    state.bag_items = bag_log_data["items"]
-                    log_debug(f"init_bag_data: Loaded {len(state.bag_items)} items from bag_log.json")
-                    return True
-                elif isinstance(bag_log_data, list) and len(bag_log_data) > 0:
-                    # Nếu là list, lấy entry cuối cùng
-                    latest_entry = bag_log_data[-1]
-                    if isinstance(latest_entry, dict) and "items" in latest_entry:
-                        state.bag_items = latest_entry["items"]
-                        log_debug(f"init_bag_data: Loaded {len(state.bag_items)} items from bag_log.json (latest entry)")
-                        return True
+        items = load_bag_snapshot()
+        if items is not None:
+            state.bag_items = items
+            log_debug(f"init_bag_data: Loaded {len(state.bag_items)} items from bag_log.json")
+            return True
         return False
     except Exception as e:
-        log_debug(f"init_bag_data: Error loading bag_log.json: {e}")
+        log_error(f"init_bag_data: Error loading bag_log.json: {e}")
         return False
 
 
@@ -81,49 +94,23 @@ def scan_init_bag(changed_text: str) -> Dict[str, Dict]:
           sẽ cộng dồn số lượng từ tất cả các slot
         - Ví dụ: SlotId=2 Num=999 và SlotId=3 Num=347 => tổng num = 1346
     """
-    bag_data = {}
-    lines = changed_text.split('\n')
+    return scan_init_bag_events(tokenize_log(changed_text))
+
+
+def scan_init_bag_events(events: List[LogEvent]) -> Dict[str, Dict]:
+    """
+    Scan init bag data từ các LogEvent (chỉ xử lý EVENT_INIT_BAG)
+    
+    Args:
+        events (List[LogEvent]): Events từ tokenize_log()
     
+    Returns:
+        Dict[str, Dict]: Giống scan_init_bag()
+    """
     # Ghi log init bag events vào file để debug
     init_bag_log_path = os.path.join("log", "init_bag_msg.log")
-    init_bag_lines = []
-    
-    for line in lines:
-        # Tìm pattern: "BagMgr@:InitBagData PageId = ... SlotId = ... ConfigBaseId = ... Num = ..."
-        if 'BagMgr@:InitBagData' in line and 'ConfigBaseId' in line:
-            # Ghi log line vào file để debug
-            init_bag_lines.append(line)
-            # Extract timestamp
-            timestamp_match = re.search(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3})\]', line)
-            timestamp = timestamp_match.group(1) if timestamp_match else ""
-            
-            # Extract PageId, SlotId, ConfigBaseId, Num
-            page_id_match = re.search(r'PageId\s*=\s*(\d+)', line)
-            slot_id_match = re.search(r'SlotId\s*=\s*(\d+)', line)
-            config_base_id_match = re.search(r'ConfigBaseId\s*=\s*(\d+)', line)
-            num_match = re.search(r'Num\s*=\s*(\d+)', line)
-            
-            if config_base_id_match:
-                item_id = config_base_id_match.group(1)
-                page_id = int(page_id_match.group(1)) if page_id_match else 0
-                slot_id = int(slot_id_match.group(1)) if slot_id_match else 0
-                num = int(num_match.group(1)) if num_match else 0
-                
-                # QUAN TRỌNG: Nếu item_id đã tồn tại (item >= 1000 được chia thành nhiều slot),
-                # cộng dồn số lượng thay vì overwrite
-                if item_id in bag_data:
-                    # Cộng dồn số lượng từ slot mới vào tổng số lượng hiện tại
-                    bag_data[item_id]["num"] += num
-                    # Giữ slotId của slot đầu tiên (hoặc có thể update thành slot cuối cùng, không quan trọng)
-                    # Giữ timestamp của slot đầu tiên
-                else:
-                    # Item mới, tạo entry mới
-                    bag_data[item_id] = {
-                        "pageId": page_id,
-                        "slotId": slot_id,
-                        "num": num,
-                        "timestamp": timestamp
-                    }
+    init_bag_lines = [event.line for event in events if event.kind == EVENT_INIT_BAG]
+    bag_data = parse_init_bag_events(events)
     
     # Ghi tất cả init bag log lines vào file
     if init_bag_lines:
@@ -137,53 +124,77 @@ def scan_init_bag(changed_text: str) -> Dict[str, Dict]:
                 f.write(f"========== End Init Bag Event ({len(init_bag_lines)} lines) ==========\n\n")
             log_debug(f"scan_init_bag: wrote {len(init_bag_lines)} init bag log lines to init_bag_msg.log")
         except Exception as e:
-            log_debug(f"scan_init_bag: error writing to init_bag_msg.log: {e}")
+            log_error(f"scan_init_bag: error writing to init_bag_msg.log: {e}")
     
     if bag_data:
         log_debug(f"scan_init_bag: found {len(bag_data)} items in bag")
         
         # Tự động update vào state.bag_items khi scan được data
         try:
-            # Load id_table để lấy tên items
-            id_table = {}
-            try:
-                with open("id_table.json", 'r', encoding="utf-8") as f:
-                    id_table_data = json.load(f)
-                for item_id, item_data in id_table_data.items():
-                    id_table[str(item_id)] = item_data.get("name", f"Item {item_id}")
-            except Exception as e:
-                log_debug(f"error reading id_table.json in scan_init_bag: {e}")
+            # Tên items lấy từ catalog dùng chung
+            catalog = get_item_catalog()
             
             # Update state.bag_items với format đơn giản (chỉ name và num, không lưu pageId và slotId)
             state.bag_items = {}
             for item_id_str, bag_info in bag_data.items():
-                item_name = id_table.get(item_id_str, f"Item {item_id_str}")
+                item_name = catalog.name_of(item_id_str)
                 state.bag_items[item_id_str] = {
                     "name": item_name,
                     "num": bag_info.get("num", 0)
                 }
             log_debug(f"scan_init_bag: updated state.bag_items with {len(state.bag_items)} items")
             
-            # Ghi bag items vào bag_log.json khi scan được init bag event
-            try:
-                bag_log_path = os.path.join("log", "bag_log.json")
-                os.makedirs("log", exist_ok=True)
-                bag_current = {
-                    "timestamp": round(time.time()),
-                    "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "items": state.bag_items
-                }
-                with open(bag_log_path, 'w', encoding="utf-8") as f:
-                    json.dump(bag_current, f, indent=4, ensure_ascii=False)
-                log_debug(f"scan_init_bag: wrote {len(state.bag_items)} items to bag_log.json")
-            except Exception as e:
-                log_debug(f"scan_init_bag: error writing to bag_log.json: {e}")
+            # bag_log.json được ghi bởi snapshot writer (gộp nhiều lần thay đổi)
+            mark_bag_dirty()
         except Exception as e:
-            log_debug(f"error updating state.bag_items in scan_init_bag: {e}")
+            log_error(f"error updating state.bag_items in scan_init_bag: {e}")
     
     return bag_data
 
 
+def parse_init_bag_events(events: List[LogEvent]) -> Dict[str, Dict]:
+    """
+    Parse các EVENT_INIT_BAG thành túi đồ, không ghi file hay cập nhật state.bag_items
+    (scan_init_bag_events() dùng cho app, replay dùng trực tiếp)
+    
+    Args:
+        events (List[LogEvent]): Events từ tokenize_log()
+    
+    Returns:
+        Dict[str, Dict]: Giống scan_init_bag()
+    """
+    bag_data = {}
+    init_bag_fields = INIT_BAG_FIELDS.fields
+    for event in events:
+        # Pattern: "BagMgr@:InitBagData PageId = ... SlotId = ... ConfigBaseId = ... Num = ..."
+        if event.kind == EVENT_INIT_BAG:
+            # Timestamp, PageId, SlotId, ConfigBaseId, Num trong một lần match (core.log_patterns)
+            timestamp, page_id, slot_id, item_id, num = init_bag_fields(event.line)
+            
+            if item_id is not None:
+                timestamp = timestamp or ""
+                page_id = int(page_id) if page_id is not None else 0
+                slot_id = int(slot_id) if slot_id is not None else 0
+                num = int(num) if num is not None else 0
+                
+                # QUAN TRỌNG: Nếu item_id đã tồn tại (item >= 1000 được chia thành nhiều slot),
+                # cộng dồn số lượng thay vì overwrite
+                if item_id in bag_data:
+                    # Cộng dồn số lượng từ slot mới vào tổng số lượng hiện tại
+                    bag_data[item_id]["num"] += num
+                    # Giữ slotId của slot đầu tiên (hoặc có thể update thành slot cuối cùng, không quan trọng)
+                    # Giữ timestamp của slot đầu tiên
+                else:
+                    # Item mới, tạo entry mới
+                    bag_data[item_id] = {
+                        "pageId": page_id,
+                        "slotId": slot_id,
+                        "num": num,
+                        "timestamp": timestamp
+                    }
+    return bag_data
+
+
 def scan_drop_log(changed_text: str, id_table: dict = None, price_table: dict = None) -> List[Dict]:
     """
     Scan drop items từ log theo format PickItems
@@ -217,108 +228,463 @@ def scan_drop_log(changed_text: str, id_table: dict = None, price_table: dict =
         - id_table và price_table parameters được giữ lại để backward compatibility
         - Logic lookup name và price đã được chuyển sang sử dụng item_service.get_item_info()
     """
-    drop_items = []
-    lines = changed_text.split('\n')
-    line_count = len(lines)
+    return scan_drop_events(tokenize_log(changed_text))
+
+
+def scan_drop_events(events: List[LogEvent]) -> List[Dict]:
+    """
+    Scan drop items từ các LogEvent (chỉ xử lý PickItems events)
+    
+    Block chưa kết thúc ở cuối events sẽ bị bỏ qua. Khi đọc log theo từng chunk,
+    dùng DropScanner để giữ block đang mở giữa các lần feed.
+    
+    Args:
+        events (List[LogEvent]): Events từ tokenize_log()
     
-    i = 0
-    while i < line_count:
-        line = lines[i]
+    Returns:
+        List[Dict]: Giống scan_drop_log()
+    """
+    return DropScanner().feed(events)
+
+
+class DropScanner:
+    """
+    State machine cho PickItems blocks, có thể resume giữa các chunk
+    
+    Một drop block bắt đầu bằng EVENT_PICK_START và kết thúc ở EVENT_PICK_END,
+    các EVENT_PICK_UPDATE / EVENT_PICK_MODIFY ở giữa cung cấp BagNum, PageId, SlotId,
+    ConfigBaseId và Num. Events nằm ngoài block bị bỏ qua.
+    
+    Block đang mở được giữ lại trong scanner, nên block bị cắt giữa 2 lần đọc log
+    vẫn được nhận diện khi EVENT_PICK_END tới ở chunk sau.
+    
+    Example:
+        scanner = DropScanner()
+        drops = scanner.feed(stream_tokenizer.feed(text))
+    """
+    
+    def __init__(self, write_log: bool = True):
+        """
+        Args:
+            write_log: Ghi mỗi drop vào log/drop_log.txt (False khi replay log cũ)
+        """
+        self.current_item = None
+        self.write_log = write_log
+    
+    @property
+    def in_block(self) -> bool:
+        """True nếu đang ở giữa một PickItems block"""
+        return self.current_item is not None
+    
+    def reset(self):
+        """Bỏ block đang mở (ví dụ khi file log bị mở lại)"""
+        self.current_item = None
+    
+    def feed(self, events: List[LogEvent]) -> List[Dict]:
+        """
+        Xử lý events mới, trả về các drop items có block kết thúc trong events
+        
+        Args:
+            events (List[LogEvent]): Events mới (theo thứ tự trong log)
         
-        # Tìm start marker: "ItemChange@ ProtoName=PickItems start"
-        if 'ItemChange@ ProtoName=PickItems start' in line:
-            current_item = {}
-            # Extract timestamp từ start line: [2025.11.08-16.59.48:014]
-            timestamp_match = re.search(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3})\]', line)
-            if timestamp_match:
-                current_item["timestamp"] = timestamp_match.group(1)
+        Returns:
+            List[Dict]: Giống scan_drop_log()
+        """
+        drop_items = []
+        current_item = self.current_item
+        
+        for event in events:
+            kind = event.kind
+            line = event.line
             
-            j = i + 1
+            if current_item is None:
+                # Tìm start marker: "ItemChange@ ProtoName=PickItems start"
+                if kind == EVENT_PICK_START:
+                    current_item = {}
+                    # Extract timestamp từ start line: [2025.11.08-16.59.48:014]
+                    timestamp, = PICK_START_FIELDS.fields(line)
+                    if timestamp is not None:
+                        current_item["timestamp"] = timestamp
+                continue
             
-            # Scan các dòng trong block cho đến khi gặp end
-            while j < line_count:
-                current_line = lines[j]
-                
-                # End marker: "ItemChange@ ProtoName=PickItems end"
-                if 'ItemChange@ ProtoName=PickItems end' in current_line:
-                    # Nếu đã có đủ thông tin, thêm vào list và ghi log
-                    if current_item.get("itemId"):
-                        drop_items.append(current_item)
-                        
-                        # Ghi vào log/drop_log.txt
-                        try:
-                            # Tạo folder log nếu chưa có
-                            log_dir = "log"
-                            if not os.path.exists(log_dir):
-                                os.makedirs(log_dir)
-                            
-                            # Lấy các thông tin từ current_item
-                            timestamp = current_item.get("timestamp", "")
-                            page_id = current_item.get("pageId", 0)
-                            slot_id = current_item.get("slotId", 0)
-                            config_base_id = current_item.get("itemId", "")
-                            num = current_item.get("num", 0)
-                            
-                            # Lấy name và price từ item_service
-                            item_info = get_item_info(config_base_id, apply_tax=False)
-                            item_name = item_info.get("name", f"Item {config_base_id}")
-                            item_price = item_info.get("price", 0.0)
-                            
-                            # Format: [2025.11.08-16.59.48:014][PickItems] BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 101 Name = Memory Fragments Price = 0.0
-                            if timestamp:
-                                log_line = f"[{timestamp}][PickItems] BagItem PageId = {page_id} SlotId = {slot_id} ConfigBaseId = {config_base_id} Num = {num} Name = {item_name} Price = {round(item_price, 4)}\n"
-                                
-                                drop_log_path = os.path.join(log_dir, "drop_log.txt")
-                                with open(drop_log_path, "a", encoding="utf-8") as f:
-                                    f.write(log_line)
-                        except Exception as e:
-                            log_debug(f"error writing to drop_log.txt: {e}")
-                    break
+            # End marker: "ItemChange@ ProtoName=PickItems end"
+            if kind == EVENT_PICK_END:
+                # Nếu đã có đủ thông tin, thêm vào list và ghi log
+                if current_item.get("itemId"):
+                    drop_items.append(current_item)
+                    if self.write_log:
+                        _write_drop_log_line(current_item)
+                current_item = None
+            
+            # Parse Update line: "ItemChange@ Update Id=... BagNum=... in PageId=... SlotId=..."
+            elif kind == EVENT_PICK_UPDATE:
+                # Extract BagNum, PageId, SlotId
+                bag_num, page_id, slot_id = PICK_UPDATE_FIELDS.fields(line)
                 
-                # Parse Update line: "ItemChange@ Update Id=... BagNum=... in PageId=... SlotId=..."
-                if 'ItemChange@ Update' in current_line and 'BagNum=' in current_line:
-                    # Extract BagNum, PageId, SlotId
-                    bag_num_match = re.search(r'BagNum=(\d+)', current_line)
-                    page_id_match = re.search(r'PageId=(\d+)', current_line)
-                    slot_id_match = re.search(r'SlotId=(\d+)', current_line)
-                    
-                    if bag_num_match:
-                        current_item["bagNum"] = int(bag_num_match.group(1))
-                    if page_id_match:
-                        current_item["pageId"] = int(page_id_match.group(1))
-                    if slot_id_match:
-                        current_item["slotId"] = int(slot_id_match.group(1))
+                if bag_num is not None:
+                    current_item["bagNum"] = int(bag_num)
+                if page_id is not None:
+                    current_item["pageId"] = int(page_id)
+                if slot_id is not None:
+                    current_item["slotId"] = int(slot_id)
+            
+            # Parse BagMgr line: "BagMgr@:Modfy BagItem PageId = ... SlotId = ... ConfigBaseId = ... Num = ..."
+            elif kind == EVENT_PICK_MODIFY:
+                # Extract ConfigBaseId, Num (và timestamp)
+                timestamp, item_id, num = PICK_MODIFY_FIELDS.fields(line)
                 
-                # Parse BagMgr line: "BagMgr@:Modfy BagItem PageId = ... SlotId = ... ConfigBaseId = ... Num = ..."
-                if 'BagMgr@:Modfy BagItem' in current_line and 'ConfigBaseId' in current_line:
-                    # Extract ConfigBaseId và Num
-                    config_base_id_match = re.search(r'ConfigBaseId\s*=\s*(\d+)', current_line)
-                    num_match = re.search(r'Num\s*=\s*(\d+)', current_line)
-                    
-                    if config_base_id_match:
-                        current_item["itemId"] = config_base_id_match.group(1)
-                    if num_match:
-                        current_item["num"] = int(num_match.group(1))
-                    
-                    # Nếu chưa có timestamp, lấy từ BagMgr line
-                    if not current_item.get("timestamp"):
-                        timestamp_match = re.search(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d{3})\]', current_line)
-                        if timestamp_match:
-                            current_item["timestamp"] = timestamp_match.group(1)
+                if item_id is not None:
+                    current_item["itemId"] = item_id
+                if num is not None:
+                    current_item["num"] = int(num)
                 
-                j += 1
-            
-            # Move to next line after block
-            i = j + 1
+                # Nếu chưa có timestamp, lấy từ BagMgr line
+                if not current_item.get("timestamp") and timestamp is not None:
+                    current_item["timestamp"] = timestamp
+        
+        self.current_item = current_item
+        if drop_items:
+            log_debug(f"scan_drop_log: found {len(drop_items)} drop item(s)")
+        return drop_items
+
+
+def _write_drop_log_line(drop_item: Dict):
+    """
+    Ghi một drop item vào log/drop_log.txt
+    
+    Format: [2025.11.08-16.59.48:014][PickItems] BagItem PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 101 Name = Memory Fragments Price = 0.0
+    
+    Args:
+        drop_item (Dict): Drop item từ scan_drop_events()
+    """
+    try:
+        # Lấy các thông tin từ drop_item
+        timestamp = drop_item.get("timestamp", "")
+        page_id = drop_item.get("pageId", 0)
+        slot_id = drop_item.get("slotId", 0)
+        config_base_id = drop_item.get("itemId", "")
+        num = drop_item.get("num", 0)
+        
+        # Lấy name và price từ item_service
+        item_info = get_item_info(config_base_id, apply_tax=False)
+        item_name = item_info.get("name", f"Item {config_base_id}")
+        item_price = item_info.get("price", 0.0)
+        
+        if timestamp:
+            log_line = f"[{timestamp}][PickItems] BagItem PageId = {page_id} SlotId = {slot_id} ConfigBaseId = {config_base_id} Num = {num} Name = {item_name} Price = {round(item_price, 4)}\n"
+            # Background writer: không mở file trên thread parse
+            get_append_writer().write(DROP_LOG_PATH, log_line)
+    except Exception as e:
+        log_error(f"error writing to drop_log.txt: {e}")
+
+
+# Price search: request "XchgSearchPrice----SynId = N ... +refer [itemId]" và response
+# "----Socket RecvMessage STT----XchgSearchPrice----SynId = N" chứa unitPrices ladder
+PRICE_SYN_ID_PATTERN = re.compile(r'XchgSearchPrice----SynId\s*=\s*(\d+)')
+PRICE_REFER_PATTERN = re.compile(r'\+refer\s*\[(\d+)\]')
+PRICE_FIRST_VALUE_PATTERN = re.compile(r'unitPrices\+1\s*\[([^\]]+)\]\s*$')
+# Dòng giá: "|      | |          +2 [0.18008]" (lấy cặp +index [value] cuối dòng) hoặc "+2 [0.18008]"
+PRICE_VALUE_PATTERN = re.compile(r'\+(\d+)\s*\[(-?\d+(?:\.\d+)?)\]\s*$')
+PRICE_BARE_VALUE_PATTERN = re.compile(r'\s*\+(\d+)\s*\[(-?\d+(?:\.\d+)?)\]\s*')
+PRICE_CURRENCY_PATTERN = re.compile(r'\s*\|.*?\+currency')
+PRICE_RESPONSE_MARKER = '----Socket RecvMessage STT----'
+PRICE_RESPONSE_END_MARKER = '----Socket RecvMessage End----'
+# unitPrices ladder có tối đa 100 giá (+1 đến +100)
+PRICE_LADDER_SIZE = 100
+# Số request/response chưa ghép cặp tối đa được giữ lại (bỏ cái cũ nhất khi vượt)
+PRICE_MAX_PENDING = 256
+# Khoảng thời gian tối thiểu giữa 2 lần os.stat() config.json khi scanner không có strategy cố định (giây)
+PRICE_STRATEGY_CHECK_INTERVAL = 1.0
+
+
+class PriceSearchScanner:
+    """
+    Extract price search results trong một lần quét xuôi, có thể resume giữa các chunk
+    
+    Mỗi dòng chỉ được xem một lần (O(độ dài log)), không có regex DOTALL chạy lại
+    trên toàn bộ text cho từng SynId như cách cũ:
+        - Dòng có "XchgSearchPrice----SynId = N": header của request hoặc response.
+          "+refer [itemId]" đầu tiên sau header gần nhất (cùng dòng hoặc dòng sau) là
+          item của SynId đó
+        - Response block (RecvMessage STT): đọc unitPrices+1..+100 tới dòng "+currency"
+        - Request và response được ghép qua dict theo SynId, theo thứ tự nào cũng được;
+          result được trả về ngay khi có đủ cả 2
+    
+    Response block đang đọc dở và các request/response chưa ghép cặp được giữ trong
+    scanner, nên một lần search bị cắt giữa 2 lần đọc log vẫn được nhận diện.
+    
+    Với analyze=False, results chỉ gồm synId, itemId và values (chưa tính giá), để gom
+    nhiều ladders rồi tính một lần bằng analyze_price_searches() (replay).
+    
+    Example:
+        scanner = PriceSearchScanner()
+        results = scanner.feed(stream_tokenizer.feed(text))
+    """
+    
+    def __init__(self, strategy: Optional[str] = None, analyze: bool = True):
+        # strategy=None: dùng config.json "price_strategy", chỉ đọc lại khi file thay đổi
+        # (kiểm tra mtime/size tối đa mỗi PRICE_STRATEGY_CHECK_INTERVAL giây)
+        self.strategy = strategy
+        self.analyze = analyze
+        self.reset()
+    
+    def reset(self):
+        """Bỏ toàn bộ trạng thái đang chờ (ví dụ khi file log bị mở lại)"""
+        self._requests = {}  # syn_id -> item_id
+        self._responses = {}  # syn_id -> values
+        self._header_syn_id = None  # SynId đang chờ "+refer"
+        self._response_syn_id = None  # SynId của response block đang đọc
+        self._values = None  # None: chưa gặp unitPrices+1
+        self._ladder_done = False
+        # Strategy đọc từ config.json (strategy=None), kiểm tra lại ở result tiếp theo
+        self._config_strategy = None
+        self._config_stat_key = None
+        self._next_config_check = float("-inf")
+    
+    def export_state(self) -> Dict:
+        """Trạng thái đang chờ dạng JSON (cho checkpoint)"""
+        return {
+            "requests": dict(self._requests),
+            "responses": {syn_id: list(values) for syn_id, values in self._responses.items()},
+            "header_syn_id": self._header_syn_id,
+            "response_syn_id": self._response_syn_id,
+            "values": list(self._values) if self._values is not None else None,
+            "ladder_done": self._ladder_done,
+        }
+    
+    def restore_state(self, data: Optional[Dict]):
+        """
+        Khôi phục trạng thái từ export_state() (checkpoint của lần chạy trước)
+        
+        Args:
+            data: Kết quả export_state(), None = reset
+        """
+        self.reset()
+        if not data:
+            return
+        self._requests = dict(data.get("requests", {}))
+        self._responses = {syn_id: list(values) for syn_id, values in data.get("responses", {}).items()}
+        self._header_syn_id = data.get("header_syn_id")
+        self._response_syn_id = data.get("response_syn_id")
+        values = data.get("values")
+        self._values = list(values) if values is not None else None
+        self._ladder_done = bool(data.get("ladder_done", False))
+    
+    def current_strategy(self) -> str:
+        """Strategy chọn "price" cho result tiếp theo (không đọc config.json khi file không đổi)"""
+        if self.strategy is not None:
+            return self.strategy
+        now = time.monotonic()
+        if now >= self._next_config_check:
+            self._next_config_check = now + PRICE_STRATEGY_CHECK_INTERVAL
+            try:
+                stat = os.stat(CONFIG_PATH)
+                stat_key = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stat_key = None
+            if self._config_strategy is None or stat_key != self._config_stat_key:
+                self._config_stat_key = stat_key
+                self._config_strategy = get_price_strategy()
+        return self._config_strategy
+    
+    @property
+    def idle(self) -> bool:
+        """True nếu không có response block hay header nào đang mở"""
+        return self._response_syn_id is None and self._header_syn_id is None
+    
+    def feed(self, events: List[LogEvent]) -> List[Dict]:
+        """
+        Xử lý events mới (tất cả kinds, vì giá nằm trong các dòng dump EVENT_OTHER)
+        
+        Args:
+            events (List[LogEvent]): Events mới (theo thứ tự trong log)
+        
+        Returns:
+            List[Dict]: Giống scan_price_search(), các search đã ghép đủ request + response
+        """
+        # Chunk không có dòng XchgSearchPrice nào và không có block đang mở: bỏ qua ngay
+        if self.idle and not any(event.kind == EVENT_PRICE_SEARCH for event in events):
+            return []
+        return self.feed_lines(event.line for event in events)
+    
+    def feed_lines(self, lines) -> List[Dict]:
+        """Giống feed() nhưng nhận các dòng log (str) trực tiếp"""
+        results = []
+        for line in lines:
+            if 'XchgSearchPrice----SynId' in line:
+                self._on_header(line, results)
+            elif self._response_syn_id is not None:
+                self._on_response_line(line, results)
+            if self._header_syn_id is not None and '+refer' in line:
+                refer_match = PRICE_REFER_PATTERN.search(line)
+                if refer_match:
+                    self._on_request(self._header_syn_id, refer_match.group(1), results)
+                    self._header_syn_id = None
+        if results:
+            log_debug(f"scan_price_search: found {len(results)} result(s)")
+        return results
+    
+    def finish(self) -> List[Dict]:
+        """
+        Kết thúc response block đang đọc dở (hết text, ví dụ scan_price_search())
+        
+        Returns:
+            List[Dict]: Result nếu response vừa kết thúc ghép được với request
+        """
+        results = []
+        self._close_response(results)
+        return results
+    
+    def _on_header(self, line: str, results: List[Dict]):
+        syn_match = PRICE_SYN_ID_PATTERN.search(line)
+        if not syn_match:
+            return
+        syn_id = syn_match.group(1)
+        if PRICE_RESPONSE_MARKER in line:
+            self._close_response(results)
+            if syn_id not in self._responses:
+                self._response_syn_id = syn_id
+                self._values = None
+                self._ladder_done = False
+            if syn_id in self._requests:
+                # Response của request đã biết item: không chờ "+refer" cho header này
+                return
+        # "+refer" tiếp theo thuộc về header gần nhất
+        self._header_syn_id = syn_id
+    
+    def _on_response_line(self, line: str, results: List[Dict]):
+        if PRICE_RESPONSE_END_MARKER in line:
+            self._close_response(results)
+            return
+        if self._ladder_done:
+            return
+        values = self._values
+        if values is None:
+            if 'unitPrices+1' in line:
+                first_match = PRICE_FIRST_VALUE_PATTERN.search(line)
+                if first_match:
+                    self._values = [first_match.group(1)]
+            return
+        if '+currency' in line and PRICE_CURRENCY_PATTERN.match(line):
+            self._close_response(results)
+            return
+        stripped = line.lstrip()
+        if stripped.startswith('|'):
+            value_match = PRICE_VALUE_PATTERN.search(line)
+        else:
+            value_match = PRICE_BARE_VALUE_PATTERN.fullmatch(line)
+        if value_match:
+            index = int(value_match.group(1))
+            if 2 <= index <= PRICE_LADDER_SIZE:
+                values.append(value_match.group(2))
+            elif index > PRICE_LADDER_SIZE:
+                self._ladder_done = True
+    
+    def _close_response(self, results: List[Dict]):
+        syn_id = self._response_syn_id
+        if syn_id is None:
+            return
+        values = self._values if self._values is not None else []
+        self._response_syn_id = None
+        self._values = None
+        self._ladder_done = False
+        item_id = self._requests.pop(syn_id, None)
+        if item_id is None:
+            self._remember(self._responses, syn_id, values)
+        else:
+            self._emit(syn_id, item_id, values, results)
+    
+    def _on_request(self, syn_id: str, item_id: str, results: List[Dict]):
+        values = self._responses.pop(syn_id, None)
+        if values is None:
+            self._remember(self._requests, syn_id, item_id)
         else:
-            i += 1
+            self._emit(syn_id, item_id, values, results)
     
-    if drop_items:
-        log_debug(f"scan_drop_log: found {len(drop_items)} drop item(s)")
-    return drop_items
+    @staticmethod
+    def _remember(pending: Dict, syn_id: str, value):
+        pending[syn_id] = value
+        if len(pending) > PRICE_MAX_PENDING:
+            del pending[next(iter(pending))]
+    
+    def _emit(self, syn_id: str, item_id: str, values: List[str], results: List[Dict]):
+        # Skip currency 100300
+        if int(item_id) == 100300:
+            return
+        if not values:
+            log_warning("scan_price_search: No unitPrices block found for itemId=%s, synId=%s", item_id, syn_id)
+        if not self.analyze:
+            results.append({"synId": syn_id, "itemId": item_id, "values": values})
+            return
+        results.append(_price_search_result(syn_id, item_id, values, self.current_strategy()))
+
+
+def _price_search_result(syn_id: str, item_id: str, values: List[str], strategy: str,
+                         stats: Optional[Dict] = None) -> Dict:
+    """Tạo result của scan_price_search() từ ladder giá (stats: analyze_ladder() đã tính theo batch)"""
+    # Parse float một lần, mọi thống kê tính từ một lần sort (services.price_analyzer)
+    if stats is None and len(values) > 0:
+        stats = analyze_ladder(values, strategy)
+    if stats is not None:
+        log_debug("scan_price_search: itemId=%s, synId=%s, values_count=%s, outliers=%s",
+                  item_id, syn_id, stats['count'], stats['outliers'])
+        log_debug("scan_price_search: itemId=%s, average_price=%s, highest_price=%s, %s=%s", item_id,
+                  round(stats['mean'], 4), round(stats['max'], 4), strategy, round(stats['price'], 4))
+    
+    average_price = stats["mean"] if stats else -1
+    highest_price = stats["max"] if stats else -1
+    price = stats["price"] if stats else -1
+    return {
+        "synId": syn_id,
+        "itemId": item_id,
+        "values": values,
+        "average_price": round(average_price, 4) if average_price > 0 else -1,
+        "highest_price": round(highest_price, 4) if highest_price > 0 else -1,
+        "price": round(price, 4) if price > 0 else -1,
+        "stats": stats
+    }
+
+
+def analyze_price_searches(searches: List[Dict], strategy: str) -> List[Dict]:
+    """
+    Tính giá cho các searches của PriceSearchScanner(analyze=False), mọi ladder trong một
+    lần analyze_ladders() (vectorized khi có NumPy)
+    
+    Args:
+        searches (List[Dict]): {"synId", "itemId", "values"}
+        strategy (str): Strategy chọn "price"
+    
+    Returns:
+        List[Dict]: Results giống scan_price_search(), cùng thứ tự searches
+    """
+    batch = analyze_ladders([search["values"] for search in searches], strategy)
+    return [
+        _price_search_result(search["synId"], search["itemId"], search["values"], strategy, stats)
+        for search, stats in zip(searches, batch)
+    ]
+
+
+def scan_price_search_events(events: List[LogEvent], strategy: Optional[str] = None) -> List[Dict]:
+    """
+    Scan price search results từ các LogEvent
+    
+    Chunk không có dòng XchgSearchPrice nào sẽ được bỏ qua ngay. Events cần bao gồm
+    cả EVENT_OTHER vì giá nằm trong các dòng dump của structured log. Search chưa
+    ghép đủ request + response ở cuối events sẽ bị bỏ qua; khi đọc log theo từng chunk,
+    dùng PriceSearchScanner để giữ trạng thái giữa các lần feed.
+    
+    Args:
+        events (List[LogEvent]): Events từ tokenize_log() (tất cả kinds)
+        strategy (str): Strategy chọn "price" (mặc định: config.json "price_strategy")
+    
+    Returns:
+        List[Dict]: Giống scan_price_search()
+    """
+    scanner = PriceSearchScanner(strategy)
+    return scanner.feed(events) + scanner.finish()
 
 
-def scan_price_search(changed_text: str) -> List[Dict]:
+def scan_price_search(changed_text: str, strategy: Optional[str] = None) -> List[Dict]:
     """
     Scan price search results từ log và extract giá từ unitPrices block
     
@@ -327,8 +693,12 @@ def scan_price_search(changed_text: str) -> List[Dict]:
         - Extract SynId và ItemId từ pattern
         - Extract giá từ unitPrices block (từ +1 đến +100)
     
+    Một lần quét xuôi qua các dòng (xem PriceSearchScanner), thời gian tuyến tính
+    theo độ dài log dù có bao nhiêu lần search.
+    
     Args:
         changed_text (str): Nội dung log mới được đọc từ file
+        strategy (str): Strategy chọn "price" (mặc định: config.json "price_strategy")
     
     Returns:
         List[Dict]: List các price search results với format:
@@ -337,122 +707,15 @@ def scan_price_search(changed_text: str) -> List[Dict]:
                 "synId": "12345",
                 "itemId": "360404",
                 "values": ["0.17017", "0.17125", ...],  # List giá từ unitPrices
-                "average_price": 0.1752,  # Average của 30 giá trị đầu
-                "highest_price": 0.18018  # Giá cao nhất (max value) từ tất cả giá trị
+                "average_price": 0.1752,  # Average của tất cả giá trị
+                "highest_price": 0.18018,  # Giá cao nhất (max value) từ tất cả giá trị
+                "price": 0.1752,  # Giá theo strategy (mặc định "mean")
+                "stats": {...}  # analyze_ladder(): median, trimmed_mean, outliers, ...
             },
             ...
         ]
     """
-    results = []
-    
-    # Pattern: XchgSearchPrice----SynId = (\d+).*?\+refer \[(\d+)\]
-    pattern_id = r'XchgSearchPrice----SynId\s*=\s*(\d+).*?\+refer\s*\[(\d+)\]'
-    matches = re.findall(pattern_id, changed_text, re.DOTALL)
-    
-    for syn_id, item_id in matches:
-        # Tìm data block cho synId này
-        data_block_pattern = re.compile(
-            rf'----Socket RecvMessage STT----XchgSearchPrice----SynId = {syn_id}\s+'  # Match target SynId
-            r'\[.*?\]\s*GameLog: Display: \[Game\]\s+'  # Match time and fixed prefix
-            r'(.*?)(?=----Socket RecvMessage STT----|$)',  # Match data block content (to next block or end)
-            re.DOTALL  # Allow . to match newlines
-        )
-        
-        data_block_match = data_block_pattern.search(changed_text)
-        if not data_block_match:
-            continue
-        
-        data_block = data_block_match.group(1)
-        
-        # Skip currency 100300
-        if int(item_id) == 100300:
-            continue
-        
-        # Extract chỉ các giá trị từ unitPrices block (từ +1 đến +100)
-        # Logic regex 2 tầng (tối ưu):
-        # Bước 1: Tách block unitPrices từ "unitPrices+1 [value]" đến trước dòng "+currency"
-        # Bước 2: Scan tất cả các giá trị trong block đó
-        
-        values = []
-        
-        # Bước 1: Tìm block unitPrices
-        # Pattern: unitPrices+1 [value] ... (dừng khi gặp +currency hoặc hết chuỗi)
-        # Format log có thể là:
-        #   +prices+1+unitPrices+1 [value]
-        #   hoặc
-        #   unitPrices+1 [value]
-        # Sử dụng pattern theo user suggestion: regex 2 tầng tối ưu
-        # Pattern match cả 2 format: +prices+1+unitPrices+1 hoặc unitPrices+1
-        block_pattern = re.compile(
-            r'(?:\+prices\+1\+)?unitPrices\+1\s*\[([^\]]+)\]\s*\n([\s\S]*?)(?=^\s*\|.*?\+currency|\Z)',
-            re.MULTILINE
-        )
-        
-        block_match = block_pattern.search(data_block)
-        if block_match:
-            # Lấy giá trị đầu tiên từ dòng unitPrices+1
-            first_value = block_match.group(1)
-            values.append(first_value)
-            
-            # Lấy phần còn lại của block (từ dòng +2 trở đi)
-            unit_prices_block = block_match.group(2)
-            
-            # Bước 2: Scan các giá trị trong block
-            # Pattern: |      | |          +number [value] (có prefix | và spaces)
-            # Match cả dòng có format: |      | |          +2 [value]
-            # Pattern này match các dòng có format: |      | |          +number [value]
-            # với bất kỳ số lượng | và spaces nào trước +number
-            value_pattern = re.compile(
-                r'^\s*(?:\|[^\n]*)*\+(\d+)\s*\[(-?\d+(?:\.\d+)?)\]\s*$',
-                re.MULTILINE
-            )
-            
-            # Lấy tất cả các cặp (index, value) từ block
-            value_matches = value_pattern.findall(unit_prices_block)
-            
-            # Debug: log số lượng matches
-            if len(value_matches) == 0:
-                log_debug(f"scan_price_search: WARNING - No value matches found in block for itemId={item_id}, block_length={len(unit_prices_block)}")
-            
-            # Lọc chỉ lấy từ +2 đến +100
-            for index_str, value_str in value_matches:
-                index = int(index_str)
-                if 2 <= index <= 100:
-                    values.append(value_str)
-                elif index > 100:
-                    # Dừng khi gặp số > 100
-                    break
-        else:
-            # Debug: log khi không tìm thấy block
-            log_debug(f"scan_price_search: WARNING - No unitPrices block found for itemId={item_id}, synId={syn_id}")
-        
-        # Tính average và highest price
-        average_price = -1
-        highest_price = -1
-        
-        if len(values) > 0:
-            # Tính trung bình của TẤT CẢ các giá trị trong array (không giới hạn 30)
-            # Công thức: tổng tất cả giá trị / số lượng giá trị
-            num_values = len(values)
-            sum_values = sum(float(v) for v in values)
-            average_price = sum_values / num_values
-            # Lấy giá cao nhất (max value) từ tất cả các giá trị trong list
-            highest_price = max(float(v) for v in values)
-            
-            # Log để debug: hiển thị số lượng và list values scan được
-            values_float = [float(v) for v in values]
-            log_debug(f"scan_price_search: itemId={item_id}, synId={syn_id}, values_count={len(values)}, prices={values_float}")
-            log_debug(f"scan_price_search: itemId={item_id}, average_price={round(average_price, 4)}, highest_price={round(highest_price, 4)}")
-        
-        results.append({
-            "synId": syn_id,
-            "itemId": item_id,
-            "values": values,
-            "average_price": round(average_price, 4) if average_price > 0 else -1,
-            "highest_price": round(highest_price, 4) if highest_price > 0 else -1
-        })
-    
-    if results:
-        log_debug(f"scan_price_search: found {len(results)} result(s)")
-    return results
-
+    if 'XchgSearchPrice' not in changed_text:
+        return []
+    scanner = PriceSearchScanner(strategy)
+    return scanner.feed_lines(changed_text.split('\n')) + scanner.finish()
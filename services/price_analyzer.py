@@ -0,0 +1,244 @@
+"""
+Price Analyzer Service
+======================
+
+Mục đích:
+    Module này tính thống kê của ladder giá (unitPrices từ một lần search trên exchange)
+    và chọn giá tracker dùng cho item theo strategy trong config.json ("price_strategy").
+
+Tác dụng:
+    - Một lần sort cho mỗi ladder, tất cả thống kê tính từ mảng đã sort:
+      mean, min, max, median, trimmed mean, VWAP, quantiles p10/p25/p75/p90
+    - Phát hiện outliers (ví dụ một listing "troll" giá cao/thấp bất thường) theo
+      Tukey fences trên IQR, và robust mean = mean sau khi bỏ outliers
+    - Dùng NumPy nếu có khi batch nhiều ladders (replay): các ladders thành một ma trận,
+      mọi thống kê vectorized; ladder lẻ hoặc chưa cài NumPy dùng bản Python thuần
+      với kết quả giống hệt
+
+Strategies (config.json "price_strategy"):
+    - "mean": Trung bình tất cả giá (mặc định, giống hành vi cũ)
+    - "trimmed_mean": Trung bình sau khi bỏ TRIM_FRACTION mỗi đầu
+    - "median": Giá giữa
+    - "vwap": Trung bình có trọng số volume (log chỉ có unit price nên mặc định
+      mỗi listing có trọng số 1, tức là bằng "mean" nếu không truyền volumes)
+    - "robust_mean": Trung bình sau khi bỏ outliers
+    - "p25": Quantile 25% (giá bán nhanh)
+
+Function chính:
+    - analyze_ladder(): Thống kê của một ladder
+    - analyze_ladders(): Thống kê của nhiều ladders (batch)
+    - get_price_strategy(): Strategy đang cấu hình trong config.json
+"""
+import json
+from itertools import chain
+from typing import Dict, List, Optional, Sequence
+from core.logger import log_debug
+from core import metrics
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là optional
+    np = None
+
+
+PRICE_STRATEGIES = ("mean", "trimmed_mean", "median", "vwap", "robust_mean", "p25")
+DEFAULT_PRICE_STRATEGY = "mean"
+CONFIG_PATH = "config.json"
+
+# Tỉ lệ bị cắt ở mỗi đầu ladder khi tính trimmed mean
+TRIM_FRACTION = 0.1
+# Tukey fences: outlier nếu nằm ngoài [q25 - k*spread, q75 + k*spread]
+OUTLIER_FENCE = 1.5
+# Spread tối thiểu (tỉ lệ với median), tránh ladder gần như phẳng (IQR = 0)
+# coi mọi giá lệch một chút là outlier
+OUTLIER_MIN_SPREAD = 0.05
+
+QUANTILES = (("p10", 0.10), ("p25", 0.25), ("median", 0.50), ("p75", 0.75), ("p90", 0.90))
+
+# Dùng NumPy khi có; tests/benchmark có thể tắt để so sánh với bản Python thuần
+use_numpy = np is not None
+# Số ladders tối thiểu để dùng NumPy: với một ladder lẻ (search giá lúc chơi),
+# chi phí tạo array lớn hơn phần tính toán tiết kiệm được
+numpy_min_batch = 32
+
+
+def get_price_strategy(config_path: str = CONFIG_PATH) -> str:
+    """
+    Đọc strategy tính giá từ config.json
+
+    Args:
+        config_path: Đường dẫn config.json
+
+    Returns:
+        str: Một trong PRICE_STRATEGIES (DEFAULT_PRICE_STRATEGY nếu thiếu hoặc không hợp lệ)
+    """
+    try:
+        with metrics.timer("config_read"), open(config_path, "r", encoding="utf-8") as f:
+            strategy = json.load(f).get("price_strategy", DEFAULT_PRICE_STRATEGY)
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_PRICE_STRATEGY
+    if strategy not in PRICE_STRATEGIES:
+        log_debug(f"price analyzer: unknown price_strategy {strategy!r}, using {DEFAULT_PRICE_STRATEGY}")
+        return DEFAULT_PRICE_STRATEGY
+    return strategy
+
+
+def _check_strategy(strategy: str):
+    if strategy not in PRICE_STRATEGIES:
+        raise ValueError(f"unknown price strategy {strategy!r}, expected one of {PRICE_STRATEGIES}")
+
+
+def _quantile(sorted_values: Sequence[float], q: float) -> float:
+    """Quantile với nội suy tuyến tính giữa 2 phần tử gần nhất (giống numpy 'linear')"""
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def _analyze_python(values: Sequence[float], volumes: Optional[Sequence[float]], strategy: str) -> Dict:
+    """Bản Python thuần của analyze_ladder() (values đã là float, không rỗng)"""
+    if volumes is None:
+        ladder = sorted(values)
+        vwap = None
+    else:
+        pairs = sorted(zip(values, volumes))
+        ladder = [value for value, _ in pairs]
+        total_volume = sum(volume for _, volume in pairs)
+        vwap = sum(value * volume for value, volume in pairs) / total_volume if total_volume > 0 else None
+    count = len(ladder)
+    mean = sum(ladder) / count
+    stats = {"count": count, "mean": mean, "min": ladder[0], "max": ladder[-1]}
+    for name, q in QUANTILES:
+        stats[name] = _quantile(ladder, q)
+    trim = int(count * TRIM_FRACTION)
+    trimmed = ladder[trim:count - trim]
+    stats["trimmed_mean"] = sum(trimmed) / len(trimmed)
+    stats["vwap"] = mean if vwap is None else vwap
+
+    spread = max(stats["p75"] - stats["p25"], OUTLIER_MIN_SPREAD * abs(stats["median"]))
+    low = stats["p25"] - OUTLIER_FENCE * spread
+    high = stats["p75"] + OUTLIER_FENCE * spread
+    inliers = [value for value in ladder if low <= value <= high]
+    stats["outliers"] = count - len(inliers)
+    stats["robust_mean"] = sum(inliers) / len(inliers)
+    stats["price"] = stats[strategy]
+    return stats
+
+
+def _analyze_numpy(ladders: List[Sequence[float]], volumes: Optional[List], strategy: str) -> List[Dict]:
+    """
+    Bản NumPy của analyze_ladders(): pad các ladders thành ma trận, mọi thống kê tính theo hàng
+    (NumPy parse trực tiếp các giá dạng str, không cần float() từng giá trị)
+    """
+    rows = len(ladders)
+    counts = np.fromiter((len(ladder) for ladder in ladders), dtype=np.int64, count=rows)
+    width = int(counts.max())
+    valid = np.arange(width) < counts[:, None]
+
+    # Padding bằng +inf để sau khi sort nằm cuối mỗi hàng
+    matrix = np.full((rows, width), np.inf)
+    matrix[valid] = np.array(list(chain.from_iterable(ladders)), dtype=np.float64)
+    order = np.argsort(matrix, axis=1, kind="stable")
+    ladder = np.take_along_axis(matrix, order, axis=1)
+    zeroed = np.where(valid, ladder, 0.0)
+
+    # Prefix sums: tổng của ladder[a:b] = prefix[b] - prefix[a]
+    prefix = np.zeros((rows, width + 1))
+    np.cumsum(zeroed, axis=1, out=prefix[:, 1:])
+    row_index = np.arange(rows)
+    mean = prefix[row_index, counts] / counts
+
+    def quantile(q):
+        position = (counts - 1) * q
+        lower = position.astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        low_value = ladder[row_index, lower]
+        return low_value + (ladder[row_index, upper] - low_value) * (position - lower)
+
+    stats = {"mean": mean, "min": ladder[:, 0], "max": ladder[row_index, counts - 1]}
+    for name, q in QUANTILES:
+        stats[name] = quantile(q)
+    trim = (counts * TRIM_FRACTION).astype(np.int64)
+    stats["trimmed_mean"] = (prefix[row_index, counts - trim] - prefix[row_index, trim]) / (counts - 2 * trim)
+
+    stats["vwap"] = mean
+    if volumes is not None:
+        weights = np.zeros((rows, width))
+        weights[valid] = np.concatenate([np.asarray(volume, dtype=np.float64) for volume in volumes])
+        weights = np.take_along_axis(weights, order, axis=1)
+        total_volume = weights.sum(axis=1)
+        weighted = (zeroed * weights).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats["vwap"] = np.where(total_volume > 0, weighted / total_volume, mean)
+
+    spread = np.maximum(stats["p75"] - stats["p25"], OUTLIER_MIN_SPREAD * np.abs(stats["median"]))
+    low = (stats["p25"] - OUTLIER_FENCE * spread)[:, None]
+    high = (stats["p75"] + OUTLIER_FENCE * spread)[:, None]
+    inlier = valid & (ladder >= low) & (ladder <= high)
+    inlier_counts = inlier.sum(axis=1)
+    stats["outliers"] = counts - inlier_counts
+    stats["robust_mean"] = np.where(inlier, ladder, 0.0).sum(axis=1) / inlier_counts
+    stats["price"] = stats[strategy]
+
+    columns = {name: column.tolist() for name, column in stats.items()}
+    columns["count"] = counts.tolist()
+    return [{name: column[i] for name, column in columns.items()} for i in range(rows)]
+
+
+def analyze_ladder(values: Sequence, strategy: str = DEFAULT_PRICE_STRATEGY,
+                   volumes: Optional[Sequence[float]] = None) -> Optional[Dict]:
+    """
+    Thống kê của một ladder giá
+
+    Args:
+        values: Các giá (float hoặc str), thứ tự bất kỳ
+        strategy: Strategy chọn "price" (xem PRICE_STRATEGIES)
+        volumes: Volume của từng listing (optional, cùng độ dài với values)
+
+    Returns:
+        dict: {"count", "mean", "min", "max", "p10", "p25", "median", "p75", "p90",
+               "trimmed_mean", "vwap", "outliers", "robust_mean", "price"}
+        hoặc None nếu ladder rỗng
+
+    Raises:
+        ValueError: Nếu strategy không hợp lệ hoặc có giá không parse được
+    """
+    return analyze_ladders([values], strategy, None if volumes is None else [volumes])[0]
+
+
+def analyze_ladders(ladders: Sequence[Sequence], strategy: str = DEFAULT_PRICE_STRATEGY,
+                    volumes: Optional[Sequence[Sequence[float]]] = None) -> List[Optional[Dict]]:
+    """
+    Thống kê của nhiều ladders giá (batch, dùng khi replay log)
+
+    Args:
+        ladders: List các ladder (mỗi ladder như values của analyze_ladder())
+        strategy: Strategy chọn "price"
+        volumes: Volumes tương ứng từng ladder (optional)
+
+    Returns:
+        List: Kết quả theo thứ tự ladders, None cho ladder rỗng
+
+    Raises:
+        ValueError: Nếu strategy không hợp lệ hoặc có giá không parse được
+    """
+    _check_strategy(strategy)
+    non_empty = [index for index, ladder in enumerate(ladders) if len(ladder)]
+    results = [None] * len(ladders)
+    if not non_empty:
+        return results
+    if use_numpy and len(non_empty) >= numpy_min_batch:
+        batch = _analyze_numpy(
+            [ladders[index] for index in non_empty],
+            None if volumes is None else [volumes[index] for index in non_empty],
+            strategy
+        )
+        for index, stats in zip(non_empty, batch):
+            results[index] = stats
+    else:
+        for index in non_empty:
+            values = [float(value) for value in ladders[index]]
+            results[index] = _analyze_python(values, None if volumes is None else volumes[index], strategy)
+    return results
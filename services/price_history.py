@@ -0,0 +1,316 @@
+"""
+Price History Service
+=====================
+
+Mục đích:
+    Module này giữ toàn bộ lịch sử giá của từng item, thay vì chỉ giá cuối cùng như
+    price store. Mỗi lần search giá trên exchange là một observation gồm: timestamp,
+    price (giá tracker dùng - theo price strategy của scan_price_search), mean/min/max, các quantile
+    p10/p25/p50/p75/p90 và depth (số giá trị trong unitPrices ladder).
+
+Tác dụng:
+    - Lưu trữ dạng cột: mỗi item có một array('d') cho từng field, sort theo timestamp,
+      nên query chỉ là bisect + đọc phần tử (vài micro giây với hàng chục nghìn observations)
+    - Ghi append-only xuống log/price_history.bin (repositories.price_history_file)
+    - Cho phép định giá drops theo giá tại thời điểm drop (price_at)
+
+Class chính:
+    - PriceHistory: Columnar store + query API (price_at, last, rolling_median)
+
+Function chính:
+    - summarize_ladder(): Tính mean/min/max/quantiles/depth của một ladder giá
+    - summary_from_stats(): Như summarize_ladder() nhưng từ kết quả analyze_ladder() đã có
+    - get_price_history(): PriceHistory dùng chung của process
+"""
+import statistics
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional
+from core.logger import log_debug
+from .price_analyzer import analyze_ladder
+from repositories.price_history_file import (
+    PriceHistoryFile,
+    PRICE_HISTORY_PATH,
+    RECORD_FIELDS
+)
+
+
+# Các field giá trị của một observation (không gồm item_id, timestamp)
+VALUE_FIELDS = RECORD_FIELDS[2:]
+# Field của observation -> key trong kết quả price_analyzer.analyze_ladder()
+STATS_FIELDS = {"p50": "median", "depth": "count"}
+
+
+def summarize_ladder(values: Iterable, price: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """
+    Tính các thống kê của một ladder giá (unitPrices từ scan_price_search)
+
+    Args:
+        values: Các giá (str hoặc float), giá trị không parse được bị bỏ qua
+        price: Giá tracker dùng cho item (mặc định = mean)
+
+    Returns:
+        dict theo VALUE_FIELDS, None nếu ladder rỗng
+    """
+    ladder = []
+    for value in values:
+        try:
+            ladder.append(float(value))
+        except (TypeError, ValueError):
+            continue
+    return summary_from_stats(analyze_ladder(ladder), price)
+
+
+def summary_from_stats(stats: Optional[Dict], price: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """
+    Summary của một ladder từ kết quả price_analyzer.analyze_ladder() đã tính (ví dụ
+    result["stats"] của scan_price_search), không parse / sort lại ladder
+
+    Args:
+        stats: Kết quả analyze_ladder() (strategy bất kỳ), None nếu ladder rỗng
+        price: Giá tracker dùng cho item (mặc định = mean)
+
+    Returns:
+        dict theo VALUE_FIELDS, None nếu stats là None
+    """
+    if stats is None:
+        return None
+    summary = {field: stats[STATS_FIELDS.get(field, field)] for field in VALUE_FIELDS}
+    if price is not None:
+        summary["price"] = price
+    return summary
+
+
+class _ItemSeries:
+    """Các cột của một item, sort theo timestamp"""
+
+    __slots__ = ("timestamps", "columns")
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.columns = {field: array("d") for field in VALUE_FIELDS}
+
+    def insert(self, timestamp: float, summary: Dict[str, float]):
+        # Observations thường tới theo thứ tự thời gian: append O(1), chỉ insert khi bị lệch
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            self.timestamps.append(timestamp)
+            for field, column in self.columns.items():
+                column.append(summary[field])
+            return
+        index = bisect_right(self.timestamps, timestamp)
+        self.timestamps.insert(index, timestamp)
+        for field, column in self.columns.items():
+            column.insert(index, summary[field])
+
+    def row(self, index: int) -> Dict[str, float]:
+        observation = {"timestamp": self.timestamps[index]}
+        for field, column in self.columns.items():
+            observation[field] = column[index]
+        observation["depth"] = int(observation["depth"])
+        return observation
+
+
+class PriceHistory:
+    """
+    Lịch sử giá dạng cột theo từng item
+
+    Example:
+        history = get_price_history()
+        history.record("5028", result["values"], price=0.2)
+        history.price_at("5028", drop_timestamp)
+        history.rolling_median("5028", window=3600)
+    """
+
+    def __init__(self, path: Optional[str] = PRICE_HISTORY_PATH):
+        # path=None: chỉ giữ trong RAM (replay, tests)
+        self.file = PriceHistoryFile(path) if path else None
+        self._series = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """
+        Load toàn bộ observations từ file
+
+        Returns:
+            int: Số observations đã load
+        """
+        if self.file is None:
+            return 0
+        try:
+            records = self.file.read_all()
+        except (OSError, ValueError) as e:
+            log_debug(f"price history: error loading {self.file.path}: {e}")
+            return 0
+        with self._lock:
+            for record in records:
+                self._insert(str(record[0]), record[1], dict(zip(VALUE_FIELDS, record[2:])))
+        log_debug(f"price history: loaded {len(records)} observations")
+        return len(records)
+
+    def _insert(self, item_id: str, timestamp: float, summary: Dict[str, float]):
+        series = self._series.get(item_id)
+        if series is None:
+            series = self._series[item_id] = _ItemSeries()
+        series.insert(timestamp, summary)
+        self._count += 1
+
+    def add(self, item_id, timestamp: float, summary: Dict[str, float], persist: bool = True):
+        """
+        Thêm một observation đã tính sẵn
+
+        Args:
+            item_id: Item ID (số nguyên dạng str hoặc int)
+            timestamp: Unix timestamp
+            summary: dict theo VALUE_FIELDS (xem summarize_ladder())
+            persist: Ghi xuống file (False khi replay chỉ cần trong RAM)
+        """
+        item_id = str(item_id)
+        with self._lock:
+            self._insert(item_id, timestamp, summary)
+        if persist and self.file is not None:
+            try:
+                self.file.append([(int(item_id), timestamp) + tuple(summary[field] for field in VALUE_FIELDS)])
+            except (OSError, ValueError) as e:
+                log_debug(f"price history: error appending observation for {item_id}: {e}")
+
+    def record(self, item_id, values: Iterable, price: Optional[float] = None,
+               timestamp: Optional[float] = None, persist: bool = True,
+               stats: Optional[Dict] = None) -> Optional[Dict[str, float]]:
+        """
+        Thêm observation từ ladder giá của một lần search
+
+        Args:
+            item_id: Item ID
+            values: unitPrices ladder (từ scan_price_search)
+            price: Giá tracker dùng (theo price strategy), mặc định = mean của ladder
+            timestamp: Thời điểm observation (mặc định: bây giờ)
+            persist: Ghi xuống file
+            stats: analyze_ladder(values) đã tính (result["stats"] của scan_price_search),
+                tránh phân tích ladder lần thứ hai
+
+        Returns:
+            dict summary đã lưu, None nếu ladder rỗng
+        """
+        summary = summarize_ladder(values, price) if stats is None else summary_from_stats(stats, price)
+        if summary is None:
+            return None
+        self.add(item_id, time.time() if timestamp is None else timestamp, summary, persist)
+        return summary
+
+    def __len__(self) -> int:
+        return self._count
+
+    def item_ids(self) -> List[str]:
+        """Các item có lịch sử giá"""
+        return list(self._series)
+
+    def count(self, item_id) -> int:
+        """Số observations của item"""
+        series = self._series.get(str(item_id))
+        return len(series.timestamps) if series is not None else 0
+
+    def price_at(self, item_id, timestamp: float, field: str = "price") -> Optional[float]:
+        """
+        Giá có hiệu lực tại thời điểm timestamp (observation gần nhất không sau timestamp)
+
+        Args:
+            item_id: Item ID
+            timestamp: Thời điểm cần định giá
+            field: Field trong VALUE_FIELDS (mặc định "price")
+
+        Returns:
+            float hoặc None nếu chưa có observation nào trước timestamp
+        """
+        with self._lock:
+            series = self._series.get(str(item_id))
+            if series is None:
+                return None
+            index = bisect_right(series.timestamps, timestamp) - 1
+            if index < 0:
+                return None
+            return series.columns[field][index]
+
+    def last(self, item_id, n: int) -> List[Dict[str, float]]:
+        """
+        N observations gần nhất (cũ trước, mới sau)
+
+        Args:
+            item_id: Item ID
+            n: Số observations
+
+        Returns:
+            List[Dict]: Mỗi dict có "timestamp" và các VALUE_FIELDS
+        """
+        with self._lock:
+            series = self._series.get(str(item_id))
+            if series is None or n <= 0:
+                return []
+            start = max(0, len(series.timestamps) - n)
+            return [series.row(index) for index in range(start, len(series.timestamps))]
+
+    def rolling_median(self, item_id, window: float, at: Optional[float] = None,
+                       field: str = "price") -> Optional[float]:
+        """
+        Median của field trong các observations thuộc cửa sổ (at - window, at]
+
+        Args:
+            item_id: Item ID
+            window: Độ dài cửa sổ (giây)
+            at: Cuối cửa sổ (mặc định: bây giờ)
+            field: Field trong VALUE_FIELDS
+
+        Returns:
+            float hoặc None nếu cửa sổ không có observation nào
+        """
+        at = time.time() if at is None else at
+        with self._lock:
+            series = self._series.get(str(item_id))
+            if series is None:
+                return None
+            end = bisect_right(series.timestamps, at)
+            start = bisect_right(series.timestamps, at - window, 0, end)
+            if start >= end:
+                return None
+            window_values = series.columns[field][start:end]
+        return statistics.median(window_values)
+
+    def between(self, item_id, start: float, end: float) -> List[Dict[str, float]]:
+        """Các observations có start <= timestamp <= end"""
+        with self._lock:
+            series = self._series.get(str(item_id))
+            if series is None:
+                return []
+            first = bisect_left(series.timestamps, start)
+            last = bisect_right(series.timestamps, end)
+            return [series.row(index) for index in range(first, last)]
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_price_history() -> PriceHistory:
+    """
+    PriceHistory dùng chung của process (load log/price_history.bin ở lần gọi đầu tiên)
+
+    Returns:
+        PriceHistory
+    """
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                history = PriceHistory()
+                history.load()
+                _history = history
+    return _history
+
+
+def reset_price_history():
+    """Bỏ PriceHistory dùng chung, lần get_price_history() sau sẽ load lại từ file (tests)"""
+    global _history
+    with _history_lock:
+        _history = None
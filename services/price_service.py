@@ -13,15 +13,22 @@ Service này sử dụng repositories để giao tiếp với external APIs.
 import time
 import json
 import re
-from core.logger import log_debug
+from core.logger import log_debug, log_error
 from repositories.price_api_client import (
     fetch_all_prices,
     fetch_item_by_id,
     submit_price,
     register_user
 )
-from .log_scan_service import scan_price_search
+from core.log_parser import tokenize_log
+from .log_scan_service import scan_price_search_events, PriceSearchScanner
 from .item_service import get_item_info
+from .price_store import get_price_store
+from .price_history import get_price_history
+
+
+# Scanner dùng chung cho log đọc theo chunk (MyThread): giữ search đang dở giữa các lần đọc
+price_search_scanner = PriceSearchScanner()
 
 
 def get_user():
@@ -63,24 +70,55 @@ def get_price_info(text):
     
     Business logic:
     - Sử dụng scan_price_search() để scan và extract giá từ log
-    - Tính toán average price từ exchange data
-    - Ghi log vào search_price_log.json (giá cao nhất - max value)
+    - Tính giá từ exchange data theo price strategy (services.price_analyzer)
+    - Upsert giá vào price store (services.price_store)
+    - Ghi observation vào lịch sử giá (services.price_history)
     - Submit price lên server
     
     Args:
         text (str): Log text từ game
     """
     try:
-        
-        # Sử dụng scan_price_search để scan và extract giá
-        price_results = scan_price_search(text)
-        
+        price_results = scan_price_search_events(tokenize_log(text))
+    except Exception as e:
+        print(e)
+        return
+    _update_prices(price_results)
+
+
+def get_price_info_events(events):
+    """
+    Giống get_price_info() nhưng nhận LogEvent của chunk log mới
+    
+    Dùng price_search_scanner nên một lần search bị cắt giữa 2 chunk vẫn được nhận diện.
+    
+    Args:
+        events (List[LogEvent]): Events từ tokenize_log() (tất cả kinds)
+    """
+    try:
+        price_results = price_search_scanner.feed(events)
+    except Exception as e:
+        print(e)
+        return
+    _update_prices(price_results)
+
+
+def _update_prices(price_results):
+    """
+    Upsert giá và ghi lịch sử giá cho các results của scan_price_search()
+    
+    Args:
+        price_results (List[Dict]): Results từ scan_price_search() / PriceSearchScanner
+    """
+    try:
         for result in price_results:
             item_id = result.get("itemId")
             highest_price = result.get("highest_price", -1)
             average_price = result.get("average_price", -1)
+            # Giá theo price strategy trong config.json (mặc định "mean" = average_price)
+            price = result.get("price", average_price)
             
-            if average_price <= 0:
+            if price <= 0:
                 continue
             
             # Lấy type và name từ item_service
@@ -89,46 +127,24 @@ def get_price_info(text):
             item_name = item_info.get("name", f"Item {item_id}")
             
             # Print thông tin: average (giá được lưu) và highest (để tham khảo)
-            log_debug(f'Updated item value: ID:{item_id}, Name:{item_name}, Average Price:{average_price}, Highest Price:{highest_price}')
+            log_debug('Updated item value: ID:%s, Name:%s, Price:%s, Average Price:%s, Highest Price:%s',
+                      item_id, item_name, price, average_price, highest_price)
             
-            # Ghi vào search_price_log.json (lưu average_price - giá trung bình của tất cả giá trị)
+            # Upsert vào price store (lưu giá theo price strategy)
             try:
-                # Đọc file log hiện tại hoặc tạo mới
-                try:
-                    with open("search_price_log.json", 'r', encoding="utf-8") as f:
-                        price_log = json.load(f)
-                except FileNotFoundError:
-                    price_log = []
-                
-                # Tạo entry mới
                 # Làm tròn price về 4 chữ số thập phân (ví dụ: 0.001)
-                rounded_price = round(average_price, 4) if average_price > 0 else 0.0
-                log_entry = {
-                    "idItem": item_id,
-                    "name": item_name,
-                    "price": rounded_price,
-                    "last_update": round(time.time()),
-                    "type": item_type
-                }
-                
-                # Tìm xem đã có entry với idItem này chưa
-                found = False
-                for idx, entry in enumerate(price_log):
-                    if entry.get("idItem") == item_id:
-                        price_log[idx] = log_entry  # Update entry cũ
-                        found = True
-                        break
-                
-                if not found:
-                    price_log.append(log_entry)  # Thêm entry mới
-                
-                # Ghi lại file
-                with open("search_price_log.json", 'w', encoding="utf-8") as f:
-                    json.dump(price_log, f, indent=4, ensure_ascii=False)
-                
-                log_debug(f'Logged to search_price_log.json: ID:{item_id}, Price:{average_price}, Type:{item_type}')
+                rounded_price = round(price, 4) if price > 0 else 0.0
+                get_price_store().upsert(item_id, rounded_price, name=item_name, item_type=item_type)
+                log_debug('Logged to price store: ID:%s, Price:%s, Type:%s', item_id, price, item_type)
+            except Exception as e:
+                print(f'Error writing to price store: {e}')
+
+            # Lưu cả ladder vào lịch sử giá (quantiles, depth) để định giá theo thời điểm
+            try:
+                get_price_history().record(item_id, result.get("values", []), price=rounded_price,
+                                          stats=result.get("stats"))
             except Exception as e:
-                print(f'Error writing to search_price_log.json: {e}')
+                log_error(f'Error recording price history: {e}')
             
             # TODO: Re-enable submit price to server
             # submit_price(item_id, average_price, get_user())
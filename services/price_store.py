@@ -0,0 +1,146 @@
+"""
+Price Store Service
+===================
+
+Mục đích:
+    Module này là nơi duy nhất đọc/ghi giá items, thay cho search_price_log.json:
+    - Ghi: upsert từng item vào SQLite (repositories.price_repository), atomic
+    - Đọc: view trong RAM {item_id: entry}, được load một lần và cập nhật ngay sau mỗi upsert
+
+Tác dụng:
+    - Mỗi giá mới chỉ tốn một upsert có index thay vì đọc + ghi lại toàn bộ file JSON
+    - Crash giữa chừng không làm hỏng dữ liệu giá
+    - item_service, drop_handler và UI đọc từ view nên không có file I/O khi tính giá
+    - Lần đầu chạy tự migrate dữ liệu từ search_price_log.json
+
+Class chính:
+    - PriceStore: Read-through view + ghi xuống PriceRepository
+
+Function chính:
+    - get_price_store(): Price store dùng chung của process
+    - close_price_store(): Đóng store dùng chung (app thoát / tests)
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+from core.logger import log_debug
+from repositories.price_repository import (
+    PriceRepository,
+    PRICE_DB_PATH,
+    LEGACY_PRICE_LOG_PATH
+)
+
+
+class PriceStore:
+    """
+    View trong RAM của bảng prices, ghi xuống SQLite
+
+    Entry có format giống search_price_log.json:
+        {"idItem", "name", "price", "last_update", "type"}
+
+    Example:
+        store = get_price_store()
+        store.upsert("5028", 0.2, name="Netherrealm Resonance", item_type="Hard Currency")
+        store.price_of("5028")  # 0.2
+    """
+
+    def __init__(self, path: str = PRICE_DB_PATH, legacy_json_path: Optional[str] = LEGACY_PRICE_LOG_PATH):
+        self.repository = PriceRepository(path)
+        self._lock = threading.Lock()
+        if legacy_json_path and self.repository.count() == 0 and os.path.exists(legacy_json_path):
+            try:
+                imported = self.repository.import_json(legacy_json_path)
+                log_debug(f"price store: migrated {imported} prices from {legacy_json_path}")
+            except Exception as e:
+                log_debug(f"price store: error migrating {legacy_json_path}: {e}")
+        self._view = {entry["idItem"]: entry for entry in self.repository.load_all()}
+
+    def get(self, item_id) -> Optional[Dict]:
+        """
+        Entry giá của item
+
+        Args:
+            item_id: Item ID (str hoặc int)
+
+        Returns:
+            dict hoặc None nếu item chưa có giá
+        """
+        return self._view.get(str(item_id))
+
+    def price_of(self, item_id, default: float = 0.0) -> float:
+        """Giá của item (chưa tính tax), default nếu chưa có"""
+        entry = self._view.get(str(item_id))
+        return entry["price"] if entry is not None else default
+
+    def prices(self) -> Dict[str, float]:
+        """Bản copy {item_id: price} của toàn bộ view"""
+        return {item_id: entry["price"] for item_id, entry in list(self._view.items())}
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def upsert(self, item_id, price: float, name: Optional[str] = None,
+               item_type: Optional[str] = None, last_update: Optional[int] = None) -> Dict:
+        """
+        Cập nhật giá của item: ghi SQLite trước, thành công mới cập nhật view
+
+        Args:
+            item_id: Item ID
+            price: Giá mới
+            name: Tên item (giữ tên cũ nếu None)
+            item_type: Type item (giữ type cũ nếu None)
+            last_update: Timestamp (mặc định: bây giờ)
+
+        Returns:
+            dict: Entry mới
+
+        Raises:
+            sqlite3.Error: Nếu ghi thất bại (view không đổi)
+        """
+        item_id = str(item_id)
+        with self._lock:
+            previous = self._view.get(item_id) or {}
+            entry = {
+                "idItem": item_id,
+                "name": name if name is not None else previous.get("name"),
+                "price": price,
+                "last_update": last_update if last_update is not None else round(time.time()),
+                "type": item_type if item_type is not None else previous.get("type"),
+            }
+            self.repository.upsert(entry)
+            # Thay entry (không sửa in-place) để thread đọc luôn thấy entry hoàn chỉnh
+            self._view[item_id] = entry
+        return entry
+
+    def close(self):
+        """Đóng SQLite connection"""
+        self.repository.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """
+    Price store dùng chung của process (price_store.db trong thư mục hiện tại)
+
+    Returns:
+        PriceStore: Store (mở và migrate ở lần gọi đầu tiên)
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceStore()
+    return _store
+
+
+def close_price_store():
+    """Đóng price store dùng chung, lần get_price_store() sau sẽ mở lại"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
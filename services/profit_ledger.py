@@ -0,0 +1,123 @@
+"""
+Profit Ledger Service
+=====================
+
+Mục đích:
+    Module này lưu profit của từng map (income, cost, profit, thời gian), thay cho
+    log/profit_log.json được đọc + ghi lại toàn bộ mỗi lần ra map.
+
+Tác dụng:
+    - Ra map chỉ ghi thêm một dòng vào ledger JSONL append-only + một offset vào index
+      (repositories.profit_ledger_file), chi phí không tăng theo độ dài lịch sử
+    - Đọc lịch sử theo trang (page) qua index, không cần load toàn bộ file
+    - Lần đầu chạy tự migrate dữ liệu từ log/profit_log.json (file cũ được giữ nguyên)
+
+Class chính:
+    - ProfitLedger: Ghi/đọc lịch sử profit theo map
+
+Function chính:
+    - get_profit_ledger(): Ledger dùng chung của process
+    - close_profit_ledger(): Bỏ ledger dùng chung (tests)
+"""
+import os
+import threading
+from typing import Dict, Iterator, List, Optional
+from core.logger import log_debug
+from repositories.profit_ledger_file import (
+    ProfitLedgerFile,
+    PROFIT_LEDGER_PATH,
+    PROFIT_INDEX_PATH,
+    LEGACY_PROFIT_LOG_PATH
+)
+
+
+class ProfitLedger:
+    """
+    Lịch sử profit, mỗi map một entry
+
+    Entry có format giống profit_log.json:
+        {"timestamp", "datetime", "map_count", "income", "cost", "profit",
+         "duration_seconds", "duration_formatted"}
+
+    Example:
+        ledger = get_profit_ledger()
+        ledger.record(entry)
+        ledger.page(0, page_size=50)  # 50 maps gần nhất
+    """
+
+    def __init__(self, path: str = PROFIT_LEDGER_PATH, index_path: str = PROFIT_INDEX_PATH,
+                 legacy_json_path: Optional[str] = LEGACY_PROFIT_LOG_PATH):
+        self.file = ProfitLedgerFile(path, index_path)
+        if legacy_json_path and len(self.file) == 0 and os.path.exists(legacy_json_path):
+            try:
+                imported = self.file.import_json(legacy_json_path)
+                log_debug(f"profit ledger: migrated {imported} entries from {legacy_json_path}")
+            except Exception as e:
+                log_debug(f"profit ledger: error migrating {legacy_json_path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self.file)
+
+    def record(self, entry: Dict) -> int:
+        """
+        Ghi profit của một map
+
+        Args:
+            entry: Entry của map vừa kết thúc
+
+        Returns:
+            int: Vị trí của entry trong ledger
+        """
+        return self.file.append(entry)
+
+    def page(self, page: int, page_size: int = 50) -> List[Dict]:
+        """
+        Một trang lịch sử, trang 0 là các maps gần nhất
+
+        Args:
+            page: Số trang (0 = mới nhất)
+            page_size: Số entries mỗi trang
+
+        Returns:
+            List[Dict]: Entries của trang, cũ trước mới sau
+        """
+        if page < 0 or page_size <= 0:
+            return []
+        stop = len(self) - page * page_size
+        if stop <= 0:
+            return []
+        return self.file.read_range(max(0, stop - page_size), stop)
+
+    def last(self, n: int) -> List[Dict]:
+        """N entries gần nhất (cũ trước, mới sau)"""
+        return self.page(0, n)
+
+    def entries(self, start: int = 0) -> Iterator[Dict]:
+        """Duyệt lần lượt các entries từ start (đọc theo trang, không load cả file)"""
+        return self.file.iter_records(start)
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_profit_ledger() -> ProfitLedger:
+    """
+    Ledger dùng chung của process (mở và migrate ở lần gọi đầu tiên)
+
+    Returns:
+        ProfitLedger
+    """
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = ProfitLedger()
+    return _ledger
+
+
+def close_profit_ledger():
+    """Bỏ ledger dùng chung, lần get_profit_ledger() sau sẽ mở lại (tests)"""
+    global _ledger
+    with _ledger_lock:
+        _ledger = None
@@ -0,0 +1,394 @@
+"""
+Replay Service
+==============
+
+Mục đích:
+    Module này replay các UE_game.log cũ (lưu trữ) qua cùng các parser của app để tính
+    lại offline: profit của từng map, tổng drops theo item và lịch sử giá, với tốc độ
+    đọc disk thay vì từng chunk 1 giây như LogTailer.
+
+Tác dụng:
+    - Đọc log qua mmap, tokenize bằng core.log_parser.iter_relevant_events() (chỉ decode các
+      dòng có event marker), rồi dùng DropScanner / PriceSearchScanner / parse_init_bag_events
+      giống app đang chạy
+    - Mỗi file được replay độc lập (túi đồ bắt đầu rỗng, InitBagData trong log làm baseline)
+      thành một ReplayResult (picklable, không phụ thuộc state của process), nên nhiều file
+      được replay song song trên nhiều process (--workers) với kết quả giống hệt replay tuần tự
+    - Bước 2 gộp các ReplayResult theo thứ tự thời gian và định giá drops theo giá tại thời
+      điểm drop (lịch sử giá của chính các log được replay, fallback về price history / price store)
+    - Ghi kết quả vào thư mục riêng (mặc định log/replay/): profit_ledger.jsonl (+ .idx),
+      price_history.bin và drops.json. Không đụng tới log/ của app
+
+Class chính:
+    - ReplayResult: Kết quả replay một file (maps, drops, price observations)
+
+Function chính:
+    - find_log_files(): Các log file trong một file / thư mục
+    - replay_file(): Replay một log file
+    - replay_files(): replay_file() cho nhiều file, song song qua ProcessPoolExecutor
+    - build_outputs(): Gộp kết quả, tính profit và ghi output
+    - replay(): replay_files() + build_outputs()
+"""
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import repeat
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from core.logger import log_info, log_error, flush_logs
+from core.log_parser import (
+    iter_relevant_events,
+    parse_log_timestamp,
+    RELEVANT_BLOCK_SIZE,
+    EVENT_INIT_BAG,
+    EVENT_MAP_ENTER,
+    EVENT_MAP_EXIT,
+    EVENT_OTHER,
+    PICK_EVENT_KINDS
+)
+from .log_scan_service import DropScanner, PriceSearchScanner, analyze_price_searches, parse_init_bag_events
+from .log_scan_service import PRICE_SYN_ID_PATTERN, PRICE_MAX_PENDING
+from .price_analyzer import get_price_strategy
+from .price_history import PriceHistory, summary_from_stats, VALUE_FIELDS
+from .profit_ledger import ProfitLedger
+from .item_catalog import get_item_catalog
+from .item_service import get_item_price_at
+from repositories.price_history_file import PriceHistoryFile
+
+
+REPLAY_OUT_DIR = os.path.join("log", "replay")
+REPLAY_LEDGER_NAME = "profit_ledger.jsonl"
+REPLAY_PRICE_HISTORY_NAME = "price_history.bin"
+REPLAY_DROPS_NAME = "drops.json"
+# File được coi là game log khi replay một thư mục (UE_game.log, UE_game-backup-*.log)
+LOG_FILE_SUFFIX = ".log"
+CURRENCY_ITEM_ID = "100300"
+
+
+class ReplayResult(NamedTuple):
+    """Kết quả replay một log file (chỉ gồm kiểu built-in: gửi được giữa các process)"""
+    source: str
+    bytes: int
+    # Mỗi map: {"source", "start", "end", "drops": [(timestamp, item_id, quantity)], "complete"}
+    # complete=False: map chưa ra khi hết log (hoặc bị thay bởi scene change vào map khác)
+    maps: List[Dict]
+    # {item_id: quantity} của mọi drops, kể cả map chưa complete
+    drops: Dict[str, int]
+    # (timestamp, item_id, summary) theo VALUE_FIELDS của price history
+    observations: List[Tuple[float, str, Dict[str, float]]]
+
+
+def find_log_files(paths: Iterable[str]) -> List[str]:
+    """
+    Các log file cần replay
+
+    Args:
+        paths: File hoặc thư mục (thư mục được duyệt đệ quy, lấy các file *.log)
+
+    Returns:
+        List[str]: Đường dẫn đã sort, không trùng
+
+    Raises:
+        FileNotFoundError: Nếu một path không tồn tại
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                files.update(os.path.join(directory, name) for name in names if name.endswith(LOG_FILE_SUFFIX))
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            raise FileNotFoundError(path)
+    return sorted(files)
+
+
+def _drop_timestamp(item: Dict, fallback: float) -> float:
+    """Timestamp của drop item ("2025.11.08-16.59.48:014" từ DropScanner)"""
+    timestamp = item.get("timestamp")
+    if timestamp:
+        parsed = parse_log_timestamp(f"[{timestamp}]")
+        if parsed is not None:
+            return parsed
+    return fallback
+
+
+def replay_file(path: str, strategy: Optional[str] = None, block_size: int = RELEVANT_BLOCK_SIZE) -> ReplayResult:
+    """
+    Replay một log file
+
+    Drops được tính giống core.drop_handler: số lượng nhặt = Num sau khi nhặt - số lượng
+    trong túi (baseline từ InitBagData hoặc lần nhặt trước). Drops ngoài map (log bắt đầu giữa
+    map) mở một map ngầm định như mark_in_map().
+
+    Args:
+        path: Đường dẫn log file
+        strategy: Price strategy (mặc định: config.json "price_strategy")
+        block_size: Số byte tokenize mỗi lần
+
+    Returns:
+        ReplayResult
+    """
+    strategy = strategy or get_price_strategy()
+    drop_scanner = DropScanner(write_log=False)
+    # Ladders của cả file được tính giá một lần (analyze_price_searches) sau khi đọc xong
+    price_scanner = PriceSearchScanner(strategy=strategy, analyze=False)
+    price_searches = []
+    bag = {}
+    maps = []
+    drops = {}
+    observations = []
+    current_map = None
+    last_timestamp = 0.0
+    init_bag_run = []
+    # Thời điểm mới nhất thấy mỗi SynId (request hoặc response): search có kết quả khi đã thấy cả hai
+    price_seen = {}
+
+    def open_map(start):
+        nonlocal current_map
+        if current_map is not None:
+            maps.append(current_map)
+        current_map = {"source": path, "start": start, "end": None, "drops": [], "complete": False}
+
+    def flush_init_bag():
+        # Một loạt InitBagData liên tiếp là toàn bộ túi đồ: thay baseline
+        nonlocal bag
+        bag = {item_id: info["num"] for item_id, info in parse_init_bag_events(init_bag_run).items()}
+        init_bag_run.clear()
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ReplayResult(path, 0, [], {}, [])
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for events, _ in iter_relevant_events(buffer, block_size):
+                has_price_search = False
+                for event in events:
+                    kind = event.kind
+                    if kind == EVENT_INIT_BAG:
+                        init_bag_run.append(event)
+                        continue
+                    if init_bag_run:
+                        flush_init_bag()
+
+                    if kind in PICK_EVENT_KINDS:
+                        for item in drop_scanner.feed((event,)):
+                            item_id = item["itemId"]
+                            num = item.get("num", 0)
+                            new_quantity = num - bag.get(item_id, 0)
+                            bag[item_id] = num
+                            if new_quantity <= 0:
+                                continue
+                            timestamp = _drop_timestamp(item, last_timestamp)
+                            last_timestamp = max(last_timestamp, timestamp)
+                            if current_map is None:
+                                open_map(timestamp)
+                            current_map["drops"].append((timestamp, item_id, new_quantity))
+                            drops[item_id] = drops.get(item_id, 0) + new_quantity
+                        continue
+                    if kind == EVENT_OTHER:
+                        continue
+
+                    # Scene change / price search: cập nhật thời điểm hiện tại của log
+                    timestamp = parse_log_timestamp(event.line)
+                    if timestamp is not None:
+                        last_timestamp = timestamp
+                    if kind == EVENT_MAP_ENTER:
+                        open_map(last_timestamp)
+                    elif kind == EVENT_MAP_EXIT:
+                        if current_map is not None:
+                            current_map["end"] = last_timestamp
+                            current_map["complete"] = True
+                            maps.append(current_map)
+                            current_map = None
+                    else:
+                        syn_match = PRICE_SYN_ID_PATTERN.search(event.line)
+                        if syn_match:
+                            has_price_search = True
+                            price_seen[syn_match.group(1)] = last_timestamp
+                            if len(price_seen) > PRICE_MAX_PENDING:
+                                del price_seen[next(iter(price_seen))]
+
+                # Price scanner đọc cả block một lần (cần cả các dòng dump EVENT_OTHER)
+                if has_price_search or not price_scanner.idle:
+                    for search in price_scanner.feed_lines(event.line for event in events):
+                        price_searches.append((price_seen.pop(search["synId"], last_timestamp), search))
+    if current_map is not None:
+        maps.append(current_map)
+    results = analyze_price_searches([search for _, search in price_searches], strategy)
+    for (timestamp, _), result in zip(price_searches, results):
+        if result["price"] > 0:
+            observations.append((timestamp, result["itemId"], summary_from_stats(result["stats"], result["price"])))
+    return ReplayResult(path, size, maps, drops, observations)
+
+
+def _format_duration(seconds: float) -> str:
+    return f"{int(seconds // 60)}m{int(seconds % 60)}s"
+
+
+def build_outputs(results: List[ReplayResult], out_dir: str = REPLAY_OUT_DIR, cost: float = 0,
+                  tax: bool = False) -> Dict:
+    """
+    Gộp kết quả replay, tính profit từng map và ghi output vào out_dir (ghi đè lần replay trước)
+
+    Kết quả chỉ phụ thuộc vào nội dung results (không phụ thuộc thứ tự), nên cùng các log
+    luôn cho ra các file giống hệt nhau.
+
+    Args:
+        results: Kết quả replay_file()
+        out_dir: Thư mục output
+        cost: Chi phí mỗi map
+        tax: Trừ tax 12.5% vào giá items (config.json "tax" == 1)
+
+    Returns:
+        dict: files, bytes, maps (số entries trong ledger), incomplete_maps, drops, observations,
+            profit_all
+    """
+    results = sorted(results, key=lambda result: result.source)
+    observations = sorted(
+        (observation for result in results for observation in result.observations),
+        key=lambda observation: (observation[0], int(observation[1]))
+    )
+    history = PriceHistory(path=None)
+    for timestamp, item_id, summary in observations:
+        history.add(item_id, timestamp, summary, persist=False)
+
+    def value_of(item_id, quantity, timestamp):
+        if item_id == CURRENCY_ITEM_ID:
+            return quantity
+        price = history.price_at(item_id, timestamp)
+        if price is None:
+            price = get_item_price_at(item_id, timestamp)
+        if tax:
+            price = price * 0.875  # Tax 12.5%
+        return price * quantity
+
+    maps = [game_map for result in results for game_map in result.maps if game_map["complete"]]
+    maps.sort(key=lambda game_map: (game_map["start"], game_map["end"], game_map["source"]))
+    entries = []
+    income_all = 0.0
+    for map_count, game_map in enumerate(maps, start=1):
+        income = sum(value_of(item_id, quantity, timestamp) for timestamp, item_id, quantity in game_map["drops"])
+        income -= cost
+        income_all += income
+        duration = game_map["end"] - game_map["start"]
+        map_drops = {}
+        for _, item_id, quantity in game_map["drops"]:
+            map_drops[item_id] = map_drops.get(item_id, 0) + quantity
+        entries.append({
+            "timestamp": round(game_map["end"]),
+            "datetime": datetime.fromtimestamp(game_map["end"], timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "map_count": map_count,
+            "income": round(income, 2),
+            "cost": round(cost, 2),
+            "profit": round(income, 2),
+            "duration_seconds": round(duration, 2),
+            "duration_formatted": _format_duration(duration),
+            "source": os.path.basename(game_map["source"]),
+            "drops": {item_id: map_drops[item_id] for item_id in sorted(map_drops, key=int)},
+        })
+
+    drops = {}
+    for result in results:
+        for item_id, quantity in result.drops.items():
+            drops[item_id] = drops.get(item_id, 0) + quantity
+    catalog = get_item_catalog()
+    drop_counts = {
+        item_id: {"name": catalog.name_of(item_id), "quantity": drops[item_id]}
+        for item_id in sorted(drops, key=int)
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    ledger_path = os.path.join(out_dir, REPLAY_LEDGER_NAME)
+    index_path = os.path.splitext(ledger_path)[0] + ".idx"
+    history_path = os.path.join(out_dir, REPLAY_PRICE_HISTORY_NAME)
+    for path in (ledger_path, index_path, history_path):
+        if os.path.exists(path):
+            os.remove(path)
+    ProfitLedger(ledger_path, index_path, legacy_json_path=None).file.append_many(entries)
+    PriceHistoryFile(history_path).append(
+        (int(item_id), timestamp) + tuple(summary[field] for field in VALUE_FIELDS)
+        for timestamp, item_id, summary in observations
+    )
+    summary = {
+        "files": len(results),
+        "bytes": sum(result.bytes for result in results),
+        "maps": len(entries),
+        "incomplete_maps": sum(1 for result in results for game_map in result.maps if not game_map["complete"]),
+        "drops": sum(drops.values()),
+        "observations": len(observations),
+        "profit_all": round(income_all, 2),
+    }
+    with open(os.path.join(out_dir, REPLAY_DROPS_NAME), "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "drops": drop_counts}, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def _replay_worker(path: str, strategy: str) -> Optional[ReplayResult]:
+    """replay_file() trong worker process: lỗi đọc file chỉ bỏ qua file đó"""
+    try:
+        return replay_file(path, strategy)
+    except OSError as e:
+        log_error(f"replay: error reading {path}: {e}")
+        return None
+    finally:
+        # Worker thoát bằng os._exit (không chạy atexit): ghi log đang chờ ngay
+        flush_logs()
+
+
+def replay_files(files: List[str], strategy: str, workers: int = 1) -> List[ReplayResult]:
+    """
+    replay_file() cho từng file, song song trên workers process nếu workers > 1
+
+    Mỗi worker trả về kết quả của một file (drops, maps, price observations); việc gộp
+    nằm ở build_outputs() và không phụ thuộc thứ tự, nên kết quả giống hệt replay tuần tự.
+
+    Args:
+        files: Các log file
+        strategy: Price strategy (truyền cho workers, không đọc lại config.json)
+        workers: Số process
+
+    Returns:
+        List[ReplayResult]: Kết quả các file đọc được
+    """
+    workers = max(1, min(workers, len(files)))
+    if workers == 1:
+        results = [_replay_worker(path, strategy) for path in files]
+    else:
+        # File lớn trước: file lớn cuối cùng không bắt các worker khác chờ
+        ordered = sorted(files, key=lambda path: -os.path.getsize(path))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_replay_worker, ordered, repeat(strategy)))
+    return [result for result in results if result is not None]
+
+
+def replay(paths: Iterable[str], out_dir: str = REPLAY_OUT_DIR, cost: float = 0, tax: bool = False,
+           strategy: Optional[str] = None, workers: int = 1) -> Dict:
+    """
+    Replay các log file / thư mục và ghi output
+
+    Args:
+        paths: Files hoặc thư mục
+        out_dir: Thư mục output
+        cost: Chi phí mỗi map
+        tax: Trừ tax 12.5% vào giá items
+        strategy: Price strategy (mặc định: config.json "price_strategy")
+        workers: Số process đọc log song song (mỗi file một task)
+
+    Returns:
+        dict: build_outputs() + workers, seconds và mb_per_s (throughput của bước đọc log)
+    """
+    files = find_log_files(paths)
+    strategy = strategy or get_price_strategy()
+    started = time.perf_counter()
+    results = replay_files(files, strategy, workers)
+    seconds = time.perf_counter() - started
+    summary = build_outputs(results, out_dir, cost=cost, tax=tax)
+    summary["workers"] = max(1, min(workers, len(files)))
+    summary["seconds"] = round(seconds, 3)
+    summary["mb_per_s"] = round(summary["bytes"] / (1024 * 1024) / seconds, 1) if seconds > 0 else 0.0
+    log_info(f"replay: {summary['files']} file(s), {summary['maps']} map(s), {summary['workers']} worker(s), "
+             f"{summary['mb_per_s']} MB/s")
+    return summary
@@ -2,7 +2,7 @@ from distutils.core import setup
 import py2exe
 options = {
     'py2exe': {
-        'includes': ['win32gui', 'win32process', 'tkinter', 'psutil', 're', 'json']
+        'includes': ['win32gui', 'win32process', 'tkinter', 'psutil', 're', 'json', 'sqlite3']
     }
 }
 
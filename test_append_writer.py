@@ -0,0 +1,107 @@
+"""
+Tests cho repositories.append_writer
+
+Mục đích:
+    Kiểm tra background writer gom dòng thành batch (mỗi file một lần mở), giữ thứ tự,
+    flush/fsync khi được yêu cầu, không block khi queue đầy, và drop_handler ghi
+    log/drop.txt, log/drop_log.txt qua writer.
+
+Cách chạy:
+    python -m pytest test_append_writer.py
+"""
+import os
+import threading
+
+from app import state
+from app.session_state import SessionState
+from core import drop_handler
+from repositories import append_writer
+from repositories.append_writer import AppendWriter, close_append_writer
+from services.log_scan_service import DropScanner
+from test_log_parser import ENTER_LINE, EXIT_LINE, drop_block
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_burst_is_written_in_one_batch_per_file():
+    writer = AppendWriter(flush_interval=60)
+    for index in range(50):
+        writer.write("log/drop.txt", f"drop {index}\n")
+        writer.write("log/drop_log.txt", f"block {index}\n")
+    assert writer.flush(fsync=True, wait=True)
+    assert writer.batches_written == 2
+    assert read("log/drop.txt") == "".join(f"drop {index}\n" for index in range(50))
+    assert read("log/drop_log.txt").splitlines()[-1] == "block 49"
+    writer.close()
+
+
+def test_size_and_interval_trigger_flush():
+    writer = AppendWriter(flush_interval=60, max_batch_bytes=10)
+    writer.write("a.txt", "0123456789\n")
+    # Đủ max_batch_bytes: writer tự ghi mà không cần flush()
+    for _ in range(100):
+        if os.path.exists("a.txt"):
+            break
+        threading.Event().wait(0.01)
+    assert read("a.txt") == "0123456789\n"
+    writer.close()
+
+    writer = AppendWriter(flush_interval=0.05)
+    writer.write("b.txt", "x\n")
+    for _ in range(100):
+        if os.path.exists("b.txt"):
+            break
+        threading.Event().wait(0.01)
+    assert read("b.txt") == "x\n"
+    writer.close()
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    release = threading.Event()
+    writer = AppendWriter(max_queue=3, flush_interval=0)
+    original = writer._write_batch
+
+    def stalled_write(pending, fsync):
+        release.wait(5)  # Disk bị treo
+        original(pending, fsync)
+
+    monkeypatch.setattr(writer, "_write_batch", stalled_write)
+    results = [writer.write("c.txt", f"{index}\n") for index in range(20)]
+    assert results.count(False) == writer.dropped_lines > 0
+    release.set()
+    writer.close()
+    assert read("c.txt").splitlines()[0] == "0"
+
+
+def test_drop_handler_writes_through_shared_writer(monkeypatch):
+    monkeypatch.setattr(state, "bag_items", {"5028": {"name": "x", "num": 10}})
+    monkeypatch.setattr(state, "session", SessionState())
+    monkeypatch.setattr(state, "root", None)
+    monkeypatch.setattr(drop_handler, "previous_item_quantities", {})
+    monkeypatch.setattr(drop_handler, "drop_scanner", DropScanner())
+    parse_thread = threading.current_thread()
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        if threading.current_thread() is parse_thread:
+            opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+
+    text = "\n".join([ENTER_LINE] + [drop_block(5028, 10 + index, slot_id=index) for index in range(1, 21)] + [EXIT_LINE])
+    drop_handler.deal_change(text)
+    parse_thread_opens = [path for path in opened if path.endswith(("drop.txt", "drop_log.txt"))]
+    close_append_writer()
+
+    assert parse_thread_opens == []
+    drops = read(os.path.join("log", "drop.txt")).splitlines()
+    assert len(drops) == 21 and drops[-1] == drop_handler.END_MAP_MARKER.strip()
+    drop_log = read(os.path.join("log", "drop_log.txt")).splitlines()
+    assert drop_log[0] == drop_handler.START_MAP_MARKER.strip()
+    assert drop_log[-1] == drop_handler.END_MAP_MARKER.strip()
+    assert append_writer._writer is None
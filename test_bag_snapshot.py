@@ -0,0 +1,145 @@
+"""
+Tests cho repositories.snapshot_writer và services.bag_snapshot
+
+Mục đích:
+    Kiểm tra snapshot writer gộp nhiều thay đổi thành một lần ghi (tối đa một lần mỗi
+    interval), ghi ngay khi flush()/close(), thử lại khi lỗi, và drop_handler không còn
+    ghi log/bag_log.json trên thread parse sau mỗi drop.
+
+Cách chạy:
+    python -m pytest test_bag_snapshot.py
+"""
+import json
+import os
+import threading
+
+from app import state
+from app.session_state import SessionState
+from core import drop_handler
+from repositories.snapshot_writer import SnapshotWriter
+from services import bag_snapshot
+from services.bag_snapshot import BAG_LOG_PATH, load_bag_snapshot
+from services.log_scan_service import DropScanner, init_bag_data
+from test_log_parser import ENTER_LINE, EXIT_LINE, drop_block
+
+
+def read_json_file(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def wait_until(predicate):
+    for _ in range(200):
+        if predicate():
+            return True
+        threading.Event().wait(0.01)
+    return False
+
+
+def test_burst_is_coalesced_into_one_write():
+    data = {"n": 0}
+    writer = SnapshotWriter("snap.json", lambda: dict(data), interval=60)
+    # Thay đổi đầu tiên được ghi ngay, các thay đổi sau gộp lại tới hết interval
+    writer.mark_dirty()
+    assert wait_until(lambda: writer.writes == 1)
+    for index in range(1, 101):
+        data["n"] = index
+        writer.mark_dirty()
+    threading.Event().wait(0.05)
+    assert writer.writes == 1 and writer.dirty
+    assert writer.flush(wait=True)
+    assert writer.writes == 2 and not writer.dirty
+    assert read_json_file("snap.json") == {"n": 100}
+    # Không còn gì dirty: flush() không ghi lại
+    assert writer.flush(wait=True)
+    writer.close()
+    assert writer.writes == 2
+
+
+def test_trailing_write_after_interval_and_on_close():
+    data = {"n": 0}
+    writer = SnapshotWriter("snap.json", lambda: dict(data), interval=0.05)
+    writer.mark_dirty()
+    data["n"] = 1
+    writer.mark_dirty()
+    assert wait_until(lambda: not writer.dirty)
+    assert read_json_file("snap.json") == {"n": 1}
+
+    writer.interval = 60
+    data["n"] = 2
+    writer.mark_dirty()
+    writer.close()
+    assert read_json_file("snap.json") == {"n": 2}
+    # Sau close(): mark_dirty() bị bỏ qua
+    writer.mark_dirty()
+    assert not writer.dirty
+
+
+def test_failed_write_is_retried():
+    calls = []
+
+    def source():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("dictionary changed size during iteration")
+        return {"ok": True}
+
+    writer = SnapshotWriter("snap.json", source, interval=0.02)
+    writer.mark_dirty()
+    assert wait_until(lambda: writer.writes == 1)
+    assert writer.write_errors == 1
+    assert read_json_file("snap.json") == {"ok": True}
+    writer.close()
+
+
+def test_load_bag_snapshot_formats(monkeypatch):
+    assert load_bag_snapshot() is None
+    os.makedirs("log")
+    items = {"5028": {"name": "x", "num": 3}}
+    # Format cũ: list (lấy entry cuối), indent=4
+    with open(BAG_LOG_PATH, "w", encoding="utf-8") as f:
+        json.dump([{"items": {}}, {"items": items}], f, indent=4)
+    assert load_bag_snapshot() == items
+    with open(BAG_LOG_PATH, "w", encoding="utf-8") as f:
+        f.write("{broken")
+    assert load_bag_snapshot() is None
+
+    monkeypatch.setattr(state, "bag_items", items)
+    bag_snapshot.mark_bag_dirty()
+    assert bag_snapshot.flush_bag_snapshot(wait=True)
+    snapshot = read_json_file(BAG_LOG_PATH)
+    assert snapshot["items"] == items and "timestamp" in snapshot
+
+    monkeypatch.setattr(state, "bag_items", {})
+    assert init_bag_data()
+    assert state.bag_items == items
+
+
+def test_drops_do_not_rewrite_bag_log_on_parse_thread(monkeypatch):
+    monkeypatch.setattr(bag_snapshot, "BAG_SNAPSHOT_INTERVAL", 60)
+    monkeypatch.setattr(state, "bag_items", {"5028": {"name": "x", "num": 10}})
+    monkeypatch.setattr(state, "session", SessionState())
+    monkeypatch.setattr(state, "root", None)
+    monkeypatch.setattr(drop_handler, "previous_item_quantities", {})
+    monkeypatch.setattr(drop_handler, "drop_scanner", DropScanner())
+    parse_thread = threading.current_thread()
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        if threading.current_thread() is parse_thread:
+            opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+
+    text = "\n".join([ENTER_LINE] + [drop_block(5028, 10 + index, slot_id=index) for index in range(1, 21)] + [EXIT_LINE])
+    drop_handler.deal_change(text)
+    writer = bag_snapshot.get_bag_snapshot_writer()
+    # Ra map: flush_bag_snapshot() ghi trạng thái cuối cùng
+    assert writer.flush(wait=True)
+
+    assert [path for path in opened if "bag_log" in path] == []
+    # 20 drops nhưng chỉ ghi lần đầu (leading) + lần ra map
+    assert writer.writes <= 2
+    assert read_json_file(BAG_LOG_PATH)["items"]["5028"]["num"] == 30
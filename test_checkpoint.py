@@ -0,0 +1,244 @@
+"""
+Tests cho checkpoint / resume của log tailer
+
+Mục đích:
+    Kiểm tra restart giữa chừng (kể cả giữa một dòng, một ký tự UTF-8 hay một
+    PickItems block) cho cùng kết quả như đọc liền một mạch, và checkpoint
+    không được dùng khi file log đã đổi.
+
+Cách chạy:
+    python -m pytest test_checkpoint.py
+"""
+import os
+
+import pytest
+
+from app import state
+from app.session_state import SessionState
+from core import drop_handler
+from core.log_parser import LogStreamTokenizer
+from core.log_tailer import LogTailer, PollingBackend
+from services.checkpoint_service import CheckpointService
+from services.log_scan_service import DropScanner
+from test_log_parser import ENTER_LINE, EXIT_LINE, drop_block
+
+
+@pytest.fixture(autouse=True)
+def work_dir(work_dir, monkeypatch):
+    monkeypatch.setattr(state, "bag_items", {"5028": {"name": "x", "num": 10}})
+    return work_dir
+
+
+class Pipeline:
+    """Tailer + tokenizer + drop_handler, giống MyThread nhưng không cần Tk/config"""
+
+    def __init__(self, log_path, checkpoint_path):
+        self.tailer = LogTailer(log_path, backend=PollingBackend())
+        self.tailer.on_rotate = self.on_rotate
+        self.tokenizer = LogStreamTokenizer()
+        self.checkpoint = CheckpointService(self.capture, path=checkpoint_path, flush_interval=60)
+
+    def capture(self):
+        log_state = self.tailer.identity()
+        log_state.update(self.tailer.position())
+        return {
+            "log": log_state,
+            "parser": {
+                "pending_text": self.tokenizer.pending_text,
+                "drop_block": drop_handler.drop_scanner.current_item,
+            },
+            "session": drop_handler.export_session(),
+        }
+
+    def open(self):
+        data = self.checkpoint.load(self.tailer.path)
+        if data is None:
+            self.tailer.open()
+            return False
+        self.tokenizer.restore(data["parser"]["pending_text"])
+        drop_handler.drop_scanner = DropScanner()
+        drop_handler.drop_scanner.current_item = data["parser"]["drop_block"]
+        drop_handler.restore_session(data["session"])
+        self.tailer.open(position=data["log"], source_path=data["log"].get("source_path"))
+        return True
+
+    def on_rotate(self, reason):
+        drop_handler.deal_change_events(self.tokenizer.flush())
+        self.tokenizer.reset()
+        drop_handler.drop_scanner.reset()
+
+    def pump(self):
+        while self.tailer.has_new_data():
+            drop_handler.deal_change_events(self.tokenizer.feed(self.tailer.read(max_bytes=7)))
+            self.checkpoint.mark_dirty()
+
+
+def reset_session():
+    """Mô phỏng process mới: mọi global về giá trị ban đầu"""
+    state.session = SessionState()
+    state.bag_items = {}
+    drop_handler.previous_item_quantities = {}
+    drop_handler.drop_scanner = DropScanner()
+
+
+def session_totals():
+    snapshot = state.session.snapshot()
+    return snapshot.map_count, dict(snapshot.drop_list_all), dict(snapshot.drop_list), snapshot.income_all
+
+
+LOG_TEXT = "\n".join([
+    "初火源质 header",
+    ENTER_LINE,
+    drop_block(5028, 13),
+    drop_block(5028, 20, slot_id=1),
+    EXIT_LINE,
+    ENTER_LINE,
+    drop_block(5028, 26),
+]) + "\n"
+
+
+def test_restart_mid_block_resumes_without_loss(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    checkpoint_path = str(tmp_path / "log" / "checkpoint.json")
+    data = LOG_TEXT.encode("utf-8")
+    with open(log_path, "wb"):
+        pass
+
+    first = Pipeline(log_path, checkpoint_path)
+    assert first.open() is False
+    # Dừng giữa block thứ 2 (và giữa một dòng)
+    cut = data.index(b"Num = 20") + 3
+    with open(log_path, "ab") as f:
+        f.write(data[:cut])
+    first.pump()
+    assert drop_handler.drop_scanner.in_block
+    assert first.checkpoint.maybe_save(force=True)
+    first.tailer.close()
+
+    reset_session()
+    with open(log_path, "ab") as f:
+        f.write(data[cut:])
+
+    second = Pipeline(log_path, checkpoint_path)
+    assert second.open() is True
+    assert state.session.map_count == 1
+    second.pump()
+    second.tailer.close()
+
+    resumed = session_totals()
+
+    # Đọc liền một mạch không restart phải cho cùng kết quả
+    reset_session()
+    state.bag_items = {"5028": {"name": "x", "num": 10}}
+    drop_handler.deal_change(LOG_TEXT)
+    assert resumed == session_totals()
+    assert resumed[:3] == (2, {5028: 16}, {5028: 6})
+
+
+def test_crash_after_checkpoint_uses_checkpoint_bag_baseline(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    with open(log_path, "wb"):
+        pass
+    first = Pipeline(log_path, checkpoint_path)
+    first.open()
+    first_part = "\n".join([ENTER_LINE, drop_block(5028, 13)]) + "\n"
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(first_part)
+    first.pump()
+    assert first.checkpoint.maybe_save(force=True)
+    # Drop sau checkpoint: bag_log.json đã có num = 20 nhưng checkpoint chưa kịp ghi
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(drop_block(5028, 20, slot_id=1) + "\n")
+    first.pump()
+    first.tailer.close()
+
+    reset_session()
+    state.bag_items = {"5028": {"name": "x", "num": 20}}
+    second = Pipeline(log_path, checkpoint_path)
+    assert second.open() is True
+    assert state.bag_items["5028"]["num"] == 13
+    second.pump()
+    second.tailer.close()
+    assert state.session.snapshot().drop_list_all == {5028: 10}
+
+
+def test_restart_after_game_rotated_log_reads_backup_then_new_log(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    first_session = "\n".join([ENTER_LINE, drop_block(5028, 13)]) + "\n"
+    missed = drop_block(5028, 20) + "\n" + EXIT_LINE + "\n"
+    second_session = ENTER_LINE + "\n" + drop_block(5028, 26) + "\n"
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(first_session)
+
+    first = Pipeline(log_path, checkpoint_path)
+    first.tailer.from_end = False
+    first.open()
+    first.pump()
+    first.checkpoint.save()
+    first.tailer.close()
+
+    # Trong lúc tracker tắt: game ghi thêm, restart và đổi tên log cũ
+    reset_session()
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(missed)
+    os.rename(log_path, str(tmp_path / "UE_game-backup-2025.11.08-17.00.00.log"))
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(second_session)
+
+    second = Pipeline(log_path, checkpoint_path)
+    assert second.open() is True
+    second.pump()
+    second.tailer.close()
+    assert second.tailer.rotations == 1
+    assert state.session.map_count == 2
+    assert state.session.snapshot().drop_list_all == {5028: 16}
+
+
+def test_tailer_position_round_trip_splits_utf8_and_crlf(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    data = "a初\r\nb火\r\n".encode("utf-8")
+    with open(log_path, "wb") as f:
+        f.write(data)
+    for cut in range(len(data) + 1):
+        tailer = LogTailer(log_path, backend=PollingBackend(), from_end=False)
+        tailer.open()
+        head = tailer.read(max_bytes=cut)
+        position = tailer.position()
+        tailer.close()
+        resumed = LogTailer(log_path, backend=PollingBackend())
+        resumed.open(position=position)
+        assert head + resumed.read() == "a初\nb火\n", cut
+        resumed.close()
+
+
+def test_checkpoint_rejected_when_log_replaced(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(LOG_TEXT)
+    pipeline = Pipeline(log_path, checkpoint_path)
+    pipeline.open()
+    pipeline.checkpoint.save()
+    pipeline.tailer.close()
+    assert pipeline.checkpoint.load(log_path) is not None
+
+    os.remove(log_path)
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write("new game session\n")
+    assert pipeline.checkpoint.load(log_path) is None
+
+
+def test_checkpoint_flush_is_rate_limited(tmp_path):
+    calls = []
+    checkpoint = CheckpointService(lambda: calls.append(1) or {}, path=str(tmp_path / "cp.json"),
+                                   flush_interval=60)
+    assert checkpoint.maybe_save() is False
+    checkpoint.mark_dirty()
+    assert checkpoint.maybe_save() is True
+    checkpoint.mark_dirty()
+    assert checkpoint.maybe_save() is False
+    assert checkpoint.maybe_save(force=True) is True
+    assert len(calls) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
@@ -0,0 +1,124 @@
+"""
+Tests cho ui.drop_list_view
+
+Mục đích:
+    Kiểm tra listbox Drops được cập nhật theo diff: chỉ dòng thay đổi bị xoá/insert,
+    thứ tự theo tổng giá trị giảm dần, header giữ nguyên, và kết quả giống render lại toàn bộ.
+
+Cách chạy:
+    python -m pytest test_drop_list_view.py
+"""
+import random
+
+from ui.drop_list_view import DropListView, STATUS_SYMBOLS
+
+
+NOW = 1_000_000.0
+
+
+class FakeListbox:
+    """Listbox trong RAM với cùng API delete/insert như tkinter.Listbox"""
+
+    def __init__(self, header=None):
+        self.rows = [header] if header is not None else []
+        self.calls = 0
+
+    def delete(self, first, last=None):
+        self.calls += 1
+        if last == "end":
+            del self.rows[first:]
+        else:
+            del self.rows[first]
+
+    def insert(self, index, *elements):
+        self.calls += 1
+        if index == "end":
+            self.rows.extend(elements)
+        else:
+            self.rows[index:index] = elements
+
+
+class Catalog:
+    def name_of(self, item_id):
+        return f"Item {item_id}"
+
+
+class Prices:
+    def __init__(self, prices):
+        self.entries = {item_id: {"price": price, "last_update": NOW} for item_id, price in prices.items()}
+
+    def get(self, item_id):
+        return self.entries.get(item_id)
+
+
+def expected_rows(drops, prices, visible_ids):
+    rows = []
+    for item_id, quantity in drops.items():
+        item_id = str(item_id)
+        if item_id not in visible_ids:
+            continue
+        price = prices.entries.get(item_id, {}).get("price", 0)
+        rows.append(((-quantity * price, item_id), f"{STATUS_SYMBOLS[0]} Item {item_id} x{quantity} [{quantity * price}]"))
+    return [text for _, text in sorted(rows)]
+
+
+def test_only_changed_rows_touch_the_listbox():
+    prices = Prices({str(i): float(i) for i in range(1, 101)})
+    visible = set(prices.entries)
+    drops = {i: 1 for i in range(1, 101)}
+    listbox = FakeListbox(header="legend")
+    view = DropListView(header_rows=1)
+
+    view.render(listbox, drops, visible, Catalog(), prices, now=NOW)
+    assert view.full_renders == 1
+    assert listbox.rows[0] == "legend"
+    assert listbox.rows[1:] == expected_rows(drops, prices, visible)
+    assert listbox.rows[1].startswith("✔ Item 100 ")
+
+    # Không có gì thay đổi: không chạm listbox
+    listbox.calls = 0
+    assert view.render(listbox, drops, visible, Catalog(), prices, now=NOW) == 0
+    assert listbox.calls == 0
+
+    # Một drop: một dòng bị xoá + insert lại ở vị trí mới theo giá trị
+    drops[5] += 100
+    assert view.render(listbox, drops, visible, Catalog(), prices, now=NOW) == 2
+    assert listbox.calls == 2
+    assert listbox.rows[1] == f"✔ Item 5 x101 [{101 * 5.0}]"
+    assert listbox.rows[1:] == expected_rows(drops, prices, visible)
+
+
+def test_price_freshness_and_tax_update_rows():
+    prices = Prices({"1": 10.0, "2": 1.0, "100300": 1.0})
+    visible = set(prices.entries)
+    drops = {1: 1, 2: 3, 100300: 5}
+    listbox = FakeListbox()
+    view = DropListView()
+    view.render(listbox, drops, visible, Catalog(), prices, now=NOW)
+
+    # Giá item 2 cũ > 15 phút: chỉ dòng đó đổi status
+    prices.entries["2"]["last_update"] = NOW - 1000
+    assert view.render(listbox, drops, visible, Catalog(), prices, now=NOW) == 2
+    assert [row[0] for row in listbox.rows] == ["✔", "✔", "✘"]
+
+    # Tax: mọi item trừ 100300 đổi giá trị -> render lại cả listbox
+    view.render(listbox, drops, visible, Catalog(), prices, tax=True, now=NOW)
+    assert listbox.rows[0] == f"✔ Item 1 x1 [{10.0 * 0.875}]"
+    assert listbox.rows[1] == "✔ Item 100300 x5 [5.0]"
+
+
+def test_filter_and_map_change_match_full_render():
+    rng = random.Random(3)
+    prices = Prices({str(i): rng.uniform(0, 5) for i in range(300)})
+    view = DropListView(header_rows=1)
+    listbox = FakeListbox(header="legend")
+    drops = {}
+    for step in range(400):
+        if step % 97 == 0:
+            drops = {}  # Vào map mới
+        item = rng.randrange(300)
+        drops[item] = drops.get(item, 0) + rng.randint(1, 5)
+        visible = set(prices.entries) if step % 50 < 40 else {str(i) for i in range(0, 300, 2)}
+        view.render(listbox, drops, visible, Catalog(), prices, now=NOW)
+        assert listbox.rows[1:] == expected_rows(drops, prices, visible)
+        assert view.texts() == listbox.rows[1:]
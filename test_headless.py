@@ -0,0 +1,69 @@
+"""
+Tests cho app.headless
+
+Mục đích:
+    Kiểm tra chế độ headless chạy được trên Linux (không import Tk / pywin32), đọc log từ
+    file hoặc stdin qua toàn bộ pipeline và in statistics dạng JSON lines: một dòng mỗi lần
+    ra map (kể cả nhiều maps trong cùng một block đọc) và một dòng "final".
+
+Cách chạy:
+    python -m pytest test_headless.py
+"""
+import io
+import json
+import sys
+
+from app import headless
+from app import state
+from app.session_state import SessionState
+from core import drop_handler
+from services.log_scan_service import DropScanner
+from test_log_parser import ENTER_LINE, EXIT_LINE, drop_block, init_bag_line
+
+
+LOG_TEXT = "\n".join([
+    init_bag_line(5028, 10, 0),
+    ENTER_LINE,
+    drop_block(5028, 13),
+    EXIT_LINE,
+    ENTER_LINE,
+    drop_block(5028, 20, slot_id=1),
+    EXIT_LINE,
+    ENTER_LINE,
+    drop_block(5028, 21, slot_id=1),
+])
+
+
+def run(argv, stdin=None):
+    out = io.StringIO()
+    assert headless.main(argv, out=out, stdin=stdin) == 0
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_import_does_not_need_windows():
+    assert "win32gui" not in sys.modules and "psutil" not in sys.modules
+
+
+def test_log_file_emits_one_line_per_map(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_text(LOG_TEXT, encoding="utf-8")
+    lines = run(["--log", str(log_path), "--cost", "1.5"])
+    assert [line["event"] for line in lines] == ["map_exit", "map_exit", "final"]
+    assert [line["drops"] for line in lines] == [{"5028": 3}, {"5028": 7}, {"5028": 1}]
+    assert (lines[0]["map_count"], lines[0]["is_in_map"], lines[0]["income"]) == (1, False, -1.5)
+    final = lines[-1]
+    # Dòng cuối không có '\n' vẫn được xử lý
+    assert (final["map_count"], final["is_in_map"], final["drops_all"]) == (3, True, {"5028": 11})
+
+
+def test_stdin_matches_log_file(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_text(LOG_TEXT, encoding="utf-8")
+    from_file = run(["--log", str(log_path)])
+
+    state.session = SessionState()
+    state.bag_items = {}
+    drop_handler.drop_scanner = DropScanner()
+    from_stdin = run([], stdin=io.StringIO(LOG_TEXT))
+    keys = ("event", "map_count", "drops", "drops_all", "income_all")
+    assert [[line[key] for key in keys] for line in from_stdin] == [[line[key] for key in keys] for line in from_file]
@@ -0,0 +1,99 @@
+"""
+Tests cho services.item_catalog
+
+Mục đích:
+    Kiểm tra lookup theo id/type và catalog chỉ đọc lại id_table.json khi nội dung thay đổi.
+
+Cách chạy:
+    python -m pytest test_item_catalog.py
+"""
+import json
+import os
+
+import pytest
+
+from services.item_catalog import ItemCatalog
+
+
+TABLE = {
+    "5028": {"name": "Netherrealm Resonance", "type": "Hard Currency"},
+    "100300": {"name": "Flame Elementium", "type": "Hard Currency"},
+    "1001": {"name": "Star Goose Fire", "type": "Memory Fluorescence"},
+}
+
+
+def write_table(path, table, mtime_ns=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    path = str(tmp_path / "id_table.json")
+    write_table(path, TABLE, mtime_ns=1_000_000_000)
+    return path
+
+
+def test_lookup_by_id_and_type(table_path):
+    catalog = ItemCatalog(table_path)
+    assert catalog.name_of(5028) == "Netherrealm Resonance"
+    assert catalog.type_of("1001") == "Memory Fluorescence"
+    assert catalog.name_of("999") == "Item 999"
+    assert catalog.type_of("999") == "Unknown"
+    assert catalog.ids_of_type("Hard Currency") == {"5028", "100300"}
+    assert catalog.ids_of_types(["Hard Currency", "Memory Fluorescence"]) == set(TABLE)
+    assert catalog.ids_of_types([]) == frozenset()
+
+
+def test_unchanged_file_is_read_once(table_path):
+    catalog = ItemCatalog(table_path, check_interval=0)
+    for _ in range(100):
+        catalog.name_of("5028")
+        catalog.ids_of_types(["Compass"])
+    assert catalog.load_count == 1
+    assert catalog.version == 1
+
+
+def test_reload_only_when_content_changes(table_path):
+    catalog = ItemCatalog(table_path, check_interval=0)
+    assert catalog.name_of("5028") == "Netherrealm Resonance"
+
+    # Chỉ đổi mtime, nội dung giữ nguyên: đọc lại nhưng không rebuild
+    write_table(table_path, TABLE, mtime_ns=2_000_000_000)
+    assert catalog.name_of("5028") == "Netherrealm Resonance"
+    assert catalog.load_count == 2
+    assert catalog.version == 1
+
+    changed = dict(TABLE, **{"5028": {"name": "Renamed", "type": "Compass"}})
+    write_table(table_path, changed, mtime_ns=3_000_000_000)
+    assert catalog.name_of("5028") == "Renamed"
+    assert catalog.ids_of_type("Compass") == {"5028"}
+    assert catalog.ids_of_type("Hard Currency") == {"100300"}
+    assert catalog.version == 2
+
+
+def test_check_interval_limits_stat_calls(table_path):
+    catalog = ItemCatalog(table_path, check_interval=3600)
+    assert catalog.name_of("5028") == "Netherrealm Resonance"
+    write_table(table_path, {}, mtime_ns=2_000_000_000)
+    assert catalog.name_of("5028") == "Netherrealm Resonance"
+    catalog.invalidate()
+    assert "5028" not in catalog
+
+
+def test_invalid_json_keeps_previous_catalog(table_path):
+    catalog = ItemCatalog(table_path, check_interval=0)
+    assert len(catalog) == 3
+    with open(table_path, "w", encoding="utf-8") as f:
+        f.write('{"5028": ')
+    assert catalog.name_of("5028") == "Netherrealm Resonance"
+    write_table(table_path, {"7": {"name": "Seven", "type": "Compass"}}, mtime_ns=4_000_000_000)
+    assert catalog.name_of("7") == "Seven"
+
+
+def test_missing_file_gives_empty_catalog(tmp_path):
+    catalog = ItemCatalog(str(tmp_path / "missing.json"))
+    assert len(catalog) == 0
+    assert catalog.name_of("5028") == "Item 5028"
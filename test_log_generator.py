@@ -0,0 +1,63 @@
+"""
+Tests cho benchmarks.log_generator và benchmarks.bench_parsers
+
+Mục đích:
+    Kiểm tra synthetic log: cùng seed cho cùng nội dung, các parser đếm đúng những gì
+    generator đã sinh (picks, drops, +DropItems blocks, InitBagData slots), và benchmark
+    suite chạy được + phát hiện regression khi so với baseline.
+
+Cách chạy:
+    python -m pytest test_log_generator.py
+"""
+import copy
+
+from benchmarks.bench_parsers import compare_results, run_suite
+from benchmarks.log_generator import LogMix, build_log_text, generate_log
+from core.log_parser import scanned_log
+from core.logger import get_log_level
+from services.log_scan_service import scan_drop_log, scan_init_bag
+from services.replay_service import replay_file
+
+
+SIZE = 128 * 1024
+
+
+def test_same_seed_same_log(tmp_path):
+    text, generated = build_log_text(SIZE, seed=5)
+    assert build_log_text(SIZE, seed=5) == (text, generated)
+    assert build_log_text(SIZE, seed=6)[0] != text
+    assert generated.bytes == len(text.encode("utf-8")) >= SIZE
+    # Ghi file cho cùng nội dung với log trong RAM
+    assert generate_log(str(tmp_path / "UE_game.log"), SIZE, seed=5) == generated
+    assert (tmp_path / "UE_game.log").read_text(encoding="utf-8") == text
+
+
+def test_parsers_match_generated_counts(tmp_path):
+    mix = LogMix(init_bag_every=2, init_bag_slots=12, drop_item_blocks_per_map=2)
+    path = str(tmp_path / "UE_game.log")
+    generated = generate_log(path, SIZE, seed=2, mix=mix)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    assert len(scan_drop_log(text)) == generated.pick_blocks
+    assert len(scanned_log(text)) == generated.drop_item_blocks
+    assert len(scan_init_bag(text)) == generated.init_bag_slots
+    result = replay_file(path)
+    assert result.drops == generated.drops
+    assert len(result.maps) == generated.maps
+
+
+def test_run_suite_and_compare():
+    level = get_log_level()
+    results = run_suite(size_mb=0.25, rounds=2, warmup=0, only=["scan_drop_log", "scan_price_search"], out=None)
+    assert get_log_level() == level
+    assert [bench["name"] for bench in results["benchmarks"]] == ["scan_drop_log", "scan_price_search"]
+    stats = results["benchmarks"][0]["stats"]
+    assert stats["rounds"] == 2 and stats["min"] <= stats["median"] <= stats["max"]
+    assert results["params"]["generated"]["maps"] > 0
+
+    assert not any(row["regression"] for row in compare_results(results, results))
+    slower = copy.deepcopy(results)
+    slower["benchmarks"][0]["stats"]["median"] *= 1.5
+    rows = compare_results(results, slower, threshold=0.2)
+    assert [row["regression"] for row in rows] == [True, False]
+    assert rows[0]["change"] == 0.5
@@ -0,0 +1,275 @@
+"""
+Tests cho tokenizer trong core.log_parser và các scanner dùng LogEvent
+
+Mục đích:
+    Kiểm tra mỗi dòng log được phân loại đúng một lần, LogEventBus phân phối
+    đúng kinds, và các scanner dạng *_events cho kết quả giống API text cũ.
+
+Cách chạy:
+    python -m pytest test_log_parser.py
+"""
+import random
+
+import pytest
+
+from app import state
+from core import drop_handler
+from core.log_parser import (
+    LogEventBus,
+    LogStreamTokenizer,
+    classify_line,
+    tokenize_log,
+    EVENT_INIT_BAG,
+    EVENT_MAP_ENTER,
+    EVENT_MAP_EXIT,
+    EVENT_OTHER,
+    EVENT_PICK_END,
+    EVENT_PICK_MODIFY,
+    EVENT_PICK_START,
+    EVENT_PICK_UPDATE,
+    EVENT_PRICE_SEARCH,
+    HIDEOUT_SCENE,
+    iter_relevant_events,
+    parse_log_timestamp,
+)
+from services import log_scan_service
+from services.log_scan_service import (
+    DropScanner,
+    scan_drop_events,
+    scan_drop_log,
+    scan_init_bag,
+    scan_price_search,
+    scan_price_search_events,
+)
+
+
+PREFIX = "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] "
+MAP_SCENE = "World'/Game/Art/Maps/02/Map01/Map01.Map01'"
+ENTER_LINE = f"{PREFIX}PageApplyBase@ _UpdateGameEnd: LastSceneName = {HIDEOUT_SCENE} NextSceneName = {MAP_SCENE}"
+EXIT_LINE = f"{PREFIX}PageApplyBase@ _UpdateGameEnd: LastSceneName = {MAP_SCENE} NextSceneName = {HIDEOUT_SCENE}"
+
+
+def drop_block(item_id, num, slot_id=0):
+    return "\n".join([
+        f"{PREFIX}ItemChange@ ProtoName=PickItems start",
+        f"{PREFIX}ItemChange@ Update Id=1 BagNum={num} in PageId=102 SlotId={slot_id}",
+        f"{PREFIX}BagMgr@:Modfy BagItem PageId = 102 SlotId = {slot_id} ConfigBaseId = {item_id} Num = {num}",
+        f"{PREFIX}ItemChange@ ProtoName=PickItems end",
+    ])
+
+
+def init_bag_line(item_id, num, slot_id):
+    return f"{PREFIX}BagMgr@:InitBagData PageId = 102 SlotId = {slot_id} ConfigBaseId = {item_id} Num = {num}"
+
+
+@pytest.mark.parametrize("line, kind", [
+    (f"{PREFIX}ItemChange@ ProtoName=PickItems start", EVENT_PICK_START),
+    (f"{PREFIX}ItemChange@ ProtoName=PickItems end", EVENT_PICK_END),
+    (f"{PREFIX}ItemChange@ Update Id=1 BagNum=5 in PageId=102 SlotId=3", EVENT_PICK_UPDATE),
+    (f"{PREFIX}BagMgr@:Modfy BagItem PageId = 102 SlotId = 3 ConfigBaseId = 5028 Num = 5", EVENT_PICK_MODIFY),
+    (init_bag_line(5028, 5, 3), EVENT_INIT_BAG),
+    (ENTER_LINE, EVENT_MAP_ENTER),
+    (EXIT_LINE, EVENT_MAP_EXIT),
+    (f"{PREFIX}----Socket RecvMessage STT----XchgSearchPrice----SynId = 1", EVENT_PRICE_SEARCH),
+    ("|      | |          +2 [0.18008048289738]", EVENT_OTHER),
+    (f"{PREFIX}ItemChange@ Update Id=1 in PageId=102", EVENT_OTHER),
+])
+def test_classify_line(line, kind):
+    assert classify_line(line) == kind
+
+
+def test_hideout_to_hideout_is_not_a_map_entry():
+    line = f"{PREFIX}PageApplyBase@ _UpdateGameEnd: LastSceneName = {HIDEOUT_SCENE} NextSceneName = {HIDEOUT_SCENE}"
+    assert classify_line(line) == EVENT_MAP_EXIT
+
+
+def test_tokenize_keeps_every_line_in_order():
+    text = "\n".join(["noise", ENTER_LINE, drop_block(5028, 3), EXIT_LINE])
+    events = tokenize_log(text)
+    assert [event.line for event in events] == text.split("\n")
+    assert [event.kind for event in events] == [
+        EVENT_OTHER, EVENT_MAP_ENTER, EVENT_PICK_START, EVENT_PICK_UPDATE,
+        EVENT_PICK_MODIFY, EVENT_PICK_END, EVENT_MAP_EXIT,
+    ]
+
+
+def test_event_bus_filters_by_kind_and_skips_empty():
+    received = {"scene": [], "all": [], "price": []}
+    bus = LogEventBus()
+    bus.subscribe(received["scene"].extend, {EVENT_MAP_ENTER, EVENT_MAP_EXIT})
+    bus.subscribe(received["price"].append, {EVENT_PRICE_SEARCH})
+    bus.subscribe(received["all"].extend)
+    events = tokenize_log("\n".join([ENTER_LINE, "noise", EXIT_LINE]))
+    bus.publish(events)
+    assert [event.kind for event in received["scene"]] == [EVENT_MAP_ENTER, EVENT_MAP_EXIT]
+    assert received["all"] == events
+    assert received["price"] == []
+
+
+def test_scan_drop_events_matches_text_api():
+    text = "\n".join([
+        "noise",
+        drop_block(5028, 3),
+        f"{PREFIX}ItemChange@ ProtoName=PickItems start",
+        f"{PREFIX}ItemChange@ ProtoName=PickItems end",
+        drop_block(100300, 120, slot_id=4),
+        f"{PREFIX}ItemChange@ ProtoName=PickItems start",
+    ])
+    drops = scan_drop_events(tokenize_log(text))
+    assert drops == scan_drop_log(text)
+    assert [(drop["itemId"], drop["num"], drop["slotId"]) for drop in drops] == [
+        ("5028", 3, 0), ("100300", 120, 4),
+    ]
+
+
+def test_scan_init_bag_sums_split_stacks():
+    text = "\n".join([init_bag_line(100300, 999, 2), init_bag_line(100300, 347, 3), init_bag_line(5028, 7, 4)])
+    bag_data = scan_init_bag(text)
+    assert bag_data["100300"]["num"] == 1346
+    assert state.bag_items["5028"]["num"] == 7
+
+
+def test_price_search_events_skip_chunks_without_searches():
+    assert scan_price_search_events(tokenize_log("noise\n" + drop_block(5028, 3))) == []
+
+
+def test_price_search_events_match_text_api():
+    text = "\n".join([
+        f"{PREFIX}----Socket RecvMessage STT----XchgSearchPrice----SynId = 64158",
+        f"{PREFIX}",
+        "+errCode",
+        "+prices+1+unitPrices+1 [0.2]",
+        "|      | |          +2 [0.4]",
+        "|      | +currency [100300]",
+        f"{PREFIX}----Socket RecvMessage End----",
+        "XchgSearchPrice----SynId = 64158 +refer [5028]",
+    ])
+    assert scan_price_search_events(tokenize_log(text)) == scan_price_search(text)
+
+
+def test_deal_change_assigns_drops_to_maps_in_log_order():
+    state.bag_items = {"5028": {"name": "x", "num": 10}}
+    text = "\n".join([
+        ENTER_LINE,
+        drop_block(5028, 13),
+        EXIT_LINE,
+        ENTER_LINE,
+        drop_block(5028, 15),
+    ])
+    drop_handler.deal_change(text)
+    session = state.session.snapshot()
+    assert session.drop_list == {5028: 2}
+    assert session.drop_list_all == {5028: 5}
+    assert session.is_in_map is True
+    assert state.bag_items["5028"]["num"] == 15
+
+
+# Log "recorded" nhỏ: noise, drops (cả stack tách slot), init bag, scene changes, dòng tiếng Trung
+RECORDED_LOG = "\n".join([
+    f"{PREFIX}LogStreaming: Display: 初火源质 loaded",
+    init_bag_line(100300, 770, 0),
+    ENTER_LINE,
+    drop_block(100300, 888),
+    "|      | |          +2 [0.18008048289738]",
+    drop_block(5028, 4, slot_id=7),
+    f"{PREFIX}ItemChange@ ProtoName=PickItems start",
+    f"{PREFIX}ItemChange@ ProtoName=PickItems end",
+    drop_block(100200, 12, slot_id=9),
+    EXIT_LINE,
+]) + "\n"
+
+
+def stream_drops(chunks):
+    """Feed từng chunk qua LogStreamTokenizer + DropScanner, trả về list drops"""
+    tokenizer = LogStreamTokenizer()
+    scanner = DropScanner()
+    drops = []
+    for chunk in chunks:
+        drops.extend(scanner.feed(tokenizer.feed(chunk)))
+    drops.extend(scanner.feed(tokenizer.flush()))
+    return drops
+
+
+@pytest.fixture
+def no_drop_log_writes(monkeypatch):
+    monkeypatch.setattr(log_scan_service, "_write_drop_log_line", lambda drop_item: None)
+
+
+def test_stream_tokenizer_holds_partial_line():
+    tokenizer = LogStreamTokenizer()
+    assert tokenizer.feed(f"{PREFIX}ItemChange@ ProtoName=Pick") == []
+    assert tokenizer.pending_text.endswith("ProtoName=Pick")
+    events = tokenizer.feed("Items start\nnext")
+    assert [event.kind for event in events] == [EVENT_PICK_START]
+    assert tokenizer.pending_text == "next"
+    assert [event.line for event in tokenizer.flush()] == ["next"]
+    assert tokenizer.flush() == []
+
+
+def test_drop_scanner_resumes_open_block():
+    scanner = DropScanner()
+    events = tokenize_log(drop_block(5028, 4))
+    assert scanner.feed(events[:2]) == []
+    assert scanner.in_block
+    drops = scanner.feed(events[2:])
+    assert [(drop["itemId"], drop["num"]) for drop in drops] == [("5028", 4)]
+    assert not scanner.in_block
+
+
+def test_split_at_every_offset_yields_identical_drops(no_drop_log_writes):
+    expected = scan_drop_log(RECORDED_LOG)
+    assert len(expected) == 3
+    for offset in range(len(RECORDED_LOG) + 1):
+        assert stream_drops([RECORDED_LOG[:offset], RECORDED_LOG[offset:]]) == expected, offset
+
+
+def test_random_multi_way_splits_yield_identical_drops(no_drop_log_writes):
+    expected = scan_drop_log(RECORDED_LOG)
+    rng = random.Random(1234)
+    for _ in range(300):
+        cuts = sorted(rng.sample(range(1, len(RECORDED_LOG)), rng.randint(2, 12)))
+        bounds = [0] + cuts + [len(RECORDED_LOG)]
+        chunks = [RECORDED_LOG[start:end] for start, end in zip(bounds, bounds[1:])]
+        assert stream_drops(chunks) == expected, cuts
+
+
+def test_deal_change_counts_block_split_across_chunks():
+    state.bag_items = {"5028": {"name": "x", "num": 10}}
+    tokenizer = LogStreamTokenizer()
+    text = ENTER_LINE + "\n" + drop_block(5028, 13) + "\n"
+    split_at = text.index("BagMgr@:Modfy") + 5
+    for chunk in (text[:split_at], text[split_at:]):
+        drop_handler.deal_change_events(tokenizer.feed(chunk))
+    assert state.session.snapshot().drop_list == {5028: 3}
+
+
+def relevant_events(data, block_size):
+    return [event for events, _ in iter_relevant_events(data, block_size) for event in events]
+
+
+def test_iter_relevant_events_matches_tokenize_log_for_any_block_size():
+    search = "\n".join([
+        f"{PREFIX}----Socket RecvMessage STT----XchgSearchPrice----SynId = 7",
+        "+prices+1+unitPrices+1 [0.5]",
+        "|      | |          +2 [0.6]",
+        "|      | +currency [100300]",
+        f"{PREFIX}----Socket RecvMessage End----",
+        "XchgSearchPrice----SynId = 7 +refer [5028]",
+    ])
+    text = RECORDED_LOG + search + "\n" + f"{PREFIX}UIMgr@ OpenPanel Name = Bag"
+    expected = [event for event in tokenize_log(text) if event.kind != EVENT_OTHER]
+    for data in (text.encode("utf-8"), text.replace("\n", "\r\n").encode("utf-8")):
+        for block_size in (1, 17, 100, 1000, len(data)):
+            events = relevant_events(data, block_size)
+            assert [event for event in events if event.kind != EVENT_OTHER] == expected, block_size
+            # Socket block của price search được giữ nguyên vẹn (ladder nằm trong các dòng EVENT_OTHER)
+            assert scan_price_search_events(events, strategy="mean") == scan_price_search(text, strategy="mean")
+    # Dòng noise không được decode
+    assert all("UIMgr@" not in event.line for event in relevant_events(text.encode("utf-8"), 100))
+
+
+def test_parse_log_timestamp():
+    assert parse_log_timestamp(ENTER_LINE) == 1762621188.014
+    assert parse_log_timestamp("[2025.11.08-16.59.48:014]") == 1762621188.014
+    assert parse_log_timestamp("|      | +currency [100300]") is None
+    assert parse_log_timestamp("[2025.xx.08-16.59.48:014] bad") is None
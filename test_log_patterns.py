@@ -0,0 +1,94 @@
+"""
+Tests cho core.log_patterns
+
+Mục đích:
+    Kiểm tra fields của LINE_PATTERNS (fast path + fallback) giống cách cũ
+    (benchmarks.bench_line_fields.legacy_fields, mỗi field một re.search) trên các dòng chuẩn
+    và các dòng biến đổi ngẫu nhiên (khoảng trắng quanh '=', thiếu / đổi thứ tự fields, '='
+    trong prefix, digits unicode, không có timestamp, dòng bị cắt...), và parse_init_bag_events()
+    giống bản cũ trên synthetic log.
+
+Cách chạy:
+    python -m pytest test_log_patterns.py
+"""
+import random
+
+import pytest
+
+from benchmarks.bench_line_fields import generate_events, legacy_fields, legacy_parse_init_bag
+from core.log_parser import EVENT_INIT_BAG, EVENT_PICK_MODIFY, EVENT_PICK_START, EVENT_PICK_UPDATE
+from core.log_patterns import INIT_BAG_FIELDS, LINE_PATTERNS, LinePattern
+from services.log_scan_service import parse_init_bag_events
+
+
+PREFIX = "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] "
+CANONICAL = {
+    EVENT_PICK_START: PREFIX + "ItemChange@ ProtoName=PickItems start",
+    EVENT_PICK_UPDATE: PREFIX + "ItemChange@ Update Id=41 BagNum=5 in PageId=102 SlotId=3",
+    EVENT_PICK_MODIFY: PREFIX + "BagMgr@:Modfy BagItem PageId = 102 SlotId = 3 ConfigBaseId = 5028 Num = 5",
+    EVENT_INIT_BAG: PREFIX + "BagMgr@:InitBagData PageId = 102 SlotId = 0 ConfigBaseId = 100300 Num = 123",
+}
+
+# Biến đổi một dòng chuẩn; mỗi hàm nhận (rng, line)
+MUTATIONS = [
+    lambda rng, line: line.replace(" = ", rng.choice(["=", "  =  ", " =", "= ", "\t=\t"]), 1),
+    lambda rng, line: line.replace(" = ", rng.choice(["=", " =  "])),
+    lambda rng, line: line.replace(" SlotId", rng.choice(["  SlotId", "\tSlotId", "SlotId", ""]), 1),
+    lambda rng, line: line.replace(rng.choice(["PageId", "SlotId", "ConfigBaseId", "Num", "BagNum"]), "Xx", 1),
+    lambda rng, line: line.replace("Num = 123", "BagNum = 7 Num = 123").replace("Num = 5", "Num = 5 Num = 6"),
+    lambda rng, line: line.replace("[Game] ", rng.choice(["[Game] Num = 9 ", "[Game=1] ", "[Game] PageId=1 ",
+                                                          "[Game] BagMgr@:InitBagData ", "[Game] ItemChange@ "])),
+    lambda rng, line: line.replace("102", rng.choice(["١٠٢", "1O2", "", "-102", "102abc", "10²"])),
+    lambda rng, line: line.replace("123", rng.choice(["12٣", "", " 123", "0123"])),
+    lambda rng, line: line.replace("[2025.11.08-16.59.48:014]", rng.choice(
+        ["", "[2025.11.08-16.59.48:14]", "[2025.11.08-16.59.48:014] ", "x[2025.11.08-16.59.48:014]",
+         "[2025.11.08-16.59.48:014][2025.01.01-00.00.00:000]", "[٢025.11.08-16.59.48:014]"])),
+    lambda rng, line: line[:rng.randrange(len(line) + 1)],
+    lambda rng, line: line + rng.choice(["", "\r", " PageId = 7", " Num = 8", " tail"]),
+    lambda rng, line: " ".join(reversed(line.split(" "))),
+]
+
+
+def mutate(rng, line):
+    for mutation in rng.sample(MUTATIONS, rng.randint(1, 3)):
+        line = mutation(rng, line)
+    return line
+
+
+@pytest.mark.parametrize("kind", sorted(CANONICAL))
+def test_canonical_lines_use_fast_path(kind):
+    pattern = LINE_PATTERNS[kind]
+    line = CANONICAL[kind]
+    assert pattern.pattern.match(line) is not None
+    assert pattern.fields(line) == legacy_fields(kind, line)
+
+
+def test_init_bag_fields():
+    assert INIT_BAG_FIELDS.fields(CANONICAL[EVENT_INIT_BAG]) == (
+        "2025.11.08-16.59.48:014", "102", "0", "100300", "123")
+    # Khác format chuẩn -> fallback từng field
+    assert INIT_BAG_FIELDS.fields("BagMgr@:InitBagData Num=4 ConfigBaseId=5") == (None, None, None, "5", "4")
+    assert INIT_BAG_FIELDS.fields("") == (None,) * 5
+
+
+def test_pattern_groups_must_match_fallback():
+    with pytest.raises(ValueError):
+        LinePattern("bad", r'(?P<num>\d+)(?P<item_id>\d+)', {"item_id": "item_id", "num": "num"})
+    with pytest.raises(ValueError):
+        LinePattern("bad", r'(\d+)(?P<num>\d+)', {"num": "num"})
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_mutated_lines_match_legacy(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        kind = rng.choice(sorted(CANONICAL))
+        line = mutate(rng, CANONICAL[kind])
+        for other in LINE_PATTERNS:
+            assert LINE_PATTERNS[other].fields(line) == legacy_fields(other, line), (other, line)
+
+
+def test_parse_init_bag_events_matches_legacy():
+    events = generate_events(300, 3, seed=2)
+    bag_data = parse_init_bag_events(events)
+    assert bag_data and bag_data == legacy_parse_init_bag(events)
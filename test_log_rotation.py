@@ -0,0 +1,149 @@
+"""
+Tests cho việc phát hiện rotation / truncation trong core.log_tailer
+
+Mục đích:
+    Mô phỏng game restart trong lúc một synthetic writer ghi log liên tục:
+    file cũ bị đổi tên thành UE_game-backup-*.log và UE_game.log mới được tạo,
+    hoặc UE_game.log bị truncate. Tailer phải đọc mỗi dòng đúng một lần, theo thứ tự.
+
+Cách chạy:
+    python -m pytest test_log_rotation.py
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from core.log_parser import LogStreamTokenizer
+from core.log_tailer import (
+    LogTailer,
+    PollingBackend,
+    ROTATION_REPLACED,
+    ROTATION_TRUNCATED,
+    create_tail_backend,
+    find_rotated_file,
+    get_file_identity,
+)
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Windows không cho đổi tên file đang mở")
+
+
+class SyntheticWriter(threading.Thread):
+    """Ghi các dòng đánh số thật nhanh, đổi tên log thành backup sau mỗi rotate_every dòng"""
+
+    def __init__(self, log_path, total_lines, rotate_every):
+        super().__init__()
+        self.log_path = log_path
+        self.total_lines = total_lines
+        self.rotate_every = rotate_every
+        self.rotations = 0
+
+    def run(self):
+        stem, ext = os.path.splitext(self.log_path)
+        for number in range(self.total_lines):
+            line = f"[{number:06d}] GameLog: Display: 初火源质 {'x' * (number % 50)}\r\n".encode("utf-8")
+            with open(self.log_path, "ab") as f:
+                # Cắt dòng thành 2 lần write để tailer thấy dòng/ký tự UTF-8 ghi dở
+                f.write(line[:len(line) // 2])
+                f.flush()
+                f.write(line[len(line) // 2:])
+            if number % self.rotate_every == self.rotate_every - 1:
+                self.rotations += 1
+                os.rename(self.log_path, f"{stem}-backup-{self.rotations:03d}{ext}")
+                # Giữa lúc đổi tên và tạo file mới, UE_game.log tạm thời không tồn tại
+                time.sleep(0.001)
+                open(self.log_path, "ab").close()
+
+
+def collect_lines(tailer, expected_count, timeout=20.0):
+    """Đọc cho đến khi có đủ expected_count dòng hoàn chỉnh"""
+    tokenizer = LogStreamTokenizer()
+    reasons = []
+
+    def on_rotate(reason):
+        reasons.append(reason)
+        tokenizer.flush()
+        tokenizer.reset()
+
+    tailer.on_rotate = on_rotate
+    lines = []
+    deadline = time.monotonic() + timeout
+    while len(lines) < expected_count and time.monotonic() < deadline:
+        tailer.wait(timeout=0.05)
+        lines.extend(event.line for event in tokenizer.feed(tailer.read()))
+    return lines, reasons
+
+
+@pytest.mark.parametrize("backend_name", ["polling", "auto"])
+def test_rename_rotation_under_fast_writer_keeps_every_line_once(tmp_path, backend_name):
+    log_path = str(tmp_path / "UE_game.log")
+    open(log_path, "wb").close()
+    total_lines = 3000
+    tailer = LogTailer(log_path, backend=create_tail_backend(log_path, backend_name))
+    tailer.open()
+    writer = SyntheticWriter(log_path, total_lines, rotate_every=700)
+    writer.start()
+    try:
+        lines, reasons = collect_lines(tailer, total_lines)
+    finally:
+        writer.join()
+        tailer.close()
+    assert [int(line[1:7]) for line in lines] == list(range(total_lines))
+    assert reasons == [ROTATION_REPLACED] * writer.rotations
+    assert tailer.rotations == writer.rotations
+
+
+def test_truncation_reads_new_content_from_start(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write("old session line 1\nold session line 2\n")
+    tailer = LogTailer(log_path, backend=PollingBackend(), from_end=False)
+    tailer.open()
+    reasons = []
+    tailer.on_rotate = reasons.append
+    try:
+        assert tailer.read() == "old session line 1\nold session line 2\n"
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("new\n")
+        assert tailer.has_new_data()
+        assert tailer.read() == "new\n"
+        assert reasons == [ROTATION_TRUNCATED]
+        assert tailer.offset == 4
+        assert tailer.read() == ""
+    finally:
+        tailer.close()
+
+
+def test_truncation_detected_by_changed_head_when_size_regrows(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write("session A header\n")
+    tailer = LogTailer(log_path, backend=PollingBackend(), from_end=False)
+    tailer.open()
+    reasons = []
+    tailer.on_rotate = reasons.append
+    try:
+        assert tailer.read() == "session A header\n"
+        # Game truncate và ghi lại đúng bằng offset cũ trước khi tailer kịp đọc
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("session B header\n")
+        assert tailer.read() == "session B header\n"
+        assert reasons == [ROTATION_TRUNCATED]
+    finally:
+        tailer.close()
+
+
+def test_find_rotated_file_matches_backup_identity(tmp_path):
+    log_path = str(tmp_path / "UE_game.log")
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write("first session\n")
+    identity = get_file_identity(log_path)
+    backup_path = str(tmp_path / "UE_game-backup-2025.11.08-17.00.00.log")
+    os.rename(log_path, backup_path)
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write("second session\n")
+    assert find_rotated_file(log_path, identity) == backup_path
+    assert find_rotated_file(log_path, get_file_identity(log_path)) is None
@@ -0,0 +1,84 @@
+"""
+Tests cho core.log_tailer
+
+Mục đích:
+    Kiểm tra LogTailer đọc đúng phần text mới, giữ ký tự UTF-8 bị cắt giữa 2 lần đọc,
+    chuẩn hóa \\r\\n và backend báo dữ liệu mới ngay khi file được ghi.
+
+Cách chạy:
+    python -m pytest test_log_tailer.py
+"""
+import sys
+import threading
+import time
+
+import pytest
+
+from core.log_tailer import LogTailer, PollingBackend, create_tail_backend
+
+
+def _append(path, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_read_only_returns_appended_text(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_bytes(b"old line\n")
+    tailer = LogTailer(str(log_path), backend=PollingBackend())
+    tailer.open()
+    try:
+        assert tailer.read() == ""
+        _append(log_path, b"new line\n")
+        assert tailer.read() == "new line\n"
+        assert tailer.offset == len(b"old line\nnew line\n")
+    finally:
+        tailer.close()
+
+
+def test_split_utf8_and_crlf_are_joined_across_reads(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_bytes(b"")
+    tailer = LogTailer(str(log_path), backend=PollingBackend())
+    tailer.open()
+    try:
+        encoded = "Drop: 初火源质\r\n".encode("utf-8")
+        _append(log_path, encoded[:9])
+        first = tailer.read()
+        _append(log_path, encoded[9:-1])
+        second = tailer.read()
+        _append(log_path, encoded[-1:])
+        third = tailer.read()
+        assert first + second + third == "Drop: 初火源质\n"
+    finally:
+        tailer.close()
+
+
+@pytest.mark.parametrize("backend_name", ["polling", "auto"])
+def test_wait_wakes_up_on_write(tmp_path, backend_name):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_bytes(b"")
+    tailer = LogTailer(str(log_path), backend=create_tail_backend(str(log_path), backend_name))
+    tailer.open()
+    try:
+        assert tailer.wait(timeout=0.05) is False
+        writer = threading.Timer(0.05, _append, args=(log_path, b"line\n"))
+        writer.start()
+        started = time.monotonic()
+        assert tailer.wait(timeout=5.0) is True
+        assert time.monotonic() - started < 1.0
+        writer.join()
+        assert tailer.read() == "line\n"
+    finally:
+        tailer.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_auto_backend_uses_inotify_on_linux(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_bytes(b"")
+    backend = create_tail_backend(str(log_path))
+    try:
+        assert backend.name == "inotify"
+    finally:
+        backend.close()
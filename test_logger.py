@@ -0,0 +1,111 @@
+"""
+Tests cho core.logger
+
+Mục đích:
+    Kiểm tra logger theo level: message bị tắt không được format, log_debug() vẫn ghi
+    logger.txt với format cũ, writer thread ghi theo batch và rotate logger.txt theo kích thước.
+
+Cách chạy:
+    python -m pytest test_logger.py
+"""
+import os
+
+import pytest
+
+from core import logger
+from core.logger import (
+    DEBUG,
+    INFO,
+    flush_logs,
+    is_enabled,
+    log_debug,
+    log_error,
+    log_info,
+    set_log_level
+)
+
+
+@pytest.fixture(autouse=True)
+def work_dir(work_dir):
+    level = logger.get_log_level()
+    yield work_dir
+    flush_logs()
+    set_log_level(level)
+
+
+def read_log():
+    with open(logger.LOG_FILE, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+class Expensive:
+    formatted = 0
+
+    def __str__(self):
+        Expensive.formatted += 1
+        return "expensive"
+
+
+def test_log_debug_keeps_format(capsys):
+    set_log_level(DEBUG)
+    log_debug("drop item 360404")
+    log_debug("values %s x%d", [1, 2], 3)
+    assert flush_logs()
+    lines = read_log()
+    assert lines[0].startswith("[DEBUG] ") and lines[0].endswith(" - drop item 360404")
+    assert lines[1].endswith(" - values [1, 2] x3")
+    assert "drop item 360404" in capsys.readouterr().out
+
+
+def test_disabled_level_is_not_formatted():
+    set_log_level("info")
+    Expensive.formatted = 0
+    log_debug("ladder %s", Expensive())
+    log_debug(lambda: str(Expensive()))
+    assert not is_enabled(DEBUG) and is_enabled(INFO)
+    log_info("info %s", Expensive())
+    log_error("boom")
+    assert flush_logs()
+    assert Expensive.formatted == 1
+    lines = read_log()
+    assert [line.split(" ")[0] for line in lines] == ["[INFO]", "[ERROR]"]
+    with pytest.raises(ValueError):
+        set_log_level("verbose")
+
+
+def test_bad_format_args_do_not_raise():
+    set_log_level(DEBUG)
+    log_debug("%d items", "not a number")
+    assert flush_logs()
+    assert "log format error" in read_log()[0]
+
+
+def test_size_based_rotation(monkeypatch):
+    monkeypatch.setattr(logger, "LOG_MAX_BYTES", 200)
+    monkeypatch.setattr(logger, "LOG_BACKUP_COUNT", 2)
+    set_log_level(DEBUG)
+    for index in range(20):
+        log_debug("message %02d %s", index, "x" * 40)
+        # Mỗi message một batch để kích thước được kiểm tra nhiều lần
+        flush_logs()
+    assert os.path.getsize(logger.LOG_FILE) <= 200
+    assert os.path.exists(logger.LOG_FILE + ".1") and os.path.exists(logger.LOG_FILE + ".2")
+    assert not os.path.exists(logger.LOG_FILE + ".3")
+    assert read_log()[-1].split(" - ")[1].startswith("message 19")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="cần os.fork")
+def test_forked_child_writes_its_own_logs():
+    log_info("parent")
+    flush_logs()
+    pid = os.fork()
+    if pid == 0:
+        # Process con: writer thread của process cha không tồn tại ở đây
+        try:
+            log_info("child")
+            os._exit(0 if flush_logs(timeout=2) else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert [line.split(" - ")[-1] for line in read_log()] == ["parent", "child"]
@@ -0,0 +1,174 @@
+"""
+Tests cho core.metrics
+
+Mục đích:
+    Kiểm tra histogram kiểu HDR (sai số tương đối của percentiles, buckets liên tục),
+    registry counters / timers (tắt được), dump JSONL định kỳ, format của cửa sổ Metrics
+    và các điểm đo của pipeline: đọc log, tokenize, scanners, drops, ghi file, UI frames.
+
+Cách chạy:
+    python -m pytest test_metrics.py
+"""
+import io
+import json
+import random
+
+import pytest
+
+from app import headless
+from app.ui_scheduler import UiScheduler, take_ui_snapshot
+from core import metrics
+from core.log_tailer import LogTailer
+from core.metrics import Histogram, MetricsDumper, get_metrics
+from repositories.append_writer import close_append_writer
+from test_headless import LOG_TEXT
+from ui.metrics_view import MetricsView, format_metrics
+
+
+@pytest.fixture(autouse=True)
+def work_dir(work_dir):
+    metrics.reset_metrics()
+    yield work_dir
+    metrics.stop_metrics_dump()
+    metrics.set_enabled(True)
+    metrics.reset_metrics()
+
+
+def test_bucket_ranges_are_contiguous_and_contain_value():
+    previous = -1
+    for value in list(range(5000)) + [random.Random(1).randrange(1, 10 ** 12) for _ in range(2000)]:
+        low, high = metrics._bucket_range(metrics._bucket_index(value))
+        assert low <= value <= high
+        # Sai số tương đối tối đa 1/64
+        assert high - low <= max(1, low // 64)
+    for index in range(20000):
+        low, high = metrics._bucket_range(index)
+        assert low == previous + 1
+        previous = high
+
+
+def test_histogram_percentiles_within_relative_error():
+    histogram = Histogram()
+    values = list(range(1, 100001))
+    random.Random(2).shuffle(values)
+    for value in values:
+        histogram.record(value * 1000)
+    assert histogram.count == 100000
+    assert (histogram.min, histogram.max) == (1000, 100000000)
+    for percent in (50, 90, 99):
+        expected = percent * 1000 * 1000
+        assert abs(histogram.percentile(percent) - expected) <= expected / 64
+    assert histogram.percentile(100) == 100000000
+    summary = histogram.summary(scale=1000)
+    assert summary["count"] == 100000 and summary["max"] == 100000.0
+    assert Histogram().summary()["p99"] == 0
+
+
+def test_timers_counters_snapshot_and_disable():
+    with metrics.timer("stage"):
+        pass
+    metrics.record("stage", 2_000_000)
+    metrics.count("things", 3)
+    snapshot = get_metrics().snapshot()
+    assert snapshot["counters"] == {"things": 3}
+    assert snapshot["timers"]["stage"]["count"] == 2
+    assert snapshot["timers"]["stage"]["max_ms"] == 2.0
+    json.dumps(snapshot)
+
+    metrics.set_enabled(False)
+    with metrics.timer("stage"):
+        pass
+    metrics.count("things")
+    assert get_metrics().snapshot()["counters"] == {"things": 3}
+    assert get_metrics().snapshot()["timers"]["stage"]["count"] == 2
+
+
+def test_headless_pipeline_is_instrumented(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_text(LOG_TEXT, encoding="utf-8")
+    out = io.StringIO()
+    assert headless.main(["--log", str(log_path), "--metrics-interval", "3600"], out=out) == 0
+    snapshot = get_metrics().snapshot()
+    counters = snapshot["counters"]
+    assert counters["bytes_read"] == len(LOG_TEXT.encode("utf-8"))
+    assert counters["lines_classified"] == LOG_TEXT.count("\n") + 1
+    assert counters["events_emitted"] > 0
+    assert counters["drops_processed"] == 3
+    for name in ("log_read", "tokenize", "scan_init_bag", "deal_change", "get_price_info"):
+        assert snapshot["timers"][name]["count"] > 0, name
+    # Dòng cuối được ghi khi kết thúc
+    lines = (tmp_path / "log" / "metrics.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[-1])["counters"]["drops_processed"] == 3
+
+    close_append_writer()
+    assert get_metrics().snapshot()["counters"]["file_writes"] > 0
+
+
+def test_empty_reads_are_not_timed(tmp_path):
+    path = tmp_path / "UE_game.log"
+    path.write_bytes(b"")
+    tailer = LogTailer(str(path), from_end=False)
+    tailer.open()
+    try:
+        assert tailer.read() == ""
+        assert "log_read" not in get_metrics().snapshot()["timers"]
+        path.write_bytes(b"line\n")
+        assert tailer.read() == "line\n"
+    finally:
+        tailer.close()
+    assert get_metrics().snapshot()["counters"]["bytes_read"] == 5
+
+
+def test_ui_frames_and_latency():
+    callbacks = []
+    frames = []
+    scheduler = UiScheduler(lambda ms, callback: callbacks.append(callback), frames.append)
+    scheduler.submit(take_ui_snapshot())
+    scheduler.submit(take_ui_snapshot())
+    callbacks.pop()()
+    snapshot = get_metrics().snapshot()
+    assert snapshot["counters"] == {"ui_frames": 1, "ui_frames_skipped": 1}
+    assert snapshot["timers"]["ui_frame"]["count"] == 1
+    assert snapshot["timers"]["ui_latency"]["count"] == 1
+
+
+def test_metrics_dumper_writes_json_lines(tmp_path):
+    metrics.count("things")
+    dumper = MetricsDumper(interval=3600, path=str(tmp_path / "log" / "metrics.jsonl"))
+    dumper.start()
+    dumper.dump()
+    dumper.stop()
+    dumper.stop()
+    lines = (tmp_path / "log" / "metrics.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == dumper.dumps == 2
+    assert json.loads(lines[0])["counters"] == {"things": 1}
+    assert metrics.start_metrics_dump(0) is None
+
+
+class FakeListbox:
+    def __init__(self):
+        self.lines = []
+
+    def delete(self, first, last):
+        self.lines = []
+
+    def insert(self, index, *lines):
+        self.lines.extend(lines)
+
+
+def test_metrics_view_formats_timers_and_counters():
+    snapshot = {
+        "uptime_seconds": 10.0,
+        "counters": {"bytes_read": 1000},
+        "timers": {"deal_change": {"count": 4, "total_ms": 8.0, "mean_ms": 2.0, "min_ms": 1.0,
+                                   "p50_ms": 1.5, "p90_ms": 3.0, "p99_ms": 3.5, "max_ms": 3.5}},
+    }
+    lines = format_metrics(snapshot)
+    assert lines[0].split() == ["timer", "(ms)", "count", "mean", "p50", "p90", "p99", "max"]
+    assert lines[1].split() == ["deal_change", "4", "2.000", "1.500", "3.000", "3.500", "3.500"]
+    assert lines[3].split() == ["bytes_read", "1000", "100.0/s"]
+    view = MetricsView()
+    listbox = FakeListbox()
+    assert view.render(listbox, snapshot)
+    assert not view.render(listbox, snapshot)
+    assert listbox.lines == lines
@@ -0,0 +1,120 @@
+"""
+Tests cho services.price_analyzer
+
+Mục đích:
+    Kiểm tra thống kê ladder (trimmed mean, median, VWAP, quantiles), phát hiện listing
+    troll, chọn giá theo strategy trong config.json và bản NumPy cho kết quả giống bản
+    Python thuần.
+
+Cách chạy:
+    python -m pytest test_price_analyzer.py
+"""
+import json
+import random
+
+import pytest
+
+from services import price_analyzer
+from services.log_scan_service import scan_price_search
+from services.price_analyzer import analyze_ladder, analyze_ladders, get_price_strategy
+
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(price_analyzer, "use_numpy", True)
+        monkeypatch.setattr(price_analyzer, "numpy_min_batch", 1)
+    else:
+        monkeypatch.setattr(price_analyzer, "use_numpy", False)
+    return request.param
+
+
+def test_basic_statistics(backend):
+    stats = analyze_ladder(["4", "1", "3", "2", "5"])
+    assert stats["count"] == 5
+    assert (stats["min"], stats["max"]) == (1, 5)
+    assert stats["mean"] == stats["price"] == 3
+    assert stats["median"] == 3
+    assert stats["p25"] == 2 and stats["p90"] == pytest.approx(4.6)
+    assert stats["vwap"] == 3
+    assert stats["outliers"] == 0
+    assert analyze_ladder([]) is None
+
+
+def test_troll_listing_is_detected(backend):
+    ladder = [0.18, 0.181, 0.18, 0.182, 0.183, 0.18, 0.184, 0.181, 0.182, 99.0]
+    stats = analyze_ladder(ladder, strategy="robust_mean")
+    assert stats["outliers"] == 1
+    assert stats["mean"] > 9
+    assert stats["price"] == stats["robust_mean"] == pytest.approx(sum(ladder[:-1]) / 9)
+    # trimmed mean bỏ 1 giá mỗi đầu nên cũng loại được listing troll
+    assert stats["trimmed_mean"] < 0.19
+    # Ladder phẳng: lệch nhỏ không bị coi là outlier
+    assert analyze_ladder([1.0] * 20 + [1.01])["outliers"] == 0
+
+
+def test_vwap_uses_volumes(backend):
+    stats = analyze_ladder([1.0, 2.0], strategy="vwap", volumes=[3, 1])
+    assert stats["price"] == pytest.approx(1.25)
+    assert stats["mean"] == 1.5
+
+
+def test_batch_matches_single(backend):
+    rng = random.Random(7)
+    ladders = [[round(rng.uniform(0.1, 10), 5) for _ in range(rng.randint(1, 100))] for _ in range(50)]
+    ladders.insert(3, [])
+    batch = analyze_ladders(ladders, strategy="median")
+    assert batch[3] is None
+    for ladder, stats in zip(ladders, batch):
+        if ladder:
+            assert stats == pytest.approx(analyze_ladder(ladder, strategy="median"))
+
+
+def test_numpy_matches_python(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(11)
+    ladders = [[rng.lognormvariate(0, 1) for _ in range(rng.randint(1, 100))] for _ in range(200)]
+    volumes = [[rng.randint(1, 50) for _ in ladder] for ladder in ladders]
+    monkeypatch.setattr(price_analyzer, "use_numpy", False)
+    expected = analyze_ladders(ladders, strategy="trimmed_mean", volumes=volumes)
+    monkeypatch.setattr(price_analyzer, "use_numpy", True)
+    monkeypatch.setattr(price_analyzer, "numpy_min_batch", 1)
+    actual = analyze_ladders(ladders, strategy="trimmed_mean", volumes=volumes)
+    for python_stats, numpy_stats in zip(expected, actual):
+        assert python_stats.keys() == numpy_stats.keys()
+        for key, value in python_stats.items():
+            assert numpy_stats[key] == pytest.approx(value), key
+
+
+def test_strategy_from_config():
+    assert get_price_strategy() == "mean"
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump({"price_strategy": "median"}, f)
+    assert get_price_strategy() == "median"
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump({"price_strategy": "bogus"}, f)
+    assert get_price_strategy() == "mean"
+    with pytest.raises(ValueError):
+        analyze_ladder([1.0], strategy="bogus")
+
+
+def test_scan_price_search_uses_strategy():
+    prefix = "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] "
+    text = "\n".join([
+        f"{prefix}----Socket RecvMessage STT----XchgSearchPrice----SynId = 7",
+        prefix,
+        "+errCode",
+        "+prices+1+unitPrices+1 [0.5]",
+        "|      | |          +2 [0.6]",
+        "|      | |          +3 [2.2]",
+        "|      | +currency [100300]",
+        f"{prefix}----Socket RecvMessage End----",
+        "XchgSearchPrice----SynId = 7 +refer [5028]",
+    ])
+    result = scan_price_search(text)[0]
+    assert result["average_price"] == result["price"] == 1.1
+    assert result["highest_price"] == 2.2
+    result = scan_price_search(text, strategy="median")[0]
+    assert result["price"] == 0.6
+    assert result["stats"]["count"] == 3
@@ -0,0 +1,150 @@
+"""
+Tests cho services.price_history
+
+Mục đích:
+    Kiểm tra thống kê ladder giá, query theo thời điểm (price_at, last, rolling_median),
+    persist/load qua log/price_history.bin và price_service ghi observation mỗi lần search.
+
+Cách chạy:
+    python -m pytest test_price_history.py
+"""
+import os
+import time
+
+import pytest
+
+from repositories.price_history_file import HEADER, RECORD
+from services import price_history
+from services.price_analyzer import analyze_ladder
+from services.price_history import (
+    PriceHistory,
+    get_price_history,
+    reset_price_history,
+    summarize_ladder,
+    summary_from_stats
+)
+from services.price_service import get_price_info
+
+
+def test_summarize_ladder():
+    summary = summarize_ladder(["4", "1", "3", "2", "bad"])
+    assert summary["depth"] == 4
+    assert summary["min"] == 1 and summary["max"] == 4
+    assert summary["mean"] == summary["price"] == 2.5
+    assert summary["p50"] == 2.5
+    assert summary["p25"] == pytest.approx(1.75)
+    assert summary["p90"] == pytest.approx(3.7)
+    assert summarize_ladder([], price=1.0) is None
+    assert summarize_ladder(["1"], price=0.9)["price"] == 0.9
+
+
+def test_record_uses_precomputed_stats(monkeypatch):
+    values = ["4", "1", "3", "2"]
+    stats = analyze_ladder(values, strategy="median")
+    expected = summarize_ladder(values, price=2.5)
+    assert summary_from_stats(stats, price=2.5) == expected
+    assert summary_from_stats(None) is None
+    # Stats của scanner được dùng lại: ladder không bị phân tích lần thứ hai
+    monkeypatch.setattr(price_history, "analyze_ladder", None)
+    history = PriceHistory(path=None)
+    assert history.record("5028", values, price=2.5, timestamp=100, stats=stats) == expected
+    assert history.price_at("5028", 100) == 2.5
+
+
+def test_price_at_last_and_rolling_median():
+    history = PriceHistory(path=None)
+    for timestamp, price in [(100, 1.0), (200, 2.0), (300, 9.0), (400, 3.0)]:
+        history.record("5028", [price], timestamp=timestamp)
+    # Observation tới trễ vẫn được chèn đúng vị trí
+    history.record("5028", [1.5], timestamp=150)
+
+    assert history.price_at("5028", 99) is None
+    assert history.price_at("5028", 100) == 1.0
+    assert history.price_at("5028", 199) == 1.5
+    assert history.price_at("5028", 10_000) == 3.0
+    assert history.price_at("9999", 500) is None
+
+    assert [row["timestamp"] for row in history.last("5028", 2)] == [300, 400]
+    assert history.last("5028", 2)[0]["depth"] == 1
+    assert history.rolling_median("5028", window=250, at=400) == 3.0  # 200, 300, 400
+    assert history.rolling_median("5028", window=10, at=50) is None
+    assert len(history) == history.count("5028") == 5
+
+
+def test_persist_and_reload_skips_partial_record():
+    history = PriceHistory("history.bin")
+    history.record("5028", ["0.1", "0.3"], price=0.2, timestamp=1000)
+    history.record(1001, ["3.5"], timestamp=2000)
+    # Mô phỏng crash khi đang ghi record tiếp theo
+    with open("history.bin", "ab") as f:
+        f.write(b"\x00" * (RECORD.size // 2))
+
+    reloaded = PriceHistory("history.bin")
+    assert reloaded.load() == 2
+    assert os.path.getsize("history.bin") == HEADER.size + 2 * RECORD.size
+    assert reloaded.last("5028", 1)[0]["p50"] == pytest.approx(0.2)
+    assert reloaded.price_at("1001", 2000) == 3.5
+
+
+def test_file_shorter_than_header_is_treated_as_empty():
+    # Mô phỏng crash khi đang tạo file: header bị ghi dở
+    os.makedirs("log")
+    with open(os.path.join("log", "price_history.bin"), "wb") as f:
+        f.write(b"TL")
+
+    history = get_price_history()
+    assert len(history) == 0
+    assert os.path.getsize(os.path.join("log", "price_history.bin")) == 0
+    history.record("5028", ["0.5"], timestamp=1000)
+
+    reset_price_history()
+    assert get_price_history().price_at("5028", 1000) == 0.5
+    assert os.path.getsize(os.path.join("log", "price_history.bin")) == HEADER.size + RECORD.size
+
+
+def test_price_service_records_observation():
+    prefix = "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] "
+    text = "\n".join([
+        f"{prefix}----Socket RecvMessage STT----XchgSearchPrice----SynId = 7",
+        prefix,
+        "+errCode",
+        "+prices+1+unitPrices+1 [0.5]",
+        "|      | |          +2 [0.7]",
+        "|      | +currency [100300]",
+        f"{prefix}----Socket RecvMessage End----",
+        "XchgSearchPrice----SynId = 7 +refer [5028]",
+    ])
+    get_price_info(text)
+    observation = get_price_history().last("5028", 1)[0]
+    assert observation["price"] == 0.6
+    assert observation["depth"] == 2
+    assert (observation["min"], observation["max"]) == (0.5, 0.7)
+
+    reset_price_history()
+    assert get_price_history().count("5028") == 1
+
+
+def test_queries_stay_fast_with_many_observations():
+    history = PriceHistory(path=None)
+    count = 50_000
+    for i in range(count):
+        history.add("5028", float(i), {field: float(i) for field in
+                                       ("price", "mean", "min", "max", "p10", "p25", "p50", "p75", "p90", "depth")},
+                    persist=False)
+    start = time.perf_counter()
+    for i in range(1000):
+        assert history.price_at("5028", i * 37.5) == float(int(i * 37.5))
+    elapsed = (time.perf_counter() - start) / 1000
+    # bisect trên array: vài micro giây / query, giới hạn rộng để không flaky trên CI
+    assert elapsed < 200e-6
+
+
+def test_item_price_at_falls_back_to_current_price():
+    from services.item_service import get_item_price_at
+    from services.price_store import get_price_store
+
+    get_price_store().upsert("5028", 0.4)
+    get_price_history().record("5028", ["0.2"], timestamp=1000, persist=False)
+    assert get_item_price_at("5028", 999) == 0.4
+    assert get_item_price_at("5028", 1500) == 0.2
+    assert get_item_price_at("5028", 1500, apply_tax=True) == 0.175
@@ -0,0 +1,176 @@
+"""
+Tests cho services.log_scan_service.PriceSearchScanner
+
+Mục đích:
+    Kiểm tra extractor price search một lần quét: ghép request/response qua SynId theo
+    thứ tự bất kỳ, giới hạn ladder (+currency, +100), feed theo chunk và checkpoint
+    cho cùng kết quả với quét cả text một lần.
+
+Cách chạy:
+    python -m pytest test_price_search_scanner.py
+"""
+import json
+import random
+
+from core.log_parser import LogStreamTokenizer, tokenize_log
+from services import log_scan_service, price_service
+from services.log_scan_service import PriceSearchScanner, scan_price_search
+from services.price_store import get_price_store
+
+
+PREFIX = "[2025.11.08-20.21.00:708][609]GameLog: Display: [Game] "
+
+
+def response(syn_id, values, other_currency=True):
+    lines = [
+        f"{PREFIX}----Socket RecvMessage STT----XchgSearchPrice----SynId = {syn_id}",
+        PREFIX,
+        "+errCode",
+        f"+prices+1+unitPrices+1 [{values[0]}]",
+    ]
+    lines += [f"|      | |          +{index} [{value}]" for index, value in enumerate(values[1:], start=2)]
+    lines.append("|      | +currency [100300]")
+    if other_currency:
+        # Ladder của currency khác sau "+currency": không được tính
+        lines += ["|      +2+unitPrices+1 [20000.0]", "|      | |          +2 [30000.0]", "|      +currency [100200]"]
+    lines.append(f"{PREFIX}----Socket RecvMessage End----")
+    return "\n".join(lines)
+
+
+def inline_request(syn_id, item_id):
+    return f"XchgSearchPrice----SynId = {syn_id} +refer [{item_id}]"
+
+
+def send_request(syn_id, item_id):
+    return "\n".join([
+        f"{PREFIX}----Socket SendMessage STT----XchgSearchPrice----SynId = {syn_id}",
+        PREFIX,
+        f"+filters+1+refer [{item_id}]",
+        f"{PREFIX}----Socket SendMessage End----",
+    ])
+
+
+def summary(results):
+    return [(result["synId"], result["itemId"], result["values"]) for result in results]
+
+
+def test_response_then_request_matches_legacy_format():
+    text = "\n".join([response(64158, ["0.18", "0.19", "0.20"]), inline_request(64158, 5028)])
+    results = scan_price_search(text)
+    assert summary(results) == [("64158", "5028", ["0.18", "0.19", "0.20"])]
+    assert results[0]["average_price"] == 0.19
+    assert results[0]["highest_price"] == 0.2
+
+
+def test_interleaved_requests_and_responses_pair_by_syn_id():
+    text = "\n".join([
+        send_request(1, 5028),
+        send_request(2, 1001),
+        response(2, ["3.0", "4.0"]),
+        "noise line",
+        response(1, ["0.5"]),
+        send_request(3, 100300),  # currency gốc bị bỏ qua
+        response(3, ["1.0"]),
+    ])
+    assert summary(scan_price_search(text)) == [("2", "1001", ["3.0", "4.0"]), ("1", "5028", ["0.5"])]
+
+
+def test_ladder_stops_after_index_100():
+    values = [str(index) for index in range(1, 106)]
+    text = "\n".join([response(9, values, other_currency=False), inline_request(9, 5028)])
+    assert scan_price_search(text)[0]["values"] == values[:100]
+
+
+def test_response_without_ladder_and_unmatched_searches():
+    text = "\n".join([
+        f"{PREFIX}----Socket RecvMessage STT----XchgSearchPrice----SynId = 4",
+        "+errCode [1]",
+        f"{PREFIX}----Socket RecvMessage End----",
+        inline_request(4, 5028),
+        send_request(5, 1001),  # không có response
+    ])
+    assert [(result["synId"], result["values"], result["price"]) for result in scan_price_search(text)] == [
+        ("4", [], -1)
+    ]
+
+
+def build_log(count, seed):
+    rng = random.Random(seed)
+    parts = []
+    for syn_id in range(count):
+        ladder = [f"{rng.uniform(0.1, 5):.5f}" for _ in range(rng.randint(1, 30))]
+        item_id = rng.choice([5028, 1001, 2002])
+        parts.append("\n".join([f"{PREFIX}noise {syn_id}"] * rng.randint(0, 3)))
+        if rng.random() < 0.5:
+            parts += [response(syn_id, ladder), inline_request(syn_id, item_id)]
+        else:
+            parts += [send_request(syn_id, item_id), response(syn_id, ladder)]
+    return "\n".join(parts) + "\n"
+
+
+def test_chunked_feed_matches_single_pass():
+    text = build_log(40, seed=3)
+    expected = summary(scan_price_search(text))
+    assert len(expected) == 40
+    rng = random.Random(5)
+    for _ in range(5):
+        tokenizer = LogStreamTokenizer()
+        scanner = PriceSearchScanner(strategy="mean")
+        results = []
+        position = 0
+        while position < len(text):
+            step = rng.randint(1, 400)
+            results += scanner.feed(tokenizer.feed(text[position:position + step]))
+            position += step
+        assert summary(results) == expected
+
+
+def test_state_round_trip_through_json():
+    text = build_log(10, seed=9)
+    cut = text.index("+3 [", len(text) // 2)
+    cut = text.index("\n", cut) + 1
+    first = PriceSearchScanner(strategy="mean")
+    results = first.feed(tokenize_log(text[:cut - 1]))
+    second = PriceSearchScanner(strategy="mean")
+    second.restore_state(json.loads(json.dumps(first.export_state())))
+    results += second.feed(tokenize_log(text[cut:]))
+    assert summary(results) == summary(scan_price_search(text))
+
+
+def test_price_service_joins_search_split_across_chunks():
+    text = "\n".join([send_request(7, 5028), response(7, ["0.5", "0.7"])])
+    lines = text.split("\n")
+    middle = next(index for index, line in enumerate(lines) if "+2 [0.7]" in line)
+    price_service.get_price_info_events(tokenize_log("\n".join(lines[:middle])))
+    assert get_price_store().get("5028") is None
+    price_service.get_price_info_events(tokenize_log("\n".join(lines[middle:])))
+    assert get_price_store().price_of("5028") == 0.6
+
+
+def test_config_strategy_is_read_only_when_config_changes(monkeypatch):
+    reads = []
+
+    def get_price_strategy():
+        reads.append(1)
+        with open("config.json", encoding="utf-8") as f:
+            return json.load(f)["price_strategy"]
+
+    monkeypatch.setattr(log_scan_service, "get_price_strategy", get_price_strategy)
+    monkeypatch.setattr(log_scan_service, "PRICE_STRATEGY_CHECK_INTERVAL", 3600)
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump({"price_strategy": "median"}, f)
+    text = build_log(20, seed=4)
+    scanner = PriceSearchScanner()
+    prices = [result["price"] for result in scanner.feed(tokenize_log(text))]
+    assert prices == [result["price"] for result in scan_price_search(text, strategy="median")]
+    assert len(reads) == 1
+
+    # File đổi: chỉ đọc lại ở lần kiểm tra tiếp theo (sau PRICE_STRATEGY_CHECK_INTERVAL)
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump({"price_strategy": "p25"}, f)
+    assert scanner.current_strategy() == "median"
+    monkeypatch.setattr(log_scan_service, "PRICE_STRATEGY_CHECK_INTERVAL", 0)
+    scanner._next_config_check = float("-inf")
+    assert scanner.current_strategy() == "p25"
+    assert scanner.current_strategy() == "p25"
+    assert len(reads) == 2
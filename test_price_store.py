@@ -0,0 +1,89 @@
+"""
+Tests cho services.price_store
+
+Mục đích:
+    Kiểm tra migrate từ search_price_log.json, upsert ghi xuống SQLite và cập nhật view,
+    và các consumer (item_service, price_service) dùng chung store.
+
+Cách chạy:
+    python -m pytest test_price_store.py
+"""
+import json
+
+import pytest
+
+from services import price_store as price_store_module
+from services.item_service import get_item_info
+from services.price_service import get_price_info
+from services.price_store import PriceStore, get_price_store
+
+
+LEGACY = [
+    {"idItem": "5028", "name": "Netherrealm Resonance", "price": 0.25, "last_update": 100, "type": "Hard Currency"},
+    {"idItem": "1001", "price": 3.5, "last_update": 200, "type": "Memory Fluorescence"},
+]
+
+
+def write_legacy(path="search_price_log.json"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(LEGACY, f)
+
+
+def test_first_open_migrates_legacy_json():
+    write_legacy()
+    store = PriceStore("prices.db")
+    assert len(store) == 2
+    assert store.price_of("5028") == 0.25
+    assert store.get(1001)["last_update"] == 200
+    store.close()
+
+    # Lần mở sau không import lại (dữ liệu trong DB là nguồn chính)
+    with open("search_price_log.json", "w", encoding="utf-8") as f:
+        json.dump([{"idItem": "5028", "price": 99, "last_update": 1}], f)
+    reopened = PriceStore("prices.db")
+    assert reopened.price_of("5028") == 0.25
+    reopened.close()
+
+
+def test_upsert_updates_view_and_persists():
+    store = PriceStore("prices.db", legacy_json_path=None)
+    assert store.price_of("5028") == 0.0
+    store.upsert("5028", 0.2, name="Netherrealm Resonance", item_type="Hard Currency", last_update=10)
+    store.upsert(5028, 0.3, last_update=20)
+    entry = store.get("5028")
+    assert entry == {"idItem": "5028", "name": "Netherrealm Resonance", "price": 0.3,
+                     "last_update": 20, "type": "Hard Currency"}
+    store.close()
+
+    reopened = PriceStore("prices.db", legacy_json_path=None)
+    assert reopened.get("5028") == entry
+    assert len(reopened) == 1
+    reopened.close()
+
+
+def test_failed_write_leaves_view_unchanged():
+    store = PriceStore("prices.db", legacy_json_path=None)
+    store.upsert("5028", 0.2, last_update=10)
+    store.repository.close()
+    with pytest.raises(Exception):
+        store.upsert("5028", 0.9, last_update=11)
+    assert store.price_of("5028") == 0.2
+
+
+def test_consumers_share_the_process_store():
+    write_legacy()
+    assert get_item_info("5028")["price"] == 0.25
+    prefix = "[2025.11.08-16.59.48:014][  1]GameLog: Display: [Game] "
+    text = "\n".join([
+        f"{prefix}----Socket RecvMessage STT----XchgSearchPrice----SynId = 7",
+        prefix,
+        "+errCode",
+        "+prices+1+unitPrices+1 [0.5]",
+        "|      | |          +2 [0.7]",
+        "|      | +currency [100300]",
+        f"{prefix}----Socket RecvMessage End----",
+        "XchgSearchPrice----SynId = 7 +refer [5028]",
+    ])
+    get_price_info(text)
+    assert get_price_store() is price_store_module.get_price_store()
+    assert get_item_info("5028")["price"] == get_price_store().price_of("5028") == 0.6
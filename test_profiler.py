@@ -0,0 +1,137 @@
+"""
+Tests cho core.profiler
+
+Mục đích:
+    Kiểm tra profiling bật / tắt lúc chạy: modes từ env / flag, section no-op khi tắt,
+    cProfile ghi .prof đọc được bằng pstats, sampling ghi collapsed stacks, tracemalloc
+    ghi diff ở mỗi lần vào / ra map, overhead có trong summary và headless --profile.
+
+Cách chạy:
+    python -m pytest test_profiler.py
+"""
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from app import headless
+from core import profiler
+from core.log_parser import tokenize_log
+from core.profiler import Profiler, parse_modes
+from test_headless import LOG_TEXT
+
+
+@pytest.fixture(autouse=True)
+def work_dir(work_dir, monkeypatch):
+    monkeypatch.delenv(profiler.PROFILE_ENV, raising=False)
+    yield work_dir
+    profiler.stop_profiling()
+
+
+def hot_function():
+    return len(tokenize_log("GameLog: Display: [Game] ItemChange@ ProtoName=PickItems start\n" * 200))
+
+
+def test_parse_modes():
+    assert parse_modes(None) == parse_modes("") == parse_modes("off") == frozenset()
+    assert parse_modes("1") == parse_modes("on") == {"cpu", "memory"}
+    assert parse_modes("CPU+sample") == {"cpu", "sample"}
+    assert parse_modes("all") == {"cpu", "sample", "memory"}
+    assert parse_modes(["memory"]) == {"memory"}
+    with pytest.raises(ValueError):
+        parse_modes("cpu,gpu")
+
+
+def test_sections_are_no_ops_when_off():
+    assert profiler.get_profiler() is None
+    with profiler.profile_section("worker"):
+        hot_function()
+    profiler.map_boundary("exit_map")
+    assert profiler.stop_profiling() == {}
+    assert profiler.start_profiling("off") is None
+    assert not os.path.exists(profiler.PROFILES_DIR)
+
+
+def test_cpu_profile_of_worker_thread(tmp_path):
+    session = profiler.start_profiling("cpu", out_dir=str(tmp_path / "profiles"))
+
+    def worker():
+        for _ in range(3):
+            with profiler.profile_section("worker"):
+                # Section lồng nhau trên cùng thread chỉ được tính một lần
+                with profiler.profile_section("worker"):
+                    hot_function()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    summary = profiler.stop_profiling()
+    assert profiler.get_profiler() is None
+    assert summary["sections"]["worker"]["calls"] == 3
+    assert summary["overhead"]["cpu_slowdown"] > 0
+    prof_path = os.path.join(session.out_dir, f"{session.session}-worker.prof")
+    assert prof_path in summary["files"]
+    functions = {name for _, _, name in pstats.Stats(prof_path).stats}
+    assert "hot_function" in functions
+    with open(os.path.join(session.out_dir, f"{session.session}-summary.json"), encoding="utf-8") as f:
+        assert json.load(f)["modes"] == ["cpu"]
+
+
+def test_sampling_profile_only_samples_sections(tmp_path):
+    session = Profiler({"sample"}, out_dir=str(tmp_path), sample_interval=0.001)
+    session.start()
+    deadline = time.perf_counter() + 0.3
+    with session.section("worker"):
+        while time.perf_counter() < deadline:
+            hot_function()
+    summary = session.stop()
+    assert summary["samples"] > 0
+    assert 0 <= summary["overhead"]["sampler_cpu_fraction"] < 1
+    with open(os.path.join(str(tmp_path), f"{session.session}-samples.txt"), encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines and all(line.startswith("worker;") for line in lines)
+    assert any(":hot_function:" in line for line in lines)
+
+
+def test_memory_diffs_at_map_boundaries(tmp_path):
+    was_tracing = tracemalloc.is_tracing()
+    session = profiler.start_profiling("memory", out_dir=str(tmp_path))
+    retained = [bytearray(1000) for _ in range(200)]
+    profiler.map_boundary("exit_map")
+    summary = profiler.stop_profiling()
+    assert retained
+    assert summary["memory_snapshots"] == 2
+    assert summary["overhead"]["tracemalloc_bytes"] > 0
+    diff_path = os.path.join(str(tmp_path), f"{session.session}-mem-001-exit_map.txt")
+    with open(diff_path, encoding="utf-8") as f:
+        text = f.read()
+    assert "test_profiler.py" in text
+    assert os.path.join(str(tmp_path), f"{session.session}-mem-002-stop.txt") in summary["files"]
+    assert tracemalloc.is_tracing() == was_tracing
+
+
+def test_start_from_env(tmp_path, monkeypatch):
+    assert profiler.start_from_env({}) is None
+    assert profiler.start_from_env({profiler.PROFILE_ENV: "bogus"}) is None
+    session = profiler.start_from_env({profiler.PROFILE_ENV: "cpu"})
+    assert profiler.get_profiler() is session and session.modes == {"cpu"}
+
+
+def test_headless_profile_flag(tmp_path):
+    log_path = tmp_path / "UE_game.log"
+    log_path.write_text(LOG_TEXT, encoding="utf-8")
+    assert headless.main(["--log", str(log_path), "--profile", "cpu,memory"], out=io.StringIO()) == 0
+    names = os.listdir(tmp_path / "log" / "profiles")
+    assert any(name.endswith("-worker.prof") for name in names)
+    # LOG_TEXT có 3 lần vào map và 2 lần ra map
+    assert sum("-enter_map.txt" in name for name in names) == 3
+    assert sum("-exit_map.txt" in name for name in names) == 2
+    assert any(name.endswith("-summary.json") for name in names)
+    assert profiler.get_profiler() is None
+    with pytest.raises(SystemExit):
+        headless.main(["--log", str(log_path), "--profile", "gpu"], out=io.StringIO())
@@ -0,0 +1,114 @@
+"""
+Tests cho repositories.profit_ledger_file và services.profit_ledger
+
+Mục đích:
+    Kiểm tra ledger JSONL append-only: ghi O(1) (không đọc lại lịch sử), đọc theo trang
+    qua index, phục hồi sau crash (dòng ghi dở, index thiếu/mất), migrate một lần từ
+    profit_log.json và drop_handler ghi profit vào ledger khi ra map.
+
+Cách chạy:
+    python -m pytest test_profit_ledger.py
+"""
+import json
+import os
+
+from app import state
+from app.session_state import SessionState
+from core import drop_handler
+from repositories.profit_ledger_file import ProfitLedgerFile, OFFSET
+from services import profit_ledger
+from services.profit_ledger import ProfitLedger, close_profit_ledger, get_profit_ledger
+from services.log_scan_service import DropScanner
+from test_log_parser import ENTER_LINE, EXIT_LINE, drop_block
+
+
+def entry(index):
+    return {"map_count": index, "profit": index * 1.5, "datetime": f"2024-01-01 00:00:{index:02d}", "note": "Lò rèn"}
+
+
+def test_append_and_page_through_history():
+    ledger = ProfitLedger("ledger.jsonl", "ledger.idx", legacy_json_path=None)
+    for index in range(10):
+        assert ledger.record(entry(index)) == index
+    assert len(ledger) == 10
+    assert [e["map_count"] for e in ledger.last(3)] == [7, 8, 9]
+    assert [e["map_count"] for e in ledger.page(1, page_size=4)] == [2, 3, 4, 5]
+    assert [e["map_count"] for e in ledger.page(2, page_size=4)] == [0, 1]
+    assert ledger.page(3, page_size=4) == []
+    assert [e["map_count"] for e in ledger.entries(8)] == [8, 9]
+    assert list(ledger.entries()) == [entry(index) for index in range(10)]
+
+    # Mở lại: đếm từ index, không đọc lại cả file
+    reopened = ProfitLedgerFile("ledger.jsonl", "ledger.idx")
+    assert len(reopened) == 10
+    assert reopened.read_range(4, 6) == [entry(4), entry(5)]
+    assert os.path.getsize("ledger.idx") == 10 * OFFSET.size
+
+
+def test_append_does_not_read_history(monkeypatch):
+    ledger = ProfitLedgerFile("ledger.jsonl")
+    ledger.append_many([entry(index) for index in range(1000)])
+    real_open = open
+    modes = []
+
+    def tracking_open(path, mode="r", *args, **kwargs):
+        modes.append(mode)
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    ledger.append(entry(1000))
+    assert modes == ["ab", "ab"]
+    assert ledger.read_range(1000, 1001) == [entry(1000)]
+
+
+def test_recovers_from_partial_line_and_missing_index():
+    ledger = ProfitLedgerFile("ledger.jsonl")
+    ledger.append_many([entry(index) for index in range(5)])
+    # Crash khi đang ghi dòng thứ 6 (chưa có index)
+    with open("ledger.jsonl", "ab") as f:
+        f.write(b'{"map_count":5,"pro')
+    recovered = ProfitLedgerFile("ledger.jsonl")
+    assert len(recovered) == 5
+    recovered.append(entry(5))
+    assert recovered.read_range(4, 6) == [entry(4), entry(5)]
+
+    # Crash sau khi ghi dòng nhưng trước khi ghi index, và index bị mất hẳn
+    with open("ledger.jsonl", "ab") as f:
+        f.write((json.dumps(entry(6)) + "\n").encode("utf-8"))
+    assert len(ProfitLedgerFile("ledger.jsonl")) == 7
+    os.remove("ledger.idx")
+    rebuilt = ProfitLedgerFile("ledger.jsonl")
+    assert len(rebuilt) == 7
+    assert list(rebuilt.iter_records(page_size=3)) == [entry(index) for index in range(7)]
+
+
+def test_migrates_legacy_profit_log_once():
+    os.makedirs("log")
+    legacy = [entry(index) for index in range(3)]
+    with open(os.path.join("log", "profit_log.json"), "w", encoding="utf-8") as f:
+        json.dump(legacy, f, indent=4)
+    ledger = get_profit_ledger()
+    assert len(ledger) == 3 and ledger.last(3) == legacy
+    ledger.record(entry(3))
+    close_profit_ledger()
+    # Lần mở sau: ledger đã có dữ liệu, không import lại
+    assert len(get_profit_ledger()) == 4
+    assert os.path.exists(os.path.join("log", "profit_log.json"))
+
+
+def test_exit_map_records_profit(monkeypatch):
+    monkeypatch.setattr(state, "bag_items", {"5028": {"name": "x", "num": 10}})
+    monkeypatch.setattr(state, "session", SessionState())
+    monkeypatch.setattr(state, "root", None)
+    monkeypatch.setattr(drop_handler, "previous_item_quantities", {})
+    monkeypatch.setattr(drop_handler, "drop_scanner", DropScanner())
+
+    for _ in range(2):
+        text = "\n".join([ENTER_LINE, drop_block(5028, 11, slot_id=1), EXIT_LINE])
+        drop_handler.deal_change(text)
+
+    ledger = profit_ledger.get_profit_ledger()
+    assert len(ledger) == 2
+    assert [e["map_count"] for e in ledger.last(2)] == [1, 2]
+    assert set(ledger.last(1)[0]) >= {"timestamp", "income", "cost", "profit", "duration_seconds"}
+    assert not os.path.exists(os.path.join("log", "profit_log.json"))
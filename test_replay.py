@@ -0,0 +1,148 @@
+"""
+Tests cho services.replay_service và app.replay
+
+Mục đích:
+    Kiểm tra replay log cũ: drops tính theo baseline túi đồ giống drop_handler, maps
+    (kể cả map ngầm định khi log bắt đầu giữa map, map chưa kết thúc), price observations
+    theo timestamp của log, định giá drops theo lịch sử giá của chính các log được replay
+    và output không phụ thuộc thứ tự các file.
+
+Cách chạy:
+    python -m pytest test_replay.py
+"""
+import io
+import json
+import os
+
+from app import replay as replay_command
+from repositories.price_history_file import PriceHistoryFile
+from services import log_scan_service
+from services.profit_ledger import ProfitLedger
+from services.replay_service import build_outputs, find_log_files, replay, replay_file
+from test_log_parser import ENTER_LINE, EXIT_LINE, PREFIX, drop_block, init_bag_line
+from test_price_search_scanner import PREFIX as SEARCH_PREFIX, inline_request, response
+
+
+LATER_PREFIX = PREFIX.replace("16.59.48", "17.09.48")
+
+
+def later(text):
+    """Cùng các dòng nhưng muộn hơn 10 phút"""
+    return text.replace(PREFIX, LATER_PREFIX)
+
+
+LOG_TEXT = "\n".join([
+    init_bag_line(5028, 10, 0),
+    init_bag_line(5028, 5, 1),
+    ENTER_LINE,
+    response(1, ["2.0", "2.0"]).replace(SEARCH_PREFIX, PREFIX),
+    inline_request(1, 5028),
+    drop_block(5028, 18),
+    drop_block(100300, 40, slot_id=2),
+    # Số lượng giảm (bán / dùng): không phải drop
+    drop_block(5028, 12),
+    later(EXIT_LINE),
+    later(ENTER_LINE),
+    later(drop_block(5028, 13)),
+]) + "\n"
+
+
+def write_log(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def open_ledger(out_dir):
+    return ProfitLedger(os.path.join(out_dir, "profit_ledger.jsonl"), os.path.join(out_dir, "profit_ledger.idx"),
+                        legacy_json_path=None)
+
+
+def test_replay_file_maps_drops_and_prices(tmp_path):
+    result = replay_file(write_log(tmp_path / "UE_game.log", LOG_TEXT), strategy="mean", block_size=64)
+    start = 1762621188.014
+    assert result.bytes == len(LOG_TEXT.encode("utf-8"))
+    # Baseline 15 (2 slots): nhặt 3, rồi 12 -> 13 ở map sau
+    assert result.drops == {"5028": 4, "100300": 40}
+    first, second = result.maps
+    assert (first["start"], first["end"], first["complete"]) == (start, start + 600, True)
+    assert [drop[1:] for drop in first["drops"]] == [("5028", 3), ("100300", 40)]
+    assert (second["complete"], second["drops"]) == (False, [(start + 600, "5028", 1)])
+    [(timestamp, item_id, summary)] = result.observations
+    assert (timestamp, item_id, summary["price"], summary["depth"]) == (start, "5028", 2.0, 2)
+
+
+def test_replay_file_analyzes_price_ladders_in_one_batch(tmp_path, monkeypatch):
+    batches = []
+    original = log_scan_service.analyze_ladders
+
+    def analyze_ladders(ladders, strategy):
+        batches.append(len(ladders))
+        return original(ladders, strategy)
+
+    monkeypatch.setattr(log_scan_service, "analyze_ladders", analyze_ladders)
+    monkeypatch.setattr(log_scan_service, "analyze_ladder", None)
+    searches = [response(syn_id, [str(syn_id), str(syn_id + 1)]).replace(SEARCH_PREFIX, PREFIX) + "\n"
+                + inline_request(syn_id, 5028) for syn_id in range(1, 41)]
+    text = "\n".join([ENTER_LINE] + searches) + "\n"
+    result = replay_file(write_log(tmp_path / "UE_game.log", text), strategy="mean", block_size=256)
+    assert batches == [40]
+    assert [summary["price"] for _, _, summary in result.observations] == [syn_id + 0.5 for syn_id in range(1, 41)]
+
+
+def test_drops_before_scene_change_open_implicit_map(tmp_path):
+    text = "\n".join([drop_block(5028, 3), later(EXIT_LINE)])
+    result = replay_file(write_log(tmp_path / "UE_game.log", text), strategy="mean")
+    [game_map] = result.maps
+    assert game_map["complete"] and game_map["end"] - game_map["start"] == 600
+
+
+def test_build_outputs_values_drops_and_is_order_independent(tmp_path):
+    first = write_log(tmp_path / "logs" / "a" / "UE_game.log", LOG_TEXT)
+    second = write_log(tmp_path / "logs" / "UE_game-backup.log", later(later(LOG_TEXT)))
+    (tmp_path / "logs" / "notes.txt").write_text("not a log")
+    assert find_log_files([str(tmp_path / "logs")]) == sorted([first, second])
+    results = [replay_file(path, strategy="mean") for path in (first, second)]
+
+    summary = build_outputs(results, "out_a", cost=1, tax=False)
+    build_outputs(results[::-1], "out_b", cost=1, tax=False)
+    for name in ("profit_ledger.jsonl", "profit_ledger.idx", "price_history.bin", "drops.json"):
+        with open(os.path.join("out_a", name), "rb") as a, open(os.path.join("out_b", name), "rb") as b:
+            assert a.read() == b.read(), name
+
+    entries = list(open_ledger("out_a").entries())
+    # 3 x 2.0 + 40 Fe - cost 1; map chưa kết thúc không có trong ledger
+    assert [(entry["map_count"], entry["income"], entry["source"]) for entry in entries] == [
+        (1, 45.0, "UE_game.log"), (2, 45.0, "UE_game-backup.log")]
+    assert entries[0]["drops"] == {"5028": 3, "100300": 40} and entries[0]["duration_formatted"] == "10m0s"
+    assert (summary["maps"], summary["incomplete_maps"], summary["observations"]) == (2, 2, 2)
+    assert len(PriceHistoryFile(os.path.join("out_a", "price_history.bin")).read_all()) == 2
+    with open(os.path.join("out_a", "drops.json"), encoding="utf-8") as f:
+        assert json.load(f)["drops"]["5028"]["quantity"] == 8
+
+    # Replay lại ghi đè output cũ thay vì ghi thêm
+    build_outputs(results, "out_a", cost=1, tax=False)
+    assert len(open_ledger("out_a")) == 2
+
+
+def test_parallel_replay_matches_serial_byte_for_byte(tmp_path):
+    for index in range(4):
+        text = LOG_TEXT
+        for _ in range(index):
+            text = later(later(text))
+        write_log(tmp_path / "logs" / f"UE_game-{index}.log", text)
+    serial = replay([str(tmp_path / "logs")], "out_serial", cost=1, strategy="mean", workers=1)
+    parallel = replay([str(tmp_path / "logs")], "out_parallel", cost=1, strategy="mean", workers=3)
+    assert (serial["workers"], parallel["workers"], parallel["maps"]) == (1, 3, 4)
+    for name in ("profit_ledger.jsonl", "profit_ledger.idx", "price_history.bin", "drops.json"):
+        with open(os.path.join("out_serial", name), "rb") as a, open(os.path.join("out_parallel", name), "rb") as b:
+            assert a.read() == b.read(), name
+
+
+def test_replay_command_reports_throughput(tmp_path):
+    write_log(tmp_path / "logs" / "UE_game.log", LOG_TEXT)
+    out = io.StringIO()
+    assert replay_command.main([str(tmp_path / "logs"), "--out", "replay_out", "--cost", "0"], out=out) == 0
+    assert "MB/s" in out.getvalue() and "1 file(s)" in out.getvalue()
+    assert os.path.exists(os.path.join("replay_out", "profit_ledger.jsonl"))
+    assert replay_command.main([str(tmp_path / "missing")], out=io.StringIO()) == 1
@@ -0,0 +1,90 @@
+"""
+Tests cho app.session_state
+
+Mục đích:
+    Kiểm tra SessionState: snapshot không copy drop lists và không đổi khi có drops mới
+    (copy-on-write), vào/ra map cập nhật statistics như drop_handler cũ, export/restore
+    cho checkpoint và reader thread luôn thấy trạng thái nhất quán khi writer đang ghi.
+
+Cách chạy:
+    python -m pytest test_session_state.py
+"""
+import threading
+
+import pytest
+
+from app.session_state import SessionState
+
+
+def test_snapshot_is_copy_on_write():
+    session = SessionState()
+    session.add_drop(5028, 3, value=1.5)
+    first = session.snapshot()
+    second = session.snapshot()
+    # Không có ghi giữa 2 snapshot: dùng chung dict, chưa copy lần nào
+    assert session.copies == 0
+    session.add_drop(5028, 2, value=1.0)
+    session.add_drop(100300, 5, value=5)
+    # Chỉ copy một lần cho cả đợt drops sau snapshot
+    assert session.copies == 1
+    assert first.drop_list == second.drop_list == {5028: 3} and first.income == 1.5
+    latest = session.snapshot()
+    assert latest.drop_list == {5028: 5, 100300: 5} and latest.income == 7.5
+    with pytest.raises(TypeError):
+        latest.drop_list[1] = 1
+
+
+def test_enter_and_exit_map_update_statistics():
+    session = SessionState()
+    session.enter_map(cost=10, now=100.0)
+    session.add_drop(5028, 4, value=30)
+    before_exit = session.snapshot()
+    finished = session.exit_map(now=160.0)
+    assert finished == before_exit
+    snapshot = session.snapshot()
+    assert (snapshot.is_in_map, snapshot.map_count, snapshot.total_time) == (False, 1, 60.0)
+    assert (snapshot.income, snapshot.income_all, snapshot.profit) == (20, 20, 20)
+
+    # Map mới: drops/income của map reset, drops tổng giữ lại (snapshot cũ không đổi)
+    session.enter_map(cost=5, now=200.0)
+    snapshot = session.snapshot()
+    assert snapshot.drop_list == {} and snapshot.drop_list_all == {5028: 4}
+    assert (snapshot.income, snapshot.income_all, snapshot.map_count) == (-5, 15, 2)
+    assert finished.drop_list == {5028: 4}
+    assert snapshot.map_elapsed(now=230.0) == 30.0
+
+
+def test_export_restore_round_trip():
+    session = SessionState()
+    session.enter_map(cost=2, now=100.0)
+    session.add_drop(5028, 3, value=6)
+    data = session.export(now=130.0)
+    assert data["drop_list"] == {"5028": 3} and data["map_elapsed"] == 30.0
+
+    restored = SessionState()
+    restored.restore(data, now=1000.0)
+    snapshot = restored.snapshot()
+    assert snapshot.drop_list == {5028: 3} and snapshot.income == 4 and snapshot.map_count == 1
+    # Thời gian app tắt không tính vào map đang chạy
+    assert snapshot.map_elapsed(now=1000.0) == 30.0
+
+
+def test_reader_never_sees_partial_update():
+    session = SessionState()
+    stop = threading.Event()
+
+    def writer():
+        for index in range(20000):
+            session.add_drop(index % 50, 1, value=1)
+        stop.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    snapshots = 0
+    while not stop.is_set() or snapshots == 0:
+        snapshot = session.snapshot()
+        # value = quantity: income luôn bằng tổng drops trong cùng snapshot
+        assert sum(snapshot.drop_list_all.values()) == snapshot.income_all == snapshot.income
+        snapshots += 1
+    thread.join()
+    assert session.snapshot().income_all == 20000
@@ -0,0 +1,134 @@
+"""
+Tests cho structured log parser trong core.log_parser
+
+Mục đích:
+    Kiểm tra convert_from_log_structure() viết lại cho cùng kết quả với bản cũ
+    (benchmarks.bench_structured_log.legacy_convert) trên +DropItems blocks sinh ra và trên
+    các dòng ngẫu nhiên (pipes trong value, thiếu ']', key rỗng, CRLF...), và
+    extract_drop_items() / picked_drop_items() cho cùng items với cách duyệt cũ của deal_drop().
+
+Cách chạy:
+    python -m pytest test_structured_log.py
+"""
+import random
+
+import pytest
+
+from app import state
+from benchmarks.bench_structured_log import generate_blocks, legacy_convert, legacy_picked_items
+from core import drop_handler
+from core.log_parser import (
+    DropItem,
+    convert_from_log_structure,
+    extract_drop_items,
+    iter_log_structure,
+    picked_drop_items,
+)
+
+
+SAMPLE_BLOCK = "\n".join([
+    "+DropItems+1+item+BaseId [5030]",
+    "|          +Num [27]",
+    "|          +Picked [false]",
+    "+DropItems+2+item+BaseId [100300]",
+    "|          +Num [3]",
+    "|          +Picked [True]",
+    "|          +SpecialInfo+BaseId [100200]",
+    "|          |           +Num [ 12 ]",
+    "+DropItems+2+Pos+X [-1308]",
+    "|                  +Y [-4708]",
+    "+DropItems+3+Picked [true]",
+    "+DropItems+3+item",
+    "|          +BaseId [430000]",
+    "",
+    "[2025.11.08-16.59.48:014][  0]GameLog: Display: [Game] ----Socket RecvMessage End----",
+])
+
+# Mảnh ghép cho các dòng ngẫu nhiên: pipes, keys, value lạ, ngoặc thiếu / thừa
+FUZZ_PREFIXES = ["", "|", "| ", "|      | ", "||", "  ", "\t|", "|  |  |  "]
+FUZZ_KEYS = ["+a", "+b", "+a+b", "+item", "+item+Num", "+Picked", "+SpecialInfo", "+", "++c", " +d ", "+x y"]
+FUZZ_VALUES = ["", " [1]", " [-7]", " [true]", " [FALSE]", " [ 3 ]", " [x|y]", " [a]b]", " [", " ]", " [[2]]",
+               " [1] tail", "[²]", " [+5]", " [1_0]", "\r", " [0]\r", " [٣]"]
+
+
+@pytest.fixture
+def session():
+    """state.session mới của test (conftest.work_dir)"""
+    return state.session
+
+
+def fuzz_text(rng, lines):
+    return "\n".join(rng.choice(FUZZ_PREFIXES) + rng.choice(FUZZ_KEYS) + rng.choice(FUZZ_VALUES)
+                     for _ in range(lines))
+
+
+def outcome(function, text):
+    """Kết quả hoặc loại exception (bản cũ raise TypeError khi gán key vào value không phải dict)"""
+    try:
+        return function(text)
+    except TypeError:
+        return TypeError
+
+
+def test_sample_block():
+    tree = convert_from_log_structure(SAMPLE_BLOCK)
+    assert tree == legacy_convert(SAMPLE_BLOCK)
+    assert tree["DropItems"]["2"]["item"]["SpecialInfo"] == {"BaseId": 100200, "Num": 12}
+    assert tree["DropItems"]["2"]["Pos"] == {"X": -1308, "Y": -4708}
+    expected = [DropItem(100200, 12), DropItem(430000, 0)]
+    assert picked_drop_items(tree) == extract_drop_items(SAMPLE_BLOCK) == expected
+    assert legacy_picked_items(legacy_convert(SAMPLE_BLOCK)) == expected
+
+
+def test_iter_log_structure_yields_flat_pairs():
+    pairs = list(iter_log_structure(SAMPLE_BLOCK))
+    assert pairs[:3] == [
+        (("DropItems", "1", "item", "BaseId"), 5030),
+        (("DropItems", "1", "item", "Num"), 27),
+        (("DropItems", "1", "item", "Picked"), False),
+    ]
+    assert (("DropItems", "2", "item", "SpecialInfo", "Num"), 12) in pairs
+    assert (("DropItems", "3", "item", "BaseId"), 430000) in pairs
+
+
+def test_generated_blocks_match_legacy():
+    blocks = generate_blocks(0.5, 20, seed=3)
+    assert blocks
+    for block in blocks:
+        tree = convert_from_log_structure(block)
+        assert tree == legacy_convert(block)
+        expected = legacy_picked_items(legacy_convert(block))
+        assert picked_drop_items(tree) == extract_drop_items(block) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_lines_match_legacy(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        text = fuzz_text(rng, rng.randint(1, 12))
+        assert outcome(convert_from_log_structure, text) == outcome(legacy_convert, text), repr(text)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_drop_blocks_extract_like_tree_walk(seed):
+    rng = random.Random(seed)
+    lines = []
+    for index in range(1, 30):
+        node = f"+DropItems+{index}"
+        fields = [("item+BaseId", rng.choice(["100300", "5030", "x"])), ("item+Num", str(rng.randrange(-2, 9))),
+                  ("item+Picked", rng.choice(["true", "false"])), ("Picked", rng.choice(["true", "false", "0"])),
+                  ("item+SpecialInfo+BaseId", "430000"), ("item+SpecialInfo+Num", "4"), ("Pos+X", "1")]
+        for key, value in rng.sample(fields, rng.randint(1, len(fields))):
+            lines.append(f"{node}+{key} [{value}]")
+    text = "\n".join(lines)
+    expected = legacy_picked_items(legacy_convert(text))
+    assert picked_drop_items(convert_from_log_structure(text)) == expected
+    assert extract_drop_items(text) == expected
+
+
+def test_deal_drop_records_picked_items(session):
+    item_id_table = {"100200": "Primordial Fire Sand", "430000": "Some Item"}
+    drop_handler.deal_drop(convert_from_log_structure(SAMPLE_BLOCK), item_id_table, {"100200": 2.0})
+    snapshot = session.snapshot()
+    assert snapshot.drop_list_all == {100200: 12, 430000: 0}
+    assert snapshot.income_all == 24.0
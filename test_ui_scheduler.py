@@ -0,0 +1,127 @@
+"""
+Tests cho app.ui_scheduler
+
+Mục đích:
+    Kiểm tra UiScheduler gộp nhiều yêu cầu thành một frame (chỉ một callback đang chờ),
+    bỏ snapshot cũ nhưng giữ yêu cầu reshow, giới hạn FPS, snapshot bất biến và drop_handler
+    yêu cầu reshow qua scheduler thay vì root.after() trực tiếp.
+
+Cách chạy:
+    python -m pytest test_ui_scheduler.py
+"""
+import threading
+
+import pytest
+
+from app import state
+from app.session_state import SessionState
+from app import ui_scheduler
+from app.ui_scheduler import UiScheduler, take_ui_snapshot
+from core import drop_handler
+from services.log_scan_service import DropScanner
+from test_log_parser import ENTER_LINE, drop_block
+
+
+class FakeTk:
+    """Thay root.after(): giữ callbacks để test chạy 'main loop' thủ công"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.delays = []
+        self.frames = []
+
+    def after(self, ms, callback):
+        self.delays.append(ms)
+        self.callbacks.append(callback)
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def render_frame(self, snapshot):
+        self.frames.append(snapshot)
+
+
+@pytest.fixture(autouse=True)
+def work_dir(work_dir, monkeypatch):
+    monkeypatch.setattr(ui_scheduler, "_scheduler", None)
+    return work_dir
+
+
+def test_burst_is_merged_into_one_frame():
+    tk = FakeTk()
+    scheduler = UiScheduler(tk.after, tk.render_frame, max_fps=0)
+    scheduler.submit(take_ui_snapshot(reshow=True))
+    for _ in range(49):
+        scheduler.submit(take_ui_snapshot())
+    # Chỉ một callback đang chờ dù có 50 yêu cầu
+    assert len(tk.callbacks) == 1
+    tk.run_pending()
+    assert len(tk.frames) == 1
+    # Frame cuối giữ yêu cầu reshow của frame đầu bị bỏ
+    assert tk.frames[0].reshow
+    assert scheduler.stats() == {"frames_requested": 50, "frames_rendered": 1, "frames_skipped": 49}
+
+    scheduler.submit(take_ui_snapshot())
+    tk.run_pending()
+    assert len(tk.frames) == 2 and not tk.frames[1].reshow
+
+
+def test_max_fps_delays_next_frame():
+    tk = FakeTk()
+    scheduler = UiScheduler(tk.after, tk.render_frame, max_fps=10)
+    scheduler.submit(take_ui_snapshot())
+    assert tk.delays == [0]
+    tk.run_pending()
+    scheduler.submit(take_ui_snapshot())
+    # Frame tiếp theo cách frame trước ít nhất 1/10 giây
+    assert 50 < tk.delays[1] <= 100
+
+
+def test_failed_schedule_is_reported():
+    def closed_after(ms, callback):
+        raise RuntimeError("main thread is not in main loop")
+
+    scheduler = UiScheduler(closed_after, lambda snapshot: None)
+    assert not scheduler.submit(take_ui_snapshot())
+    assert not scheduler.submit(take_ui_snapshot())
+
+
+def test_snapshot_is_immutable_copy(monkeypatch):
+    session = SessionState()
+    session.restore({"drop_list": {"5028": 3}, "drop_list_all": {"5028": 10}, "income": 1.5,
+                     "total_time": 60.0, "is_in_map": True}, now=100.0)
+    monkeypatch.setattr(state, "session", session)
+    snapshot = take_ui_snapshot(now=130.0)
+    session.add_drop(5028, 1, value=0.5)
+    assert snapshot.drop_list == {5028: 3} and snapshot.income == 1.5
+    assert (snapshot.map_elapsed, snapshot.total_elapsed) == (30.0, 90.0)
+    with pytest.raises(TypeError):
+        snapshot.drop_list_all[1] = 1
+    with pytest.raises(AttributeError):
+        snapshot.income = 2
+
+
+def test_worker_threads_and_drop_handler_use_scheduler(monkeypatch):
+    tk = FakeTk()
+    scheduler = ui_scheduler.install_ui_scheduler(tk, max_fps=0)
+    monkeypatch.setattr(state, "bag_items", {"5028": {"name": "x", "num": 10}})
+    monkeypatch.setattr(state, "session", SessionState())
+    monkeypatch.setattr(state, "root", None)
+    monkeypatch.setattr(drop_handler, "previous_item_quantities", {})
+    monkeypatch.setattr(drop_handler, "drop_scanner", DropScanner())
+
+    text = "\n".join([ENTER_LINE] + [drop_block(5028, 10 + index, slot_id=index) for index in range(1, 6)])
+    worker = threading.Thread(target=drop_handler.deal_change, args=(text,))
+    worker.start()
+    worker.join()
+    for _ in range(10):
+        ui_scheduler.request_ui_refresh()
+
+    assert len(tk.callbacks) == 1
+    tk.run_pending()
+    assert len(tk.frames) == 1
+    frame = tk.frames[0]
+    assert frame.reshow and frame.drop_list == {5028: 5} and frame.map_count == 1
+    assert scheduler.frames_rendered == 1
@@ -4,9 +4,20 @@ UI Components Package
 
 This package contains UI components:
 - ui: Main application window and UI components
+- drop_list_view: View model của listbox Drops (cập nhật theo diff)
+- metrics_view: Format metrics của pipeline cho cửa sổ Metrics
+
+Note:
+    App được import lazy: ui.ui import app.config (Windows APIs), nên import eager ở đây
+    làm ui.drop_list_view không dùng được khi không có các dependencies đó (tests, benchmark).
 """
-# Chỉ import App, không import ui module để tránh circular import và duplicate
-from .ui import App
+import importlib
 
 __all__ = ['App']
 
+
+def __getattr__(name):
+    """Lazy import App khi được truy cập lần đầu"""
+    if name == 'App':
+        return importlib.import_module('.ui', __name__).App
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
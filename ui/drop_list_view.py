@@ -0,0 +1,173 @@
+"""
+Drop List View Model
+====================
+
+Mục đích:
+    Module này tính nội dung listbox Drops (status + tên + số lượng + giá trị) và chỉ
+    cập nhật những dòng thay đổi, thay vì xoá và insert lại toàn bộ listbox mỗi lần có drop.
+
+Tác dụng:
+    - Mỗi item id giữ một dòng (row identity): số lượng, giá, trạng thái giá (✔/◯/✘) và text
+    - diff() so sánh với lần render trước, chỉ dòng có số lượng / giá / độ mới
+      thay đổi mới bị xoá + insert lại; dòng không đổi không chạm tới Tk
+    - Các dòng sort theo tổng giá trị giảm dần; vị trí insert tìm bằng bisect nên
+      không cần sort lại cả list
+    - Khi phần lớn listbox thay đổi (đổi filter, Current Map <-> Total Drops, vào map mới)
+      thì render lại một lần bằng một lệnh insert thay vì từng dòng
+
+Class chính:
+    - DropListView: View model + áp dụng thay đổi vào Tk Listbox
+"""
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Trạng thái giá: ✔ < 3 phút (fresh), ◯ 3-15 phút (stale), ✘ > 15 phút (outdated)
+STATUS_SYMBOLS = ("✔", "◯", "✘")
+FRESH_SECONDS = 180
+STALE_SECONDS = 900
+TAX_RATE = 0.875
+# Item không bị tính tax (Flame Elementium, tiền tệ chính)
+TAX_EXEMPT_ID = "100300"
+
+
+def price_status(last_update: float, now: float) -> int:
+    """Index trong STATUS_SYMBOLS theo thời gian từ lần cập nhật giá cuối"""
+    time_passed = now - last_update
+    if time_passed < FRESH_SECONDS:
+        return 0
+    if time_passed < STALE_SECONDS:
+        return 1
+    return 2
+
+
+class DropListView:
+    """
+    Các dòng của listbox Drops, cập nhật theo diff
+
+    Example:
+        view = DropListView(header_rows=1)
+        view.render(listbox, snapshot.drop_list_all, visible_ids, catalog, price_store, tax=True)
+    """
+
+    def __init__(self, header_rows: int = 0):
+        # Số dòng cố định ở đầu listbox (dòng chú thích ✔/◯/✘)
+        self.header_rows = header_rows
+        self._rows = {}    # item_id -> (sort_key, state, text)
+        self._order = []   # sort_keys theo thứ tự hiển thị
+        # Thống kê cho benchmark / debug (full_renders: số lần render lại cả listbox)
+        self.rows_inserted = 0
+        self.rows_deleted = 0
+        self.full_renders = 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def texts(self) -> List[str]:
+        """Text của các dòng theo thứ tự hiển thị"""
+        return [self._rows[key[1]][2] for key in self._order]
+
+    def diff(self, drops: Dict, visible_ids, catalog, price_store, tax: bool = False,
+             now: Optional[float] = None) -> List[Tuple]:
+        """
+        Tính các thay đổi cần áp dụng để listbox hiển thị drops
+
+        Args:
+            drops: {item_id: quantity} (drop_list hoặc drop_list_all của UiSnapshot)
+            visible_ids: Các item id (str) thuộc filter hiện tại
+            catalog: ItemCatalog (name_of)
+            price_store: PriceStore (get)
+            tax: Áp dụng tax 12.5% (trừ TAX_EXEMPT_ID)
+            now: Thời điểm tính trạng thái giá (mặc định: bây giờ)
+
+        Returns:
+            List[Tuple]: Các lệnh theo thứ tự, index tính từ dòng dữ liệu đầu tiên:
+                ("delete", index), ("insert", index, text) hoặc ("reset", [texts])
+        """
+        now = time.time() if now is None else now
+        wanted = {}
+        for raw_id, quantity in drops.items():
+            item_id = str(raw_id)
+            if item_id not in visible_ids:
+                continue
+            price_data = price_store.get(item_id) or {}
+            item_price = price_data.get("price", 0)
+            if tax and item_id != TAX_EXEMPT_ID:
+                item_price = item_price * TAX_RATE
+            status = price_status(price_data.get("last_update", 0), now)
+            wanted[item_id] = (quantity, item_price, status)
+
+        changed = [item_id for item_id, row_state in wanted.items()
+                   if item_id not in self._rows or self._rows[item_id][1] != row_state]
+        removed = [item_id for item_id in self._rows if item_id not in wanted]
+        if not changed and not removed:
+            return []
+
+        # Phần lớn dòng thay đổi: render lại cả listbox một lần
+        if len(changed) + len(removed) > max(len(self._rows), len(wanted)) // 2:
+            self._rows = {}
+            self._order = []
+            for item_id, row_state in wanted.items():
+                self._store(item_id, row_state, catalog)
+            self.full_renders += 1
+            return [("reset", self.texts())]
+
+        operations = []
+        for item_id in removed:
+            operations.append(("delete", self._remove(item_id)))
+        for item_id in changed:
+            if item_id in self._rows:
+                operations.append(("delete", self._remove(item_id)))
+            index, text = self._store(item_id, wanted[item_id], catalog)
+            operations.append(("insert", index, text))
+        return operations
+
+    def _remove(self, item_id: str) -> int:
+        key = self._rows.pop(item_id)[0]
+        index = bisect_left(self._order, key)
+        del self._order[index]
+        return index
+
+    def _store(self, item_id: str, row_state: Tuple, catalog) -> Tuple[int, str]:
+        quantity, item_price, status = row_state
+        value = quantity * item_price
+        text = f"{STATUS_SYMBOLS[status]} {catalog.name_of(item_id)} x{quantity} [{value}]"
+        # Giá trị giảm dần, cùng giá trị thì theo item id để thứ tự ổn định
+        key = (-value, item_id)
+        self._rows[item_id] = (key, row_state, text)
+        insort(self._order, key)
+        return bisect_left(self._order, key), text
+
+    def apply(self, listbox, operations: Iterable[Tuple]):
+        """
+        Áp dụng các lệnh của diff() vào Tk Listbox
+
+        Args:
+            listbox: tkinter.Listbox (có header_rows dòng cố định ở đầu)
+            operations: Kết quả của diff()
+        """
+        for operation in operations:
+            if operation[0] == "reset":
+                listbox.delete(self.header_rows, "end")
+                if operation[1]:
+                    listbox.insert("end", *operation[1])
+                self.rows_inserted += len(operation[1])
+            elif operation[0] == "delete":
+                listbox.delete(self.header_rows + operation[1])
+                self.rows_deleted += 1
+            else:
+                listbox.insert(self.header_rows + operation[1], operation[2])
+                self.rows_inserted += 1
+
+    def render(self, listbox, drops: Dict, visible_ids, catalog, price_store, tax: bool = False,
+               now: Optional[float] = None) -> int:
+        """
+        diff() + apply()
+
+        Returns:
+            int: Số lệnh đã áp dụng vào listbox (0 nếu không có gì thay đổi)
+        """
+        operations = self.diff(drops, visible_ids, catalog, price_store, tax, now)
+        self.apply(listbox, operations)
+        return len(operations)
@@ -0,0 +1,75 @@
+"""
+Metrics View Model
+==================
+
+Mục đích:
+    Module này format snapshot của core.metrics (timers + counters của pipeline) thành
+    các dòng text cho cửa sổ Metrics (debug) của UI.
+
+Tác dụng:
+    - Mỗi timer một dòng: count, mean, p50, p90, p99, max (ms)
+    - Mỗi counter một dòng: tổng và tốc độ trung bình mỗi giây từ lúc app chạy
+    - Listbox chỉ được render lại khi nội dung thay đổi
+
+Class chính:
+    - MetricsView: Format + áp dụng vào Tk Listbox
+"""
+from typing import Dict, List
+
+
+# Chu kỳ refresh cửa sổ Metrics khi đang hiển thị (ms)
+METRICS_REFRESH_MS = 1000
+TIMER_COLUMNS = ("count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+NAME_WIDTH = 16
+
+
+def format_metrics(snapshot: Dict) -> List[str]:
+    """
+    Các dòng text của snapshot
+
+    Args:
+        snapshot: Kết quả core.metrics.get_metrics().snapshot()
+
+    Returns:
+        List[str]: Bảng timers (ms), dòng trống, rồi counters
+    """
+    lines = [f"{'timer (ms)':<{NAME_WIDTH}}" + "".join(f"{column.replace('_ms', ''):>9}" for column in TIMER_COLUMNS)]
+    for name, stats in snapshot.get("timers", {}).items():
+        values = [f"{stats['count']:>9}"] + [f"{stats[column]:>9.3f}" for column in TIMER_COLUMNS[1:]]
+        lines.append(f"{name:<{NAME_WIDTH}}" + "".join(values))
+    lines.append("")
+    uptime = snapshot.get("uptime_seconds", 0)
+    for name, value in snapshot.get("counters", {}).items():
+        rate = f"{value / uptime:>12.1f}/s" if uptime > 0 else ""
+        lines.append(f"{name:<{NAME_WIDTH}}{value:>12}{rate}")
+    return lines
+
+
+class MetricsView:
+    """
+    Nội dung listbox của cửa sổ Metrics
+
+    Example:
+        view = MetricsView()
+        view.render(listbox, get_metrics().snapshot())
+    """
+
+    def __init__(self):
+        self._lines = []
+        self.renders = 0
+
+    def render(self, listbox, snapshot: Dict) -> bool:
+        """
+        Hiển thị snapshot trong listbox
+
+        Returns:
+            bool: False nếu nội dung không đổi (không chạm tới Tk)
+        """
+        lines = format_metrics(snapshot)
+        if lines == self._lines:
+            return False
+        listbox.delete(0, "end")
+        listbox.insert("end", *lines)
+        self._lines = lines
+        self.renders += 1
+        return True
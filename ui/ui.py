@@ -7,6 +7,7 @@ Mục đích:
     - Main window với thống kê cơ bản
     - Drops panel window
     - Settings panel window
+    - Metrics panel window (timers/counters của pipeline, mở từ Settings)
     - Tất cả các UI elements và event handlers
 
 Tác dụng:
@@ -18,7 +19,6 @@ Tác dụng:
 Class chính:
     - App: Main application window và UI components
 """
-import time
 import json
 import ctypes
 from tkinter import *
@@ -26,32 +26,47 @@ from tkinter.ttk import *
 from tkinter import ttk
 from app import state
 from app import config
+from services.item_catalog import get_item_catalog
+from services.price_store import get_price_store
+from app.ui_scheduler import take_ui_snapshot
+from core import metrics
+from core import profiler
+from core.logger import log_info
+from .drop_list_view import DropListView, STATUS_SYMBOLS
+from .metrics_view import MetricsView, METRICS_REFRESH_MS
+
+
+# Lựa chọn của combobox Profiling -> modes của core.profiler
+PROFILE_CHOICES = {
+    "Off": "",
+    "CPU": "cpu",
+    "Sampling": "sample",
+    "Memory": "memory",
+    "CPU + Memory": "cpu,memory",
+}
 
 
 class App(Tk):
     """Main application window with all UI components"""
     show_type = ["Compass","Hard Currency","Special Items","Memory Materials","Equipment Materials","Gameplay Tickets","Map Tickets","Cube Materials","Erosion Materials","Dream Materials","Tower Materials","BOSS Tickets","Memory Fluorescence","Divine Seal","Overlap Materials"]
     # Correct, Circle, Wrong
-    status = ["✔", "◯", "✘"]
+    status = list(STATUS_SYMBOLS)
     cost = 0
     
-    # Cache data để tránh đọc file nhiều lần
-    _id_table_cache = None
-    _id_table_cache_time = 0
-    _price_log_cache = None
-    _price_log_cache_time = 0
-    _cache_ttl = 5  # Cache 5 giây
+    # id_table.json và giá đọc từ item catalog / price store dùng chung (không đọc file khi render)
     
     def __init__(self):
         super().__init__()
         self.title("FurTorch v0.0.1a4")
         self.geometry()
 
-        ctypes.windll.shcore.SetProcessDpiAwareness(1)
-        # Call API to get current scale factor
-        ScaleFactor = ctypes.windll.shcore.GetScaleFactorForDevice(0)
-        # Set scale factor
-        self.tk.call('tk', 'scaling', ScaleFactor / 75)
+        # DPI scaling chỉ có trên Windows (ctypes.windll)
+        if hasattr(ctypes, "windll"):
+            ctypes.windll.shcore.SetProcessDpiAwareness(1)
+            # Call API to get current scale factor
+            ScaleFactor = ctypes.windll.shcore.GetScaleFactorForDevice(0)
+            # Set scale factor
+            self.tk.call('tk', 'scaling', ScaleFactor / 75)
         basic_frame = ttk.Frame(self)
         advanced_frame = ttk.Frame(self)
         basic_frame.pack(side="top", fill="both")
@@ -173,6 +188,8 @@ class App(Tk):
         self.inner_pannel_drop_listbox.pack(side=LEFT, fill=BOTH)
         self.inner_pannel_drop_scrollbar.config(command=self.inner_pannel_drop_listbox.yview)
         self.inner_pannel_drop_listbox.insert(END, f"{self.status[0]} <3min {self.status[1]} <15min {self.status[2]} >15min")
+        # View model của các dòng drops (sau dòng header)
+        self.drop_list_view = DropListView(header_rows=1)
         # Set row height
         self.inner_pannel_drop_listbox.config(font=("Consolas", 12))
         # Set width
@@ -213,12 +230,35 @@ class App(Tk):
         self.scale_setting_2 = ttk.Scale(self.inner_pannel_settings, from_=0.1, to=1.0, orient=HORIZONTAL)
         self.scale_setting_2.grid(row=1, column=1, padx=5, pady=5)
         self.scale_setting_2.config(command=self.change_opacity)
+        # Metrics (debug): timers / counters của pipeline
+        self.button_setting_metrics = ttk.Button(self.inner_pannel_settings, text="Metrics", width=7)
+        self.button_setting_metrics.grid(row=3, column=1, padx=5, pady=5, sticky="e")
+        self.button_setting_metrics.config(command=self.show_metrics, cursor="hand2")
+        # Profiling (core.profiler): bật / tắt lúc đang chạy, output trong log/profiles/
+        self.label_setting_profile = ttk.Label(self.inner_pannel_settings, text="Profiling:")
+        self.label_setting_profile.grid(row=4, column=0, padx=5, pady=5)
+        self.chose_profile = ttk.Combobox(self.inner_pannel_settings, values=list(PROFILE_CHOICES), state="readonly")
+        self.chose_profile.current(self._profile_choice_index())
+        self.chose_profile.grid(row=4, column=1, padx=5, pady=5)
+        self.chose_profile.bind("<<ComboboxSelected>>", lambda event: self.change_profiling(self.chose_profile.get()))
         print(config_data)
         self.entry_setting_1.insert(0, str(config_data["cost_per_map"]))
         self.entry_setting_1.bind("<Return>", lambda event: self.change_cost(self.entry_setting_1.get()))
         self.scale_setting_2.set(config_data["opacity"])
         self.change_opacity(config_data["opacity"])
         self.change_cost(config_data["cost_per_map"])
+        # Metrics page
+        self.inner_pannel_metrics = Toplevel(self)
+        self.inner_pannel_metrics.title("Metrics")
+        self.inner_pannel_metrics.attributes('-toolwindow', True)
+        self.inner_pannel_metrics.geometry('+300+200')
+        self.inner_pannel_metrics.withdraw()
+        self.inner_pannel_metrics_listbox = Listbox(self.inner_pannel_metrics, width=72, height=24)
+        self.inner_pannel_metrics_listbox.config(font=("Consolas", 10))
+        self.inner_pannel_metrics_listbox.pack(side=LEFT, fill=BOTH, expand=True)
+        self.inner_pannel_metrics.protocol("WM_DELETE_WINDOW", self.close_metrics)
+        self.metrics_view = MetricsView()
+        self.inner_pannel_metrics.attributes('-topmost', True)
         # Đảm bảo cả 2 windows đều bị ẩn khi khởi động (đã withdraw ở trên, nhưng gọi lại để chắc chắn)
         self.inner_pannel_drop.withdraw()
         self.inner_pannel_settings.withdraw()
@@ -286,6 +326,38 @@ class App(Tk):
         else:
             this.withdraw()
 
+    def _profile_choice_index(self):
+        """Index trong PROFILE_CHOICES của phiên profiling đang chạy (TLI_PROFILE / --profile)"""
+        running = profiler.get_profiler()
+        modes = running.modes if running is not None else frozenset()
+        for index, value in enumerate(PROFILE_CHOICES.values()):
+            if profiler.parse_modes(value) == modes:
+                return index
+        return 0
+
+    def change_profiling(self, choice):
+        """Kết thúc phiên profiling hiện tại (ghi files) và bắt đầu phiên mới theo lựa chọn"""
+        session = profiler.start_profiling(PROFILE_CHOICES.get(choice, ""))
+        log_info(f"profiling: {choice}" + (f", output {session.out_dir}" if session is not None else ""))
+
+    def show_metrics(self):
+        this = self.inner_pannel_metrics
+        if this.state() == "withdrawn":
+            this.deiconify()
+            self.refresh_metrics()
+        else:
+            this.withdraw()
+
+    def close_metrics(self):
+        self.inner_pannel_metrics.withdraw()
+
+    def refresh_metrics(self):
+        """Cập nhật cửa sổ Metrics mỗi METRICS_REFRESH_MS khi đang hiển thị (dừng khi bị ẩn)"""
+        if self.inner_pannel_metrics.state() == "withdrawn":
+            return
+        self.metrics_view.render(self.inner_pannel_metrics_listbox, metrics.get_metrics().snapshot())
+        self.after(METRICS_REFRESH_MS, self.refresh_metrics)
+
     def change_opacity(self, value):
         with open("config.json", "r", encoding="utf-8") as f:
             config_data = f.read()
@@ -297,111 +369,80 @@ class App(Tk):
         self.inner_pannel_drop.attributes('-alpha', float(value))
         self.inner_pannel_settings.attributes('-alpha', float(value))
     
-    def reshow(self):
+    def render_frame(self, snapshot):
+        """
+        Render một frame của UiScheduler (Tk main thread)
+        
+        Chức năng:
+            - Update labels thời gian và tốc độ kiếm được khi đang trong map
+            - Gọi reshow() nếu frame có yêu cầu cập nhật drops list
+        
+        Args:
+            snapshot (UiSnapshot): Trạng thái bất biến do thread đọc log chụp
+        """
+        if snapshot.is_in_map:
+            m, s = divmod(int(snapshot.map_elapsed), 60)
+            self.label_current_time.config(text=f"Current: {m}m{s}s")
+            current_speed = round(snapshot.income / (snapshot.map_elapsed / 60), 2) if snapshot.map_elapsed > 0 else 0
+            self.label_current_speed.config(text=f"🔥 {current_speed} /min")
+            
+            total_m, total_s = divmod(int(snapshot.total_elapsed), 60)
+            self.label_total_time.config(text=f"Total: {total_m}m{total_s}s")
+            total_minutes = snapshot.total_elapsed / 60
+            total_speed = round(snapshot.income_all / total_minutes, 2) if total_minutes > 0 else 0
+            self.label_total_speed.config(text=f"🔥 {total_speed} /min")
+        if snapshot.reshow:
+            self.reshow(snapshot)
+    
+    def reshow(self, snapshot=None):
         """
         Rerender/Reload UI - Refresh drops list và các labels
         
         Chức năng:
-            - Load data từ id_table.json và search_price_log.json (với cache)
+            - Lấy name/type từ item catalog, price/last_update từ price store
             - Update labels: map_count, current_earn
-            - Xóa và render lại toàn bộ drops list trong listbox
+            - Cập nhật drops list trong listbox qua DropListView: chỉ các dòng thay đổi,
+              sort theo tổng giá trị giảm dần
             - Hiển thị items theo filter (show_type)
             - Tính toán status (✔/◯/✘) dựa trên last_update time
         
         Được gọi khi:
-            - Có drops mới (từ drop_handler.py)
+            - Có drops mới (frame của UiScheduler, từ drop_handler.py)
             - User thay đổi filter (show_all_type, show_tonghuo, ...)
             - User switch giữa Current Map và Total Drops
         
-        Note: Hàm này được schedule từ main thread qua root.after() để tránh blocking
-        """
-        # Load id_table.json với cache để tránh đọc file nhiều lần
-        now = time.time()
-        if (self._id_table_cache is None or 
-            now - self._id_table_cache_time > self._cache_ttl):
-            try:
-                with open("id_table.json", 'r', encoding="utf-8") as f:
-                    self._id_table_cache = json.load(f)
-                    self._id_table_cache_time = now
-            except Exception as e:
-                print(f'Error reading id_table.json: {e}')
-                if self._id_table_cache is None:
-                    self._id_table_cache = {}
-        
-        id_table = self._id_table_cache
-        
-        # Load search_price_log.json với cache để tránh đọc file nhiều lần
-        price_log_dict = {}
-        if (self._price_log_cache is None or 
-            now - self._price_log_cache_time > self._cache_ttl):
-            try:
-                with open("search_price_log.json", 'r', encoding="utf-8") as f:
-                    price_log = json.load(f)
-                self._price_log_cache = {}
-                for entry in price_log:
-                    item_id = entry.get("idItem")
-                    if item_id:
-                        self._price_log_cache[str(item_id)] = {
-                            "price": entry.get("price", 0),
-                            "last_update": entry.get("last_update", 0)
-                        }
-                self._price_log_cache_time = now
-            except Exception as e:
-                print(f'Error reading search_price_log.json: {e}')
-                if self._price_log_cache is None:
-                    self._price_log_cache = {}
+        Args:
+            snapshot (UiSnapshot): Trạng thái cần hiển thị (mặc định: chụp trạng thái hiện tại)
         
-        price_log_dict = self._price_log_cache
+        Note: Chỉ chạy trên Tk main thread (thread đọc log dùng request_ui_refresh())
+        """
+        with metrics.timer("ui_reshow"), profiler.profile_section("ui"):
+            self._reshow(snapshot)
+    
+    def _reshow(self, snapshot):
+        if snapshot is None:
+            snapshot = take_ui_snapshot(reshow=True)
+        # Item catalog dùng chung: chỉ đọc lại id_table.json khi file thay đổi
+        catalog = get_item_catalog()
+        # Index theo type: items hiển thị theo filter hiện tại (show_type)
+        visible_ids = catalog.ids_of_types(self.show_type)
+        # Price store: view trong RAM, cập nhật ngay khi có giá mới
+        price_store = get_price_store()
         
         # Update labels: map count, current earnings và profit
-        self.label_map_count.config(text=f"🎫 {state.map_count}")
+        self.label_map_count.config(text=f"🎫 {snapshot.map_count}")
         if state.show_all:
-            tmp = state.drop_list_all
-            self.label_current_earn.config(text=f"🔥 {round(state.income_all, 2)}")
-            self.label_current_profit.config(text=f"💰 {round(state.profit_all, 2)}")
+            tmp = snapshot.drop_list_all
+            self.label_current_earn.config(text=f"🔥 {round(snapshot.income_all, 2)}")
+            self.label_current_profit.config(text=f"💰 {round(snapshot.profit_all, 2)}")
         else:
-            tmp = state.drop_list
-            self.label_current_earn.config(text=f"🔥 {round(state.income, 2)}")
-            self.label_current_profit.config(text=f"💰 {round(state.profit, 2)}")
+            tmp = snapshot.drop_list
+            self.label_current_earn.config(text=f"🔥 {round(snapshot.income, 2)}")
+            self.label_current_profit.config(text=f"💰 {round(snapshot.profit, 2)}")
         
-        # Xóa toàn bộ items cũ trong listbox (giữ lại header ở index 0)
-        self.inner_pannel_drop_listbox.delete(1, END)
-        
-        # Render lại từng item trong drops list
-        for i in tmp.keys():
-            item_id = str(i)
-            
-            # Lấy name và type từ id_table.json
-            item_data = id_table.get(item_id, {})
-            item_name = item_data.get("name", f"Item {item_id}")
-            item_type = item_data.get("type", "Unknown")
-            
-            # Filter theo show_type (skip items không match filter)
-            if item_type not in self.show_type:
-                continue
-            
-            # Lấy price và last_update từ search_price_log.json
-            price_data = price_log_dict.get(item_id, {})
-            now = time.time()
-            last_time = price_data.get("last_update", 0)
-            time_passed = now - last_time
-            
-            # Tính status dựa trên thời gian update:
-            # ✔ = < 3 phút (fresh), ◯ = 3-15 phút (stale), ✘ = > 15 phút (outdated)
-            if time_passed < 180:
-                status = self.status[0]  # ✔
-            elif time_passed < 900:
-                status = self.status[1]  # ◯
-            else:
-                status = self.status[2]  # ✘
-            
-            # Tính giá (apply tax nếu có)
-            item_price = price_data.get("price", 0)
-            if config.config_data.get("tax", 0) == 1 and item_id != "100300":
-                item_price = item_price * 0.875  # Apply 12.5% tax
-            
-            # Insert item vào listbox: status + name + quantity + total value
-            self.inner_pannel_drop_listbox.insert(END, f"{status} {item_name} x{tmp[i]} [{tmp[i] * item_price}]")
+        # Chỉ cập nhật các dòng có số lượng / giá / trạng thái giá thay đổi (giữ header ở index 0)
+        tax = config.config_data.get("tax", 0) == 1
+        self.drop_list_view.render(self.inner_pannel_drop_listbox, tmp, visible_ids, catalog, price_store, tax=tax)
 
     def show_all_type(self):
         self.show_type = ["Compass","Hard Currency","Special Items","Memory Materials","Equipment Materials","Gameplay Tickets","Map Tickets","Cube Materials","Erosion Materials","Dream Materials","Tower Materials","BOSS Tickets","Memory Fluorescence","Divine Seal","Overlap Materials"]